@@ -4,14 +4,14 @@
 # This section contains all backend logic, routes, database functions, and business logic
 # ================================================================================================
 
-from flask import Flask, render_template_string, send_from_directory, request, jsonify, make_response, send_file
+from flask import Flask, render_template_string, send_from_directory, request, jsonify, make_response, send_file, Response, stream_with_context
 from flask_socketio import SocketIO, emit
 import os
 import sqlite3
 import json
 import time
 import random
-import math
+import hashlib
 from datetime import datetime, timedelta
 import requests
 import yfinance as yf
@@ -34,6 +34,7 @@ from logging.handlers import RotatingFileHandler
 from pydantic import BaseModel, Field, validator
 from typing import List, Optional
 import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # Setup Professional Logging
 if not os.path.exists('logs'):
@@ -85,7 +86,7 @@ class PortfolioAsset(BaseModel):
         return v
 
 class PortfolioRequest(BaseModel):
-    portfolio: List[PortfolioAsset] = Field(..., min_length=1, max_length=100)
+    portfolio: List[PortfolioAsset] = Field(..., min_length=1, max_length=1000)
     total_investment: Optional[float] = Field(None, gt=0, le=1000000000)
     risk_profile: Optional[str] = Field('moderate', pattern=r'^(conservative|moderate|aggressive)$')
 
@@ -102,6 +103,140 @@ class BlackLittermanRequest(BaseModel):
             raise ValueError('Invalid symbol format')
         return v
 
+class EfficientFrontierRequest(BaseModel):
+    symbols: List[str] = Field(..., min_items=2, max_items=1000)
+    points: int = Field(50, ge=2, le=200)
+    max_weight: float = Field(1.0, gt=0, le=1)
+    period: str = Field('1y', pattern=r'^(6mo|1y|2y|3y|5y)$')
+    n_factors: Optional[int] = Field(None, ge=1, le=50, description="PCA factor model instead of the sample covariance")
+
+    @validator('symbols', each_item=True)
+    def validate_symbols(cls, v):
+        v = v.upper().strip()
+        import re
+        if not re.match(r'^[A-Z0-9\.\-=^]+$', v):
+            raise ValueError('Invalid symbol format')
+        return v
+
+class CorrelationRequest(BaseModel):
+    symbols: List[str] = Field(..., min_items=2, max_items=1000)
+    window: int = Field(252, ge=20, le=2520, description="Trading days")
+    pairwise: bool = Field(True, description="Pairwise-complete observations for different histories")
+    cluster: bool = Field(False, description="Hierarchical cluster ordering for the heatmap")
+    min_periods: int = Field(20, ge=2, le=2520)
+
+    @validator('symbols', each_item=True)
+    def validate_symbols(cls, v):
+        v = v.upper().strip()
+        import re
+        if not re.match(r'^[A-Z0-9\.\-=^]+$', v):
+            raise ValueError('Invalid symbol format')
+        return v
+
+class BacktestRequest(BaseModel):
+    symbols: List[str] = Field(..., min_items=2, max_items=200)
+    strategies: Optional[List[str]] = Field(None, description="Subset of backtest.STRATEGIES, default all five")
+    period: str = Field('10y', pattern=r'^(2y|3y|5y|10y|max)$')
+    frequency: str = Field('monthly', pattern=r'^(weekly|monthly|quarterly|annual)$')
+    lookback: int = Field(252, ge=60, le=1260, description="Estimation window in trading days")
+    window: str = Field('rolling', pattern=r'^(rolling|expanding)$')
+    n_factors: Optional[int] = Field(None, ge=1, le=50)
+
+    @validator('symbols', each_item=True)
+    def validate_symbols(cls, v):
+        v = v.upper().strip()
+        import re
+        if not re.match(r'^[A-Z0-9\.\-=^]+$', v):
+            raise ValueError('Invalid symbol format')
+        return v
+
+class RiskBatchRequest(BaseModel):
+    portfolios: List[dict] = Field(..., min_items=1, max_items=5000,
+                                   description="[{'id': ..., 'weights': {symbol: weight}, 'value': optional}]")
+    levels: List[float] = Field([0.95, 0.99], min_items=1, max_items=5)
+    filtered: bool = Field(False, description="Filtered historical simulation (EWMA volatility rescaling)")
+    ewma_lambda: float = Field(0.94, gt=0.5, lt=1)
+    period: str = Field('2y', pattern=r'^(1y|2y|3y|5y|10y)$')
+
+    @validator('levels', each_item=True)
+    def validate_levels(cls, v):
+        if not 0.5 <= v < 1:
+            raise ValueError('Confidence levels must be in [0.5, 1)')
+        return v
+
+    @validator('portfolios', each_item=True)
+    def validate_portfolio(cls, v):
+        weights = v.get('weights')
+        if not isinstance(weights, dict) or not weights:
+            raise ValueError('Each portfolio needs a non-empty weights mapping')
+        return v
+
+class EvaluatePortfoliosRequest(BaseModel):
+    symbols: List[str] = Field(..., min_items=1, max_items=500)
+    weights: List[List[float]] = Field(..., min_items=1, max_items=1000, description="One row of weights per candidate portfolio")
+    names: Optional[List[str]] = Field(None, description="Optional label per row")
+    benchmark: Optional[str] = Field(None, description="Benchmark symbol, e.g. ^SSMI")
+    benchmark_weights: Optional[List[float]] = Field(None, description="Benchmark as weights over symbols")
+    normalize: bool = Field(True, description="Scale each row to a sum of 1")
+    period: str = Field('1y', pattern=r'^(6mo|1y|2y|3y|5y)$')
+    n_factors: Optional[int] = Field(None, ge=1, le=50)
+
+    @validator('symbols', each_item=True)
+    def validate_symbols(cls, v):
+        v = v.upper().strip()
+        import re
+        if not re.match(r'^[A-Z0-9\.\-=^]+$', v):
+            raise ValueError('Invalid symbol format')
+        return v
+
+    @validator('benchmark')
+    def validate_benchmark(cls, v):
+        if v is None:
+            return v
+        v = v.upper().strip()
+        import re
+        if not re.match(r'^[A-Z0-9\.\-=^]+$', v):
+            raise ValueError('Invalid benchmark symbol')
+        return v
+
+    @validator('weights')
+    def validate_weights(cls, v, values):
+        n = len(values.get('symbols') or [])
+        if any(len(row) != n for row in v):
+            raise ValueError(f'Every weight row needs {n} entries (one per symbol)')
+        return v
+
+class StressTestRequest(BaseModel):
+    holdings: dict = Field(..., description="{symbol: value in CHF} or weights")
+    scenarios: Optional[List[str]] = Field(None, description="Subset of stress_engine.SCENARIOS, default all")
+    proxies: Optional[dict] = Field(None, description="{symbol: proxy symbol} before the automatic mapping")
+    currencies: Optional[dict] = Field(None, description="{symbol: currency} if not derivable from the suffix")
+
+    @validator('holdings')
+    def validate_holdings(cls, v):
+        import re
+        if not v or len(v) > 1000:
+            raise ValueError('Holdings must contain 1 to 1000 symbols')
+        holdings = {}
+        for symbol, value in v.items():
+            symbol = symbol.upper().strip()
+            if not re.match(r'^[A-Z0-9\.\-=^]+$', symbol):
+                raise ValueError('Invalid symbol format')
+            holdings[symbol] = float(value)
+        return holdings
+
+class StressLibraryRequest(BaseModel):
+    symbols: List[str] = Field(..., min_items=1, max_items=200)
+    force: bool = Field(False, description="Reload windows that are already stored")
+
+    @validator('symbols', each_item=True)
+    def validate_symbols(cls, v):
+        v = v.upper().strip()
+        import re
+        if not re.match(r'^[A-Z0-9\.\-=^]+$', v):
+            raise ValueError('Invalid symbol format')
+        return v
+
 class MonteCarloRequest(BaseModel):
     initial_value: float = Field(..., gt=0, le=1000000000)
     expected_return: float = Field(..., ge=-1, le=2)
@@ -111,8 +246,18 @@ class MonteCarloRequest(BaseModel):
 
 # Simple in-memory cache implementation
 class SimpleCache:
-    def __init__(self):
+    # Nur JSON-Payloads der Endpunkte gehen in den L2; DataFrames & Co. bleiben im Speicher,
+    # da ein JSON-Roundtrip ihre Typen ändern würde
+    L2_PREFIXES = ('live_price_', 'hist_', 'market_overview', 'market_news', 'top_movers', 'perf_refreshed_')
+
+    def __init__(self, l2=None):
         self._cache = {}
+        self.l2 = l2  # Optional durable store (market_data_cache)
+        # Ein Writer-Thread: SQLite-Schreibzugriffe blockieren den Request nicht
+        self._l2_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='l2_cache')
+    
+    def _durable(self, key):
+        return self.l2 is not None and key.startswith(self.L2_PREFIXES)
     
     def get(self, key):
         if key in self._cache:
@@ -121,10 +266,18 @@ class SimpleCache:
                 return data
             else:
                 del self._cache[key]
+        if self._durable(key):
+            entry = self.l2.get(key)
+            if entry is not None:
+                data, remaining_ttl = entry
+                self._cache[key] = (data, time.time(), remaining_ttl)
+                return data
         return None
     
     def set(self, key, value, ttl=300):
         self._cache[key] = (value, time.time(), ttl)
+        if self._durable(key):
+            self._l2_writer.submit(self.l2.set, key, value, ttl)
     
     def touch(self, key):
         if key in self._cache:
@@ -330,6 +483,63 @@ def init_database():
 # Initialize database on startup
 init_database()
 
+# Durable persistence tier on top of swiss_asset_manager.db
+try:
+    from persistent_store import MarketDataCacheStore, PerformanceMetricsStore
+    cache.l2 = MarketDataCacheStore('swiss_asset_manager.db')
+    performance_store = PerformanceMetricsStore('swiss_asset_manager.db')
+    PERSISTENT_STORE_AVAILABLE = True
+    logger.info("✅ market_data_cache als L2-Cache und performance_metrics-Snapshots aktiviert")
+except Exception as e:
+    PERSISTENT_STORE_AVAILABLE = False
+    logger.warning(f"⚠️ Persistente Speicherschicht nicht verfügbar: {e}")
+
+import strategy_analysis
+import portfolio_solvers
+import factor_model
+import black_litterman
+import backtest
+import nav_engine
+from portfolio_data_loader import portfolio_loader
+import risk_engine
+import stress_engine
+from covariance_service import covariance_service, correlation_from_covariance
+from correlation_service import correlation_service
+
+# Prozess-Pool für /api/strategy_optimization: per fork anlegen, solange noch keine Server-Threads laufen
+# (nur mit einem Webprozess; mit mehreren wird er beim ersten Aufruf angelegt)
+try:
+    import strategy_runner
+    if strategy_runner.PREWARM:
+        strategy_runner.runner.warm()
+    STRATEGY_RUNNER_AVAILABLE = True
+except ImportError as e:
+    STRATEGY_RUNNER_AVAILABLE = False
+    logger.warning(f"⚠️ Strategie-Runner nicht verfügbar: {e}")
+
+# Fundamentaldaten-Snapshots (täglich vom Scheduler aktualisiert)
+try:
+    from live_data.storage import get_fundamentals_store
+    fundamentals_store = get_fundamentals_store()
+    FUNDAMENTALS_STORE_AVAILABLE = True
+    logger.info("✅ Fundamentaldaten-Snapshots für Value/Buy&Hold/Carry aktiviert")
+except Exception as e:
+    FUNDAMENTALS_STORE_AVAILABLE = False
+    logger.warning(f"⚠️ Fundamentaldaten-Store nicht verfügbar: {e}")
+
+def get_fundamentals(symbols):
+    """Fundamentaldaten je Symbol aus dem Snapshot-Store (Fallback: Ticker.info)"""
+    if FUNDAMENTALS_STORE_AVAILABLE:
+        return fundamentals_store.get_many(symbols)
+    fundamentals = {}
+    for symbol in symbols:
+        try:
+            fundamentals[symbol] = yf.Ticker(symbol).info or {}
+        except Exception as e:
+            logger.warning(f"Ticker.info fehlgeschlagen für {symbol}: {e}")
+            fundamentals[symbol] = {}
+    return fundamentals
+
 @app.route('/static/<path:filename>')
 def serve_static(filename):
     return send_from_directory('static', filename)
@@ -841,6 +1051,16 @@ def get_currency_rates():
         logger.error(f"Error getting currency rates: {e}")
         return jsonify({"error": str(e)}), 500
 
+def _requested_factors(data):
+    """Optionales 'n_factors' (1-50) für das PCA-Faktormodell; None = Stichproben-Kovarianz"""
+    value = (data or {}).get('n_factors')
+    if value in (None, '', 0):
+        return None
+    n_factors = int(value)
+    if not 1 <= n_factors <= factor_model.MAX_FACTORS:
+        raise ValueError(f"n_factors must be between 1 and {factor_model.MAX_FACTORS}")
+    return n_factors
+
 @app.route('/api/optimize_portfolio', methods=['POST'])
 def optimize_portfolio():
     """Portfolio optimization using real calculations"""
@@ -857,14 +1077,18 @@ def optimize_portfolio():
         
         if len(symbols) < 2:
             return jsonify({"error": "At least 2 symbols required"}), 400
+        try:
+            n_factors = _requested_factors(data)
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": f"Validation error: {str(e)}"}), 400
             
         # Get portfolio metrics from real_calculations
         if portfolio and len(portfolio) >= 2:
-            metrics = real_calculator.calculate_portfolio_metrics(portfolio)
+            metrics = real_calculator.calculate_portfolio_metrics(portfolio, n_factors=n_factors)
         else:
             # Fallback: equal weights
             portfolio_data = [{'symbol': s, 'weight': 1.0/len(symbols)} for s in symbols]
-            metrics = real_calculator.calculate_portfolio_metrics(portfolio_data)
+            metrics = real_calculator.calculate_portfolio_metrics(portfolio_data, n_factors=n_factors)
         
         logger.info(f"Portfolio metrics calculated for {len(symbols)} symbols")
         return jsonify(metrics)
@@ -874,9 +1098,14 @@ def optimize_portfolio():
 
 @app.route('/api/strategy_optimization', methods=['POST'])
 def strategy_optimization():
-    """Calculate all optimization strategies"""
+    """
+    Calculate all optimization strategies concurrently on one shared returns panel.
+
+    Mit "stream": true wird jede Strategie als eigene NDJSON-Zeile gesendet,
+    sobald sie fertig ist; die letzte Zeile ({"done": true, ...}) schliesst ab.
+    """
     try:
-        if not REAL_CALCULATIONS_AVAILABLE:
+        if not REAL_CALCULATIONS_AVAILABLE or not STRATEGY_RUNNER_AVAILABLE:
             return jsonify({"error": "Real calculations not available"}), 503
             
         data = request.get_json()
@@ -886,137 +1115,270 @@ def strategy_optimization():
         symbols = data['symbols']
         if len(symbols) < 2:
             return jsonify({"error": "At least 2 symbols required"}), 400
+        try:
+            n_factors = _requested_factors(data)
+            deadline = float(data['deadline']) if data.get('deadline') is not None else None
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": f"Validation error: {str(e)}"}), 400
+        if deadline is not None and not 0 < deadline <= 120:
+            return jsonify({"error": "Validation error: deadline must be in (0, 120] seconds"}), 400
+        
+        # Renditepanel einmal laden; alle Strategien rechnen darauf
+        returns_df = _returns_panel(symbols)
+        hrp_linkage = data.get('hrp_linkage', 'single')
+        if hrp_linkage not in portfolio_solvers.HRP_LINKAGES:
+            return jsonify({"error": f"Validation error: hrp_linkage must be one of {', '.join(portfolio_solvers.HRP_LINKAGES)}"}), 400
+        options = {'n_factors': n_factors, 'risk_budgets': data.get('risk_budgets'), 'hrp_linkage': hrp_linkage}
+        covariance = {'model': 'pca', 'factors': n_factors} if n_factors else {'model': 'sample'}
+        events = strategy_runner.runner.run(symbols, returns_df, options, deadline=deadline)
+        
+        if data.get('stream'):
+            def generate():
+                completed = 0
+                for event in events:
+                    completed += event['status'] == 'ok'
+                    yield json.dumps(event) + '\n'
+                logger.info(f"Strategy optimization streamed: {completed} strategies calculated")
+                yield json.dumps({'done': True, 'symbols': symbols, 'covariance': covariance}) + '\n'
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        
+        results = {event['strategy']: event for event in events}
+        strategies = [results[key]['result'] for key in strategy_runner.STRATEGY_ORDER
+                      if key in results and results[key]['status'] == 'ok']
         
-        strategies = []
+        logger.info(f"Strategy optimization completed: {len(strategies)} strategies calculated")
+        return jsonify({'strategies': strategies, 'symbols': symbols, 'covariance': covariance,
+                        'timing': {key: event['duration'] for key, event in results.items()},
+                        'failed': {key: event['status'] for key, event in results.items() if event['status'] != 'ok'}})
+    except Exception as e:
+        logger.error(f"Error in strategy optimization: {e}")
+        return jsonify({"error": str(e)}), 500
+
+def _returns_panel(symbols, period='1y'):
+    """Renditepanel für die Optimierer, kurz im Cache geteilt"""
+    cache_key = f"returns_panel_{period}_{hashlib.sha1('_'.join(symbols).encode()).hexdigest()}"
+    panel = cache.get(cache_key)
+    if panel is None:
+        panel = real_calculator.returns_panel(symbols, period)
+        if not panel.empty:
+            cache.set(cache_key, panel, ttl=300)
+    return panel
+
+@app.route('/api/efficient_frontier', methods=['POST'])
+def efficient_frontier():
+    """Effizienzkurve: Renditepanel einmal laden, K warm gestartete Punkte"""
+    try:
+        if not REAL_CALCULATIONS_AVAILABLE:
+            return jsonify({"error": "Real calculations not available"}), 503
+        
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "Request data required"}), 400
         
-        # 1. Mean-Variance Optimization with moderate target return
         try:
-            # Calculate average expected return of all assets
-            avg_return = 0
-            for symbol in symbols:
-                exp_ret = real_calculator.calculate_real_expected_return(symbol, '1y')
-                if exp_ret:
-                    avg_return += exp_ret
-            avg_return = avg_return / len(symbols) if len(symbols) > 0 else 0.08
-            
-            # Use 80% of average return as target (balanced approach)
-            target_return = avg_return * 0.8
-            
-            mv_result = real_calculator.mean_variance_optimization(symbols, target_return=target_return)
-            if mv_result:
-                strategies.append({
-                    'name': 'Mean-Variance',
-                    'description': 'Optimales Rendite-Risiko-Verhältnis',
-                    'return': mv_result.get('expected_return', 0),  # Already in %
-                    'risk': mv_result.get('volatility', 0),          # Already in %
-                    'sharpe': mv_result.get('sharpe_ratio', 0),
-                    'weights': mv_result.get('weights', []),
-                    'recommendation': 'OPTIMAL' if mv_result.get('sharpe_ratio', 0) > 0.5 else 'BALANCIERT'
-                })
+            frontier_request = EfficientFrontierRequest(**data)
         except Exception as e:
-            logger.warning(f"Mean-Variance optimization failed: {e}")
+            return jsonify({"error": f"Validation error: {str(e)}"}), 400
+        
+        started = time.time()
+        panel = _returns_panel(frontier_request.symbols, frontier_request.period)
+        missing = [s for s in frontier_request.symbols if s not in panel.columns]
+        symbols = list(panel.columns)
+        if len(symbols) < 2:
+            return jsonify({"error": "At least 2 symbols with price history required", "missing": missing}), 400
+        if frontier_request.max_weight * len(symbols) < 1:
+            return jsonify({"error": f"max_weight {frontier_request.max_weight} too small for {len(symbols)} assets"}), 400
+        
+        mean_returns = real_calculator._mean_returns(panel, frontier_request.n_factors)
+        cov_matrix = real_calculator._covariance(panel, frontier_request.n_factors)
+        frontier = portfolio_solvers.efficient_frontier(
+            cov_matrix, mean_returns.values,
+            points=frontier_request.points, upper=frontier_request.max_weight
+        )
+        if not frontier['points']:
+            return jsonify({"error": "Efficient frontier could not be computed"}), 500
+        
+        risk_free_rate = real_calculator.risk_free_rate
+        points = []
+        for point in frontier['points']:
+            volatility = point['volatility']
+            points.append({
+                'return': point['return'] * 100,
+                'risk': volatility * 100,
+                'sharpe': (point['return'] - risk_free_rate) / volatility if volatility > 0 else 0,
+                'weights': {symbol: float(w) for symbol, w in zip(symbols, point['weights'])},
+                'converged': point['converged']
+            })
+        
+        logger.info(f"Efficient frontier: {len(points)} points for {len(symbols)} symbols in {frontier['time_ms']:.1f}ms")
+        return jsonify({
+            'symbols': symbols,
+            'missing': missing,
+            'points': points,
+            'maxSharpeIndex': int(np.argmax([p['sharpe'] for p in points])),
+            'observations': int(len(panel)),
+            'covariance': real_calculator._covariance_info(cov_matrix),
+            'solver': {'iterations': frontier['iterations'], 'time_ms': frontier['time_ms']},
+            'duration': round(time.time() - started, 3)
+        })
+    except Exception as e:
+        logger.error(f"Error in efficient frontier: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/evaluate_portfolios', methods=['POST'])
+def evaluate_portfolios():
+    """Rendite, Volatilität, Sharpe, Risikobeiträge und Tracking Error vieler Gewichtsvektoren (W μ, diag(W Σ Wᵀ))"""
+    try:
+        if not REAL_CALCULATIONS_AVAILABLE:
+            return jsonify({"error": "Real calculations not available"}), 503
+        
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "Request data required"}), 400
         
-        # 2. Risk Parity
         try:
-            rp_result = real_calculator.risk_parity_optimization(symbols)
-            if rp_result:
-                strategies.append({
-                    'name': 'Risk Parity',
-                    'description': 'Gleicher Risikobeitrag aller Assets',
-                    'return': rp_result.get('expected_return', 0),  # Already in %
-                    'risk': rp_result.get('volatility', 0),          # Already in %
-                    'sharpe': rp_result.get('sharpe_ratio', 0),
-                    'weights': rp_result.get('weights', []),
-                    'recommendation': 'BALANCIERT'
-                })
+            evaluate_request = EvaluatePortfoliosRequest(**data)
         except Exception as e:
-            logger.warning(f"Risk Parity optimization failed: {e}")
+            return jsonify({"error": f"Validation error: {str(e)}"}), 400
         
-        # 3. Minimum Variance
-        try:
-            minvar_result = real_calculator.minimum_variance_optimization(symbols)
-            if minvar_result:
-                strategies.append({
-                    'name': 'Min Variance',
-                    'description': 'Minimales Portfolio-Risiko',
-                    'return': minvar_result.get('expected_return', 0),  # Already in %
-                    'risk': minvar_result.get('volatility', 0),          # Already in %
-                    'sharpe': minvar_result.get('sharpe_ratio', 0),
-                    'weights': minvar_result.get('weights', []),
-                    'recommendation': 'KONSERVATIV'
+        symbols = list(evaluate_request.symbols)
+        if len(set(symbols)) != len(symbols):
+            return jsonify({"error": "Duplicate symbols"}), 400
+        if evaluate_request.benchmark_weights is not None and len(evaluate_request.benchmark_weights) != len(symbols):
+            return jsonify({"error": f"benchmark_weights needs {len(symbols)} entries"}), 400
+        names = evaluate_request.names or list(range(len(evaluate_request.weights)))
+        if len(names) != len(evaluate_request.weights):
+            return jsonify({"error": "names must match the number of weight rows"}), 400
+        
+        W = np.array(evaluate_request.weights, dtype=float)
+        if evaluate_request.normalize:
+            totals = W.sum(axis=1)
+            if np.any(np.abs(totals) < 1e-12):
+                return jsonify({"error": "Weight rows must not sum to zero"}), 400
+            W = W / totals[:, None]
+        
+        # Benchmark-Symbol als zusätzliche Spalte im Panel, in allen Kandidaten mit Gewicht 0
+        universe = symbols + ([evaluate_request.benchmark] if evaluate_request.benchmark and evaluate_request.benchmark not in symbols else [])
+        panel = _returns_panel(universe, evaluate_request.period)
+        missing = [s for s in universe if s not in panel.columns]
+        if evaluate_request.benchmark in missing:
+            return jsonify({"error": f"No price history for benchmark {evaluate_request.benchmark}"}), 400
+        known = [s for s in universe if s in panel.columns]
+        if not [s for s in symbols if s in panel.columns]:
+            return jsonify({"error": "No price history for the portfolio symbols", "missing": missing}), 400
+        
+        position = {s: i for i, s in enumerate(symbols)}
+        columns = [position[s] for s in known if s in position]
+        W_known = np.zeros((len(W), len(known)))
+        W_known[:, :len(columns)] = W[:, columns]     # Portfolio-Symbole stehen in known vor der Benchmark
+        gross = np.abs(W).sum(axis=1)
+        coverage = np.where(gross > 0, np.abs(W[:, columns]).sum(axis=1) / np.where(gross > 0, gross, 1.0), 0.0)
+        
+        benchmark = None
+        if evaluate_request.benchmark:
+            benchmark = np.zeros(len(known))
+            benchmark[known.index(evaluate_request.benchmark)] = 1.0
+        elif evaluate_request.benchmark_weights is not None:
+            b = np.array(evaluate_request.benchmark_weights, dtype=float)
+            if evaluate_request.normalize and abs(b.sum()) > 1e-12:
+                b = b / b.sum()
+            benchmark = np.zeros(len(known))
+            benchmark[:len(columns)] = b[columns]
+        
+        returns_df = panel[known]
+        mu = real_calculator._mean_returns(returns_df, evaluate_request.n_factors).values
+        cov = real_calculator._covariance(returns_df, evaluate_request.n_factors)
+        metrics = portfolio_solvers.evaluate_portfolios(cov, mu, W_known, real_calculator.risk_free_rate, benchmark)
+        
+        held = known[:len(columns)]
+        results = []
+        for i, name in enumerate(names):
+            row = {
+                'id': name,
+                'expectedReturn': float(metrics['expected_return'][i]),
+                'volatility': float(metrics['volatility'][i]),
+                'sharpeRatio': float(metrics['sharpe'][i]),
+                'riskContributions': {s: float(metrics['risk_contributions'][i, j]) for j, s in enumerate(held)},
+                'coverage': float(coverage[i])
+            }
+            if benchmark is not None:
+                row.update({
+                    'activeReturn': float(metrics['active_return'][i]),
+                    'trackingError': float(metrics['tracking_error'][i]),
+                    'informationRatio': float(metrics['information_ratio'][i])
                 })
-        except Exception as e:
-            logger.warning(f"Min Variance optimization failed: {e}")
+            results.append(row)
+        
+        return jsonify({
+            'success': True,
+            'results': results,
+            'symbols': held,
+            'missing': missing,
+            'benchmark': evaluate_request.benchmark or ('weights' if benchmark is not None else None),
+            'observations': int(len(returns_df)),
+            'covariance': real_calculator._covariance_info(cov),
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        logger.error(f"Error in portfolio evaluation: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/backtest_strategies', methods=['POST'])
+def backtest_strategies():
+    """Walk-Forward-Backtest der fünf Optimierungsstrategien mit Umsatzabgabe als Transaktionskosten"""
+    try:
+        if not REAL_CALCULATIONS_AVAILABLE:
+            return jsonify({"error": "Real calculations not available"}), 503
+        
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "Request data required"}), 400
         
-        # 4. Max Sharpe - Direct Sharpe Ratio Maximization
         try:
-            # Custom optimization to maximize Sharpe Ratio directly
-            from scipy.optimize import minimize
-            import numpy as np
-            
-            returns_data = {}
-            for symbol in symbols:
-                returns = real_calculator.calculate_real_returns(symbol, '1y')
-                if returns is not None:
-                    returns_data[symbol] = returns
-            
-            if len(returns_data) >= 2:
-                returns_df = pd.DataFrame(returns_data)
-                mean_returns = returns_df.mean() * 252
-                cov_matrix = returns_df.cov() * 252
-                
-                def neg_sharpe(weights):
-                    portfolio_return = np.dot(weights, mean_returns.values)
-                    portfolio_vol = np.sqrt(np.dot(weights, np.dot(cov_matrix.values, weights)))
-                    sharpe = (portfolio_return - real_calculator.risk_free_rate) / portfolio_vol if portfolio_vol > 0 else 0
-                    return -sharpe  # Negative because we minimize
-                
-                constraints = [{'type': 'eq', 'fun': lambda x: np.sum(x) - 1}]
-                bounds = tuple((0, 1) for _ in symbols)
-                initial_weights = np.array([1/len(symbols)] * len(symbols))
-                
-                result = minimize(neg_sharpe, initial_weights, method='SLSQP', bounds=bounds, constraints=constraints)
-                
-                if result.success:
-                    optimal_weights = dict(zip(symbols, result.x))
-                    portfolio_return = np.dot(result.x, mean_returns.values)
-                    portfolio_vol = np.sqrt(np.dot(result.x, np.dot(cov_matrix.values, result.x)))
-                    sharpe_ratio = (portfolio_return - real_calculator.risk_free_rate) / portfolio_vol
-                    
-                    strategies.append({
-                        'name': 'Max Sharpe',
-                        'description': 'Maximales Rendite-Risiko-Verhältnis',
-                        'return': portfolio_return * 100,
-                        'risk': portfolio_vol * 100,
-                        'sharpe': sharpe_ratio,
-                        'weights': optimal_weights,
-                        'recommendation': 'AGGRESSIV' if portfolio_return > 0.10 else 'MODERAT'
-                    })
+            backtest_request = BacktestRequest(**data)
         except Exception as e:
-            logger.warning(f"Max Sharpe optimization failed: {e}")
+            return jsonify({"error": f"Validation error: {str(e)}"}), 400
+        
+        panel = _returns_panel(backtest_request.symbols, backtest_request.period)
+        missing = [s for s in backtest_request.symbols if s not in panel.columns]
+        if len(panel.columns) < 2:
+            return jsonify({"error": "At least 2 symbols with price history required", "missing": missing}), 400
         
-        # 5. Black-Litterman
         try:
-            # Get market caps (simplified - equal for now)
-            market_caps = [1.0] * len(symbols)
-            bl_result = real_calculator.black_litterman_optimization(symbols, market_caps)
-            if bl_result:
-                strategies.append({
-                    'name': 'Black-Litterman',
-                    'description': 'Marktdaten + eigene Erwartungen',
-                    'return': bl_result.get('expected_return', 0),  # Already in %
-                    'risk': bl_result.get('volatility', 0),          # Already in %
-                    'sharpe': bl_result.get('sharpe_ratio', 0),
-                    'weights': bl_result.get('weights', []),
-                    'recommendation': 'EXPERTE'
-                })
-        except Exception as e:
-            logger.warning(f"Black-Litterman optimization failed: {e}")
+            result = backtest.run_backtest(
+                panel, strategies=backtest_request.strategies, frequency=backtest_request.frequency,
+                lookback=backtest_request.lookback, window=backtest_request.window,
+                cost_rate=SWISS_STAMP_TAX_RATE, risk_free_rate=real_calculator.risk_free_rate,
+                n_factors=backtest_request.n_factors
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e), "missing": missing}), 400
+        
+        symbols = result['symbols']
+        strategies = []
+        for key, strategy in result['strategies'].items():
+            strategies.append({
+                'key': key,
+                'name': strategy['name'],
+                'nav': np.round(strategy['nav'], 6).tolist(),
+                'statistics': strategy['statistics'],
+                'turnover': np.round(strategy['turnover'], 6).tolist(),
+                'finalWeights': {s: float(w) for s, w in zip(symbols, strategy['weights'][-1]) if w > 1e-8},
+                'iterations': strategy['iterations'],
+                'failedRebalances': strategy['failed_rebalances']
+            })
         
-        logger.info(f"Strategy optimization completed: {len(strategies)} strategies calculated")
-        return jsonify({'strategies': strategies, 'symbols': symbols})
+        return jsonify({
+            'symbols': symbols,
+            'missing': missing,
+            'dates': [d.strftime('%Y-%m-%d') for d in result['dates']],
+            'rebalanceDates': [d.strftime('%Y-%m-%d') for d in result['rebalance_dates']],
+            'strategies': strategies,
+            'costRate': SWISS_STAMP_TAX_RATE,
+            'duration': round(result['duration'], 3)
+        })
     except Exception as e:
-        logger.error(f"Error in strategy optimization: {e}")
+        logger.error(f"Error in strategy backtest: {e}")
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/get_financial_news', methods=['GET'])
@@ -1050,9 +1412,16 @@ def get_financial_news():
         logger.error(f"Error getting financial news: {e}")
         return jsonify({"error": str(e)}), 500
 
+CORRELATION_PERIODS = ((252, '1y'), (504, '2y'), (1260, '5y'), (2520, '10y'))
+
 @app.route('/api/calculate_correlation', methods=['POST'])
 def calculate_correlation():
-    """Calculate correlation matrix for portfolio symbols"""
+    """
+    Korrelationsmatrix der Symbole aus dem gemeinsamen Renditepanel.
+
+    Antwort kompakt als oberes Dreieck (zeilenweise, ohne Diagonale) in
+    Eingabe- oder Cluster-Reihenfolge; gecacht pro (Symbolmenge, Fenster, Stichtag).
+    """
     try:
         if not REAL_CALCULATIONS_AVAILABLE:
             return jsonify({"error": "Real calculations not available"}), 503
@@ -1060,23 +1429,312 @@ def calculate_correlation():
         data = request.get_json()
         if not data or 'symbols' not in data:
             return jsonify({"error": "Symbols required"}), 400
-            
-        symbols = data['symbols']
-        if len(symbols) < 2:
-            return jsonify({"error": "At least 2 symbols required"}), 400
-            
-        # Get correlation matrix from real_calculations
-        correlation_matrix = real_calculator.get_correlation_matrix(symbols)
-        logger.info(f"Correlation matrix calculated for {len(symbols)} symbols")
+        
+        try:
+            correlation_request = CorrelationRequest(**data)
+        except Exception as e:
+            return jsonify({"error": f"Validation error: {str(e)}"}), 400
+        
+        symbols = list(dict.fromkeys(correlation_request.symbols))
+        window = correlation_request.window
+        period = next(p for days, p in CORRELATION_PERIODS if window <= days)
+        panel = _returns_panel(symbols, period)
+        missing = [s for s in symbols if s not in panel.columns]
+        if len(panel.columns) < 2:
+            return jsonify({"error": "At least 2 symbols with price history required", "missing": missing}), 400
+        
+        entry = correlation_service.matrix(panel, window, correlation_request.pairwise, correlation_request.min_periods)
+        result = correlation_service.compact(entry, symbols, cluster=correlation_request.cluster)
+        logger.info(f"Correlation matrix calculated for {len(result['symbols'])} symbols ({result['order']} order)")
         return jsonify({
-            "correlation_matrix": correlation_matrix,
-            "symbols": symbols,
+            **result,
+            "missing": missing,
+            "window": window,
+            "pairwise": correlation_request.pairwise,
             "timestamp": datetime.now().isoformat()
         })
     except Exception as e:
         logger.error(f"Error calculating correlation: {e}")
         return jsonify({"error": str(e)}), 500
 
+def _portfolio_close_frame(symbols, period='1y', start=None):
+    """Aligned daily close prices (date string index × symbols), loaded in one batch"""
+    closes = {}
+    for symbol, hist in portfolio_loader.get_histories(symbols, period, start=start).items():
+        if hist is not None and not hist.empty and 'Close' in hist:
+            series = hist['Close'].copy()
+            series.index = series.index.strftime('%Y-%m-%d')
+            closes[symbol] = series[~series.index.duplicated(keep='last')]
+    if not closes:
+        return pd.DataFrame()
+    return pd.DataFrame(closes).sort_index().ffill().dropna()
+
+@app.route('/api/portfolio_performance_history', methods=['POST'])
+def portfolio_performance_history():
+    """Daily portfolio NAV/risk history served from performance_metrics, appended incrementally"""
+    try:
+        if not PERSISTENT_STORE_AVAILABLE:
+            return jsonify({"error": "Persistent store not available"}), 503
+        
+        data = request.get_json()
+        portfolio = data.get('portfolio', []) if data else []
+        if not portfolio:
+            return jsonify({'error': 'No portfolio data provided'}), 400
+        
+        # Stückzahlen direkt oder Investitionsbetrag/Gewicht, das beim ersten Snapshot in Stück umgerechnet wird
+        spec = {}
+        for asset in portfolio:
+            symbol = asset.get('symbol')
+            if not symbol:
+                continue
+            if asset.get('quantity'):
+                spec[symbol] = ('quantity', float(asset['quantity']))
+            elif asset.get('investment') or asset.get('amount'):
+                spec[symbol] = ('amount', float(asset.get('investment') or asset.get('amount')))
+            else:
+                spec[symbol] = ('amount', float(asset.get('weight') or 1.0 / len(portfolio)) * 100000)
+        if not spec:
+            return jsonify({'error': 'No valid symbols provided'}), 400
+        
+        key = performance_store.portfolio_key({s: v for s, (_, v) in spec.items()})
+        if any(kind == 'amount' for kind, _ in spec.values()):
+            key = 'amount:' + key
+        
+        refreshed = False
+        if cache.get(f'perf_refreshed_{key}') is None:
+            # Ab dem letzten Snapshot nachladen, damit auch Lücken über ein Jahr geschlossen werden
+            last_date = performance_store.last_date(key)
+            closes = _portfolio_close_frame(list(spec.keys()), '1y', start=last_date)
+            if not closes.empty:
+                holdings = performance_store.get_holdings(key)
+                if holdings is None:
+                    first = closes.iloc[0]
+                    holdings = {
+                        s: (v if kind == 'quantity' else v / float(first[s]))
+                        for s, (kind, v) in spec.items() if s in closes.columns
+                    }
+                    performance_store.save_holdings(key, holdings)
+                
+                nav = nav_engine.portfolio_nav(closes, quantities=holdings)
+                new_rows = performance_store.append_snapshots(key, list(zip(closes.index, nav.values)))
+                refreshed = new_rows > 0
+                logger.info(f"Performance history {key}: {new_rows} neue Snapshots")
+            cache.set(f'perf_refreshed_{key}', True, ttl=3600)
+        
+        history = performance_store.get_history(key, data.get('start'))
+        return jsonify({
+            'success': True,
+            'portfolioKey': key,
+            'history': history,
+            'summary': performance_store.get_summary(key),
+            'refreshed': refreshed,
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        logger.error(f"Error in portfolio performance history: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/portfolio_nav', methods=['POST'])
+def portfolio_nav():
+    """Tägliche Portfolio-NAV mit Drawdown, rollender Volatilität, VaR/CVaR und Benchmark-Kennzahlen"""
+    try:
+        data = request.get_json()
+        portfolio = data.get('portfolio', []) if data else []
+        if not portfolio:
+            return jsonify({'error': 'No portfolio data provided'}), 400
+        
+        period = data.get('period', '1y')
+        rebalance = data.get('rebalance', 'none')
+        benchmark = data.get('benchmark', '^SSMI')
+        window = int(data.get('rollingWindow', 21))
+        if period not in ('6mo', '1y', '2y', '5y', '10y'):
+            return jsonify({'error': f"Unknown period '{period}'"}), 400
+        if rebalance not in nav_engine.REBALANCE_RULES:
+            return jsonify({'error': f"Unknown rebalance rule '{rebalance}'"}), 400
+        
+        # Stückzahlen (Buy & Hold) oder Gewichte/Beträge mit Rebalancing-Regel
+        if all(asset.get('quantity') for asset in portfolio):
+            holdings = {asset['symbol']: float(asset['quantity']) for asset in portfolio}
+            kind = 'quantity'
+        else:
+            holdings = {asset['symbol']: float(asset.get('weight') or asset.get('investment') or 1.0)
+                        for asset in portfolio}
+            kind = 'weight'
+        
+        symbols = list(holdings)
+        closes = _portfolio_close_frame(symbols + ([benchmark] if benchmark else []), period)
+        missing = [s for s in symbols if s not in closes.columns]
+        if closes.empty or len(missing) == len(symbols):
+            return jsonify({'error': 'Could not fetch historical data', 'missing': missing}), 500
+        
+        key = (kind, rebalance, period, tuple(sorted(holdings.items())))
+        nav = nav_engine.cached_nav(key, closes.index[-1], lambda: nav_engine.portfolio_nav(
+            closes, **{'quantities' if kind == 'quantity' else 'weights': holdings},
+            rebalance=rebalance, initial_value=None if kind == 'quantity' else 100.0))
+        
+        summary = nav_engine.nav_summary(nav, real_calculator.risk_free_rate if REAL_CALCULATIONS_AVAILABLE else 0.02)
+        benchmark_stats = None
+        if benchmark and benchmark in closes.columns and benchmark not in holdings:
+            benchmark_stats = nav_engine.benchmark_statistics(nav, closes[benchmark])
+        
+        return jsonify({
+            'success': True,
+            'dates': list(nav.index),
+            'nav': np.round(nav.values, 4).tolist(),
+            'drawdown': np.round(nav_engine.drawdown(nav) * 100, 4).tolist(),
+            'rollingVolatility': [None if np.isnan(v) else round(float(v) * 100, 4)
+                                  for v in nav_engine.rolling_volatility(nav.values, window)],
+            'summary': {
+                'totalReturn': summary['total_return'] * 100,
+                'annualReturn': summary['annual_return'] * 100,
+                'volatility': summary['volatility'] * 100,
+                'sharpeRatio': summary['sharpe'],
+                'maxDrawdown': summary['drawdown']['max_drawdown'] * 100,
+                'drawdownPeak': summary['drawdown']['peak'],
+                'drawdownTrough': summary['drawdown']['trough'],
+                'drawdownRecovery': summary['drawdown']['recovery'],
+                'var95': summary['var'][0.95]['var'] * 100,
+                'cvar95': summary['var'][0.95]['cvar'] * 100,
+                'var99': summary['var'][0.99]['var'] * 100,
+                'cvar99': summary['var'][0.99]['cvar'] * 100
+            },
+            'benchmark': {'symbol': benchmark, **benchmark_stats} if benchmark_stats else None,
+            'missing': missing,
+            'rebalance': rebalance if kind == 'weight' else 'none',
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        logger.error(f"Error in portfolio NAV: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/portfolio_risk_batch', methods=['POST'])
+def portfolio_risk_batch():
+    """Historischer bzw. gefilterter VaR/CVaR für viele Portfolios in einem Aufruf (L = W Rᵀ)"""
+    try:
+        if not REAL_CALCULATIONS_AVAILABLE:
+            return jsonify({"error": "Real calculations not available"}), 503
+        
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "Request data required"}), 400
+        
+        try:
+            risk_request = RiskBatchRequest(**data)
+        except Exception as e:
+            return jsonify({"error": f"Validation error: {str(e)}"}), 400
+        
+        portfolios = risk_request.portfolios
+        symbols = sorted({s.upper().strip() for p in portfolios for s in p['weights']})
+        panel = _returns_panel(symbols, risk_request.period)
+        if panel.empty:
+            return jsonify({"error": "Could not fetch historical data"}), 500
+        
+        # Szenariomatrix einmal je Portfolio-Universum, Filter und Stichtag
+        weights = [{s.upper().strip(): w for s, w in p['weights'].items()} for p in portfolios]
+        values = np.array([float(p.get('value', 1.0)) for p in portfolios])
+        levels = tuple(risk_request.levels)
+        try:
+            risk = risk_engine.batch_var(panel, weights, levels, values, filtered=risk_request.filtered,
+                                         lam=risk_request.ewma_lambda, key=(risk_request.period,))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        results = []
+        for i, portfolio in enumerate(portfolios):
+            results.append({
+                'id': portfolio.get('id', i),
+                'coverage': risk[i]['coverage'],
+                'scenarios': risk[i]['scenarios'],
+                'asOf': str(risk[i]['as_of']) if risk[i]['as_of'] is not None else None,
+                **{f'var{round(level * 100, 1):g}': risk[i][level]['var'] for level in levels},
+                **{f'cvar{round(level * 100, 1):g}': risk[i][level]['cvar'] for level in levels}
+            })
+        
+        as_of = [r['as_of'] for r in risk if r['as_of'] is not None]
+        return jsonify({
+            'success': True,
+            'results': results,
+            'symbols': list(panel.columns),
+            'missing': [s for s in symbols if s not in panel.columns],
+            'scenarios': min((r['scenarios'] for r in risk if r['as_of'] is not None), default=0),
+            'asOf': str(max(as_of)) if as_of else None,
+            'method': 'filtered_historical' if risk_request.filtered else 'historical',
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        logger.error(f"Error in portfolio risk batch: {e}")
+        return jsonify({"error": str(e)}), 500
+
+def _stress_closes(symbol, start, end):
+    """Schlusskurse für die Stress-Bibliothek (nur beim Vorberechnen, nicht pro Anfrage)"""
+    hist = yf.Ticker(symbol, session=YF_SESSION).history(start=start, end=end)
+    return None if hist.empty else hist['Close']
+
+@app.route('/api/stress_test', methods=['POST'])
+def stress_test():
+    """Historische Krisenfenster auf ein Portfolio anwenden, ohne Netzwerkzugriff"""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "Request data required"}), 400
+        
+        try:
+            stress_request = StressTestRequest(**data)
+        except Exception as e:
+            return jsonify({"error": f"Validation error: {str(e)}"}), 400
+        
+        library = stress_engine.get_stress_library()
+        if not library.symbols():
+            return jsonify({"error": "Stress scenario library is empty, run /api/stress_library first"}), 503
+        
+        proxies = {k.upper().strip(): v.upper().strip() for k, v in (stress_request.proxies or {}).items()}
+        currencies = {k.upper().strip(): v.upper().strip() for k, v in (stress_request.currencies or {}).items()}
+        try:
+            result = library.run(stress_request.holdings, stress_request.scenarios, proxies, currencies)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        return jsonify({
+            'success': True,
+            **result,
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        logger.error(f"Error in stress test: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/stress_library', methods=['GET', 'POST'])
+def stress_library():
+    """Verfügbare Szenarien (GET) bzw. Krisenfenster für Symbole vorberechnen (POST, lädt Kurse)"""
+    try:
+        library = stress_engine.get_stress_library()
+        if request.method == 'GET':
+            return jsonify({
+                'success': True,
+                'scenarios': [{'scenario': key, **scenario} for key, scenario in stress_engine.SCENARIOS.items()],
+                'symbols': {key: library.symbols(key) for key in stress_engine.SCENARIOS},
+                'proxies': stress_engine.PROXIES
+            })
+        
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "Request data required"}), 400
+        
+        try:
+            library_request = StressLibraryRequest(**data)
+        except Exception as e:
+            return jsonify({"error": f"Validation error: {str(e)}"}), 400
+        
+        result = library.precompute(library_request.symbols, download=_stress_closes, force=library_request.force)
+        return jsonify({
+            'success': True,
+            **result,
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        logger.error(f"Error in stress library: {e}")
+        return jsonify({"error": str(e)}), 500
+
 # Routes
 @app.route('/')
 def index():
@@ -10874,28 +11532,46 @@ html, body {
                 const response = await fetch('/api/strategy_optimization', {
                     method: 'POST',
                     headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify({ symbols: symbols })
+                    body: JSON.stringify({ symbols: symbols, stream: true })
                 });
                 
-                if (!response.ok) throw new Error('Backend failed');
+                if (!response.ok || !response.body) throw new Error('Backend failed');
+                
+                // Format strategies for display
+                const formatStrategy = s => ({
+                    name: s.name,
+                    description: s.description,
+                    return: s.return.toFixed(1),
+                    risk: s.risk.toFixed(1),
+                    sharpe: s.sharpe.toFixed(2),
+                    recommendation: s.recommendation,
+                    badgeClass: getBadgeClass(s.recommendation),
+                    weights: s.weights || [],
+                    improvement: 0, // Will be calculated below
+                    detailedRecommendation: getDetailedRecommendation(s.name, s.recommendation)
+                });
                 
-                const data = await response.json();
+                // NDJSON: jede Strategie erscheint in der Tabelle, sobald sie berechnet ist
+                const strategies = [];
+                const reader = response.body.getReader();
+                const decoder = new TextDecoder();
+                let buffer = '';
+                while (true) {
+                    const { value, done } = await reader.read();
+                    if (done) break;
+                    buffer += decoder.decode(value, { stream: true });
+                    const lines = buffer.split('\\n');
+                    buffer = lines.pop();
+                    lines.filter(line => line.trim()).forEach(line => {
+                        const event = JSON.parse(line);
+                        if (event.status === 'ok' && event.result) {
+                            strategies.push(formatStrategy(event.result));
+                            updateStrategyTable(strategies);
+                        }
+                    });
+                }
                 
-                if (data.strategies && data.strategies.length >= 3) {
-                    // Format strategies for display
-                    const strategies = data.strategies.map(s => ({
-                        name: s.name,
-                        description: s.description,
-                        return: s.return.toFixed(1),
-                        risk: s.risk.toFixed(1),
-                        sharpe: s.sharpe.toFixed(2),
-                        recommendation: s.recommendation,
-                        badgeClass: getBadgeClass(s.recommendation),
-                        weights: s.weights || [],
-                        improvement: 0, // Will be calculated below
-                        detailedRecommendation: getDetailedRecommendation(s.name, s.recommendation)
-                    }));
-                    
+                if (strategies.length >= 3) {
                     // Fill UI with real data
                     updateStrategyTable(strategies);
                     updatePortfolioRating(strategies);
@@ -10935,7 +11611,8 @@ html, body {
                 'Risk Parity': 'Diversifizieren Sie stärker in Rohstoffe und Immobilien.',
                 'Min Variance': 'Konzentrieren Sie sich auf stabile Blue-Chip Aktien und Anleihen.',
                 'Max Sharpe': 'Investieren Sie mehr in Growth-Aktien und reduzieren Sie defensive Assets.',
-                'Black-Litterman': 'Kombinieren Sie fundamentale Analyse mit quantitativen Modellen.'
+                'Black-Litterman': 'Kombinieren Sie fundamentale Analyse mit quantitativen Modellen.',
+                'Hierarchical Risk Parity': 'Verteilen Sie das Risiko gleichmässig über Gruppen ähnlich laufender Assets.'
             };
             return recommendations[name] || 'Optimieren Sie Ihre Asset-Allokation.';
         }
@@ -13518,8 +14195,8 @@ html, body {
                     // Fallback: Create correlation table with estimated values based on asset types
                     createCorrelationTable(symbols);
                 } else {
-                    // Use real correlation data
-                    displayCorrelationData(data.correlation_matrix, symbols);
+                    // Use real correlation data (kompaktes oberes Dreieck)
+                    displayCorrelationData(expandCorrelationTriangle(data.upper_triangle, data.symbols.length), data.symbols);
                 }
             })
             .catch(error => {
@@ -13578,6 +14255,19 @@ html, body {
             container.innerHTML = html;
         }
 
+        function expandCorrelationTriangle(upperTriangle, n) {
+            // Oberes Dreieck (zeilenweise, ohne Diagonale) zur symmetrischen Matrix
+            const matrix = Array.from({ length: n }, (_, i) => Array.from({ length: n }, (_, j) => i === j ? 1 : 0));
+            let k = 0;
+            for (let i = 0; i < n; i++) {
+                for (let j = i + 1; j < n; j++) {
+                    const value = upperTriangle[k++];
+                    matrix[i][j] = matrix[j][i] = value === null ? NaN : value;
+                }
+            }
+            return matrix;
+        }
+
         function displayCorrelationData(correlationMatrix, symbols) {
             const container = document.getElementById('correlationTableContainer');
             if (!container) return;
@@ -14312,32 +15002,20 @@ html, body {
             let html = '';
             
             try {
-                // Fetch all investment styles data
-                const [valueData, momentumData, buyholdData, carryData] = await Promise.all([
-                    fetch('/api/value_analysis', {
-                        method: 'POST',
-                        headers: { 'Content-Type': 'application/json' },
-                        body: JSON.stringify({ portfolio: userPortfolio })
-                    }).then(r => r.json()),
-                    fetch('/api/momentum_analysis', {
-                        method: 'POST',
-                        headers: { 'Content-Type': 'application/json' },
-                        body: JSON.stringify({ portfolio: userPortfolio })
-                    }).then(r => r.json()),
-                    fetch('/api/buyhold_analysis', {
-                        method: 'POST',
-                        headers: { 'Content-Type': 'application/json' },
-                        body: JSON.stringify({ portfolio: userPortfolio })
-                    }).then(r => r.json()),
-                    fetch('/api/carry_analysis', {
-                        method: 'POST',
-                        headers: { 'Content-Type': 'application/json' },
-                        body: JSON.stringify({ 
-                            portfolio: userPortfolio,
-                            financingCost: 3  // 3% Standard
-                        })
-                    }).then(r => r.json())
-                ]);
+                // Fetch all investment styles data (one request, shared price history)
+                const bundle = await fetch('/api/portfolio_analysis_bundle', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ 
+                        portfolio: userPortfolio,
+                        financingCost: 3,  // 3% Standard
+                        sections: ['value', 'momentum', 'buyhold', 'carry']
+                    })
+                }).then(r => r.json());
+                const valueData = bundle.value || {};
+                const momentumData = bundle.momentum || {};
+                const buyholdData = bundle.buyhold || {};
+                const carryData = bundle.carry || {};
                 
                 // VALUE INVESTING SECTION
                 html += `
@@ -14578,34 +15256,23 @@ html, body {
                         strategyData = await stratResponse.json();
                     }
 
-                    // Investment Styles
-                    const [valueResp, momentumResp, buyHoldResp, carryResp] = await Promise.all([
-                        fetch('/api/value_analysis', {
-                            method: 'POST',
-                            headers: { 'Content-Type': 'application/json' },
-                            body: JSON.stringify({ portfolio: userPortfolio })
-                        }),
-                        fetch('/api/momentum_analysis', {
-                            method: 'POST',
-                            headers: { 'Content-Type': 'application/json' },
-                            body: JSON.stringify({ portfolio: userPortfolio })
-                        }),
-                        fetch('/api/buyhold_analysis', {
-                            method: 'POST',
-                            headers: { 'Content-Type': 'application/json' },
-                            body: JSON.stringify({ portfolio: userPortfolio })
-                        }),
-                        fetch('/api/carry_analysis', {
-                            method: 'POST',
-                            headers: { 'Content-Type': 'application/json' },
-                            body: JSON.stringify({ portfolio: userPortfolio })
+                    // Investment Styles (one request, shared price history)
+                    const bundleResp = await fetch('/api/portfolio_analysis_bundle', {
+                        method: 'POST',
+                        headers: { 'Content-Type': 'application/json' },
+                        body: JSON.stringify({
+                            portfolio: userPortfolio,
+                            sections: ['value', 'momentum', 'buyhold', 'carry']
                         })
-                    ]);
+                    });
 
-                    if (valueResp.ok) valueData = await valueResp.json();
-                    if (momentumResp.ok) momentumData = await momentumResp.json();
-                    if (buyHoldResp.ok) buyHoldData = await buyHoldResp.json();
-                    if (carryResp.ok) carryData = await carryResp.json();
+                    if (bundleResp.ok) {
+                        const bundle = await bundleResp.json();
+                        valueData = bundle.value || null;
+                        momentumData = bundle.momentum || null;
+                        buyHoldData = bundle.buyhold || null;
+                        carryData = bundle.carry || null;
+                    }
 
                 } catch (error) {
                     console.error('Error fetching advanced calculations:', error);
@@ -15533,393 +16200,73 @@ def multi_source_stats():
 # INVESTMENT STRATEGY APIs
 # ================================================================================================
 
-@app.route('/api/value_analysis', methods=['POST'])
-def value_analysis():
-    """Perform comprehensive value analysis on portfolio assets"""
+def _analysis_history(symbol, months):
+    """Kurshistorie für die Strategie-Analysen, kurz im Cache geteilt"""
+    cache_key = f"analysis_history_{symbol}_{months}"
+    hist = cache.get(cache_key)
+    if hist is None:
+        hist = yf.Ticker(symbol).history(period=f'{months}mo')
+        if not hist.empty:
+            cache.set(cache_key, hist, ttl=300)
+    return hist
+
+def _analysis_view(section):
+    """Einzel-Endpoint als Sicht auf das Analyse-Bundle"""
+    data = request.get_json()
+    portfolio = data.get('portfolio', [])
+    
+    if not portfolio:
+        return jsonify({'error': 'No portfolio data provided'}), 400
+    
+    bundle = strategy_analysis.analysis_bundle(
+        portfolio, _analysis_history, get_fundamentals,
+        strategy_analysis.parse_params(data), sections=(section,)
+    )
+    result = bundle[section]
+    # Ladefehler (z.B. Timeout) ebenfalls melden
+    result['errors'] = bundle['errors'] + result['errors']
+    return jsonify(result)
+
+@app.route('/api/portfolio_analysis_bundle', methods=['POST'])
+def portfolio_analysis_bundle():
+    """Value, Momentum, Buy & Hold, Carry und Korrelation in einem Durchlauf"""
     try:
         data = request.get_json()
         portfolio = data.get('portfolio', [])
-        discount_rate = float(data.get('discountRate', 8)) / 100
-        terminal_growth = float(data.get('terminalGrowth', 2)) / 100
+        sections = data.get('sections') or list(strategy_analysis.SECTIONS)
         
         if not portfolio:
             return jsonify({'error': 'No portfolio data provided'}), 400
-        
-        results = []
-        total_value = 0
-        total_fair_value = 0
-        
-        for asset in portfolio:
-            symbol = asset.get('symbol')
-            quantity = float(asset.get('quantity', 0))
-            
-            # Get current price
-            try:
-                ticker = yf.Ticker(symbol)
-                info = ticker.info
-                current_price = info.get('currentPrice', info.get('regularMarketPrice', 0))
-                
-                # Get fundamental data
-                market_cap = info.get('marketCap', 0)
-                
-                # ✅ SMART P/E & P/B - Nur für Aktien!
-                asset_type = info.get('quoteType', '').lower()
-                if asset_type in ['equity', 'stock']:
-                    pe_ratio = info.get('trailingPE', info.get('forwardPE', None))
-                    pb_ratio = info.get('priceToBook', None)
-                else:
-                    pe_ratio = None  # Indizes, Rohstoffe, Crypto haben kein P/E
-                    pb_ratio = None
-                
-                # Dividend Yield - ✅ SMART DETECTION
-                raw_div = info.get('dividendYield', 0)
-                if raw_div and raw_div > 1:  # Schon in Prozent!
-                    div_yield = raw_div  # NICHT × 100
-                elif raw_div:
-                    div_yield = raw_div * 100  # Dezimal → Prozent
-                else:
-                    div_yield = 0
-                
-                # Safety Cap
-                if div_yield > 20:
-                    div_yield = 0  # Offensichtlich falsch
-                
-                eps = info.get('trailingEps', info.get('forwardEps', 0))
-                book_value = info.get('bookValue', current_price / pb_ratio if pb_ratio and pb_ratio > 0 else current_price)
-                beta = info.get('beta', 1.0)
-                
-                # Get historical data for risk metrics
-                hist = ticker.history(period='1y')
-                returns = hist['Close'].pct_change().dropna()
-                
-                # Calculate Sharpe Ratio
-                risk_free_rate = 0.02
-                if len(returns) > 0:
-                    excess_return = returns.mean() * 252 - risk_free_rate
-                    volatility_annual = returns.std() * np.sqrt(252)
-                    sharpe_ratio = excess_return / volatility_annual if volatility_annual > 0 else 0
-                else:
-                    sharpe_ratio = 0
-                    volatility_annual = 0.15
-                
-                # Calculate VaR and CVaR (95% confidence)
-                if len(returns) > 0:
-                    var_95 = np.percentile(returns, 5) * current_price * quantity
-                    cvar_95 = returns[returns <= np.percentile(returns, 5)].mean() * current_price * quantity if len(returns[returns <= np.percentile(returns, 5)]) > 0 else var_95
-                else:
-                    var_95 = 0
-                    cvar_95 = 0
-                
-                # Maximum Drawdown
-                if len(hist) > 0:
-                    cumulative = (1 + returns).cumprod()
-                    running_max = cumulative.expanding().max()
-                    drawdown = (cumulative - running_max) / running_max
-                    max_drawdown = drawdown.min() * 100
-                else:
-                    max_drawdown = 0
-                
-                # Graham Number calculation (intrinsic value)
-                graham_number = 0
-                if eps and book_value and eps > 0 and book_value > 0:
-                    graham_number = math.sqrt(22.5 * eps * book_value)
-                
-                # ✅ FCF: Pro Aktie verwenden!
-                fcf_total = info.get('freeCashflow', None)
-                shares_outstanding = info.get('sharesOutstanding', None)
-                
-                if fcf_total and shares_outstanding and shares_outstanding > 0:
-                    fcf_per_share = fcf_total / shares_outstanding
-                elif eps and eps > 0:
-                    fcf_per_share = eps * 0.8  # Fallback: 80% of EPS
-                else:
-                    fcf_per_share = 0
-                
-                # Simple DCF estimation (per share!)
-                if fcf_per_share > 0:
-                    dcf_value = 0
-                    for year in range(1, 11):
-                        growth = terminal_growth if year > 5 else terminal_growth * 1.5
-                        future_fcf = fcf_per_share * ((1 + growth) ** year)
-                        dcf_value += future_fcf / ((1 + discount_rate) ** year)
-                    terminal_value = (fcf_per_share * ((1 + terminal_growth) ** 10) * (1 + terminal_growth)) / (discount_rate - terminal_growth)
-                    dcf_value += terminal_value / ((1 + discount_rate) ** 10)
-                else:
-                    dcf_value = current_price
-                
-                # Calculate fair value (average of methods)
-                fair_values = [v for v in [graham_number, dcf_value, current_price * 1.1] if v > 0]
-                fair_value = sum(fair_values) / len(fair_values) if fair_values else current_price
-                
-                # Scoring (mit None-Checks!)
-                score = 0
-                if pe_ratio and pe_ratio > 0 and pe_ratio < 15: score += 25
-                elif pe_ratio and pe_ratio > 0 and pe_ratio < 20: score += 15
-                if pb_ratio and pb_ratio > 0 and pb_ratio < 1.5: score += 20
-                elif pb_ratio and pb_ratio > 0 and pb_ratio < 3: score += 10
-                if div_yield > 3: score += 20
-                elif div_yield > 1.5: score += 10
-                if fair_value > current_price * 1.1: score += 35
-                elif fair_value > current_price: score += 15
-                
-                # Recommendation
-                upside = ((fair_value - current_price) / current_price) * 100
-                if upside > 20:
-                    recommendation = 'STRONG BUY'
-                    rec_color = '#4caf50'
-                elif upside > 10:
-                    recommendation = 'BUY'
-                    rec_color = '#8bc34a'
-                elif upside > -10:
-                    recommendation = 'HOLD'
-                    rec_color = '#ff9800'
-                else:
-                    recommendation = 'SELL'
-                    rec_color = '#f44336'
-                
-                asset_value = current_price * quantity
-                asset_fair_value = fair_value * quantity
-                total_value += asset_value
-                total_fair_value += asset_fair_value
-                
-                results.append({
-                    'symbol': symbol,
-                    'quantity': quantity,
-                    'currentPrice': current_price,
-                    'fairValue': fair_value,
-                    'grahamNumber': graham_number,
-                    'dcfValue': dcf_value,
-                    'peRatio': pe_ratio,
-                    'pbRatio': pb_ratio,
-                    'divYield': div_yield,
-                    'eps': eps,
-                    'fcf': fcf_total if fcf_total else None,  # Total FCF für Display
-                    'fcf_per_share': fcf_per_share,  # FCF pro Aktie für Berechnungen
-                    'bookValue': book_value,
-                    'upside': upside,
-                    'score': score,
-                    'recommendation': recommendation,
-                    'recColor': rec_color,
-                    'assetValue': asset_value,
-                    'assetFairValue': asset_fair_value,
-                    'sharpeRatio': sharpe_ratio,
-                    'beta': beta,
-                    'var95': var_95,
-                    'cvar95': cvar_95,
-                    'maxDrawdown': max_drawdown,
-                    'volatility': volatility_annual * 100
-                })
-                
-            except Exception as e:
-                print(f"Error analyzing {symbol}: {e}")
-                continue
-        
-        portfolio_valuation = ((total_fair_value - total_value) / total_value) * 100 if total_value > 0 else 0
-        avg_score = sum(r['score'] for r in results) / len(results) if results else 0
-        avg_sharpe = sum(r['sharpeRatio'] for r in results) / len(results) if results else 0
-        
-        # Portfolio-Level VaR and CVaR
-        portfolio_var_95 = sum(r['var95'] for r in results)
-        portfolio_cvar_95 = sum(r['cvar95'] for r in results)
-        
-        # Portfolio Beta (weighted)
-        portfolio_beta = sum(r['beta'] * (r['assetValue'] / total_value) for r in results) if total_value > 0 else 1.0
-        
-        # Portfolio Max Drawdown (worst case)
-        worst_drawdown = min((r['maxDrawdown'] for r in results), default=0)
-        
-        return jsonify({
-            'success': True,
-            'results': results,
-            'summary': {
-                'totalValue': total_value,
-                'totalFairValue': total_fair_value,
-                'portfolioValuation': portfolio_valuation,
-                'avgScore': avg_score,
-                'avgSharpe': avg_sharpe,
-                'portfolioBeta': portfolio_beta,
-                'portfolioVaR95': portfolio_var_95,
-                'portfolioCVaR95': portfolio_cvar_95,
-                'worstDrawdown': worst_drawdown
-            }
-        })
+        unknown = [s for s in sections if s not in strategy_analysis.SECTIONS]
+        if unknown:
+            return jsonify({'error': f"Unknown sections: {', '.join(unknown)}"}), 400
+        
+        start_time = time.time()
+        bundle = strategy_analysis.analysis_bundle(
+            portfolio, _analysis_history, get_fundamentals,
+            strategy_analysis.parse_params(data), sections=sections
+        )
+        bundle['success'] = True
+        bundle['duration'] = round(time.time() - start_time, 3)
+        logger.info(f"Analyse-Bundle für {len(portfolio)} Assets in {bundle['duration']}s")
+        return jsonify(bundle)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/value_analysis', methods=['POST'])
+def value_analysis():
+    """Perform comprehensive value analysis on portfolio assets"""
+    try:
+        return _analysis_view('value')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/momentum_analysis', methods=['POST'])
 def momentum_analysis():
     """Perform momentum analysis on portfolio assets"""
     try:
-        data = request.get_json()
-        portfolio = data.get('portfolio', [])
-        lookback_months = int(data.get('lookbackMonths', 12))
-        ma_short = int(data.get('maShort', 50))
-        ma_long = int(data.get('maLong', 200))
-        
-        if not portfolio:
-            return jsonify({'error': 'No portfolio data provided'}), 400
-        
-        results = []
-        
-        for asset in portfolio:
-            symbol = asset.get('symbol')
-            quantity = float(asset.get('quantity', 0))
-            
-            try:
-                # Get historical data
-                ticker = yf.Ticker(symbol)
-                hist = ticker.history(period=f'{lookback_months*2}mo')
-                
-                if hist.empty:
-                    continue
-                
-                # Calculate moving averages
-                hist['MA_Short'] = hist['Close'].rolling(window=ma_short).mean()
-                hist['MA_Long'] = hist['Close'].rolling(window=ma_long).mean()
-                
-                # Get current price FIRST (needed for BB calculations)
-                current_price = hist['Close'].iloc[-1]
-                
-                # Calculate MACD
-                exp1 = hist['Close'].ewm(span=12, adjust=False).mean()
-                exp2 = hist['Close'].ewm(span=26, adjust=False).mean()
-                macd = exp1 - exp2
-                signal = macd.ewm(span=9, adjust=False).mean()
-                macd_histogram = macd - signal
-                current_macd = macd.iloc[-1] if not macd.empty else 0
-                current_signal = signal.iloc[-1] if not signal.empty else 0
-                current_histogram = macd_histogram.iloc[-1] if not macd_histogram.empty else 0
-                
-                # Bollinger Bands
-                bb_window = 20
-                bb_std_multiplier = 2
-                hist['BB_Middle'] = hist['Close'].rolling(window=bb_window).mean()
-                rolling_std = hist['Close'].rolling(window=bb_window).std()
-                hist['BB_Upper'] = hist['BB_Middle'] + (rolling_std * bb_std_multiplier)
-                hist['BB_Lower'] = hist['BB_Middle'] - (rolling_std * bb_std_multiplier)
-                bb_middle = hist['BB_Middle'].iloc[-1] if not hist['BB_Middle'].isna().iloc[-1] else current_price
-                bb_upper = hist['BB_Upper'].iloc[-1] if not hist['BB_Upper'].isna().iloc[-1] else current_price * 1.1
-                bb_lower = hist['BB_Lower'].iloc[-1] if not hist['BB_Lower'].isna().iloc[-1] else current_price * 0.9
-                bb_position = ((current_price - bb_lower) / (bb_upper - bb_lower)) * 100 if bb_upper > bb_lower else 50
-                
-                # Calculate momentum (% change over lookback period)
-                momentum_return = ((hist['Close'].iloc[-1] / hist['Close'].iloc[-lookback_months*21]) - 1) * 100 if len(hist) >= lookback_months*21 else 0
-                
-                # ✅ 3M, 6M, 12M Returns
-                return_3m = ((hist['Close'].iloc[-1] / hist['Close'].iloc[-63]) - 1) * 100 if len(hist) >= 63 else 0
-                return_6m = ((hist['Close'].iloc[-1] / hist['Close'].iloc[-126]) - 1) * 100 if len(hist) >= 126 else 0
-                return_12m = ((hist['Close'].iloc[-1] / hist['Close'].iloc[-252]) - 1) * 100 if len(hist) >= 252 else 0
-                
-                # Calculate RSI
-                delta = hist['Close'].diff()
-                gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-                loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-                rs = gain / loss
-                rsi = 100 - (100 / (1 + rs))
-                current_rsi = rsi.iloc[-1] if not rsi.empty else 50
-                
-                # Calculate volatility
-                returns = hist['Close'].pct_change()
-                volatility = returns.std() * np.sqrt(252) * 100
-                
-                # Calculate Sharpe Ratio (annualized)
-                risk_free_rate = 0.02  # 2% Swiss risk-free rate
-                excess_return = returns.mean() * 252 - risk_free_rate
-                sharpe_ratio = excess_return / (returns.std() * np.sqrt(252)) if returns.std() > 0 else 0
-                
-                # Trend strength (current_price already defined above)
-                ma_short_val = hist['MA_Short'].iloc[-1] if not hist['MA_Short'].isna().iloc[-1] else current_price
-                ma_long_val = hist['MA_Long'].iloc[-1] if not hist['MA_Long'].isna().iloc[-1] else current_price
-                
-                if current_price > ma_short_val > ma_long_val:
-                    trend = 'STRONG UPTREND'
-                    trend_color = '#4caf50'
-                    trend_score = 90
-                elif current_price > ma_short_val:
-                    trend = 'UPTREND'
-                    trend_color = '#8bc34a'
-                    trend_score = 70
-                elif current_price < ma_short_val < ma_long_val:
-                    trend = 'DOWNTREND'
-                    trend_color = '#f44336'
-                    trend_score = 30
-                else:
-                    trend = 'NEUTRAL'
-                    trend_color = '#ff9800'
-                    trend_score = 50
-                
-                # Enhanced Momentum score with MACD and Bollinger Bands
-                momentum_score = 0
-                
-                # Momentum Return
-                if momentum_return > 20: momentum_score += 25
-                elif momentum_return > 10: momentum_score += 15
-                elif momentum_return > 0: momentum_score += 8
-                
-                # RSI
-                if current_rsi > 70: momentum_score -= 10  # Overbought
-                elif current_rsi > 50: momentum_score += 12
-                elif current_rsi > 30: momentum_score += 5
-                else: momentum_score -= 10  # Oversold
-                
-                # Moving Averages
-                if current_price > ma_short_val: momentum_score += 15
-                if ma_short_val > ma_long_val: momentum_score += 15
-                
-                # MACD Signal
-                if current_histogram > 0 and current_macd > current_signal: momentum_score += 15  # Bullish
-                elif current_histogram < 0 and current_macd < current_signal: momentum_score -= 10  # Bearish
-                
-                # Bollinger Bands Position
-                if bb_position < 20: momentum_score += 10  # Near lower band (oversold)
-                elif bb_position > 80: momentum_score -= 10  # Near upper band (overbought)
-                elif 40 <= bb_position <= 60: momentum_score += 5  # Middle range (stable)
-                
-                results.append({
-                    'symbol': symbol,
-                    'quantity': quantity,
-                    'momentum_return': momentum_return,
-                    'return_3m': return_3m,
-                    'return_6m': return_6m,
-                    'return_12m': return_12m,
-                    'rsi': current_rsi,
-                    'volatility': volatility,
-                    'sharpe_ratio': sharpe_ratio,
-                    'trend': trend,
-                    'trend_color': trend_color,
-                    'trend_score': trend_score,
-                    'momentum_score': momentum_score,
-                    'ma_short': ma_short_val,
-                    'ma_long': ma_long_val,
-                    'current_price': current_price,
-                    'macd': current_macd,
-                    'macd_signal': current_signal,
-                    'macd_histogram': current_histogram,
-                    'bb_upper': bb_upper,
-                    'bb_middle': bb_middle,
-                    'bb_lower': bb_lower,
-                    'bb_position': bb_position
-                })
-                
-            except Exception as e:
-                print(f"Error analyzing momentum for {symbol}: {e}")
-                continue
-        
-        avg_momentum = sum(r['momentum_return'] for r in results) / len(results) if results else 0
-        avg_score = sum(r['momentum_score'] for r in results) / len(results) if results else 0
-        avg_volatility = sum(r['volatility'] for r in results) / len(results) if results else 0
-        
-        return jsonify({
-            'success': True,
-            'results': results,
-            'summary': {
-                'avgMomentum': avg_momentum,
-                'avgScore': avg_score,
-                'avgVolatility': avg_volatility
-            }
-        })
-        
+        return _analysis_view('momentum')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -15927,126 +16274,7 @@ def momentum_analysis():
 def buyhold_analysis():
     """Perform buy & hold quality analysis on portfolio assets"""
     try:
-        data = request.get_json()
-        portfolio = data.get('portfolio', [])
-        
-        if not portfolio:
-            return jsonify({'error': 'No portfolio data provided'}), 400
-        
-        results = []
-        
-        for asset in portfolio:
-            symbol = asset.get('symbol')
-            quantity = float(asset.get('quantity', 0))
-            
-            try:
-                ticker = yf.Ticker(symbol)
-                info = ticker.info
-                
-                # Quality metrics
-                roe = info.get('returnOnEquity', 0) * 100 if info.get('returnOnEquity') else 0
-                debt_to_equity = info.get('debtToEquity', 100)
-                current_ratio = info.get('currentRatio', 1)
-                profit_margin = info.get('profitMargins', 0) * 100 if info.get('profitMargins') else 0
-                
-                # Growth metrics
-                revenue_growth = info.get('revenueGrowth', 0) * 100 if info.get('revenueGrowth') else 0
-                earnings_growth = info.get('earningsQuarterlyGrowth', 0) * 100 if info.get('earningsQuarterlyGrowth') else 0
-                
-                # Dividend metrics - ✅ SMART DETECTION
-                raw_div = info.get('dividendYield', 0)
-                if raw_div and raw_div > 1:  # Schon in Prozent!
-                    div_yield = raw_div  # NICHT × 100
-                elif raw_div:
-                    div_yield = raw_div * 100  # Dezimal → Prozent
-                else:
-                    div_yield = 0
-                
-                # Safety Cap
-                if div_yield > 20:
-                    div_yield = 0  # Offensichtlich falsch
-                
-                payout_ratio = info.get('payoutRatio', 0) * 100 if info.get('payoutRatio') else 0
-                
-                # ✅ Market Cap
-                market_cap = info.get('marketCap', 0)
-                
-                # ✅ Volatility (echte Berechnung!)
-                hist = ticker.history(period='1y')
-                if not hist.empty and len(hist) > 20:
-                    returns = hist['Close'].pct_change().dropna()
-                    volatility = returns.std() * np.sqrt(252) * 100  # Annualized
-                else:
-                    volatility = 0
-                
-                # Quality score
-                quality_score = 0
-                if roe > 15: quality_score += 25
-                elif roe > 10: quality_score += 15
-                if debt_to_equity < 50: quality_score += 20
-                elif debt_to_equity < 100: quality_score += 10
-                if current_ratio > 1.5: quality_score += 15
-                elif current_ratio > 1: quality_score += 10
-                if profit_margin > 15: quality_score += 20
-                elif profit_margin > 10: quality_score += 10
-                if div_yield > 2: quality_score += 10
-                
-                # Category
-                if quality_score >= 75:
-                    category = 'CORE'
-                    cat_color = '#4caf50'
-                elif quality_score >= 50:
-                    category = 'QUALITY'
-                    cat_color = '#8bc34a'
-                elif quality_score >= 30:
-                    category = 'SATELLITE'
-                    cat_color = '#ff9800'
-                else:
-                    category = 'SPECULATIVE'
-                    cat_color = '#f44336'
-                
-                results.append({
-                    'symbol': symbol,
-                    'quantity': quantity,
-                    'market_cap': market_cap,
-                    'dividend_yield': div_yield,
-                    'volatility': volatility,
-                    'roe': roe,
-                    'debtToEquity': debt_to_equity,
-                    'currentRatio': current_ratio,
-                    'profitMargin': profit_margin,
-                    'revenueGrowth': revenue_growth,
-                    'earningsGrowth': earnings_growth,
-                    'divYield': div_yield,
-                    'payoutRatio': payout_ratio,
-                    'qualityScore': quality_score,
-                    'category': category,
-                    'catColor': cat_color
-                })
-                
-            except Exception as e:
-                print(f"Error analyzing buy&hold for {symbol}: {e}")
-                continue
-        
-        avg_quality = sum(r['qualityScore'] for r in results) / len(results) if results else 0
-        core_count = sum(1 for r in results if r['category'] == 'CORE')
-        satellite_count = sum(1 for r in results if r['category'] in ['SATELLITE', 'SPECULATIVE'])
-        
-        # Estimate expected CAGR based on quality
-        expected_cagr = 5 + (avg_quality / 10)  # Base 5% + quality bonus
-        
-        return jsonify({
-            'success': True,
-            'results': results,
-            'summary': {
-                'avgQuality': avg_quality,
-                'coreCount': core_count,
-                'satelliteCount': satellite_count,
-                'expectedCAGR': expected_cagr,
-                'confidence': min(95, 60 + avg_quality / 3)
-            }
-        })
-        
+        return _analysis_view('buyhold')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -16054,109 +16282,7 @@ def buyhold_analysis():
 def carry_analysis():
     """Perform carry strategy analysis on portfolio assets"""
     try:
-        data = request.get_json()
-        portfolio = data.get('portfolio', [])
-        financing_cost = float(data.get('financingCost', 3)) / 100
-        
-        if not portfolio:
-            return jsonify({'error': 'No portfolio data provided'}), 400
-        
-        results = []
-        total_carry = 0
-        total_value = 0
-        
-        for asset in portfolio:
-            symbol = asset.get('symbol')
-            quantity = float(asset.get('quantity', 0))
-            
-            try:
-                ticker = yf.Ticker(symbol)
-                info = ticker.info
-                
-                current_price = info.get('currentPrice', info.get('regularMarketPrice', 0))
-                
-                # Dividend Yield - ✅ SMART DETECTION
-                raw_div = info.get('dividendYield', 0)
-                if raw_div and raw_div > 1:  # Schon in Prozent!
-                    div_yield = raw_div  # NICHT × 100
-                elif raw_div:
-                    div_yield = raw_div * 100  # Dezimal → Prozent
-                else:
-                    div_yield = 0
-                
-                # Safety Cap
-                if div_yield > 20:
-                    div_yield = 0  # Offensichtlich falsch
-                
-                # Net carry = dividend yield - financing cost
-                net_carry = div_yield - (financing_cost * 100)
-                
-                # Annual income
-                annual_div_per_share = current_price * (div_yield / 100)
-                annual_income = annual_div_per_share * quantity
-                financing_cost_amount = current_price * quantity * financing_cost
-                net_annual_income = annual_income - financing_cost_amount
-                
-                # ✅ Yield Diff (vs Benchmark - z.B. Swiss Gov Bond ~0.5%)
-                benchmark_yield = 0.5
-                yield_diff = div_yield - benchmark_yield
-                
-                # ✅ Risk Premium (einfache Schätzung)
-                hist = ticker.history(period='1y')
-                if not hist.empty and len(hist) > 20:
-                    returns = hist['Close'].pct_change().dropna()
-                    volatility = returns.std() * np.sqrt(252) * 100  # Annualized
-                    risk_premium = (div_yield / volatility) * 100 if volatility > 0 else 0
-                else:
-                    risk_premium = 0
-                
-                # ✅ Trend (Simple 50d MA vs 200d MA)
-                if len(hist) >= 200:
-                    ma_50 = hist['Close'].rolling(window=50).mean().iloc[-1]
-                    ma_200 = hist['Close'].rolling(window=200).mean().iloc[-1]
-                    if ma_50 > ma_200:
-                        trend = 'BULLISH'
-                    else:
-                        trend = 'BEARISH'
-                else:
-                    trend = 'NEUTRAL'
-                
-                asset_value = current_price * quantity
-                total_value += asset_value
-                total_carry += net_annual_income
-                
-                results.append({
-                    'symbol': symbol,
-                    'quantity': quantity,
-                    'currentPrice': current_price,
-                    'divYield': div_yield,
-                    'yield_diff': yield_diff,
-                    'risk_premium': risk_premium,
-                    'trend': trend,
-                    'netCarry': net_carry,
-                    'annualIncome': annual_income,
-                    'financingCost': financing_cost_amount,
-                    'netAnnualIncome': net_annual_income,
-                    'assetValue': asset_value
-                })
-                
-            except Exception as e:
-                print(f"Error analyzing carry for {symbol}: {e}")
-                continue
-        
-        avg_carry = (total_carry / total_value * 100) if total_value > 0 else 0
-        
-        return jsonify({
-            'success': True,
-            'results': results,
-            'summary': {
-                'netCarry': avg_carry,
-                'expectedAnnualReturn': total_carry,
-                'totalValue': total_value,
-                'carryVolatility': abs(avg_carry) * 0.5  # Simplified estimate
-            }
-        })
-        
+        return _analysis_view('carry')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -16174,31 +16300,20 @@ def monte_carlo_correlated():
         if not portfolio or len(portfolio) == 0:
             return jsonify({'error': 'No portfolio data provided'}), 400
         
-        # Get historical data for all assets to calculate correlations
-        symbols = [asset.get('symbol') for asset in portfolio]
-        returns_data = {}
-        
-        for symbol in symbols:
-            try:
-                ticker = yf.Ticker(symbol)
-                hist = ticker.history(period='2y')
-                if not hist.empty:
-                    returns_data[symbol] = hist['Close'].pct_change().dropna()
-            except:
-                continue
+        # Korrelationen aus dem Analyse-Bundle (teilt die Historie mit den Strategie-Analysen)
+        correlation = strategy_analysis.analysis_bundle(
+            portfolio, _analysis_history, get_fundamentals,
+            strategy_analysis.parse_params(data), sections=('correlation',)
+        )['correlation']
+        symbols = correlation['symbols']
         
-        if len(returns_data) == 0:
+        if correlation['observations'] < 2:
             return jsonify({'error': 'Could not fetch historical data'}), 500
         
-        # Align returns on common dates
-        returns_df = pd.DataFrame(returns_data).dropna()
-        
-        # Calculate correlation matrix
-        correlation_matrix = returns_df.corr().values
-        
-        # Calculate mean returns and volatilities
-        mean_returns = returns_df.mean().values * 252  # Annualized
-        volatilities = returns_df.std().values * np.sqrt(252)  # Annualized
+        correlation_matrix = np.array(correlation['matrix'])
+        mean_returns = np.array(correlation['meanReturns'])  # Annualized
+        volatilities = np.array(correlation['volatilities'])  # Annualized
+        portfolio = [next(a for a in portfolio if a.get('symbol') == symbol) for symbol in symbols]
         
         # Apply scenario multipliers
         mean_returns = mean_returns * scenario_mults.get('return', 1.0)
@@ -16265,117 +16380,145 @@ def monte_carlo_correlated():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _bl_history(symbol):
+    """Zwei Jahre Tagesrenditen für Black-Litterman, kurz im Cache geteilt"""
+    cache_key = f"bl_returns_{symbol}"
+    returns = cache.get(cache_key)
+    if returns is None:
+        hist = yf.Ticker(symbol).history(period='2y')
+        if hist.empty:
+            return None
+        returns = hist['Close'].pct_change().dropna()
+        cache.set(cache_key, returns, ttl=300)
+    return symbol, returns
+
+BL_COVARIANCE_WINDOW = 504
+
+def _bl_engine(symbols):
+    """
+    Renditepanel und Black-Litterman-Engine (Σ einmal faktorisiert) für die Symbole.
+
+    Die Engine ist pro (Symbole, Stichtag) gecacht; Symbole ohne Daten fehlen im Panel.
+    """
+    loaded, _ = strategy_analysis.run_per_asset([{'symbol': s} for s in symbols], lambda asset: _bl_history(asset['symbol']))
+    returns_df = pd.DataFrame(dict(loaded)).dropna()
+    if returns_df.empty:
+        return returns_df, None
+    # Σ aus dem inkrementellen Kovarianzzustand: neue Tagesbalken werden nur angehängt
+    engine = black_litterman.get_engine(
+        ('returns_2y', tuple(returns_df.columns)), returns_df.index[-1],
+        lambda: covariance_service.covariance(returns_df, window=BL_COVARIANCE_WINDOW).values,
+        list(returns_df.columns)
+    )
+    return returns_df, engine
+
+BL_SWEEP_MAX_POINTS = 10000
+
+def _bl_sweep(engine, symbols, market_weights, views, taus, risk_aversions, outperformances):
+    """Sensitivitäts-Grid über τ × λ × Views in einem vektorisierten Durchgang"""
+    P, Q = black_litterman.view_matrix(views, symbols) if views else (None, None)
+    if P is None or outperformances is None:
+        Q_grid = [Q] if P is not None else None
+        outperformances = [None]
+    else:
+        # Skalar = gleiche Outperformance für alle Views, Liste = je View
+        Q_grid = [np.broadcast_to(np.asarray(value, dtype=float), Q.shape) for value in outperformances]
+    
+    size = len(taus) * len(risk_aversions) * len(outperformances)
+    if size > BL_SWEEP_MAX_POINTS:
+        return jsonify({'error': f'Sweep grid too large ({size} > {BL_SWEEP_MAX_POINTS} points)'}), 400
+    
+    started = time.time()
+    sweep = engine.sweep(engine.equilibrium(market_weights, 1.0), P, Q_grid, taus, risk_aversions)
+    grid = []
+    for g in range(len(sweep['tau'])):
+        expected_return = float(sweep['expected_return'][g])
+        volatility = float(sweep['volatility'][g])
+        outperformance = outperformances[sweep['q_index'][g]]
+        grid.append({
+            'tau': float(sweep['tau'][g]),
+            'riskAversion': float(sweep['risk_aversion'][g]),
+            'expectedOutperformance': outperformance,
+            'weights': sweep['weights'][g].tolist(),
+            'posteriorReturns': sweep['posterior'][g].tolist(),
+            'expectedReturn': expected_return * 100,
+            'expectedVolatility': volatility * 100,
+            'sharpeRatio': (expected_return - 0.02) / volatility if volatility > 0 else 0
+        })
+    
+    return jsonify({
+        'success': True,
+        'mode': 'sweep',
+        'symbols': symbols,
+        'grid': grid,
+        'duration': round(time.time() - started, 4)
+    })
+
+def _as_list(value):
+    return value if isinstance(value, list) else [value]
+
 @app.route('/api/black_litterman', methods=['POST'])
 def black_litterman_optimization():
-    """Black-Litterman portfolio optimization"""
+    """Black-Litterman portfolio optimization (mit Listen für tau/riskAversion/expectedOutperformance als Sweep)"""
     try:
         data = request.get_json()
         portfolio = data.get('portfolio', [])
         views = data.get('views', [])  # User views: [{asset1: 'NESN.SW', asset2: 'NOVN.SW', view: 0.02}]
-        tau = float(data.get('tau', 0.05))
-        risk_aversion = float(data.get('riskAversion', 2.5))
+        sweep_mode = (isinstance(data.get('tau'), list) or isinstance(data.get('riskAversion'), list)
+                      or isinstance(data.get('expectedOutperformance'), list))
+        taus = [float(t) for t in _as_list(data.get('tau', 0.05))]
+        risk_aversions = [float(r) for r in _as_list(data.get('riskAversion', 2.5))]
+        tau, risk_aversion = taus[0], risk_aversions[0]
         
         if not portfolio or len(portfolio) == 0:
             return jsonify({'error': 'No portfolio data provided'}), 400
+        if not taus or not risk_aversions or min(taus) <= 0 or min(risk_aversions) <= 0:
+            return jsonify({'error': 'tau and riskAversion must be positive'}), 400
         
-        symbols = [asset.get('symbol') for asset in portfolio]
+        # Get historical returns and the factorized covariance (Σ)
+        returns_df, engine = _bl_engine([asset.get('symbol') for asset in portfolio])
         
-        # Get historical returns
-        returns_data = {}
-        for symbol in symbols:
-            try:
-                ticker = yf.Ticker(symbol)
-                hist = ticker.history(period='2y')
-                if not hist.empty:
-                    returns_data[symbol] = hist['Close'].pct_change().dropna()
-            except:
-                continue
-        
-        returns_df = pd.DataFrame(returns_data).dropna()
-        
-        if returns_df.empty:
+        if engine is None:
             return jsonify({'error': 'Could not fetch historical data'}), 500
         
+        symbols = list(returns_df.columns)
+        
         # Market cap weights (from portfolio)
-        market_weights = np.array([asset.get('weight', 1.0/len(portfolio)) for asset in portfolio])
+        weight_by_symbol = {asset.get('symbol'): asset.get('weight', 1.0/len(portfolio)) for asset in portfolio}
+        market_weights = np.array([weight_by_symbol[s] for s in symbols])
         
-        # Covariance matrix (Σ)
-        sigma = returns_df.cov().values * 252  # Annualized
+        if sweep_mode:
+            outperformances = data.get('expectedOutperformance')
+            return _bl_sweep(engine, symbols, market_weights, views, taus, risk_aversions,
+                             None if outperformances is None else _as_list(outperformances))
         
-        # Correlation matrix
-        correlation_matrix = returns_df.corr().values
+        # Correlation matrix (aus dem bereits faktorisierten Σ)
+        correlation_matrix = correlation_from_covariance(engine.sigma)
         
         # Implied equilibrium returns (π = λΣw)
-        pi = risk_aversion * sigma @ market_weights
-        
-        # Process user views
-        if views and len(views) > 0:
-            # Build P matrix (views)
-            P = []
-            Q = []
-            
-            for view in views:
-                # Relative view: Asset1 outperforms Asset2 by X%
-                p_row = np.zeros(len(symbols))
-                if view.get('asset1') in symbols:
-                    idx1 = symbols.index(view.get('asset1'))
-                    p_row[idx1] = 1
-                if view.get('asset2') in symbols:
-                    idx2 = symbols.index(view.get('asset2'))
-                    p_row[idx2] = -1
-                
-                P.append(p_row)
-                Q.append(view.get('expectedOutperformance', 0.02))
-            
-            P = np.array(P)
-            Q = np.array(Q)
-            
-            # Omega (uncertainty of views) - diagonal matrix
-            omega = np.eye(len(Q)) * 0.0001
-            
-            # Black-Litterman formula
-            # μ_BL = [(τΣ)^-1 + P'Ω^-1P]^-1 × [(τΣ)^-1 π + P'Ω^-1 Q]
-            tau_sigma = tau * sigma
-            tau_sigma_inv = np.linalg.inv(tau_sigma)
-            omega_inv = np.linalg.inv(omega)
-            
-            # Middle term
-            middle_inv = tau_sigma_inv + P.T @ omega_inv @ P
-            middle = np.linalg.inv(middle_inv)
-            
-            # Posterior returns
-            mu_bl = middle @ (tau_sigma_inv @ pi + P.T @ omega_inv @ Q)
-        else:
-            # No views, use equilibrium returns
-            mu_bl = pi
-        
-        # Optimal weights: w = (λΣ)^-1 μ_BL
-        optimal_weights = np.linalg.inv(risk_aversion * sigma) @ mu_bl
-        
-        # Normalize weights to sum to 1
-        optimal_weights = optimal_weights / optimal_weights.sum()
+        pi = engine.equilibrium(market_weights, risk_aversion)
         
-        # Ensure no negative weights (optional)
-        optimal_weights = np.maximum(optimal_weights, 0)
-        optimal_weights = optimal_weights / optimal_weights.sum()
-        
-        # Calculate expected portfolio metrics
-        expected_return = mu_bl @ optimal_weights
-        expected_variance = optimal_weights.T @ sigma @ optimal_weights
-        expected_volatility = np.sqrt(expected_variance)
+        # Posterior (Woodbury, k × k View-System) und Gewichte w = (λΣ)^-1 μ_BL
+        P, Q = black_litterman.view_matrix(views, symbols) if views else (None, None)
+        result = engine.optimize(pi, P, Q, tau=tau, risk_aversion=risk_aversion)
+        optimal_weights = result['weights']
+        mu_bl = result['posterior']
+        expected_return = result['expected_return']
+        expected_volatility = result['volatility']
         
         # Format results
         weights_dict = {symbols[i]: float(optimal_weights[i]) for i in range(len(symbols))}
         
         return jsonify({
             'success': True,
+            'symbols': symbols,
             'optimalWeights': weights_dict,
             'expectedReturn': float(expected_return * 100),
             'expectedVolatility': float(expected_volatility * 100),
             'sharpeRatio': float((expected_return - 0.02) / expected_volatility),
             'equilibriumReturns': pi.tolist(),
             'posteriorReturns': mu_bl.tolist(),
-            'correlationMatrix': correlation_matrix.tolist() if 'correlation_matrix' in locals() else []
+            'correlationMatrix': correlation_matrix.tolist()
         })
         
     except Exception as e:
@@ -16397,6 +16540,7 @@ def bvar_analysis():
         nlags = int(data.get('nlags', 2))
         forecast_steps = int(data.get('forecastSteps', 12))
         bayesian_mode = bool(data.get('bayesian', False))
+        tightness = float(data['tightness']) if data.get('tightness') is not None else None
         
         # Determine tickers
         if custom_tickers:
@@ -16412,7 +16556,8 @@ def bvar_analysis():
             'start': '2015-01-01',
             'nlags': nlags,
             'forecast_steps': forecast_steps,
-            'bayesian': bayesian_mode
+            'bayesian': bayesian_mode,
+            'tightness': tightness
         }
         
         result = run_bvar_pipeline(config)
@@ -16430,6 +16575,11 @@ def bvar_analysis():
                 'values': values
             })
         
+        # Posterior-Quantilbänder (nur Bayesian-Modus)
+        bands = None
+        if result.get('forecast_bands'):
+            bands = {str(q): frame.to_dict('list') for q, frame in result['forecast_bands'].items()}
+        
         # FEVD to dict
         fevd_dict = None
         if result.get('fevd_df') is not None:
@@ -16444,7 +16594,8 @@ def bvar_analysis():
             'fevd': fevd_dict,
             'irf_plot_path': result.get('irf_plot', ''),
             'metadata': result['metadata'],
-            'bayesian_meta': result.get('bayesian_meta')
+            'bayesian_meta': result.get('bayesian_meta'),
+            'forecast_bands': bands
         })
         
     except Exception as e:
@@ -16474,59 +16625,25 @@ def bvar_black_litterman():
             'start': '2015-01-01',
             'nlags': nlags,
             'forecast_steps': 12,
-            'bayesian': False  # Use classical for speed
+            # Minnesota-BVAR ist geschlossen lösbar und damit schnell genug für interaktive Aufrufe
+            'bayesian': bool(data.get('bayesian', False))
         }
         
         bvar_result = run_bvar_pipeline(config)
         pi = bvar_forecast_to_pi(bvar_result['forecast'])
-        sigma = estimate_sigma_from_data(bvar_result['data'])
-        
-        # Market weights
-        market_weights = np.array([asset.get('weight', 1.0/len(portfolio)) for asset in portfolio])
-        
-        # Process user views
-        if views and len(views) > 0:
-            P = []
-            Q = []
-            
-            for view in views:
-                p_row = np.zeros(len(symbols))
-                if view.get('asset1') in symbols:
-                    idx1 = symbols.index(view.get('asset1'))
-                    p_row[idx1] = 1
-                if view.get('asset2') in symbols:
-                    idx2 = symbols.index(view.get('asset2'))
-                    p_row[idx2] = -1
-                
-                P.append(p_row)
-                Q.append(view.get('expectedOutperformance', 0.02))
-            
-            P = np.array(P)
-            Q = np.array(Q)
-            omega = np.eye(len(Q)) * 0.0001
-            
-            # Black-Litterman formula with BVAR pi
-            tau_sigma = tau * sigma
-            tau_sigma_inv = np.linalg.inv(tau_sigma)
-            omega_inv = np.linalg.inv(omega)
-            
-            middle_inv = tau_sigma_inv + P.T @ omega_inv @ P
-            middle = np.linalg.inv(middle_inv)
-            
-            mu_bl = middle @ (tau_sigma_inv @ pi + P.T @ omega_inv @ Q)
-        else:
-            mu_bl = pi
-        
-        # Optimal weights
-        optimal_weights = np.linalg.inv(risk_aversion * sigma) @ mu_bl
-        optimal_weights = optimal_weights / optimal_weights.sum()
-        optimal_weights = np.maximum(optimal_weights, 0)
-        optimal_weights = optimal_weights / optimal_weights.sum()
-        
-        # Expected metrics
-        expected_return = mu_bl @ optimal_weights
-        expected_variance = optimal_weights.T @ sigma @ optimal_weights
-        expected_volatility = np.sqrt(expected_variance)
+        
+        # Σ aus den BVAR-Daten, pro (Symbole, Lags, Stichtag) einmal faktorisiert
+        engine = black_litterman.get_engine(
+            ('bvar', tuple(symbols), config['start'], nlags), bvar_result['data'].index[-1],
+            lambda: estimate_sigma_from_data(bvar_result['data']), symbols
+        )
+        
+        # Black-Litterman with BVAR pi (Woodbury posterior, Cholesky solves)
+        P, Q = black_litterman.view_matrix(views, symbols) if views else (None, None)
+        result = engine.optimize(pi, P, Q, tau=tau, risk_aversion=risk_aversion)
+        optimal_weights = result['weights']
+        expected_return = result['expected_return']
+        expected_volatility = result['volatility']
         
         weights_dict = {symbols[i]: float(optimal_weights[i]) for i in range(len(symbols))}
         
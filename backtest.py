@@ -0,0 +1,225 @@
+"""
+Swiss Asset Manager - Walk-Forward Backtest
+-------------------------------------------
+Out-of-Sample-Test der fünf Optimierungsstrategien aus /api/strategy_optimization
+(Mean-Variance, Risk Parity, Min Variance, Max Sharpe, Black-Litterman).
+
+An jedem Rebalancing-Stichtag (Ende Woche/Monat/Quartal/Jahr) werden μ und Σ
+nur aus den Renditen bis zum Stichtag geschätzt (rollendes oder wachsendes
+Fenster), die Gewichte gelten ab dem nächsten Handelstag. Umschichtungen
+kosten die Schweizer Umsatzabgabe auf dem gehandelten Volumen.
+
+- Die Optimierungen laufen parallel über zusammenhängende Blöcke von
+  Stichtagen; innerhalb eines Blocks startet jede Strategie warm mit den
+  Gewichten des vorherigen Stichtags.
+- Die NAV wird ohne Tagesschleife berechnet: mit den kumulierten
+  Asset-Wachstumsfaktoren C ist der Wert im Segment k
+  V_k · Σ_j w_kj C_tj / C_(t_k)j, also ein Produkt über alle Tage.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import nav_engine
+import portfolio_solvers
+from factor_model import FactorCovariance
+
+logger = logging.getLogger('swiss_asset_pro')
+
+TRADING_DAYS = 252
+DEFAULT_LOOKBACK = 252
+MAX_WORKERS = 4
+BL_RISK_AVERSION = 2.5
+
+
+def _mean_variance(cov, mu, risk_free_rate, x0):
+    # Wie strategy_optimization: 80 % der durchschnittlichen erwarteten Rendite als Ziel
+    return portfolio_solvers.mean_variance(cov, mu, 0.8 * mu.mean(), x0=x0)
+
+
+def _risk_parity(cov, mu, risk_free_rate, x0):
+    return portfolio_solvers.risk_parity(cov, x0=x0)
+
+
+def _min_variance(cov, mu, risk_free_rate, x0):
+    return portfolio_solvers.min_variance(cov, x0=x0)
+
+
+def _max_sharpe(cov, mu, risk_free_rate, x0):
+    return portfolio_solvers.max_sharpe(cov, mu, risk_free_rate, x0=x0)
+
+
+def _black_litterman(cov, mu, risk_free_rate, x0):
+    # Gleichgewicht π = δΣw mit gleichen Marktgewichten, ohne Views (wie strategy_optimization)
+    market = np.full(len(mu), 1.0 / len(mu))
+    return portfolio_solvers.max_sharpe(cov, BL_RISK_AVERSION * (cov @ market), risk_free_rate, x0=x0)
+
+
+STRATEGIES = {
+    'mean_variance': ('Mean-Variance', _mean_variance),
+    'risk_parity': ('Risk Parity', _risk_parity),
+    'min_variance': ('Min Variance', _min_variance),
+    'max_sharpe': ('Max Sharpe', _max_sharpe),
+    'black_litterman': ('Black-Litterman', _black_litterman),
+}
+
+
+def rebalance_positions(index, frequency='monthly', lookback=DEFAULT_LOOKBACK):
+    """
+    Zeilenpositionen der Rebalancing-Stichtage: letzter Handelstag je Periode,
+    frühestens nach `lookback` Beobachtungen und vor dem letzten Tag des Panels.
+    """
+    ends = nav_engine.period_ends(index, frequency)
+    return ends[(ends >= lookback - 1) & (ends < len(index) - 1)]
+
+
+def _estimate(window, n_factors=None):
+    """μ und Σ (annualisiert) der Assets mit vollständiger Historie im Fenster"""
+    available = ~np.isnan(window).any(axis=0)
+    X = window[:, available]
+    mu = X.mean(axis=0) * TRADING_DAYS
+    if n_factors:
+        cov = FactorCovariance.from_returns(X, n_factors)
+    else:
+        cov = np.cov(X, rowvar=False) * TRADING_DAYS
+    return available, mu, cov
+
+
+def _optimize_chunk(returns, positions, lookback, expanding, strategies, risk_free_rate, n_factors):
+    """
+    Gewichte aller Strategien für einen Block aufeinanderfolgender Stichtage.
+
+    Modulfunktion ohne Closure, damit sie auch in einem Prozess-Pool laufen kann.
+
+    Returns:
+        Liste je Stichtag von {strategie: (gewichte (n,) oder None, iterationen)}
+    """
+    n = returns.shape[1]
+    warm = {}
+    results = []
+    for position in positions:
+        start = 0 if expanding else max(0, position + 1 - lookback)
+        available, mu, cov = _estimate(returns[start:position + 1], n_factors)
+        row = {}
+        for key in strategies:
+            if available.sum() < 2:
+                row[key] = (None, 0)
+                continue
+            previous = warm.get(key)
+            x0 = previous[1] if previous is not None and np.array_equal(previous[0], available) else None
+            try:
+                solution = STRATEGIES[key][1](cov, mu, risk_free_rate, x0)
+            except Exception as e:
+                logger.warning(f"Backtest {key} failed at row {position}: {e}")
+                row[key] = (None, 0)
+                continue
+            if solution['weights'] is None or not solution['converged']:
+                row[key] = (None, solution['iterations'])
+                continue
+            weights = np.zeros(n)
+            weights[available] = solution['weights']
+            warm[key] = (available, solution['weights'])
+            row[key] = (weights, solution['iterations'])
+        results.append(row)
+    return results
+
+
+def _statistics(nav, risk_free_rate):
+    summary = nav_engine.nav_summary(nav, risk_free_rate, levels=(0.95,))
+    return {
+        'total_return': summary['total_return'],
+        'annual_return': summary['annual_return'],
+        'volatility': summary['volatility'],
+        'sharpe': summary['sharpe'],
+        'max_drawdown': summary['drawdown']['max_drawdown'],
+        'var_95': summary['var'][0.95]['var'],
+        'cvar_95': summary['var'][0.95]['cvar'],
+    }
+
+
+def run_backtest(returns, strategies=None, frequency='monthly', lookback=DEFAULT_LOOKBACK, window='rolling',
+                 cost_rate=0.0015, risk_free_rate=0.02, n_factors=None, max_workers=MAX_WORKERS, executor=None):
+    """
+    Walk-Forward-Backtest der Strategien auf einem Renditepanel.
+
+    Args:
+        returns: DataFrame der Tagesrenditen (Datum × Symbol)
+        strategies: Schlüssel aus STRATEGIES (Default: alle fünf)
+        frequency: weekly, monthly, quarterly oder annual
+        lookback: Beobachtungen im Schätzfenster (bzw. Mindesthistorie bei window='expanding')
+        window: 'rolling' oder 'expanding'
+        cost_rate: Transaktionskosten je gehandeltem Franken (Umsatzabgabe)
+        executor: optionaler Pool (z.B. ProcessPoolExecutor); Default: Thread-Pool
+
+    Returns:
+        Dict mit dates, symbols, rebalance_dates und je Strategie nav, weights,
+        turnover, costs, statistics, failed_rebalances
+    """
+    started = time.time()
+    strategies = list(strategies or STRATEGIES)
+    unknown = [key for key in strategies if key not in STRATEGIES]
+    if unknown:
+        raise ValueError(f"Unknown strategies: {', '.join(unknown)}")
+    if window not in ('rolling', 'expanding'):
+        raise ValueError(f"Unknown window '{window}'")
+
+    returns = returns.dropna(how='all')
+    R = returns.to_numpy(dtype=float)
+    positions = rebalance_positions(returns.index, frequency, lookback)
+    if len(positions) == 0:
+        raise ValueError(f"Not enough history: {len(R)} observations for a {lookback}-day lookback")
+
+    chunks = [chunk for chunk in np.array_split(positions, max(1, min(max_workers, len(positions)))) if len(chunk)]
+    arguments = (lookback, window == 'expanding', strategies, risk_free_rate, n_factors)
+    if executor is None and len(chunks) > 1:
+        with ThreadPoolExecutor(max_workers=len(chunks)) as pool:
+            parts = list(pool.map(lambda chunk: _optimize_chunk(R, chunk, *arguments), chunks))
+    elif executor is None:
+        parts = [_optimize_chunk(R, chunks[0], *arguments)]
+    else:
+        futures = [executor.submit(_optimize_chunk, R, chunk, *arguments) for chunk in chunks]
+        parts = [future.result() for future in futures]
+    rows = [row for part in parts for row in part]
+
+    dates = returns.index[positions[0]:]
+    results = {}
+    for key in strategies:
+        # Fehlgeschlagene Stichtage behalten die vorherigen Zielgewichte (anfangs gleichgewichtet)
+        weights = np.empty((len(positions), R.shape[1]))
+        previous = np.full(R.shape[1], 1.0 / R.shape[1])
+        failed = 0
+        for k, row in enumerate(rows):
+            if row[key][0] is None:
+                failed += 1
+            else:
+                previous = row[key][0]
+            weights[k] = previous
+        path = nav_engine.walk_forward_nav(R, positions, weights, cost_rate)
+        results[key] = {
+            'name': STRATEGIES[key][0],
+            'nav': path['nav'],
+            'weights': weights,
+            'turnover': path['turnover'],
+            'costs': path['costs'],
+            'statistics': {
+                **_statistics(path['nav'], risk_free_rate),
+                'average_turnover': float(path['turnover'][1:].mean()) if len(positions) > 1 else 0.0,
+                'total_costs': float(path['costs'].sum()),
+            },
+            'iterations': int(sum(row[key][1] for row in rows)),
+            'failed_rebalances': failed,
+        }
+
+    duration = time.time() - started
+    logger.info(f"Backtest: {len(strategies)} strategies × {len(positions)} rebalances × {R.shape[1]} assets "
+                f"in {duration:.2f}s")
+    return {
+        'symbols': list(returns.columns),
+        'dates': dates,
+        'rebalance_dates': returns.index[positions],
+        'strategies': results,
+        'duration': duration,
+    }
@@ -0,0 +1,249 @@
+"""
+Swiss Asset Manager - Black-Litterman Engine
+--------------------------------------------
+Gemeinsamer Kern für /api/black_litterman und /api/bvar_black_litterman.
+
+Σ wird einmal per Cholesky faktorisiert; statt der vier expliziten
+Inversen (τΣ)⁻¹, Ω⁻¹, [(τΣ)⁻¹ + PᵀΩ⁻¹P]⁻¹ und (λΣ)⁻¹ nutzt die Engine die
+Woodbury-Form des Posteriors
+
+    μ_BL = π + τΣPᵀ (PτΣPᵀ + Ω)⁻¹ (Q - Pπ)
+
+die nur ein k × k System der k Views löst, und für die Gewichte
+
+    w = (λΣ)⁻¹ μ_BL = (1/λ) Σ⁻¹π + (τ/λ) Pᵀ x,   x = (PτΣPᵀ + Ω)⁻¹ (Q - Pπ)
+
+mit zwei Dreieckslösungen für Σ⁻¹π. Die Faktorisierung wird pro
+(Panel, Stichtag) zwischengespeichert, sodass wiederholte Anfragen auf
+denselben Daten nur noch O(n k + k³) kosten.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from scipy.linalg import cho_factor, cho_solve
+
+logger = logging.getLogger('swiss_asset_pro')
+
+DEFAULT_VIEW_VARIANCE = 0.0001
+MAX_CACHED_ENGINES = 32
+
+
+class BlackLittermanEngine:
+    """Cholesky-faktorisierte Kovarianz mit Black-Litterman-Posterior und Gewichten"""
+
+    def __init__(self, sigma, symbols=None):
+        self.sigma = np.asarray(sigma, dtype=float)
+        self.symbols = list(symbols) if symbols is not None else None
+        self.jitter = 0.0
+        self._factor = self._cholesky(self.sigma)
+        self._equilibrium = {}
+
+    def _cholesky(self, sigma):
+        """Cholesky von Σ; bei (numerisch) singulärer Σ mit wachsendem Ridge"""
+        try:
+            return cho_factor(sigma, lower=True, check_finite=False)
+        except np.linalg.LinAlgError:
+            pass
+        scale = max(np.trace(sigma) / len(sigma), 1e-12)
+        for exponent in range(-10, -1):
+            jitter = scale * 10.0 ** exponent
+            try:
+                factor = cho_factor(sigma + np.eye(len(sigma)) * jitter, lower=True, check_finite=False)
+            except np.linalg.LinAlgError:
+                continue
+            self.jitter = jitter
+            logger.warning(f"Black-Litterman: Σ nicht positiv definit, Ridge {jitter:.2e} verwendet")
+            return factor
+        raise np.linalg.LinAlgError('Covariance matrix is not positive definite')
+
+    def solve(self, rhs):
+        """Σ⁻¹ rhs über zwei Dreieckslösungen"""
+        return cho_solve(self._factor, rhs, check_finite=False)
+
+    def equilibrium(self, market_weights, risk_aversion):
+        """Implizite Gleichgewichtsrenditen π = λΣw (Σw pro Gewichtsvektor gecacht)"""
+        market_weights = np.asarray(market_weights, dtype=float)
+        key = market_weights.tobytes()
+        base = self._equilibrium.get(key)
+        if base is None:
+            base = self._equilibrium[key] = self.sigma @ market_weights
+        return risk_aversion * base
+
+    def view_update(self, pi, P, Q, tau, omega=None):
+        """
+        Lösung x = (PτΣPᵀ + Ω)⁻¹ (Q - Pπ) des k × k View-Systems und τΣPᵀ.
+
+        Returns:
+            (sigma_pt, x) mit sigma_pt = τΣPᵀ (n × k)
+        """
+        P = np.atleast_2d(np.asarray(P, dtype=float))
+        Q = np.asarray(Q, dtype=float)
+        omega = np.eye(len(Q)) * DEFAULT_VIEW_VARIANCE if omega is None else np.asarray(omega, dtype=float)
+        sigma_pt = tau * (self.sigma @ P.T)
+        system = P @ sigma_pt + omega
+        x = np.linalg.solve(system, Q - P @ pi)
+        return sigma_pt, x
+
+    def posterior(self, pi, P=None, Q=None, tau=0.05, omega=None):
+        """Posterior-Renditen μ_BL (ohne Views = π)"""
+        pi = np.asarray(pi, dtype=float)
+        if P is None or len(P) == 0:
+            return pi.copy()
+        sigma_pt, x = self.view_update(pi, P, Q, tau, omega)
+        return pi + sigma_pt @ x
+
+    def optimize(self, pi, P=None, Q=None, tau=0.05, risk_aversion=2.5, omega=None):
+        """
+        Posterior und unbeschränkte Optimalgewichte w = (λΣ)⁻¹ μ_BL.
+
+        Die Gewichte werden wie bisher in den Endpoints auf Summe 1 normiert,
+        negative Gewichte abgeschnitten und erneut normiert.
+
+        Returns:
+            Dict mit posterior, weights, expected_return, volatility
+        """
+        pi = np.asarray(pi, dtype=float)
+        raw = self.solve(pi) / risk_aversion
+        if P is not None and len(P) > 0:
+            sigma_pt, x = self.view_update(pi, P, Q, tau, omega)
+            posterior = pi + sigma_pt @ x
+            raw = raw + (tau / risk_aversion) * (np.atleast_2d(P).T @ x)
+        else:
+            posterior = pi.copy()
+
+        weights = normalize_long_only(raw)
+        expected_return = float(posterior @ weights)
+        volatility = float(np.sqrt(max(weights @ self.sigma @ weights, 0.0)))
+        return {
+            'posterior': posterior,
+            'weights': weights,
+            'expected_return': expected_return,
+            'volatility': volatility,
+        }
+
+    def sweep(self, pi, P, Q_grid, taus, risk_aversions, equilibrium=True, omega=None):
+        """
+        Posterior und Gewichte für alle Kombinationen (τ, λ, Q) in einem Durchgang.
+
+        Σ⁻¹π und τΣPᵀ werden einmal berechnet; pro τ wird das k × k View-System
+        für alle (λ, Q)-Kombinationen gemeinsam gelöst.
+
+        Args:
+            pi: bei equilibrium=True die Basis Σw (π(λ) = λ Σw), sonst feste Renditen
+            P: (k × n) View-Matrix
+            Q_grid: (m × k) View-Renditen, eine Zeile pro Szenario
+            taus, risk_aversions: Parameterlisten
+
+        Returns:
+            Dict mit tau, risk_aversion, q_index (je G,), posterior und weights (G × n),
+            expected_return und volatility (G,); G = len(taus) · len(risk_aversions) · m
+        """
+        pi = np.asarray(pi, dtype=float)
+        taus = np.asarray(taus, dtype=float)
+        lambdas = np.asarray(risk_aversions, dtype=float)
+        P = np.atleast_2d(np.asarray(P, dtype=float)) if P is not None else np.zeros((0, len(pi)))
+        Q_grid = np.asarray(Q_grid, dtype=float).reshape(-1, len(P)) if len(P) else np.zeros((1, 0))
+        k, m = len(P), len(Q_grid)
+        omega = np.eye(k) * DEFAULT_VIEW_VARIANCE if omega is None else np.asarray(omega, dtype=float)
+
+        # π und Σ⁻¹π je λ: (L × n)
+        scale = lambdas if equilibrium else np.ones_like(lambdas)
+        pis = scale[:, None] * pi
+        inv_pis = scale[:, None] * self.solve(pi)
+        sigma_pt = self.sigma @ P.T                                   # (n × k)
+        p_sigma_pt = P @ sigma_pt                                     # (k × k)
+
+        # Residuen Q - Pπ für alle (λ, Q): (L × m × k)
+        residual = Q_grid[None, :, :] - (pis @ P.T)[:, None, :]
+        # Pro τ ein k × k System, rechte Seiten für alle (λ, Q): (T × k × L·m)
+        if k:
+            systems = taus[:, None, None] * p_sigma_pt + omega
+            rhs = np.broadcast_to(residual.reshape(-1, k).T, (len(taus), k, len(lambdas) * m))
+            x = np.linalg.solve(systems, rhs).transpose(0, 2, 1)
+        else:
+            x = np.zeros((len(taus), len(lambdas) * m, 0))
+        x = x.reshape(len(taus), len(lambdas), m, k)                  # (T × L × m × k)
+
+        tau_grid = taus[:, None, None, None]
+        posterior = pis[None, :, None, :] + tau_grid * (x @ sigma_pt.T)
+        raw = inv_pis[None, :, None, :] / lambdas[None, :, None, None] \
+            + (tau_grid / lambdas[None, :, None, None]) * (x @ P)
+
+        n = len(pi)
+        posterior = posterior.reshape(-1, n)
+        weights = normalize_long_only(raw.reshape(-1, n))
+        expected_return = np.einsum('gi,gi->g', posterior, weights)
+        volatility = np.sqrt(np.maximum(np.einsum('gi,gi->g', weights @ self.sigma, weights), 0.0))
+
+        grid_tau, grid_lambda, grid_q = np.meshgrid(taus, lambdas, np.arange(m), indexing='ij')
+        return {
+            'tau': grid_tau.ravel(),
+            'risk_aversion': grid_lambda.ravel(),
+            'q_index': grid_q.ravel(),
+            'posterior': posterior,
+            'weights': weights,
+            'expected_return': expected_return,
+            'volatility': volatility,
+        }
+
+
+def normalize_long_only(raw):
+    """Normieren, negative Gewichte abschneiden, erneut normieren (auch zeilenweise für G × n)"""
+    weights = raw / raw.sum(axis=-1, keepdims=True)
+    weights = np.maximum(weights, 0)
+    return weights / weights.sum(axis=-1, keepdims=True)
+
+
+def view_matrix(views, symbols):
+    """
+    Relative Views [{asset1, asset2, expectedOutperformance}] als P (k × n) und Q (k,).
+
+    Unbekannte Symbole ergeben eine Null-Spalte, wie in den bisherigen Endpoints.
+    """
+    position = {symbol: i for i, symbol in enumerate(symbols)}
+    P = np.zeros((len(views), len(symbols)))
+    Q = np.zeros(len(views))
+    for row, view in enumerate(views):
+        if view.get('asset1') in position:
+            P[row, position[view.get('asset1')]] = 1
+        if view.get('asset2') in position:
+            P[row, position[view.get('asset2')]] = -1
+        Q[row] = view.get('expectedOutperformance', 0.02)
+    return P, Q
+
+
+_engines = OrderedDict()
+_engines_lock = threading.Lock()
+
+
+def get_engine(key, as_of, build_sigma, symbols=None):
+    """
+    Engine für (key, as_of) aus dem Cache oder neu faktorisiert.
+
+    Args:
+        key: Identität des Panels (z.B. Quelle, Symbole, Periode)
+        as_of: Stichtag der letzten Beobachtung; neue Daten ergeben eine neue Engine
+        build_sigma: Callable ohne Argumente, liefert Σ (nur bei Cache-Miss aufgerufen)
+    """
+    cache_key = (key, str(as_of))
+    with _engines_lock:
+        engine = _engines.get(cache_key)
+        if engine is not None:
+            _engines.move_to_end(cache_key)
+            return engine
+
+    engine = BlackLittermanEngine(build_sigma(), symbols)
+    with _engines_lock:
+        _engines[cache_key] = engine
+        _engines.move_to_end(cache_key)
+        while len(_engines) > MAX_CACHED_ENGINES:
+            _engines.popitem(last=False)
+    return engine
+
+
+def clear_cache():
+    with _engines_lock:
+        _engines.clear()
@@ -4,18 +4,21 @@ BVAR Service für Swiss Asset Pro
 - Datenabruf (yfinance, FRED)
 - Preprocessing
 - Klassische VAR-Schätzung (statsmodels)
-- Optional: Bayesian VAR via PyMC3 (Toggle)
+- Optional: Bayesian VAR mit konjugiertem Minnesota-Prior (Toggle, geschlossene Form)
 - Forecast, IRF, FEVD
-- Caching & Export
+- Inhaltsadressierter Ergebnis-Cache (Speicher + Pickle) & Export
 """
 
 import os
+import glob
+import hashlib
 import logging
+import threading
+from collections import OrderedDict
 from datetime import datetime
 import pickle
 import json
 
-import numpy as np
 import pandas as pd
 import matplotlib
 matplotlib.use('Agg')  # Non-interactive backend
@@ -29,12 +32,7 @@ try:
 except Exception:
     Fred = None
 
-try:
-    import pymc3 as pm
-    import arviz as az
-    PYMC3_AVAILABLE = True
-except Exception:
-    PYMC3_AVAILABLE = False
+from bvar_module.minnesota import MinnesotaBVAR
 
 LOGGER = logging.getLogger(__name__)
 LOGGER.setLevel(logging.INFO)
@@ -51,12 +49,20 @@ fred = Fred(api_key=FRED_API_KEY) if (FRED_API_KEY and Fred) else None
 
 DEFAULT_TICKERS = ['^GSPC', '^IXIC', 'DGS10']
 FREQ = 'M'  # Monthly frequency
+POSTERIOR_DRAWS = 1000
+MAX_CACHED_RESULTS = 32       # im Speicher je Prozess
+MAX_CACHED_RESULT_FILES = 128  # Pickles in CACHE_DIR
+
+_results = OrderedDict()
+_results_lock = threading.Lock()
 
 def cache_save(obj, name):
-    """Save object to cache"""
+    """Save object to cache (atomar, parallele Worker lesen nie halbe Dateien)"""
     path = os.path.join(CACHE_DIR, name)
-    with open(path, "wb") as f:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
         pickle.dump(obj, f)
+    os.replace(tmp_path, path)
     return path
 
 def cache_load(name):
@@ -174,32 +180,84 @@ def fevd_table(var_res, steps=12):
         LOGGER.error("FEVD error: %s", e)
         return None
 
-def bvar_pymc3_simple(data, nlags=2, draws=1000, tune=1000, target_accept=0.9):
-    """Bayesian VAR using PyMC3 (optional, computationally intensive)"""
-    if not PYMC3_AVAILABLE:
-        raise RuntimeError("PyMC3 not installed. Install pymc3 and arviz to use Bayesian mode.")
-    
-    df = data.copy()
-    N = df.shape[1]
-    T = df.shape[0]
-    lags = nlags
-    
-    # Construct lagged design matrix
-    Ys = df.values[lags:]
-    Xs = []
-    for i in range(1, lags+1):
-        Xs.append(df.shift(i).values[lags:])
-    X = np.hstack(Xs)
-    X = np.hstack([np.ones((X.shape[0], 1)), X])  # Add intercept
-    
-    with pm.Model() as model:
-        sigma = pm.Exponential("sigma", 1.0, shape=N)
-        B = pm.Normal("B", mu=0, sigma=1, shape=(X.shape[1], N))
-        mu = pm.math.dot(X, B)
-        Yobs = pm.Normal("Yobs", mu=mu, sigma=sigma, observed=Ys)
-        trace = pm.sample(draws=draws, tune=tune, target_accept=target_accept, return_inferencedata=True)
-    
-    return trace
+def bvar_minnesota(data, nlags=2, steps=12, draws=POSTERIOR_DRAWS, tightness=None, seed=None):
+    """
+    Bayesian VAR mit Minnesota-NIW-Prior: Posterior analytisch, Tightness per
+    Marginal Likelihood, Forecast aus vektorisierten Posterior-Ziehungen
+    """
+    model = MinnesotaBVAR(nlags=nlags, tightness=tightness).fit(data)
+    last_date = pd.to_datetime(data.index[-1])
+    idx = pd.date_range(start=last_date, periods=steps+1, freq=FREQ)[1:]
+    forecast = model.forecast(steps=steps, draws=draws, index=idx, rng=seed)
+    return model, forecast
+
+def data_as_of(end=None):
+    """
+    Letzte Monatsperiode eines Abrufs bis `end` (Default heute). Der laufende
+    Monat zählt als eine Periode: das Ergebnis wird erst mit dem nächsten
+    Monat neu berechnet.
+    """
+    ts = pd.Timestamp(end) if end else pd.Timestamp.today()
+    return ts.to_period('M').strftime('%Y-%m')
+
+def result_cache_key(tickers, start, end, nlags, steps, bayesian, as_of, **extra):
+    """Inhaltsadresse eines Pipeline-Ergebnisses: SHA-256 über die Konfiguration und den Datenstand"""
+    payload = {
+        "tickers": [str(t) for t in tickers],
+        "start": str(start),
+        "end": None if end is None else str(end),
+        "nlags": int(nlags),
+        "steps": int(steps),
+        "bayesian": bool(bayesian),
+        "as_of": str(as_of),
+        **extra,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()[:32]
+
+def _cached_result(key):
+    """Ergebnis aus dem Speicher oder, z.B. nach Neustart oder aus einem anderen Worker, von Disk"""
+    with _results_lock:
+        if key in _results:
+            _results.move_to_end(key)
+            return _results[key]
+    try:
+        result = cache_load(f"bvar_result_{key}.pkl")
+    except Exception as e:
+        LOGGER.warning("Unreadable BVAR cache file for %s: %s", key, e)
+        return None
+    if result is not None:
+        _remember(key, result)
+    return result
+
+def _remember(key, result):
+    with _results_lock:
+        _results[key] = result
+        _results.move_to_end(key)
+        while len(_results) > MAX_CACHED_RESULTS:
+            _results.popitem(last=False)
+
+def _store_result(key, result):
+    _remember(key, result)
+    cache_save(result, f"bvar_result_{key}.pkl")
+    # Ältere Datenstände werden nie mehr adressiert; nur die neuesten Dateien behalten.
+    # Parallele Requests können Dateien zwischen glob und getmtime löschen: Aufräumen
+    # darf den Request nie scheitern lassen
+    try:
+        files = sorted(glob.glob(os.path.join(CACHE_DIR, "bvar_result_*.pkl")), key=os.path.getmtime)
+        for path in files[:-MAX_CACHED_RESULT_FILES]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    except OSError as e:
+        LOGGER.warning("Could not prune BVAR result cache: %s", e)
+
+def clear_result_cache(files=False):
+    with _results_lock:
+        _results.clear()
+    if files:
+        for path in glob.glob(os.path.join(CACHE_DIR, "bvar_result_*.pkl")):
+            os.remove(path)
 
 def run_bvar_pipeline(config: dict):
     """
@@ -211,9 +269,15 @@ def run_bvar_pipeline(config: dict):
         'end': end date (optional),
         'nlags': number of lags,
         'bayesian': True/False,
+        'tightness': Minnesota-Tightness λ (optional, sonst per Marginal Likelihood),
+        'draws': Posterior-Ziehungen im Bayesian-Modus,
         'forecast_steps': forecast horizon,
-        'use_local_prices_df': optional DataFrame
+        'use_local_prices_df': optional DataFrame,
+        'use_cache': Ergebnis-Cache verwenden (Default True)
     }
+    
+    Ergebnisse werden unter result_cache_key(...) im Speicher und als Pickle
+    abgelegt; neue Monatsdaten ergeben einen neuen Schlüssel.
     """
     tickers = config.get("tickers", DEFAULT_TICKERS)
     start = config.get("start", "2010-01-01")
@@ -221,12 +285,30 @@ def run_bvar_pipeline(config: dict):
     nlags = int(config.get("nlags", 2))
     bayesian = bool(config.get("bayesian", False))
     steps = int(config.get("forecast_steps", 12))
+    draws = int(config.get("draws", POSTERIOR_DRAWS))
+    tightness = config.get("tightness")
     local = config.get("use_local_prices_df", None)
+    use_cache = bool(config.get("use_cache", True))
     
-    # Load or fetch data
+    # Cache-Schlüssel vor dem Datenabruf: bei Treffer kein Download, kein Fit
+    data = None
+    extra = {"tightness": tightness, "draws": draws} if bayesian else {}
     if isinstance(local, pd.DataFrame):
         data = local.copy()
+        as_of = str(data.index[-1]) if len(data) else None
+        extra["data"] = hashlib.sha256(pd.util.hash_pandas_object(data, index=True).values.tobytes()).hexdigest()
     else:
+        as_of = data_as_of(end)
+    key = result_cache_key(tickers, start, end, nlags, steps, bayesian, as_of, **extra)
+    
+    if use_cache:
+        cached = _cached_result(key)
+        if cached is not None:
+            LOGGER.info("BVAR result served from cache (%s, data as of %s)", key, as_of)
+            return {**cached, "metadata": {**cached["metadata"], "cache_hit": True}}
+    
+    # Load or fetch data
+    if data is None:
         data = build_dataset(tickers=tickers, start=start, end=end)
     
     if data.shape[0] < nlags + 10:
@@ -251,22 +333,19 @@ def run_bvar_pipeline(config: dict):
         fevd_filename = f"fevd_{'_'.join([str(t) for t in tickers])}_{nlags}.csv".replace('/', '_').replace('^', '')
         fevd_path = export_df_to_csv(fevd_df, fevd_filename)
     
-    # Bayesian VAR (optional)
-    bvar_trace = None
+    # Bayesian VAR (optional): Posterior-Mittel ersetzt die klassische Prognose
+    forecast_classical = forecast
+    bvar_posterior = None
     bayesian_meta = None
+    forecast_bands = None
     if bayesian:
-        if PYMC3_AVAILABLE:
-            LOGGER.info("Starting PyMC3-BVAR (this may take a while)...")
-            trace = bvar_pymc3_simple(data, nlags=nlags, draws=500, tune=500)
-            bvar_trace = trace
-            bayesian_meta = {"posterior_samples": len(trace.posterior.stack(sample=("chain", "draw")))}
-            try:
-                trace_filename = f"bvar_trace_{'_'.join([str(t) for t in tickers])}_{nlags}.nc".replace('/', '_').replace('^', '')
-                az.to_netcdf(trace, os.path.join(CACHE_DIR, trace_filename))
-            except Exception as e:
-                LOGGER.error("Failed to save trace: %s", e)
-        else:
-            LOGGER.warning("PyMC3 not available; skipping Bayesian mode.")
+        LOGGER.info("Fitting Minnesota BVAR with %d posterior draws...", draws)
+        model, bvar_fc = bvar_minnesota(data, nlags=nlags, steps=steps, draws=draws,
+                                        tightness=tightness)
+        bvar_posterior = model
+        forecast = bvar_fc["mean"]
+        forecast_bands = bvar_fc["bands"]
+        bayesian_meta = {"posterior_samples": draws, **model.summary()}
     
     # Build result
     result = {
@@ -276,21 +355,27 @@ def run_bvar_pipeline(config: dict):
         "irf_plot": os.path.join(PLOTS_DIR, irf_filename),
         "fevd_csv": fevd_path,
         "fevd_df": fevd_df,
-        "bvar_trace": bvar_trace,
+        "forecast_classical": forecast_classical,
+        "forecast_bands": forecast_bands,
+        "bvar_posterior": bvar_posterior,
         "bayesian_meta": bayesian_meta,
         "metadata": {
             "tickers": tickers,
             "nlags": nlags,
             "bayesian": bayesian,
             "forecast_steps": steps,
-            "generated_at": datetime.utcnow().isoformat()
+            "generated_at": datetime.utcnow().isoformat(),
+            "data_as_of": as_of,
+            "last_data_date": str(data.index[-1]),
+            "cache_key": key,
+            "cache_hit": False
         }
     }
     
     # Cache result
-    cache_name = f"bvar_result_{'_'.join([str(t) for t in tickers])}_{nlags}.pkl".replace("/", "_").replace("^", "")
-    cache_save(result, cache_name)
-    LOGGER.info("BVAR pipeline complete. Cached as: %s", cache_name)
+    if use_cache:
+        _store_result(key, result)
+        LOGGER.info("BVAR pipeline complete. Cached as: bvar_result_%s.pkl", key)
     
     return result
 
@@ -0,0 +1,201 @@
+"""
+Swiss Asset Manager - Korrelations-Service
+------------------------------------------
+Korrelationsmatrix für /api/calculate_correlation aus dem gemeinsamen,
+ausgerichteten Renditepanel (Datum × Symbol).
+
+- Vollständige Daten: standardisierte Renditen Z, ρ = ZᵀZ / (T - 1) in einem
+  BLAS-Aufruf.
+- Unterschiedlich lange Historien (pairwise-complete): mit der Maske M der
+  vorhandenen Werte liefert ein einziges Produkt [X, X², M]ᵀ[X, M] alle
+  Summen je Paar über die gemeinsamen Tage; das Ergebnis entspricht
+  DataFrame.corr(min_periods=...).
+
+Ergebnisse werden pro (Symbolmenge, Fenster, Stichtag) zwischengespeichert und
+kompakt als oberes Dreieck (zeilenweise, ohne Diagonale) ausgeliefert,
+optional in hierarchischer Cluster-Reihenfolge für die Heatmap.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from scipy.cluster.hierarchy import leaves_list, linkage
+from scipy.spatial.distance import squareform
+
+from covariance_service import covariance_service
+
+logger = logging.getLogger('swiss_asset_pro')
+
+DEFAULT_WINDOW = 252
+MIN_PERIODS = 20
+MAX_CACHED_MATRICES = 64
+OPTIMAL_ORDERING_MAX_ASSETS = 100
+
+
+def pairwise_correlation(returns, min_periods=MIN_PERIODS):
+    """
+    Korrelation über die gemeinsamen Beobachtungen je Paar.
+
+    Args:
+        returns: Array oder DataFrame (T × n), NaN = keine Beobachtung
+        min_periods: Paare mit weniger gemeinsamen Tagen ergeben NaN
+
+    Returns:
+        (corr, counts) mit counts[i, j] = Anzahl gemeinsamer Beobachtungen
+    """
+    X = np.asarray(returns, dtype=float)
+    present = ~np.isnan(X)
+    n = X.shape[1]
+
+    if present.all():
+        T = len(X)
+        centered = X - X.mean(axis=0)
+        std = centered.std(axis=0, ddof=1) if T > 1 else np.zeros(n)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            Z = centered / std
+            corr = Z.T @ Z / (T - 1)
+        counts = np.full((n, n), T)
+    else:
+        mask = present.astype(float)
+        # Zentrieren verringert die Auslöschung in den Summen
+        Xz = np.where(present, X - np.nanmean(X, axis=0), 0.0)
+        left = np.hstack([Xz, Xz ** 2, mask])
+        products = left.T @ np.hstack([Xz, mask])
+        cross = products[:n, :n]                 # Σ x_i x_j
+        sums = products[:n, n:]                  # Σ x_i über Tage mit j
+        squares = products[n:2 * n, n:]          # Σ x_i² über Tage mit j
+        counts = np.rint(products[2 * n:, n:]).astype(int)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            covariance = cross - sums * sums.T / counts
+            var_left = squares - sums ** 2 / counts
+            corr = covariance / np.sqrt(var_left * var_left.T)
+
+    corr = np.clip(corr, -1.0, 1.0)
+    corr[counts < max(min_periods, 2)] = np.nan
+    diagonal = np.diag(corr)
+    np.fill_diagonal(corr, np.where(np.isnan(diagonal), np.nan, 1.0))
+    return corr, counts
+
+
+def upper_triangle(matrix):
+    """Oberes Dreieck ohne Diagonale, zeilenweise (n (n - 1) / 2 Werte)"""
+    rows, cols = np.triu_indices(len(matrix), k=1)
+    return matrix[rows, cols]
+
+
+def from_upper_triangle(values, n):
+    """Symmetrische Matrix mit Diagonale 1 aus upper_triangle"""
+    matrix = np.eye(n)
+    rows, cols = np.triu_indices(n, k=1)
+    matrix[rows, cols] = values
+    matrix[cols, rows] = values
+    return matrix
+
+
+def cluster_order(corr):
+    """
+    Reihenfolge aus hierarchischem Clustering (Average Linkage) auf d = √(½(1 - ρ)).
+
+    Fehlende Korrelationen zählen als 0.
+    """
+    n = len(corr)
+    if n < 3:
+        return np.arange(n)
+    filled = np.nan_to_num(corr, nan=0.0)
+    distance = np.sqrt(np.clip(0.5 * (1.0 - filled), 0.0, None))
+    np.fill_diagonal(distance, 0.0)
+    tree = linkage(squareform(distance, checks=False), method='average',
+                   optimal_ordering=n <= OPTIMAL_ORDERING_MAX_ASSETS)
+    return leaves_list(tree)
+
+
+class CorrelationService:
+    """Zwischengespeicherte Korrelationsmatrizen je (Symbolmenge, Fenster, Stichtag)"""
+
+    def __init__(self, max_entries=MAX_CACHED_MATRICES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def matrix(self, panel, window=DEFAULT_WINDOW, pairwise=True, min_periods=MIN_PERIODS):
+        """
+        Korrelation der letzten `window` Handelstage des Panels.
+
+        Die Spalten werden kanonisch sortiert, sodass dieselbe Symbolmenge in
+        beliebiger Reihenfolge denselben Cache-Eintrag trifft. Ohne `pairwise`
+        zählen nur vollständige Tage (inkrementeller Zustand aus covariance_service).
+
+        Returns:
+            Dict mit symbols (sortiert), corr, counts, observations, as_of
+        """
+        panel = panel.dropna(how='all')
+        panel = panel[sorted(panel.columns)].tail(window)
+        as_of = str(panel.index[-1]) if len(panel) else None
+        key = (tuple(panel.columns), int(window), as_of, bool(pairwise), int(min_periods))
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+
+        if pairwise:
+            corr, counts = pairwise_correlation(panel, min_periods)
+        else:
+            complete = panel.dropna()
+            corr = covariance_service.correlation(complete, method='rolling', window=window).to_numpy(copy=True)
+            counts = np.full(corr.shape, len(complete))
+            corr[counts < max(min_periods, 2)] = np.nan
+
+        entry = {
+            'symbols': list(panel.columns),
+            'corr': corr,
+            'counts': counts,
+            'observations': int(len(panel)),
+            'as_of': as_of,
+        }
+        with self._lock:
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def compact(self, entry, symbols=None, cluster=False):
+        """
+        Kompakte Antwort: oberes Dreieck in Eingabe- oder Cluster-Reihenfolge.
+
+        Args:
+            symbols: gewünschte Reihenfolge (Default: sortiert); fehlende Symbole werden ignoriert
+            cluster: hierarchische Cluster-Reihenfolge statt `symbols`
+        """
+        position = {symbol: i for i, symbol in enumerate(entry['symbols'])}
+        if cluster:
+            if 'cluster_order' not in entry:
+                entry['cluster_order'] = cluster_order(entry['corr'])
+            index = np.asarray(entry['cluster_order'])
+        else:
+            wanted = symbols if symbols is not None else entry['symbols']
+            index = np.array([position[s] for s in dict.fromkeys(wanted) if s in position], dtype=int)
+
+        corr = entry['corr'][np.ix_(index, index)]
+        counts = entry['counts'][np.ix_(index, index)]
+        values = upper_triangle(corr)
+        overlap = upper_triangle(counts)
+        return {
+            'symbols': [entry['symbols'][i] for i in index],
+            'upper_triangle': [None if np.isnan(v) else round(float(v), 6) for v in values],
+            'min_overlap': int(overlap.min()) if len(overlap) else entry['observations'],
+            'observations': entry['observations'],
+            'as_of': entry['as_of'],
+            'order': 'cluster' if cluster else 'input',
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+correlation_service = CorrelationService()
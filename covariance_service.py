@@ -0,0 +1,301 @@
+"""
+Swiss Asset Manager - Inkrementelle Kovarianz
+---------------------------------------------
+Hält pro Universum (Symbole + Schätzer) den Zustand einer Kovarianzschätzung
+und schreibt ihn je neuem Tagesbalken in O(n²) fort, statt bei jeder Anfrage
+returns_df.cov() über das ganze Fenster neu zu rechnen.
+
+- RollingCovariance: gleitendes Fenster über laufende Summen Σr und Σrrᵀ;
+  der älteste Balken wird abgezogen, der neue addiert.
+- EwmaCovariance: RiskMetrics Σ_t = λ Σ_{t-1} + (1 - λ) r_t r_tᵀ (λ = 0.94).
+
+Beide Zustände lassen sich aus einer Historie in einem BLAS-Aufruf initialisieren
+und können den letzten Balken ersetzen (Intraday-Updates). Σ und die
+Korrelationsmatrix werden annualisiert aus dem Zustand geliefert.
+
+Der Default-Schätzer ist über SWISS_COVARIANCE_METHOD (rolling|ewma),
+SWISS_COVARIANCE_WINDOW und SWISS_EWMA_LAMBDA konfigurierbar.
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger('swiss_asset_pro')
+
+TRADING_DAYS = 252
+DEFAULT_WINDOW = 252
+RISKMETRICS_LAMBDA = 0.94
+METHODS = ('rolling', 'ewma')
+MAX_STATES = 64
+
+
+class RollingCovariance:
+    """Stichproben-Kovarianz über die letzten `window` Balken mit laufenden Summen"""
+
+    method = 'rolling'
+
+    def __init__(self, symbols, window=DEFAULT_WINDOW):
+        self.symbols = list(symbols)
+        self.window = int(window)
+        n = len(self.symbols)
+        self._rows = np.zeros((self.window, n))
+        self._dates = [None] * self.window
+        self._pos = 0
+        self.count = 0
+        self._sum = np.zeros(n)
+        self._cross = np.zeros((n, n))
+        self._updates = 0
+        self.last_date = None
+
+    @classmethod
+    def from_history(cls, returns, window=DEFAULT_WINDOW):
+        """Initialisiert aus einem vollständigen Renditepanel (Datum × Symbol)"""
+        state = cls(returns.columns, window)
+        tail = returns.to_numpy(dtype=float)[-state.window:]
+        state.count = len(tail)
+        state._rows[:state.count] = tail
+        state._dates[:state.count] = list(returns.index[len(returns) - state.count:])
+        state._pos = state.count % state.window
+        state._resum()
+        state.last_date = returns.index[-1] if len(returns) else None
+        return state
+
+    def _resum(self):
+        rows = self._rows[:self.count] if self.count < self.window else self._rows
+        self._sum = rows.sum(axis=0)
+        self._cross = rows.T @ rows
+        self._updates = 0
+
+    def last_row(self):
+        return self._rows[(self._pos - 1) % self.window].copy() if self.count else None
+
+    @property
+    def first_date(self):
+        """Datum des ältesten Balkens im Fenster"""
+        return self._dates[(self._pos - self.count) % self.window] if self.count else None
+
+    def append(self, row, date=None):
+        """Neuer Balken in O(n²): ältesten Balken abziehen, neuen addieren"""
+        row = np.asarray(row, dtype=float)
+        if self.count == self.window:
+            oldest = self._rows[self._pos]
+            self._sum -= oldest
+            self._cross -= np.outer(oldest, oldest)
+        else:
+            self.count += 1
+        self._rows[self._pos] = row
+        self._dates[self._pos] = date
+        self._pos = (self._pos + 1) % self.window
+        self._sum += row
+        self._cross += np.outer(row, row)
+        self.last_date = date
+        self._updates += 1
+        # Rundungsfehler der laufenden Summen begrenzen
+        if self._updates >= self.window:
+            self._resum()
+
+    def replace_last(self, row, date=None):
+        """Ersetzt den letzten Balken (z.B. Intraday-Kurs) in O(n²)"""
+        row = np.asarray(row, dtype=float)
+        index = (self._pos - 1) % self.window
+        previous = self._rows[index]
+        self._sum += row - previous
+        self._cross += np.outer(row, row) - np.outer(previous, previous)
+        self._rows[index] = row
+        if date is not None:
+            self._dates[index] = date
+            self.last_date = date
+
+    def mean(self, annualize=True):
+        scale = TRADING_DAYS if annualize else 1
+        return self._sum / max(self.count, 1) * scale
+
+    def covariance(self, annualize=True):
+        if self.count < 2:
+            return np.full_like(self._cross, np.nan)
+        cov = (self._cross - np.outer(self._sum, self._sum) / self.count) / (self.count - 1)
+        return cov * (TRADING_DAYS if annualize else 1)
+
+
+class EwmaCovariance:
+    """RiskMetrics-EWMA-Kovarianz (Mittelwert 0) mit Abklingfaktor λ"""
+
+    method = 'ewma'
+
+    def __init__(self, symbols, lam=RISKMETRICS_LAMBDA):
+        self.symbols = list(symbols)
+        self.lam = float(lam)
+        n = len(self.symbols)
+        self._cov = np.zeros((n, n))
+        self._mean = np.zeros(n)
+        self._previous = None
+        self._last_row = None
+        self.count = 0
+        self.first_date = None
+        self.last_date = None
+
+    @classmethod
+    def from_history(cls, returns, lam=RISKMETRICS_LAMBDA):
+        """Initialisiert mit normierten Gewichten (1 - λ) λ^(T-1-t) in einem BLAS-Aufruf"""
+        state = cls(returns.columns, lam)
+        X = returns.to_numpy(dtype=float)
+        T = len(X)
+        if T:
+            weights = (1 - state.lam) * state.lam ** np.arange(T - 1, -1, -1)
+            weights /= weights.sum()
+            state._cov = (X * weights[:, None]).T @ X
+            state._mean = weights @ X
+            state._last_row = X[-1].copy()
+            state.first_date = returns.index[0]
+            state.last_date = returns.index[-1]
+        state.count = T
+        return state
+
+    def last_row(self):
+        return None if self._last_row is None else self._last_row.copy()
+
+    def append(self, row, date=None):
+        row = np.asarray(row, dtype=float)
+        self._previous = (self._cov, self._mean)
+        self._cov = self.lam * self._cov + (1 - self.lam) * np.outer(row, row)
+        self._mean = self.lam * self._mean + (1 - self.lam) * row
+        self._last_row = row.copy()
+        self.count += 1
+        self.last_date = date
+
+    def replace_last(self, row, date=None):
+        if self._previous is None:
+            raise ValueError('Letzter Balken stammt aus der Initialisierung und kann nicht ersetzt werden')
+        self._cov, self._mean = self._previous
+        self.count -= 1
+        self.append(row, date if date is not None else self.last_date)
+
+    def mean(self, annualize=True):
+        return self._mean * (TRADING_DAYS if annualize else 1)
+
+    def covariance(self, annualize=True):
+        return self._cov * (TRADING_DAYS if annualize else 1)
+
+
+def correlation_from_covariance(cov):
+    """Korrelationsmatrix aus Σ (Nullvarianzen ergeben NaN ausserhalb der Diagonale)"""
+    std = np.sqrt(np.diag(cov))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = cov / np.outer(std, std)
+    np.fill_diagonal(corr, 1.0)
+    return corr
+
+
+class CovarianceService:
+    """Inkrementelle Kovarianzzustände je (Symbole, Schätzer, Parameter)"""
+
+    def __init__(self, method='rolling', window=DEFAULT_WINDOW, lam=RISKMETRICS_LAMBDA):
+        if method not in METHODS:
+            raise ValueError(f"Unknown covariance method '{method}'")
+        self.method = method
+        self.window = int(window)
+        self.lam = float(lam)
+        self._states = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _build(self, panel, method, parameter):
+        if method == 'ewma':
+            return EwmaCovariance.from_history(panel, parameter)
+        return RollingCovariance.from_history(panel, parameter)
+
+    def state(self, returns, method=None, window=None, lam=None):
+        """
+        Zustand für das Renditepanel, fortgeschrieben um neue Balken.
+
+        Das Panel wird auf vollständige Zeilen reduziert. Ist der letzte bekannte
+        Balken im Panel enthalten, werden nur neuere Balken angehängt (O(n²) je
+        Balken); ein geänderter letzter Balken des Panels (Intraday-Kurs) wird
+        ersetzt. Deckt der fortgeschriebene Zustand nicht genau das Fenster des
+        Panels ab (z.B. Zustand aus einem längeren Panel), und für Panels ohne
+        Datumsindex, wird der Zustand aus dem Panel neu aufgebaut. Es werden
+        höchstens MAX_STATES Zustände gehalten (LRU).
+        """
+        method = method or self.method
+        parameter = (lam or self.lam) if method == 'ewma' else int(window or self.window)
+        panel = returns.dropna()
+        key = (tuple(panel.columns), method, parameter)
+
+        with self._lock:
+            state = self._states.get(key)
+            if state is not None and not self._extend(state, panel, method, parameter):
+                state = None
+            if state is None:
+                state = self._build(panel, method, parameter)
+                self._states[key] = state
+            self._states.move_to_end(key)
+            while len(self._states) > MAX_STATES:
+                self._states.popitem(last=False)
+            return state
+
+    @staticmethod
+    def _extend(state, panel, method, parameter):
+        """Schreibt den Zustand auf das Panel fort; False, wenn neu aufgebaut werden muss"""
+        if not isinstance(panel.index, pd.DatetimeIndex) or state.last_date not in panel.index:
+            return False
+        position = panel.index.get_loc(state.last_date)
+        known = panel.iloc[position].to_numpy(dtype=float)
+        newer = panel.iloc[position + 1:]
+        if method == 'rolling' and len(newer) >= parameter:
+            return False
+        if not np.allclose(state.last_row(), known, rtol=1e-12, atol=1e-15):
+            # Nur der jüngste Balken darf sich nachträglich ändern
+            if len(newer):
+                return False
+            try:
+                state.replace_last(known)
+            except ValueError:
+                return False
+        for date, row in zip(newer.index, newer.to_numpy(dtype=float)):
+            state.append(row, date)
+        # Der Zustand muss genau das Fenster des Panels abdecken; ein Zustand aus
+        # einem längeren (früheren) Panel enthält Balken ausserhalb dieses Panels
+        expected = min(parameter, len(panel)) if method == 'rolling' else len(panel)
+        return state.count == expected and state.first_date == panel.index[len(panel) - expected]
+
+    def covariance(self, returns, method=None, window=None, lam=None, annualize=True):
+        """Annualisierte Kovarianz als DataFrame (Symbole × Symbole)"""
+        with self._lock:
+            state = self.state(returns, method, window, lam)
+            cov = state.covariance(annualize)
+        return pd.DataFrame(cov, index=state.symbols, columns=state.symbols)
+
+    def correlation(self, returns, method=None, window=None, lam=None):
+        """Korrelationsmatrix als DataFrame (Symbole × Symbole)"""
+        with self._lock:
+            state = self.state(returns, method, window, lam)
+            corr = correlation_from_covariance(state.covariance(annualize=False))
+        return pd.DataFrame(corr, index=state.symbols, columns=state.symbols)
+
+    def push_bar(self, symbols, row, date, method=None, window=None, lam=None):
+        """Neuen Tagesbalken (Renditen je Symbol) an einen bestehenden Zustand anhängen"""
+        method = method or self.method
+        parameter = (lam or self.lam) if method == 'ewma' else int(window or self.window)
+        with self._lock:
+            state = self._states.get((tuple(symbols), method, parameter))
+            if state is None:
+                return False
+            if state.last_date is not None and date <= state.last_date:
+                return False
+            state.append(row, date)
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
+
+
+covariance_service = CovarianceService(
+    method=os.environ.get('SWISS_COVARIANCE_METHOD', 'rolling'),
+    window=int(os.environ.get('SWISS_COVARIANCE_WINDOW', DEFAULT_WINDOW)),
+    lam=float(os.environ.get('SWISS_EWMA_LAMBDA', RISKMETRICS_LAMBDA)),
+)
@@ -112,6 +112,8 @@ class Metrics:
                 'portfolios': {'success': 0, 'failure': 0, 'last_success': None, 'avg_duration': 0, 'count': 0},
                 'cycles': {'success': 0, 'failure': 0, 'last_success': None, 'avg_duration': 0, 'count': 0},
                 'news': {'success': 0, 'failure': 0, 'last_success': None, 'avg_duration': 0, 'count': 0},
+                'fundamentals': {'success': 0, 'failure': 0, 'last_success': None, 'avg_duration': 0, 'count': 0},
+                'stress_library': {'success': 0, 'failure': 0, 'last_success': None, 'avg_duration': 0, 'count': 0},
             },
             'last_full_update': None,
             'health': 'unknown',
@@ -1038,6 +1040,12 @@ class SafeScheduler:
         # Täglicher Gesundheitscheck und Metrik-Reset
         schedule.every().day.at("00:00").do(self._health_check)
         
+        # Fundamentaldaten (Value/Buy&Hold/Carry) einmal täglich gebündelt aktualisieren
+        schedule.every().day.at("06:30").do(self._refresh_fundamentals)
+        
+        # Krisenfenster der Stress-Szenarien für neu verfolgte Symbole nachladen (nur fehlende)
+        schedule.every().day.at("06:45").do(self._refresh_stress_library)
+        
         # Nur einmal ausführen beim ersten Setup mit verzögertem Start für bessere App-Initialisierung
         if not self._initialized:
             logger.info("Scheduler initialisiert, plane erste Aktualisierung...")
@@ -1105,6 +1113,41 @@ class SafeScheduler:
             logger.error(f"Fehler beim Gesundheitscheck: {e}", exc_info=True)
             return True  # Trotzdem weiterlaufen lassen
     
+    def _refresh_fundamentals(self):
+        """Tägliche Bulk-Aktualisierung der Fundamentaldaten-Snapshots"""
+        logger.info("Aktualisiere Fundamentaldaten-Snapshots...")
+        start_time = time.time()
+        try:
+            from live_data.storage import get_fundamentals_store
+            result = get_fundamentals_store().refresh()
+            duration = time.time() - start_time
+            metrics.record_update('fundamentals', success=not result['failed'], duration=duration)
+            if result['failed']:
+                logger.warning(f"Fundamentaldaten fehlgeschlagen für: {', '.join(result['failed'])}")
+            logger.info(f"{len(result['snapshots'])} Fundamentaldaten-Snapshots in {duration:.1f}s aktualisiert")
+        except Exception as e:
+            metrics.record_update('fundamentals', success=False, duration=time.time() - start_time)
+            logger.error(f"Fehler bei Fundamentaldaten-Aktualisierung: {e}", exc_info=True)
+        return True
+    
+    def _refresh_stress_library(self):
+        """Lädt fehlende Stress-Szenario-Renditen für alle verfolgten Symbole"""
+        logger.info("Aktualisiere Stress-Szenario-Bibliothek...")
+        start_time = time.time()
+        try:
+            from live_data.storage import get_fundamentals_store
+            from stress_engine import get_stress_library
+            library = get_stress_library()
+            symbols = set(get_fundamentals_store().tracked_symbols()) | set(library.symbols())
+            result = library.precompute(sorted(symbols))
+            duration = time.time() - start_time
+            metrics.record_update('stress_library', success=not result['failed'], duration=duration)
+            logger.info(f"Stress-Bibliothek: {len(result['stored'])} Symbole in {duration:.1f}s ergänzt")
+        except Exception as e:
+            metrics.record_update('stress_library', success=False, duration=time.time() - start_time)
+            logger.error(f"Fehler bei Stress-Szenario-Aktualisierung: {e}", exc_info=True)
+        return True
+    
     def _cleanup_threads(self):
         """Räumt nicht mehr laufende Threads auf"""
         if self._active_threads:
@@ -0,0 +1,156 @@
+"""
+Swiss Asset Manager - Statistisches Faktormodell
+------------------------------------------------
+PCA-Faktormodell für die Kovarianz grosser Universen: Σ = B F Bᵀ + D mit
+k Faktoren (B: n × k Ladungen, F: k × k Faktorkovarianz, D: spezifische
+Varianzen). Die Matrix wird nie dicht aufgebaut; Produkte, Portfolio-Varianz
+und Lösungen von (Σ + diag)x = r laufen über die Low-Rank-Form in O(n k)
+bzw. O(n k²). Damit bleiben 1000-Asset-Universen mit einem Jahr Tagesdaten
+lösbar, obwohl die Stichproben-Kovarianz dort singulär ist.
+
+FactorCovariance verhält sich bei `@` wie eine Matrix (cov @ w, w @ cov),
+die Optimierer in portfolio_solvers akzeptieren sie anstelle von Σ.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger('swiss_asset_pro')
+
+TRADING_DAYS = 252
+MAX_FACTORS = 50
+
+
+class FactorCovariance:
+    """Kovarianz in Faktorform B F Bᵀ + diag(D)"""
+
+    # numpy soll `w @ cov` an __rmatmul__ delegieren statt cov in ein Array zu wandeln
+    __array_ufunc__ = None
+
+    def __init__(self, loadings, factor_cov, specific, symbols=None):
+        self.loadings = np.asarray(loadings, dtype=float)
+        self.factor_cov = np.asarray(factor_cov, dtype=float)
+        self.specific = np.asarray(specific, dtype=float)
+        self.symbols = list(symbols) if symbols is not None else None
+
+    @classmethod
+    def from_returns(cls, returns, n_factors=None, annualization=TRADING_DAYS):
+        """
+        Schätzt das Modell per PCA aus einer Renditematrix (T × n, DataFrame oder Array).
+
+        Fehlende Werte werden mit dem Spaltenmittel (also 0 nach Zentrierung)
+        aufgefüllt. Die spezifischen Varianzen sind die Residuen der Diagonale
+        der Stichprobenkovarianz, nach unten begrenzt, damit Σ positiv definit ist.
+
+        Args:
+            n_factors: Anzahl Faktoren k (Default: min(10, n - 1, T - 1))
+        """
+        symbols = list(returns.columns) if isinstance(returns, pd.DataFrame) else None
+        X = np.asarray(returns, dtype=float)
+        T, n = X.shape
+        if T < 3 or n < 2:
+            raise ValueError('Factor model needs at least 3 observations and 2 assets')
+
+        means = np.nanmean(X, axis=0)
+        X = np.where(np.isnan(X), means, X) - means
+        total = (X ** 2).sum(axis=0) / (T - 1)
+
+        k = n_factors or min(10, n - 1, T - 1)
+        k = int(max(1, min(k, n - 1, T - 1, MAX_FACTORS)))
+
+        # Ökonomische SVD: O(T n min(T, n)) statt einer n × n Eigenzerlegung
+        _, singular, vt = np.linalg.svd(X, full_matrices=False)
+        loadings = vt[:k].T
+        factor_var = singular[:k] ** 2 / (T - 1)
+
+        systematic = (loadings ** 2) @ factor_var
+        floor = 1e-4 * max(np.median(total), 1e-16)
+        specific = np.maximum(total - systematic, floor)
+
+        model = cls(loadings, np.diag(factor_var) * annualization, specific * annualization, symbols)
+        model.explained_variance = float(factor_var.sum() / max(total.sum(), 1e-16))
+        model.observations = T
+        return model
+
+    @property
+    def shape(self):
+        n = len(self.specific)
+        return (n, n)
+
+    def __len__(self):
+        return len(self.specific)
+
+    @property
+    def n_factors(self):
+        return self.loadings.shape[1]
+
+    def __matmul__(self, other):
+        other = np.asarray(other, dtype=float)
+        specific = self.specific if other.ndim == 1 else self.specific[:, None]
+        return self.loadings @ (self.factor_cov @ (self.loadings.T @ other)) + specific * other
+
+    def __rmatmul__(self, other):
+        # Σ ist symmetrisch: wᵀΣ = (Σw)ᵀ
+        other = np.asarray(other, dtype=float)
+        return (self @ other.T).T
+
+    def diagonal(self):
+        return (self.loadings @ self.factor_cov * self.loadings).sum(axis=1) + self.specific
+
+    def variance(self, weights):
+        """Portfolio-Varianz wᵀΣw in O(n k)"""
+        weights = np.asarray(weights, dtype=float)
+        exposure = self.loadings.T @ weights
+        return float(exposure @ self.factor_cov @ exposure + (self.specific * weights ** 2).sum())
+
+    def to_dense(self):
+        return self.loadings @ self.factor_cov @ self.loadings.T + np.diag(self.specific)
+
+    def subset(self, index):
+        """Teilmodell für ausgewählte Assets (Indizes)"""
+        index = np.asarray(index)
+        symbols = [self.symbols[i] for i in index] if self.symbols is not None else None
+        return FactorCovariance(self.loadings[index], self.factor_cov, self.specific[index], symbols)
+
+    def solve(self, rhs, extra_diagonal=0.0):
+        """
+        Löst (Σ + diag(extra_diagonal)) x = rhs per Woodbury-Identität in O(n k²).
+
+        Mit E = D + extra: x = E⁻¹r - E⁻¹B (F⁻¹ + BᵀE⁻¹B)⁻¹ BᵀE⁻¹r
+        """
+        rhs = np.asarray(rhs, dtype=float)
+        inv_e = 1.0 / (self.specific + extra_diagonal)
+        scaled = inv_e if rhs.ndim == 1 else inv_e[:, None]
+        y = scaled * rhs
+        capacitance = np.linalg.inv(self.factor_cov) + (self.loadings.T * inv_e) @ self.loadings
+        correction = np.linalg.solve(capacitance, self.loadings.T @ y)
+        return y - scaled * (self.loadings @ correction)
+
+    def to_dict(self):
+        """Kompakte Beschreibung für API-Antworten"""
+        return {
+            'model': 'pca',
+            'factors': self.n_factors,
+            'assets': len(self),
+            'explained_variance': getattr(self, 'explained_variance', None),
+            'observations': getattr(self, 'observations', None),
+        }
+
+
+def as_matrix(cov):
+    """Dichte Matrix aus Σ (Array, DataFrame oder FactorCovariance)"""
+    if isinstance(cov, FactorCovariance):
+        return cov.to_dense()
+    return np.asarray(cov, dtype=float)
+
+
+def estimate_covariance(returns_df, n_factors=None, annualization=TRADING_DAYS):
+    """
+    Annualisierte Kovarianz der Renditen: Stichprobe (DataFrame) ohne n_factors,
+    sonst das PCA-Faktormodell mit n_factors Faktoren.
+    """
+    if n_factors:
+        return FactorCovariance.from_returns(returns_df, n_factors, annualization)
+    return returns_df.cov() * annualization
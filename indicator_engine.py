@@ -0,0 +1,528 @@
+"""
+Swiss Asset Manager - Technische Indikatoren
+--------------------------------------------
+Berechnet gleitende Durchschnitte, MACD, Bollinger-Bänder, RSI, Renditen,
+Volatilität und Sharpe spaltenweise auf einer (Datum × Symbol)-Schlusskursmatrix.
+
+Alle Symbole werden in einem Durchgang gerechnet. Wer nur den aktuellen Stand
+braucht (latest_indicators), bekommt die Fensterwerte direkt aus den letzten
+Zeilen statt aus vollständigen Rolling-Serien.
+
+IndicatorState hält den Zustand eines Symbols und schreibt ihn je neuem
+Balken in O(1) fort; IndicatorCache verwaltet diese Zustände je Symbol und
+initialisiert neue Zustände gemeinsam aus einem compute_indicators-Durchgang.
+"""
+
+import math
+import threading
+from collections import OrderedDict, deque
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+RSI_WINDOW = 14
+BB_WINDOW = 20
+BB_STD_MULTIPLIER = 2
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+# Rendite-Horizonte in Handelstagen
+RETURN_HORIZONS = {'return_3m': 63, 'return_6m': 126, 'return_12m': 252}
+MAX_STATES = 512  # IndicatorCache: höchstens so viele (Symbol, Parameter)-Zustände
+
+
+def align_closes(histories, by_date=False):
+    """
+    Baut die Schlusskursmatrix aus {symbol: DataFrame mit 'Close'}.
+
+    Jede Spalte wird rechtsbündig auf ihre eigenen letzten Handelstage gelegt,
+    damit Fensteroperationen genau wie auf der Einzelserie rechnen (Feiertage
+    verschiedener Börsen erzeugen keine Lücken). Kürzere Historien sind oben
+    mit NaN aufgefüllt; der Index stammt von der längsten Historie.
+
+    by_date=True legt die Kurse stattdessen auf gemeinsame Kalendertage (ohne
+    Zeitzone, je Tag der letzte Kurs), wie es Renditen und Korrelationen über
+    Symbole hinweg brauchen; Tage ohne Handel eines Symbols sind NaN.
+    """
+    series = {symbol: hist['Close'].astype(float) for symbol, hist in histories.items() if not hist.empty}
+    if not series:
+        return pd.DataFrame()
+    if by_date:
+        for symbol, close in series.items():
+            # Börsen in verschiedenen Zeitzonen auf Kalendertage ausrichten
+            index = pd.DatetimeIndex(close.index)
+            if index.tz is not None:
+                index = index.tz_localize(None)
+            close = pd.Series(close.to_numpy(), index=index.normalize())
+            series[symbol] = close[~close.index.duplicated(keep='last')]
+        return pd.DataFrame(series)
+
+    length = max(len(s) for s in series.values())
+    index = next(s.index for s in series.values() if len(s) == length)
+    matrix = np.full((length, len(series)), np.nan)
+    for col, s in enumerate(series.values()):
+        matrix[length - len(s):, col] = s.to_numpy()
+    return pd.DataFrame(matrix, index=index, columns=list(series))
+
+
+def _macd(closes):
+    fast = closes.ewm(span=MACD_FAST, adjust=False).mean()
+    slow = closes.ewm(span=MACD_SLOW, adjust=False).mean()
+    macd = fast - slow
+    signal = macd.ewm(span=MACD_SIGNAL, adjust=False).mean()
+    return fast, slow, macd, signal
+
+
+def _gains_losses(closes):
+    delta = closes.diff()
+    # Erstes Delta zählt wie in der Einzelserien-Rechnung als 0
+    return delta.where(delta > 0, 0), -delta.where(delta < 0, 0)
+
+
+def indicator_series(closes, ma_short=50, ma_long=200):
+    """
+    Vollständige Indikator-Serien, je Indikator eine (Datum × Symbol)-Matrix.
+
+    Returns:
+        Dict mit ma_short, ma_long, macd, macd_signal, macd_histogram,
+        bb_middle, bb_upper, bb_lower, rsi, momentum-Renditen (in %) und returns
+    """
+    valid = closes.notna().cumsum()
+    _, _, macd, signal = _macd(closes)
+    bb_middle = closes.rolling(window=BB_WINDOW).mean()
+    bb_std = closes.rolling(window=BB_WINDOW).std()
+    gain, loss = _gains_losses(closes)
+    rs = gain.rolling(window=RSI_WINDOW).mean() / loss.rolling(window=RSI_WINDOW).mean()
+    rsi = (100 - (100 / (1 + rs))).where(valid >= RSI_WINDOW)
+
+    series = {
+        'ma_short': closes.rolling(window=ma_short).mean(),
+        'ma_long': closes.rolling(window=ma_long).mean(),
+        'macd': macd,
+        'macd_signal': signal,
+        'macd_histogram': macd - signal,
+        'bb_middle': bb_middle,
+        'bb_upper': bb_middle + bb_std * BB_STD_MULTIPLIER,
+        'bb_lower': bb_middle - bb_std * BB_STD_MULTIPLIER,
+        'rsi': rsi,
+        'returns': closes.pct_change(fill_method=None),
+    }
+    for name, bars in RETURN_HORIZONS.items():
+        series[name] = closes.pct_change(periods=bars - 1, fill_method=None) * 100
+    return series
+
+
+def _tail(values, window, reducer):
+    """Reduziert die letzten window Zeilen; NaN, wenn die Matrix zu kurz ist"""
+    if len(values) < window:
+        return np.full(values.shape[1], np.nan)
+    return reducer(values[-window:])
+
+
+def _trailing_return(values, counts, bars):
+    """Rendite (in %) über die letzten bars Handelstage, 0 bei zu kurzer Historie"""
+    if len(values) < bars:
+        return np.zeros(values.shape[1])
+    result = (values[-1] / values[-bars] - 1) * 100
+    return np.where(counts >= bars, result, 0.0)
+
+
+def latest_indicators(closes, ma_short=50, ma_long=200, lookback_months=12, risk_free_rate=0.02):
+    """
+    Aktueller Indikatorstand je Symbol.
+
+    Args:
+        closes: (Datum × Symbol)-Schlusskursmatrix, z.B. aus align_closes
+        ma_short / ma_long: Fenster der gleitenden Durchschnitte
+        lookback_months: Momentum-Horizont (21 Handelstage je Monat)
+        risk_free_rate: Für die annualisierte Sharpe Ratio
+
+    Returns:
+        DataFrame (Symbol × Indikator); Fenster ohne ausreichende Historie sind NaN
+    """
+    values = closes.to_numpy(dtype=float)
+    counts = np.count_nonzero(~np.isnan(values), axis=0)
+    last_row = lambda frame: frame.iloc[-1].to_numpy()
+
+    fast, slow, macd, signal = _macd(closes)
+    bb_middle = _tail(values, BB_WINDOW, lambda v: v.mean(axis=0))
+    bb_std = _tail(values, BB_WINDOW, lambda v: v.std(axis=0, ddof=1))
+
+    gain, loss = _gains_losses(closes)
+    gain = _tail(gain.to_numpy(), RSI_WINDOW, lambda v: v.mean(axis=0))
+    loss = _tail(loss.to_numpy(), RSI_WINDOW, lambda v: v.mean(axis=0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - (100 / (1 + gain / loss))
+    rsi = np.where(counts >= RSI_WINDOW, rsi, np.nan)
+
+    returns = closes.pct_change(fill_method=None)
+    mean_return = returns.mean().to_numpy()
+    std_return = returns.std().to_numpy()
+    annual_std = std_return * np.sqrt(TRADING_DAYS)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std_return > 0, (mean_return * TRADING_DAYS - risk_free_rate) / annual_std, 0.0)
+
+    latest = {
+        'current_price': values[-1] if len(values) else np.full(values.shape[1], np.nan),
+        'ma_short': _tail(values, ma_short, lambda v: v.mean(axis=0)),
+        'ma_long': _tail(values, ma_long, lambda v: v.mean(axis=0)),
+        'macd': last_row(macd),
+        'macd_signal': last_row(signal),
+        'macd_histogram': last_row(macd) - last_row(signal),
+        'ema_fast': last_row(fast),
+        'ema_slow': last_row(slow),
+        'bb_middle': bb_middle,
+        'bb_upper': bb_middle + bb_std * BB_STD_MULTIPLIER,
+        'bb_lower': bb_middle - bb_std * BB_STD_MULTIPLIER,
+        'rsi': rsi,
+        'momentum_return': _trailing_return(values, counts, lookback_months * 21),
+        'volatility': annual_std * 100,
+        'sharpe_ratio': sharpe,
+        'observations': counts,
+    }
+    for name, bars in RETURN_HORIZONS.items():
+        latest[name] = _trailing_return(values, counts, bars)
+    return pd.DataFrame(latest, index=closes.columns)
+
+
+def compute_indicators(closes, ma_short=50, ma_long=200, lookback_months=12, last_only=True):
+    """Aktueller Stand (last_only=True) oder vollständige Serien für alle Symbole"""
+    if last_only:
+        return latest_indicators(closes, ma_short, ma_long, lookback_months)
+    return indicator_series(closes, ma_short, ma_long)
+
+
+# ================================================================================================
+# INKREMENTELLER ZUSTAND
+# ================================================================================================
+
+class _Window:
+    """Gleitendes Fenster mit laufender Summe und Quadratsumme"""
+
+    def __init__(self, size, values=()):
+        self.size = size
+        self.values = deque(values, maxlen=size)
+        self._resum()
+
+    def _resum(self):
+        data = np.fromiter(self.values, dtype=float, count=len(self.values))
+        self.sum = float(data.sum())
+        self.sumsq = float((data * data).sum())
+        self._pushes = 0
+
+    def push(self, value):
+        """Fügt einen Wert an, gibt den verdrängten Wert zurück (oder None)"""
+        evicted = self.values[0] if len(self.values) == self.size else None
+        self.values.append(value)
+        self.sum += value - (evicted or 0.0)
+        self.sumsq += value * value - (evicted or 0.0) ** 2
+        self._pushes += 1
+        if self._pushes >= self.size:
+            # Rundungsfehler der laufenden Summen begrenzen (amortisiert O(1))
+            self._resum()
+        return evicted
+
+    def undo(self, evicted):
+        """Macht den letzten push rückgängig"""
+        value = self.values.pop()
+        if evicted is not None:
+            self.values.appendleft(evicted)
+        self.sum -= value - (evicted or 0.0)
+        self.sumsq -= value * value - (evicted or 0.0) ** 2
+
+    @property
+    def full(self):
+        return len(self.values) == self.size
+
+    def mean(self):
+        return self.sum / self.size if self.full else np.nan
+
+    def std(self):
+        """Stichproben-Standardabweichung (ddof=1) des vollen Fensters"""
+        if not self.full or self.size < 2:
+            return np.nan
+        variance = (self.sumsq - self.sum * self.sum / self.size) / (self.size - 1)
+        return math.sqrt(max(variance, 0.0))
+
+
+class IndicatorState:
+    """
+    Indikatorzustand eines Symbols, der je neuem Tagesbalken in O(1) fortgeschrieben wird.
+
+    Hält die Fenstersummen der gleitenden Durchschnitte und Bollinger-Bänder
+    (inkl. Quadratsummen), die EMA-Zustände des MACD (12/26/9), die
+    Gewinn-/Verlustfenster des RSI-14 und die Renditestatistik für Volatilität
+    und Sharpe. latest() liefert dieselben Felder wie latest_indicators.
+    """
+
+    def __init__(self, ma_short=50, ma_long=200, lookback_months=12, returns_window=None,
+                 risk_free_rate=0.02):
+        self.ma_short = ma_short
+        self.ma_long = ma_long
+        self.lookback_months = lookback_months
+        self.returns_window = returns_window or lookback_months * 2 * 21
+        self.risk_free_rate = risk_free_rate
+        self.lags = max([lookback_months * 21] + list(RETURN_HORIZONS.values()))
+
+        self.count = 0
+        self.last_close = None
+        self.last_date = None
+        self.ema_fast = self.ema_slow = self.ema_signal = None
+        self._ma_short = _Window(ma_short)
+        self._ma_long = _Window(ma_long)
+        self._bb = _Window(BB_WINDOW)
+        self._gains = _Window(RSI_WINDOW)
+        self._losses = _Window(RSI_WINDOW)
+        self._returns = _Window(self.returns_window)
+        # Ringpuffer der letzten Schlusskurse für die Renditen über 3/6/12 Monate
+        self._closes = np.full(self.lags, np.nan)
+        self._pos = 0
+        self._undo = None
+
+    @classmethod
+    def from_history(cls, closes, **kwargs):
+        """
+        Initialisiert den Zustand vektorisiert aus einer Schlusskurs-Serie.
+
+        Der letzte Balken wird per append_bar angehängt, damit replace_last_bar
+        sofort nutzbar ist.
+        """
+        closes = closes.dropna().astype(float)
+        seed = latest_indicators(closes.iloc[:-1].to_frame('seed')).iloc[0] if len(closes) > 1 else None
+        return cls.from_seed(closes, seed, **kwargs)
+
+    @classmethod
+    def from_seed(cls, closes, seed, **kwargs):
+        """
+        Initialisiert den Zustand aus einer Schlusskurs-Serie und der Zeile von
+        latest_indicators über alle Balken ausser dem letzten.
+
+        Aus der Zeile kommen nur die EMA-Stände des MACD; die Fenster werden aus
+        den letzten Schlusskursen gefüllt. So lassen sich die Zustände vieler
+        Symbole aus einem gemeinsamen Durchgang über die Matrix initialisieren.
+        """
+        closes = closes.dropna().astype(float)
+        kwargs.setdefault('returns_window', max(len(closes) - 1, 2))
+        state = cls(**kwargs)
+        if closes.empty:
+            return state
+
+        values = closes.to_numpy()[:-1]
+        if len(values):
+            delta = np.diff(values[-(RSI_WINDOW + 1):])
+            if len(values) <= RSI_WINDOW:
+                delta = np.concatenate([[0.0], delta])  # Erstes Delta zählt als 0
+            tail = values[-(state.returns_window + 1):]
+
+            state.count = len(values)
+            state.last_close = float(values[-1])
+            state.last_date = closes.index[-2]
+            state.ema_fast, state.ema_slow = float(seed['ema_fast']), float(seed['ema_slow'])
+            state.ema_signal = float(seed['macd_signal'])
+            state._ma_short = _Window(state.ma_short, values[-state.ma_short:])
+            state._ma_long = _Window(state.ma_long, values[-state.ma_long:])
+            state._bb = _Window(BB_WINDOW, values[-BB_WINDOW:])
+            state._gains = _Window(RSI_WINDOW, np.maximum(delta, 0.0))
+            state._losses = _Window(RSI_WINDOW, np.maximum(-delta, 0.0))
+            state._returns = _Window(state.returns_window, tail[1:] / tail[:-1] - 1)
+            tail = values[-state.lags:]
+            state._closes[:len(tail)] = tail
+            state._pos = len(tail) % state.lags
+
+        state.append_bar(closes.iloc[-1], closes.index[-1])
+        return state
+
+    def append_bar(self, close, date=None):
+        """Schreibt alle Indikatoren um einen Tagesbalken fort (O(1))"""
+        close = float(close)
+        undo = {
+            'count': self.count, 'last_close': self.last_close, 'last_date': self.last_date,
+            'ema': (self.ema_fast, self.ema_slow, self.ema_signal),
+            'evicted_close': self._closes[self._pos],
+        }
+
+        if self.last_close is None:
+            self.ema_fast = self.ema_slow = close
+            self.ema_signal = 0.0
+            gain = loss = 0.0  # Erstes Delta zählt als 0
+            undo['returns'] = False
+        else:
+            self.ema_fast = _ema_step(self.ema_fast, close, MACD_FAST)
+            self.ema_slow = _ema_step(self.ema_slow, close, MACD_SLOW)
+            self.ema_signal = _ema_step(self.ema_signal, self.ema_fast - self.ema_slow, MACD_SIGNAL)
+            delta = close - self.last_close
+            gain, loss = max(delta, 0.0), max(-delta, 0.0)
+            undo['returns'] = self._returns.push(close / self.last_close - 1)
+
+        undo['windows'] = [
+            self._ma_short.push(close), self._ma_long.push(close), self._bb.push(close),
+            self._gains.push(gain), self._losses.push(loss),
+        ]
+        self._closes[self._pos] = close
+        self._pos = (self._pos + 1) % self.lags
+        self.count += 1
+        self.last_close = close
+        self.last_date = date
+        self._undo = undo
+
+    def replace_last_bar(self, close, date=None):
+        """Ersetzt den letzten Balken, z.B. für Live-Kurse während des Handelstags (O(1))"""
+        if self._undo is None:
+            raise ValueError('No bar to replace')
+        undo = self._undo
+        for window, evicted in zip(
+            [self._ma_short, self._ma_long, self._bb, self._gains, self._losses], undo['windows']
+        ):
+            window.undo(evicted)
+        if undo['returns'] is not False:
+            self._returns.undo(undo['returns'])
+        self._pos = (self._pos - 1) % self.lags
+        self._closes[self._pos] = undo['evicted_close']
+        self.count, self.last_close = undo['count'], undo['last_close']
+        self.ema_fast, self.ema_slow, self.ema_signal = undo['ema']
+        self.last_date = undo['last_date']
+        self.append_bar(close, date if date is not None else self.last_date)
+
+    def matches(self, closes, position):
+        """
+        Prüft, ob die gespeicherten Balken vor dem letzten mit closes[:position]
+        übereinstimmen. Adjustierte Kurse werden bei jeder Dividende rückwirkend
+        skaliert; dann passt der Zustand nicht mehr zur Historie.
+        """
+        n = min(self.count, self.lags, position + 1) - 1
+        if n <= 0:
+            return True
+        stored = self._closes[(self._pos - 1 - np.arange(1, n + 1)) % self.lags]
+        current = closes.to_numpy(dtype=float)[position - n:position][::-1]
+        return bool(np.allclose(stored, current, rtol=1e-10, atol=0.0))
+
+    def _trailing_return(self, bars):
+        if self.count < bars:
+            return 0.0
+        return (self.last_close / self._closes[(self._pos - bars) % self.lags] - 1) * 100
+
+    def latest(self):
+        """Aktueller Indikatorstand (gleiche Felder wie latest_indicators)"""
+        if self.count == 0:
+            raise ValueError('No bars appended')
+        bb_middle, bb_std = self._bb.mean(), self._bb.std()
+        macd = self.ema_fast - self.ema_slow
+
+        if self.count >= RSI_WINDOW and self._losses.sum > 0:
+            rsi = 100 - (100 / (1 + self._gains.sum / self._losses.sum))
+        elif self.count >= RSI_WINDOW and self._gains.sum > 0:
+            rsi = 100.0
+        else:
+            rsi = np.nan
+
+        n = len(self._returns.values)
+        if n > 1:
+            mean = self._returns.sum / n
+            std = math.sqrt(max((self._returns.sumsq - n * mean * mean) / (n - 1), 0.0))
+        else:
+            mean, std = np.nan, np.nan
+        annual_std = std * math.sqrt(TRADING_DAYS)
+        sharpe = (mean * TRADING_DAYS - self.risk_free_rate) / annual_std if std > 0 else 0.0
+
+        latest = {
+            'current_price': self.last_close,
+            'ma_short': self._ma_short.mean(),
+            'ma_long': self._ma_long.mean(),
+            'macd': macd,
+            'macd_signal': self.ema_signal,
+            'macd_histogram': macd - self.ema_signal,
+            'ema_fast': self.ema_fast,
+            'ema_slow': self.ema_slow,
+            'bb_middle': bb_middle,
+            'bb_upper': bb_middle + bb_std * BB_STD_MULTIPLIER,
+            'bb_lower': bb_middle - bb_std * BB_STD_MULTIPLIER,
+            'rsi': rsi,
+            'momentum_return': self._trailing_return(self.lookback_months * 21),
+            'volatility': annual_std * 100,
+            'sharpe_ratio': sharpe,
+            'observations': self.count,
+        }
+        for name, bars in RETURN_HORIZONS.items():
+            latest[name] = self._trailing_return(bars)
+        return latest
+
+
+def _ema_step(previous, value, span):
+    alpha = 2.0 / (span + 1)
+    return alpha * value + (1 - alpha) * previous
+
+
+class IndicatorCache:
+    """
+    IndicatorState je (Symbol, Parameter inkl. risikofreiem Zins); neue Balken
+    werden nur angehängt.
+
+    update_many() vergleicht jede übergebene Historie mit ihrem Zustand: neue
+    Tage werden per append_bar nachgetragen, ein geänderter letzter Kurs per
+    replace_last_bar ersetzt. Alle übrigen Symbole (neu, Lücken, revidierte
+    Historie) werden gemeinsam aus einem compute_indicators-Durchgang über die
+    ausgerichtete Matrix neu aufgebaut, ausserhalb des Locks. Es werden
+    höchstens MAX_STATES Zustände gehalten (LRU).
+    """
+
+    def __init__(self):
+        self._states = OrderedDict()
+        self.lock = threading.Lock()
+
+    def update(self, symbol, hist, ma_short=50, ma_long=200, lookback_months=12, risk_free_rate=0.02):
+        """Bringt den Zustand auf den Stand von hist und liefert latest()"""
+        return self.update_many({symbol: hist}, ma_short, ma_long, lookback_months, risk_free_rate)[symbol]
+
+    def update_many(self, histories, ma_short=50, ma_long=200, lookback_months=12, risk_free_rate=0.02):
+        """
+        Bringt die Zustände aller Symbole auf den Stand ihrer Historie.
+
+        Args:
+            histories: {symbol: DataFrame mit 'Close'}
+
+        Returns:
+            {symbol: latest()}
+        """
+        params = dict(ma_short=ma_short, ma_long=ma_long, lookback_months=lookback_months,
+                      risk_free_rate=risk_free_rate)
+        closes = {symbol: hist['Close'].dropna() for symbol, hist in histories.items()}
+
+        key = lambda symbol: (symbol, ma_short, ma_long, lookback_months, risk_free_rate)
+
+        with self.lock:
+            states, rebuild = {}, []
+            for symbol, close in closes.items():
+                state = self._states.get(key(symbol))
+                position = close.index.get_loc(state.last_date) if state and state.last_date in close.index else None
+                if position is None or not state.matches(close, position):
+                    rebuild.append(symbol)
+                    continue
+                if close.iloc[position] != state.last_close:
+                    state.replace_last_bar(close.iloc[position], state.last_date)
+                for date, value in close.iloc[position + 1:].items():
+                    state.append_bar(value, date)
+                states[symbol] = state
+
+        # Ein Durchgang über alle neu aufzubauenden Symbole (ohne ihren letzten Balken);
+        # ohne Lock, damit parallele Requests nicht auf den Neuaufbau warten
+        seeds = align_closes({symbol: closes[symbol].iloc[:-1].to_frame('Close') for symbol in rebuild})
+        latest = compute_indicators(seeds, ma_short, ma_long, lookback_months) if len(seeds) else None
+        for symbol in rebuild:
+            seed = latest.loc[symbol] if latest is not None and symbol in latest.index else None
+            states[symbol] = IndicatorState.from_seed(closes[symbol], seed, **params)
+
+        with self.lock:
+            for symbol, state in states.items():
+                self._states[key(symbol)] = state
+                self._states.move_to_end(key(symbol))
+            while len(self._states) > MAX_STATES:
+                self._states.popitem(last=False)
+            return {symbol: states[symbol].latest() for symbol in closes}
+
+    def get(self, symbol, ma_short=50, ma_long=200, lookback_months=12, risk_free_rate=0.02):
+        """Vorhandener Zustand (z.B. für Live-Updates per replace_last_bar) oder None"""
+        return self._states.get((symbol, ma_short, ma_long, lookback_months, risk_free_rate))
+
+
+indicator_cache = IndicatorCache()
@@ -2,9 +2,11 @@
 Data Storage Module
 
 This module provides data persistence functionality for storing
-market data, financial statements, and source status information.
+market data, financial statements, fundamentals snapshots and source
+status information.
 """
 
 from .data_store import DataStore
+from .fundamentals_store import FundamentalsStore, get_fundamentals_store
 
-__all__ = ['DataStore']
+__all__ = ['DataStore', 'FundamentalsStore', 'get_fundamentals_store']
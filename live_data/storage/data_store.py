@@ -304,6 +304,60 @@ class DataStore:
             logger.error(f"Error storing financial data for {symbol}: {str(e)}")
             return False
     
+    def get_latest_financial_data(self, symbol: str, report_type: str = 'annual') -> Optional[Dict[str, Any]]:
+        """
+        Get the latest financial statement row for a symbol.
+        
+        Args:
+            symbol: Market symbol
+            report_type: Report type to filter on
+            
+        Returns:
+            Latest financial data (raw_data merged in) or None if not found
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    SELECT * FROM financial_statements 
+                    WHERE symbol = ? AND report_type = ?
+                    ORDER BY id DESC 
+                    LIMIT 1
+                ''', (symbol, report_type))
+                
+                row = cursor.fetchone()
+                if row:
+                    columns = [description[0] for description in cursor.description]
+                    data = dict(zip(columns, row))
+                    
+                    if data.get('raw_data'):
+                        try:
+                            data.update(json.loads(data['raw_data']))
+                        except json.JSONDecodeError:
+                            pass
+                    
+                    return data
+                
+                return None
+                
+        except Exception as e:
+            logger.error(f"Error getting financial data for {symbol}: {str(e)}")
+            return None
+    
+    def get_financial_symbols(self, report_type: str = 'annual') -> List[str]:
+        """Get all symbols with stored financial data of the given report type."""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT DISTINCT symbol FROM financial_statements WHERE report_type = ?
+                ''', (report_type,))
+                return [row[0] for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Error getting financial symbols: {str(e)}")
+            return []
+    
     def update_source_status(self, source_name: str, success: bool, error_message: str = None):
         """
         Update source status information.
@@ -446,6 +500,12 @@ class DataStore:
                     DELETE FROM market_prices WHERE fetched_at < ?
                 ''', (cutoff_date.isoformat(),))
                 
+                # Clean up superseded fundamentals snapshots (one row per day is written)
+                cursor.execute('''
+                    DELETE FROM financial_statements 
+                    WHERE report_type = 'fundamentals_snapshot' AND created_at < ?
+                ''', (cutoff_date.isoformat(),))
+                
                 # Clean up old quality metrics
                 cursor.execute('''
                     DELETE FROM data_quality_metrics WHERE measured_at < ?
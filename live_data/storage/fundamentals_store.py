@@ -0,0 +1,229 @@
+"""
+Fundamentals Store - Daily fundamentals snapshots shared by the strategy endpoints
+
+Yahoo's ``Ticker.info`` is one of the slowest calls we make, while the
+fundamentals behind it change at most once per day. This store keeps one
+snapshot per symbol in memory, backed by the ``financial_statements`` table
+(report_type ``fundamentals_snapshot``), and is refreshed in bulk by the
+scheduler. The value, buy-and-hold and carry analyses read from it instead
+of calling ``.info`` per request.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+import yfinance as yf
+
+from .data_store import DataStore
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_REPORT_TYPE = 'fundamentals_snapshot'
+
+# Raw Yahoo ``info`` keys kept in a snapshot (names unchanged so callers can
+# keep using ``info.get(...)``)
+SNAPSHOT_FIELDS = [
+    'quoteType', 'currency', 'longName', 'sector',
+    'currentPrice', 'regularMarketPrice', 'marketCap', 'beta',
+    'trailingPE', 'forwardPE', 'priceToBook', 'bookValue',
+    'trailingEps', 'forwardEps', 'dividendYield', 'payoutRatio',
+    'freeCashflow', 'sharesOutstanding', 'returnOnEquity', 'debtToEquity',
+    'currentRatio', 'profitMargins', 'revenueGrowth', 'earningsQuarterlyGrowth',
+    'totalRevenue', 'netIncomeToCommon', 'totalDebt', 'totalCash',
+]
+
+
+class FundamentalsStore:
+    """
+    In-memory fundamentals snapshots with a SQLite backing table.
+
+    Lookup order for ``get``: memory -> financial_statements -> live ``.info``.
+    """
+
+    def __init__(self, data_store: Optional[DataStore] = None, max_age_hours: int = 24,
+                 memory_ttl: int = 3600, max_workers: int = 8, failure_ttl: int = 900):
+        """
+        Initialize the fundamentals store.
+
+        Args:
+            data_store: DataStore backing the snapshots (default: live data DB)
+            max_age_hours: Maximum age of a persisted snapshot before a live fetch
+            memory_ttl: Seconds before the in-memory copy is re-read from the DB,
+                so refreshes written by the scheduler process become visible
+            max_workers: Parallel ``.info`` requests during a bulk refresh
+            failure_ttl: Seconds a symbol whose ``.info`` failed is not retried
+                by ``get``/``get_many`` (the scheduler's ``refresh`` still retries)
+        """
+        self.data_store = data_store or DataStore()
+        self.max_age = timedelta(hours=max_age_hours)
+        self.memory_ttl = memory_ttl
+        self.max_workers = max_workers
+        self.failure_ttl = failure_ttl
+        self._snapshots: Dict[str, Dict[str, Any]] = {}
+        self._loaded_at: Dict[str, float] = {}
+        self._failed_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def extract_snapshot(info: Dict[str, Any]) -> Dict[str, Any]:
+        """Reduce a raw ``info`` dict to the snapshot fields."""
+        return {field: info.get(field) for field in SNAPSHOT_FIELDS if info.get(field) is not None}
+
+    def _fetch_snapshot(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Fetch and persist a fresh snapshot from Yahoo Finance."""
+        try:
+            info = yf.Ticker(symbol).info or {}
+        except Exception as e:
+            logger.error(f"Error fetching fundamentals for {symbol}: {str(e)}")
+            self._remember_failure(symbol)
+            return None
+
+        snapshot = self.extract_snapshot(info)
+        if not snapshot:
+            self._remember_failure(symbol)
+            return None
+        snapshot['as_of'] = datetime.now().isoformat()
+
+        self.data_store.store_financial_data(symbol, {
+            'source': 'yahoo',
+            'period': datetime.now().strftime('%Y-%m-%d'),
+            'report_type': SNAPSHOT_REPORT_TYPE,
+            'revenue': snapshot.get('totalRevenue', 0),
+            'net_income': snapshot.get('netIncomeToCommon', 0),
+            'total_debt': snapshot.get('totalDebt', 0),
+            'cash': snapshot.get('totalCash', 0),
+            'free_cash_flow': snapshot.get('freeCashflow', 0),
+            'fundamentals': snapshot,
+        })
+        self._remember(symbol, snapshot)
+        return snapshot
+
+    def _remember(self, symbol: str, snapshot: Dict[str, Any]):
+        with self._lock:
+            self._snapshots[symbol] = snapshot
+            self._loaded_at[symbol] = time.time()
+            self._failed_at.pop(symbol, None)
+
+    def _remember_failure(self, symbol: str):
+        with self._lock:
+            self._failed_at[symbol] = time.time()
+
+    def _recently_failed(self, symbol: str) -> bool:
+        with self._lock:
+            return time.time() - self._failed_at.get(symbol, float('-inf')) < self.failure_ttl
+
+    def _load_persisted(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Read the latest persisted snapshot if it is younger than ``max_age``."""
+        row = self.data_store.get_latest_financial_data(symbol, report_type=SNAPSHOT_REPORT_TYPE)
+        if not row or not row.get('fundamentals'):
+            return None
+        snapshot = row['fundamentals']
+        try:
+            as_of = datetime.fromisoformat(snapshot.get('as_of', ''))
+        except ValueError:
+            return None
+        if datetime.now() - as_of > self.max_age:
+            return None
+        self._remember(symbol, snapshot)
+        return snapshot
+
+    def get(self, symbol: str) -> Dict[str, Any]:
+        """
+        Get the fundamentals snapshot for a symbol.
+
+        Returns:
+            Snapshot dict (empty if nothing could be fetched)
+        """
+        with self._lock:
+            snapshot = self._snapshots.get(symbol)
+            fresh = snapshot is not None and time.time() - self._loaded_at.get(symbol, 0) < self.memory_ttl
+        if fresh:
+            return snapshot
+
+        persisted = self._load_persisted(symbol)
+        if persisted is not None:
+            return persisted
+        if not self._recently_failed(symbol):
+            snapshot = self._fetch_snapshot(symbol) or snapshot
+        return snapshot or {}
+
+    def get_many(self, symbols: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Snapshots for several symbols; missing ones are fetched in parallel.
+
+        Symbols whose ``.info`` failed within ``failure_ttl`` are returned as
+        empty (or stale) snapshots without another live request.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        result = {}
+        missing = []
+        for symbol in symbols:
+            with self._lock:
+                snapshot = self._snapshots.get(symbol)
+                fresh = snapshot is not None and time.time() - self._loaded_at.get(symbol, 0) < self.memory_ttl
+            if fresh:
+                result[symbol] = snapshot
+                continue
+            snapshot = self._load_persisted(symbol)
+            if snapshot is not None:
+                result[symbol] = snapshot
+            elif self._recently_failed(symbol):
+                with self._lock:
+                    result[symbol] = self._snapshots.get(symbol, {})
+            else:
+                missing.append(symbol)
+
+        if missing:
+            result.update(self.refresh(missing)['snapshots'])
+        return {symbol: result.get(symbol, {}) for symbol in symbols}
+
+    def tracked_symbols(self) -> List[str]:
+        """All symbols with a snapshot in memory or in the database."""
+        persisted = self.data_store.get_financial_symbols(report_type=SNAPSHOT_REPORT_TYPE)
+        with self._lock:
+            return sorted(set(persisted) | set(self._snapshots))
+
+    def refresh(self, symbols: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Re-fetch snapshots in bulk (used by the daily scheduler job).
+
+        Args:
+            symbols: Symbols to refresh (default: all tracked symbols)
+
+        Returns:
+            Dict with refreshed snapshots and failed symbols
+        """
+        symbols = list(symbols) if symbols is not None else self.tracked_symbols()
+        snapshots, failed = {}, []
+        if not symbols:
+            return {'snapshots': snapshots, 'failed': failed}
+
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(symbols))) as executor:
+            futures = {executor.submit(self._fetch_snapshot, symbol): symbol for symbol in symbols}
+            for future in as_completed(futures):
+                symbol = futures[future]
+                snapshot = future.result()
+                if snapshot:
+                    snapshots[symbol] = snapshot
+                else:
+                    failed.append(symbol)
+
+        logger.info(f"Refreshed fundamentals for {len(snapshots)}/{len(symbols)} symbols "
+                    f"in {time.time() - start:.1f}s")
+        return {'snapshots': snapshots, 'failed': failed}
+
+
+_fundamentals_store = None
+
+
+def get_fundamentals_store() -> FundamentalsStore:
+    """Process-wide FundamentalsStore instance."""
+    global _fundamentals_store
+    if _fundamentals_store is None:
+        _fundamentals_store = FundamentalsStore()
+    return _fundamentals_store
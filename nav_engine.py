@@ -0,0 +1,273 @@
+"""
+Swiss Asset Manager - Portfolio-NAV
+-----------------------------------
+Tägliche Portfolio-Wertreihe aus Beständen und dem ausgerichteten Kurspanel
+(Datum × Symbol) sowie die daraus abgeleiteten Risikokennzahlen.
+
+- Stückzahlen (Buy & Hold): V = P q, ein Matrix-Vektor-Produkt.
+- Gewichte mit Rebalancing-Regel: 'none' (einmal kaufen, dann driften),
+  'daily' (konstante Mischung) oder periodisch ('monthly', 'quarterly',
+  'annual') über die vektorisierte Walk-Forward-NAV (auch vom Backtest genutzt).
+
+Max Drawdown, rollende Volatilität, historischer VaR/CVaR (risk_engine) und
+Benchmark-Kennzahlen laufen in O(T) auf der Reihe. Reihen werden pro
+(Portfolio, Regel, Stichtag) zwischengespeichert.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import risk_engine
+
+logger = logging.getLogger('swiss_asset_pro')
+
+TRADING_DAYS = 252
+FREQUENCIES = {'weekly': 'W', 'monthly': 'M', 'quarterly': 'Q', 'annual': 'Y'}
+REBALANCE_RULES = ('none', 'daily') + tuple(FREQUENCIES)
+MAX_CACHED_SERIES = 128
+
+
+def period_ends(index, frequency='monthly'):
+    """Zeilenpositionen des letzten Handelstags je Woche/Monat/Quartal/Jahr"""
+    if frequency not in FREQUENCIES:
+        raise ValueError(f"Unknown rebalance frequency '{frequency}'")
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    positions = pd.Series(np.arange(len(index)), index=index)
+    return positions.groupby(index.to_period(FREQUENCIES[frequency])).max().to_numpy()
+
+
+def walk_forward_nav(returns, positions, weights, cost_rate=0.0):
+    """
+    Tägliche NAV bei Rebalancing auf `weights[k]` am Schluss von Tag `positions[k]`
+    (1.0 am ersten Stichtag, vor dem Erstkauf).
+
+    Zwischen zwei Stichtagen driften die Gewichte mit den Kursen (Buy & Hold);
+    jede Umschichtung kostet cost_rate · Σ|Δw| des Portfoliowerts.
+
+    Args:
+        returns: (T × n) Tagesrenditen, NaN = kein Handel (Rendite 0)
+        positions: (K,) aufsteigende Zeilenpositionen der Stichtage
+        weights: (K × n) Zielgewichte je Stichtag
+        cost_rate: Kostensatz auf dem gehandelten Volumen
+
+    Returns:
+        Dict mit nav (T - positions[0],), turnover (K,) und costs (K,) als Anteil des Portfoliowerts
+    """
+    R = np.nan_to_num(np.asarray(returns, dtype=float))
+    positions = np.asarray(positions)
+    W = np.asarray(weights, dtype=float)
+    start = positions[0]
+
+    # Kumulierte Wachstumsfaktoren ab dem ersten Stichtag (Zeile 0 = Stichtag)
+    growth = np.vstack([np.ones(R.shape[1]), np.cumprod(1.0 + R[start + 1:], axis=0)])
+    anchors = positions - start
+    days = np.arange(1, len(growth))
+    segment = np.searchsorted(anchors, days, side='left') - 1
+
+    # Wertfaktor jedes Tages relativ zum Segmentanfang
+    scaled = W / growth[anchors]
+    ratio = np.einsum('dj,dj->d', scaled[segment], growth[1:])
+
+    # Gedriftete Gewichte unmittelbar vor jedem weiteren Stichtag
+    ends = anchors[1:]
+    end_ratio = ratio[ends - 1]
+    drifted = scaled[:-1] * growth[ends] / end_ratio[:, None]
+    turnover = np.abs(W).sum(axis=1)
+    turnover[1:] = np.abs(W[1:] - drifted).sum(axis=1)
+    costs = cost_rate * turnover
+
+    # Wert am Segmentanfang: Wertentwicklung der Vorsegmente nach Kosten
+    level = np.cumprod(np.concatenate([[1.0], end_ratio]) * (1.0 - costs))
+    nav = np.concatenate([[1.0], level[segment] * ratio])
+    return {'nav': nav, 'turnover': turnover, 'costs': costs}
+
+
+def portfolio_nav(prices, quantities=None, weights=None, rebalance='none', initial_value=None):
+    """
+    Tägliche Portfoliowerte.
+
+    Args:
+        prices: DataFrame der Schlusskurse (Datum × Symbol), lückenlos (ffill)
+        quantities: {symbol: stückzahl} für Buy & Hold; Wert in Kurswährung
+        weights: {symbol: gewicht} alternativ zu quantities (normiert auf Summe 1)
+        rebalance: Regel für Gewichte, siehe REBALANCE_RULES
+        initial_value: Startwert bei Gewichten (Default 1.0)
+
+    Returns:
+        pd.Series der Portfoliowerte
+    """
+    if (quantities is None) == (weights is None):
+        raise ValueError('Provide either quantities or weights')
+    holdings = quantities if quantities is not None else weights
+    symbols = [s for s in holdings if s in prices.columns]
+    if not symbols:
+        raise ValueError('No price history for the portfolio symbols')
+    P = prices[symbols].to_numpy(dtype=float)
+
+    if quantities is not None:
+        return pd.Series(P @ np.array([float(quantities[s]) for s in symbols]), index=prices.index)
+
+    if rebalance not in REBALANCE_RULES:
+        raise ValueError(f"Unknown rebalance rule '{rebalance}'")
+    w = np.array([float(weights[s]) for s in symbols])
+    w = w / w.sum()
+    start = 1.0 if initial_value is None else float(initial_value)
+
+    if rebalance == 'none':
+        nav = P @ (w * start / P[0])
+    elif rebalance == 'daily':
+        growth = 1.0 + (P[1:] / P[:-1] - 1.0) @ w
+        nav = start * np.concatenate([[1.0], np.cumprod(growth)])
+    else:
+        # Periodisches Rebalancing: erster Tag plus Periodenenden, Zielgewichte konstant
+        returns = np.vstack([np.zeros(len(symbols)), P[1:] / P[:-1] - 1.0])
+        ends = period_ends(prices.index, rebalance)
+        positions = np.unique(np.concatenate([[0], ends[ends < len(P) - 1]]))
+        path = walk_forward_nav(returns, positions, np.tile(w, (len(positions), 1)))
+        nav = start * path['nav']
+    return pd.Series(nav, index=prices.index)
+
+
+def daily_returns(nav):
+    nav = np.asarray(nav, dtype=float)
+    return nav[1:] / nav[:-1] - 1.0
+
+
+def drawdown(nav):
+    """Drawdown-Reihe nav / laufendes Maximum - 1"""
+    nav = np.asarray(nav, dtype=float)
+    return nav / np.maximum.accumulate(nav) - 1.0
+
+
+def max_drawdown(nav):
+    """
+    Maximaler Drawdown mit Hoch, Tief und Erholung (Positionen bzw. Datum bei pd.Series).
+
+    Returns:
+        Dict mit max_drawdown (≤ 0), peak, trough, recovery (None = nicht erholt)
+    """
+    values = np.asarray(nav, dtype=float)
+    if len(values) == 0:
+        return {'max_drawdown': 0.0, 'peak': None, 'trough': None, 'recovery': None}
+    series = drawdown(values)
+    trough = int(np.argmin(series))
+    peak = int(np.argmax(values[:trough + 1]))
+    recovered = np.nonzero(values[trough:] >= values[peak])[0]
+    recovery = trough + int(recovered[0]) if trough > peak and len(recovered) else None
+
+    labels = nav.index if isinstance(nav, pd.Series) else None
+
+    def label(position):
+        if position is None or labels is None:
+            return position
+        return labels[position]
+
+    return {
+        'max_drawdown': float(series[trough]),
+        'peak': label(peak),
+        'trough': label(trough),
+        'recovery': label(recovery),
+    }
+
+
+def rolling_volatility(nav, window=21, annualize=True):
+    """Rollende Volatilität der Tagesrenditen über kumulierte Summen in O(T)"""
+    r = daily_returns(nav)
+    result = np.full(len(r), np.nan)
+    if len(r) >= window > 1:
+        s1 = np.concatenate([[0.0], np.cumsum(r)])
+        s2 = np.concatenate([[0.0], np.cumsum(r * r)])
+        total = s1[window:] - s1[:-window]
+        squares = s2[window:] - s2[:-window]
+        variance = np.maximum((squares - total ** 2 / window) / (window - 1), 0.0)
+        result[window - 1:] = np.sqrt(variance * (TRADING_DAYS if annualize else 1))
+    if isinstance(nav, pd.Series):
+        return pd.Series(result, index=nav.index[1:])
+    return result
+
+
+def historical_var(returns, levels=(0.95, 0.99)):
+    """Historischer VaR und CVaR (Renditen, negative Zahlen = Verlust) je Konfidenzniveau"""
+    r = np.asarray(returns, dtype=float)
+    r = r[~np.isnan(r)]
+    result = risk_engine.portfolio_var(r[:, None], np.ones(1), levels)
+    return {level: {'var': float(v['var'][0]), 'cvar': float(v['cvar'][0])} for level, v in result.items()}
+
+
+def benchmark_statistics(nav, benchmark_nav, risk_free_rate=0.02):
+    """Beta, Alpha (annualisiert), Tracking Error, Information Ratio und Korrelation zur Benchmark"""
+    aligned = pd.concat([pd.Series(nav), pd.Series(benchmark_nav)], axis=1, join='inner').dropna()
+    if len(aligned) < 3:
+        return None
+    r = daily_returns(aligned.iloc[:, 0])
+    b = daily_returns(aligned.iloc[:, 1])
+    b_var = b.var(ddof=1)
+    beta = float(np.cov(r, b, ddof=1)[0, 1] / b_var) if b_var > 0 else 0.0
+    daily_rf = risk_free_rate / TRADING_DAYS
+    alpha = ((r.mean() - daily_rf) - beta * (b.mean() - daily_rf)) * TRADING_DAYS
+    active = r - b
+    tracking_error = active.std(ddof=1) * np.sqrt(TRADING_DAYS)
+    return {
+        'beta': beta,
+        'alpha': float(alpha),
+        'tracking_error': float(tracking_error),
+        'information_ratio': float(active.mean() * TRADING_DAYS / tracking_error) if tracking_error > 0 else 0.0,
+        'correlation': float(np.corrcoef(r, b)[0, 1]),
+        'observations': len(r),
+    }
+
+
+def nav_summary(nav, risk_free_rate=0.02, levels=(0.95, 0.99)):
+    """Rendite-, Volatilitäts-, Drawdown- und VaR-Kennzahlen einer NAV-Reihe"""
+    values = np.asarray(nav, dtype=float)
+    r = daily_returns(values)
+    years = len(r) / TRADING_DAYS
+    annual_return = (values[-1] / values[0]) ** (1.0 / years) - 1.0 if years > 0 and values[-1] > 0 else 0.0
+    volatility = r.std(ddof=1) * np.sqrt(TRADING_DAYS) if len(r) > 1 else 0.0
+    return {
+        'total_return': float(values[-1] / values[0] - 1.0),
+        'annual_return': float(annual_return),
+        'volatility': float(volatility),
+        'sharpe': float((annual_return - risk_free_rate) / volatility) if volatility > 0 else 0.0,
+        'drawdown': max_drawdown(nav),
+        'var': historical_var(r, levels),
+    }
+
+
+_series = OrderedDict()
+_series_lock = threading.Lock()
+
+
+def cached_nav(key, as_of, build):
+    """
+    NAV-Reihe für (key, as_of) aus dem Cache oder über build() neu berechnet.
+
+    Args:
+        key: Identität von Portfolio und Regel (z.B. Bestände, Rebalancing, Periode)
+        as_of: Datum des letzten Kurses; neue Kurse ergeben eine neue Reihe
+        build: Callable ohne Argumente, liefert die Reihe (nur bei Cache-Miss)
+    """
+    cache_key = (key, str(as_of))
+    with _series_lock:
+        nav = _series.get(cache_key)
+        if nav is not None:
+            _series.move_to_end(cache_key)
+            return nav
+
+    nav = build()
+    with _series_lock:
+        _series[cache_key] = nav
+        while len(_series) > MAX_CACHED_SERIES:
+            _series.popitem(last=False)
+    return nav
+
+
+def clear_cache():
+    with _series_lock:
+        _series.clear()
@@ -0,0 +1,389 @@
+"""
+Persistente Speicherschicht für swiss_asset_manager.db
+------------------------------------------------------
+
+Nutzt die von app.init_database angelegten Tabellen:
+- market_data_cache: dauerhafter L2-Cache hinter dem In-Memory-Cache
+- performance_metrics: inkrementell fortgeschriebene tägliche Portfolio-NAV/Risiko-Snapshots
+- user_preferences: speichert die Stückzahlen je Portfolio für die Fortschreibung
+- stress_returns: Tagesrenditen je Symbol in historischen Krisenfenstern (eigene Tabelle)
+- stress_missing: (Szenario, Symbol)-Paare ohne Daten, damit sie nicht täglich neu geladen werden
+"""
+
+import json
+import math
+import sqlite3
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+logger = logging.getLogger('swiss_asset_pro')
+
+DB_PATH = 'swiss_asset_manager.db'
+TRADING_DAYS = 252
+
+
+# Datenbanken, auf denen WAL schon aktiviert ist (der Modus bleibt in der Datei gespeichert)
+_wal_enabled = set()
+
+
+@contextmanager
+def _connect(db_path):
+    """
+    SQLite-Verbindung, die parallele Worker toleriert; committet am Ende des
+    Blocks (Rollback bei Fehler) und schliesst die Verbindung immer.
+    """
+    conn = sqlite3.connect(db_path, timeout=10)
+    try:
+        if db_path not in _wal_enabled:
+            conn.execute('PRAGMA journal_mode=WAL')
+            _wal_enabled.add(db_path)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+class MarketDataCacheStore:
+    """Durable L2 für SimpleCache auf Basis der Tabelle market_data_cache"""
+
+    def __init__(self, db_path=DB_PATH, source='simple_cache'):
+        self.db_path = db_path
+        self.source = source
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Liefert (value, remaining_ttl) oder None, wenn nicht vorhanden/abgelaufen.
+        """
+        try:
+            with _connect(self.db_path) as conn:
+                row = conn.execute(
+                    'SELECT data, timestamp FROM market_data_cache WHERE symbol = ?', (key,)
+                ).fetchone()
+        except Exception as e:
+            logger.warning(f"L2 cache read failed for {key}: {e}")
+            return None
+
+        if not row:
+            return None
+
+        try:
+            envelope = json.loads(row[0])
+            stored_at = datetime.fromisoformat(row[1]).timestamp()
+        except (ValueError, TypeError):
+            return None
+
+        remaining = envelope.get('ttl', 0) - (time.time() - stored_at)
+        if remaining <= 0:
+            return None
+        return envelope.get('value'), remaining
+
+    def set(self, key, value, ttl):
+        """Schreibt einen Eintrag durch; nicht JSON-fähige Werte werden übersprungen"""
+        try:
+            payload = json.dumps({'ttl': ttl, 'value': value})
+        except (TypeError, ValueError):
+            return False
+
+        try:
+            with self.lock, _connect(self.db_path) as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO market_data_cache (symbol, data, timestamp, source) VALUES (?, ?, ?, ?)',
+                    (key, payload, datetime.now().isoformat(), self.source)
+                )
+            return True
+        except Exception as e:
+            logger.warning(f"L2 cache write failed for {key}: {e}")
+            return False
+
+    def purge_expired(self):
+        """Entfernt abgelaufene Einträge, gibt die Anzahl gelöschter Zeilen zurück"""
+        removed = 0
+        try:
+            with self.lock, _connect(self.db_path) as conn:
+                rows = conn.execute('SELECT symbol, data, timestamp FROM market_data_cache').fetchall()
+                now = time.time()
+                for key, data, stamp in rows:
+                    try:
+                        ttl = json.loads(data).get('ttl', 0)
+                        expired = now - datetime.fromisoformat(stamp).timestamp() > ttl
+                    except (ValueError, TypeError, AttributeError):
+                        expired = True
+                    if expired:
+                        conn.execute('DELETE FROM market_data_cache WHERE symbol = ?', (key,))
+                        removed += 1
+        except Exception as e:
+            logger.warning(f"L2 cache purge failed: {e}")
+        return removed
+
+
+class PerformanceMetricsStore:
+    """
+    Tägliche Portfolio-Snapshots in performance_metrics.
+
+    Neue Handelstage werden nur angehängt; Drawdown und kumulierte Rendite werden
+    aus dem letzten Snapshot plus SQL-Aggregaten fortgeschrieben statt neu berechnet.
+    Volatilität, Sharpe und VaR beziehen sich alle auf dasselbe gleitende Fenster
+    der letzten TRADING_DAYS Tagesrenditen.
+    """
+
+    def __init__(self, db_path=DB_PATH, risk_free_rate=0.02):
+        self.db_path = db_path
+        self.risk_free_rate = risk_free_rate
+        self.lock = threading.Lock()
+        self._migrate()
+
+    def _migrate(self):
+        """Ergänzt portfolio_key, damit mehrere Portfolios parallel gespeichert werden können"""
+        with _connect(self.db_path) as conn:
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(performance_metrics)')]
+            if 'portfolio_key' not in columns:
+                conn.execute("ALTER TABLE performance_metrics ADD COLUMN portfolio_key TEXT NOT NULL DEFAULT 'default'")
+            conn.execute(
+                'CREATE UNIQUE INDEX IF NOT EXISTS idx_performance_metrics_key_date '
+                'ON performance_metrics(portfolio_key, date)'
+            )
+
+    @staticmethod
+    def portfolio_key(holdings):
+        """Stabiler Schlüssel aus {symbol: stückzahl}"""
+        parts = [f"{symbol}:{round(float(qty), 6)}" for symbol, qty in sorted(holdings.items())]
+        return '|'.join(parts)
+
+    def get_holdings(self, key):
+        """Gespeicherte Stückzahlen für ein Portfolio (aus user_preferences)"""
+        with _connect(self.db_path) as conn:
+            row = conn.execute(
+                'SELECT value FROM user_preferences WHERE key = ?', (f'performance_holdings:{key}',)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_holdings(self, key, holdings):
+        with self.lock, _connect(self.db_path) as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO user_preferences (key, value, updated_at) VALUES (?, ?, ?)',
+                (f'performance_holdings:{key}', json.dumps(holdings), datetime.now().isoformat())
+            )
+
+    def last_date(self, key):
+        """Datum des jüngsten Snapshots (YYYY-MM-DD) oder None"""
+        with _connect(self.db_path) as conn:
+            row = conn.execute(
+                'SELECT MAX(date) FROM performance_metrics WHERE portfolio_key = ?', (key,)
+            ).fetchone()
+        return row[0] if row and row[0] else None
+
+    def append_snapshots(self, key, nav_points):
+        """
+        Hängt neue (date, portfolio_value)-Punkte an und berechnet die Kennzahlen inkrementell.
+
+        Args:
+            key: Portfolio-Schlüssel
+            nav_points: Liste von (date_str, value), aufsteigend sortiert
+
+        Returns:
+            Anzahl neu geschriebener Zeilen
+        """
+        with self.lock, _connect(self.db_path) as conn:
+            last = conn.execute(
+                'SELECT date, portfolio_value, max_drawdown FROM performance_metrics '
+                'WHERE portfolio_key = ? ORDER BY date DESC LIMIT 1', (key,)
+            ).fetchone()
+            agg = conn.execute(
+                'SELECT MAX(portfolio_value), MIN(date) FROM performance_metrics WHERE portfolio_key = ?', (key,)
+            ).fetchone()
+            tail = conn.execute(
+                'SELECT daily_return FROM performance_metrics WHERE portfolio_key = ? AND daily_return IS NOT NULL '
+                'ORDER BY date DESC LIMIT ?', (key, TRADING_DAYS - 1)
+            ).fetchall()
+
+            if last:
+                last_date, prev_value, max_dd = last[0], last[1], last[2] or 0.0
+                first_value = conn.execute(
+                    'SELECT portfolio_value FROM performance_metrics WHERE portfolio_key = ? AND date = ?',
+                    (key, agg[1])
+                ).fetchone()[0]
+                peak = agg[0]
+            else:
+                last_date, prev_value, max_dd, first_value, peak = None, None, 0.0, None, None
+
+            window = [r[0] for r in reversed(tail)]
+            rows = []
+
+            for date_str, value in nav_points:
+                if last_date is not None and date_str <= last_date:
+                    continue
+                value = float(value)
+                if not math.isfinite(value) or value <= 0:
+                    continue
+
+                if first_value is None:
+                    first_value = value
+                daily_return = value / prev_value - 1 if prev_value else None
+                peak = value if peak is None else max(peak, value)
+                max_dd = min(max_dd, value / peak - 1)
+
+                volatility = sharpe = var_95 = None
+                if daily_return is not None:
+                    window.append(daily_return)
+                    if len(window) > TRADING_DAYS:
+                        window.pop(0)
+                if len(window) > 1:
+                    # Ein Fenster für alle Risikokennzahlen der Zeile
+                    returns = np.asarray(window)
+                    mean = float(returns.mean())
+                    volatility = float(returns.std(ddof=1)) * math.sqrt(TRADING_DAYS)
+                    sharpe = (mean * TRADING_DAYS - self.risk_free_rate) / volatility if volatility > 0 else 0.0
+                    var_95 = float(np.percentile(returns, 5))
+
+                rows.append((
+                    key, date_str, value, daily_return, value / first_value - 1,
+                    volatility, sharpe, max_dd, var_95
+                ))
+                prev_value = value
+                last_date = date_str
+
+            if rows:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO performance_metrics '
+                    '(portfolio_key, date, portfolio_value, daily_return, cumulative_return, '
+                    'volatility, sharpe_ratio, max_drawdown, var_95) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    rows
+                )
+            return len(rows)
+
+    def get_history(self, key, start=None):
+        """Gespeicherte Snapshots als Liste von Dicts (für Charts)"""
+        query = ('SELECT date, portfolio_value, daily_return, cumulative_return, volatility, '
+                 'sharpe_ratio, max_drawdown, var_95 FROM performance_metrics WHERE portfolio_key = ?')
+        params = [key]
+        if start:
+            query += ' AND date >= ?'
+            params.append(start)
+        query += ' ORDER BY date ASC'
+
+        with _connect(self.db_path) as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        columns = ['date', 'portfolio_value', 'daily_return', 'cumulative_return',
+                   'volatility', 'sharpe_ratio', 'max_drawdown', 'var_95']
+        return [dict(zip(columns, row)) for row in rows]
+
+    def get_summary(self, key):
+        """Kennzahlen des letzten Snapshots inkl. Drawdown-Statistik"""
+        with _connect(self.db_path) as conn:
+            row = conn.execute(
+                'SELECT date, portfolio_value, cumulative_return, volatility, sharpe_ratio, '
+                'max_drawdown, var_95 FROM performance_metrics WHERE portfolio_key = ? '
+                'ORDER BY date DESC LIMIT 1', (key,)
+            ).fetchone()
+            if not row:
+                return None
+            peak = conn.execute(
+                'SELECT MAX(portfolio_value), COUNT(*) FROM performance_metrics WHERE portfolio_key = ?', (key,)
+            ).fetchone()
+
+        return {
+            'date': row[0],
+            'portfolioValue': row[1],
+            'cumulativeReturn': row[2],
+            'volatility': row[3],
+            'sharpeRatio': row[4],
+            'maxDrawdown': row[5],
+            'var95': row[6],
+            'currentDrawdown': row[1] / peak[0] - 1 if peak[0] else 0.0,
+            'observations': peak[1]
+        }
+
+
+class StressReturnsStore:
+    """
+    Tagesrenditen je (Stress-Szenario, Symbol) in der Tabelle stress_returns.
+
+    Historische Krisenfenster ändern sich nicht mehr; die Vektoren werden einmal
+    geladen und danach ohne Netzwerkzugriff aus der lokalen Datenbank gelesen.
+    Dasselbe gilt für Paare ohne Daten (stress_missing): ein Symbol, das im
+    Fenster noch nicht kotiert war, bekommt auch später keine Historie.
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self._migrate()
+
+    def _migrate(self):
+        with _connect(self.db_path) as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS stress_returns ('
+                'scenario TEXT NOT NULL, symbol TEXT NOT NULL, dates TEXT NOT NULL, '
+                'returns TEXT NOT NULL, updated_at TEXT NOT NULL, PRIMARY KEY (scenario, symbol))'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS stress_missing ('
+                'scenario TEXT NOT NULL, symbol TEXT NOT NULL, reason TEXT NOT NULL, '
+                'updated_at TEXT NOT NULL, PRIMARY KEY (scenario, symbol))'
+            )
+
+    def save(self, scenario, symbol, dates, returns):
+        """Speichert den Renditevektor (dates: YYYY-MM-DD, returns: gleich lang)"""
+        with self.lock, _connect(self.db_path) as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO stress_returns (scenario, symbol, dates, returns, updated_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (scenario, symbol, json.dumps(list(dates)), json.dumps([float(r) for r in returns]),
+                 datetime.now().isoformat())
+            )
+            conn.execute('DELETE FROM stress_missing WHERE scenario = ? AND symbol = ?', (scenario, symbol))
+
+    def save_missing(self, scenario, symbol, reason):
+        """Merkt sich ein Paar ohne Daten (reason: 'no_history' oder 'failed')"""
+        with self.lock, _connect(self.db_path) as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO stress_missing (scenario, symbol, reason, updated_at) VALUES (?, ?, ?, ?)',
+                (scenario, symbol, reason, datetime.now().isoformat())
+            )
+
+    def load_missing(self):
+        """
+        Alle Paare ohne Daten.
+
+        Returns:
+            Dict {scenario: {symbol: reason}}
+        """
+        with _connect(self.db_path) as conn:
+            rows = conn.execute('SELECT scenario, symbol, reason FROM stress_missing').fetchall()
+        result = {}
+        for scenario, symbol, reason in rows:
+            result.setdefault(scenario, {})[symbol] = reason
+        return result
+
+    def load(self, scenario=None):
+        """
+        Alle gespeicherten Vektoren (optional nur eines Szenarios).
+
+        Returns:
+            Dict {scenario: {symbol: (dates, returns)}}
+        """
+        query = 'SELECT scenario, symbol, dates, returns FROM stress_returns'
+        params = ()
+        if scenario is not None:
+            query += ' WHERE scenario = ?'
+            params = (scenario,)
+        with _connect(self.db_path) as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        result = {}
+        for name, symbol, dates, returns in rows:
+            result.setdefault(name, {})[symbol] = (json.loads(dates), np.array(json.loads(returns), dtype=float))
+        return result
+
+    def symbols(self):
+        """Symbole mit mindestens einem gespeicherten Szenario"""
+        with _connect(self.db_path) as conn:
+            rows = conn.execute('SELECT DISTINCT symbol FROM stress_returns').fetchall()
+        return sorted(row[0] for row in rows)
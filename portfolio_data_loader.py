@@ -7,9 +7,10 @@ Lädt nur die Daten, die für das aktuelle Portfolio benötigt werden.
 import logging
 import os
 import time
-import json
 import threading
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
 import yfinance as yf
 import pandas as pd
 import numpy as np
@@ -22,16 +23,39 @@ logger = logging.getLogger("portfolio_data")
 if not os.path.exists('cache'):
     os.makedirs('cache')
 
+MAX_FRAMES = 256  # höchstens so viele (Asset, Periode)-Historien im Speicher (LRU)
+
+
+def _normalize_index(hist):
+    """
+    Einheitlicher Index für alle Quellen: Handelstag der Börse als UTC-Mitternacht.
+
+    yf.download liefert tz-naive Börsenzeit, Ticker.history tz-aware Börsenzeit;
+    gemischt liessen sie sich nicht zu einem Panel verbinden. Das Kalenderdatum
+    der Börse bleibt erhalten, der Index ist immer tz-aware.
+    """
+    index = pd.DatetimeIndex(hist.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    hist = hist.copy()
+    hist.index = index.normalize().tz_localize('UTC')
+    return hist[~hist.index.duplicated(keep='last')]
+
+
 class PortfolioDataLoader:
     """Lädt nur die Daten, die für das aktuelle Portfolio benötigt werden"""
     
-    def __init__(self):
+    def __init__(self, max_workers=8):
         self.cache_dir = "cache"
         self.cache_duration = 3600  # 1 Stunde Cache-Dauer
+        self.period = "1mo"
+        self.max_workers = max_workers
         self.lock = threading.Lock()
         self.portfolio_assets = set()
         self.loading_status = "idle"
         self.last_update = None
+        # Heisse Kopie im Speicher: (asset, period) -> (DataFrame, geladen_um), LRU
+        self._frames = OrderedDict()
     
     def register_portfolio_assets(self, assets):
         """Registriert Assets aus dem Portfolio für das Laden"""
@@ -50,11 +74,86 @@ class PortfolioDataLoader:
         return {
             "status": self.loading_status,
             "assets_count": len(self.portfolio_assets),
+            "in_memory": len(self._frames),
             "last_update": self.last_update
         }
     
-    def load_data_for_portfolio(self):
+    def _cache_file(self, asset, period):
+        """Binäre Cache-Datei (Pickle erhält dtypes und tz-aware Index)"""
+        return os.path.join(self.cache_dir, f"market_data_{asset}_{period}.pkl")
+    
+    def _remember(self, asset, period, hist, loaded_at):
+        with self.lock:
+            self._frames[(asset, period)] = (hist, loaded_at)
+            self._frames.move_to_end((asset, period))
+            while len(self._frames) > MAX_FRAMES:
+                self._frames.popitem(last=False)
+    
+    def _from_memory(self, asset, period, allow_stale=False):
+        with self.lock:
+            entry = self._frames.get((asset, period))
+            if entry and (allow_stale or time.time() - entry[1] < self.cache_duration):
+                self._frames.move_to_end((asset, period))
+                return entry[0]
+        return None
+    
+    def _from_disk(self, asset, period, allow_stale=False):
+        cache_file = self._cache_file(asset, period)
+        if not os.path.exists(cache_file):
+            return None
+        mtime = os.path.getmtime(cache_file)
+        if not allow_stale and time.time() - mtime >= self.cache_duration:
+            return None
+        try:
+            # Ältere Cache-Dateien können noch einen tz-naiven Index haben
+            hist = _normalize_index(pd.read_pickle(cache_file))
+        except Exception as e:
+            logger.error(f"Fehler beim Lesen des Cache für {asset}: {e}")
+            return None
+        self._remember(asset, period, hist, mtime)
+        return hist
+    
+    def _store(self, asset, period, hist):
+        self._remember(asset, period, hist, time.time())
+        try:
+            hist.to_pickle(self._cache_file(asset, period))
+        except Exception as e:
+            logger.warning(f"Cache für {asset} konnte nicht geschrieben werden: {e}")
+        return hist
+    
+    def _fetch_batch(self, assets, period=None, start=None):
+        """Ein gebündelter Download (period oder ab start); fehlende Assets werden parallel einzeln nachgeladen"""
+        window = {'start': start} if start else {'period': period}
+        frames = {}
+        if len(assets) > 1:
+            try:
+                raw = yf.download(assets, **window, group_by='ticker', auto_adjust=True,
+                                  threads=True, progress=False)
+                for asset in assets:
+                    if isinstance(raw.columns, pd.MultiIndex) and asset in raw.columns.get_level_values(0):
+                        hist = raw[asset].dropna(how='all')
+                        if not hist.empty:
+                            frames[asset] = hist
+            except Exception as e:
+                logger.warning(f"Gebündelter Download fehlgeschlagen, lade einzeln: {e}")
+        
+        missing = [a for a in assets if a not in frames]
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(missing))) as executor:
+                futures = {executor.submit(lambda a: yf.Ticker(a).history(**window), a): a for a in missing}
+                for future in as_completed(futures):
+                    asset = futures[future]
+                    try:
+                        hist = future.result()
+                        if hist is not None and not hist.empty:
+                            frames[asset] = hist
+                    except Exception as e:
+                        logger.error(f"Fehler beim Laden von {asset}: {e}")
+        return {asset: _normalize_index(hist) for asset, hist in frames.items()}
+    
+    def load_data_for_portfolio(self, period=None):
         """Lädt nur die Daten für die registrierten Portfolio Assets"""
+        period = period or self.period
         if not self.portfolio_assets:
             logger.info("Kein Portfolio vorhanden - überspringe Datenladung")
             return {"status": "no_portfolio", "message": "Kein Portfolio vorhanden"}
@@ -66,36 +165,24 @@ class PortfolioDataLoader:
         logger.info(f"Starte Laden von {len(assets_to_load)} Portfolio Assets...")
         results = {"success": [], "error": []}
         
+        # Prüfe Speicher und Cache zuerst
+        stale = []
         for asset in assets_to_load:
-            try:
-                # Prüfe Cache zuerst
-                cache_file = os.path.join(self.cache_dir, f"market_data_{asset}.cache")
-                if os.path.exists(cache_file):
-                    cache_time = os.path.getmtime(cache_file)
-                    if time.time() - cache_time < self.cache_duration:
-                        logger.info(f"Verwende Cache für {asset}")
-                        results["success"].append(asset)
-                        continue
-                
-                # Lade Daten von Yahoo Finance
-                logger.info(f"Lade Daten für {asset}...")
-                ticker = yf.Ticker(asset)
-                hist = ticker.history(period="1mo")
-                if hist.empty:
+            if self._from_memory(asset, period) is not None or self._from_disk(asset, period) is not None:
+                results["success"].append(asset)
+            else:
+                stale.append(asset)
+        
+        if stale:
+            logger.info(f"Lade Daten für {len(stale)} Assets von Yahoo Finance...")
+            frames = self._fetch_batch(stale, period)
+            for asset in stale:
+                if asset in frames:
+                    self._store(asset, period, frames[asset])
+                    results["success"].append(asset)
+                else:
                     logger.warning(f"Keine Daten für {asset} gefunden")
                     results["error"].append(asset)
-                    continue
-                
-                # Speichere in Cache
-                with open(cache_file, 'w') as f:
-                    hist.to_json(f)
-                
-                logger.info(f"Daten für {asset} erfolgreich geladen")
-                results["success"].append(asset)
-                
-            except Exception as e:
-                logger.error(f"Fehler beim Laden von {asset}: {e}")
-                results["error"].append(asset)
         
         with self.lock:
             self.loading_status = "completed"
@@ -109,79 +196,104 @@ class PortfolioDataLoader:
             "timestamp": self.last_update
         }
     
-    def get_asset_data(self, asset):
+    def get_asset_data(self, asset, period=None):
         """Holt Daten für ein bestimmtes Asset"""
-        cache_file = os.path.join(self.cache_dir, f"market_data_{asset}.cache")
+        period = period or self.period
+        hist = self._from_memory(asset, period)
+        if hist is None:
+            hist = self._from_disk(asset, period)
+        if hist is not None:
+            return hist
         
         # Wenn nicht im Cache oder Cache abgelaufen, lade neu
-        if not os.path.exists(cache_file) or time.time() - os.path.getmtime(cache_file) > self.cache_duration:
-            try:
-                logger.info(f"Lade aktuelle Daten für {asset}...")
-                ticker = yf.Ticker(asset)
-                hist = ticker.history(period="1mo")
-                if hist.empty:
-                    logger.warning(f"Keine Daten für {asset} gefunden")
-                    return None
-                
-                # Speichere in Cache
-                with open(cache_file, 'w') as f:
-                    hist.to_json(f)
-            except Exception as e:
-                logger.error(f"Fehler beim Laden von {asset}: {e}")
-                if os.path.exists(cache_file):
-                    # Verwende alten Cache im Notfall
-                    pass
-                else:
-                    return None
+        frames = self._fetch_batch([asset], period)
+        if asset in frames:
+            return self._store(asset, period, frames[asset])
         
-        # Lese aus Cache
-        try:
-            with open(cache_file, 'r') as f:
-                data = pd.read_json(f)
-            return data
-        except Exception as e:
-            logger.error(f"Fehler beim Lesen des Cache für {asset}: {e}")
-            return None
+        # Verwende alten Cache im Notfall
+        logger.warning(f"Keine aktuellen Daten für {asset}, verwende alten Cache falls vorhanden")
+        return self._from_disk(asset, period, allow_stale=True)
+    
+    def _ensure_loaded(self, assets, period):
+        """Lädt alle nicht im Speicher/Cache vorhandenen Assets in einem Batch"""
+        frames, missing = {}, []
+        for asset in assets:
+            hist = self._from_memory(asset, period)
+            if hist is None:
+                hist = self._from_disk(asset, period)
+            if hist is None:
+                missing.append(asset)
+            else:
+                frames[asset] = hist
+        if missing:
+            fetched = self._fetch_batch(missing, period)
+            for asset in missing:
+                if asset in fetched:
+                    frames[asset] = self._store(asset, period, fetched[asset])
+                else:
+                    # Abgelaufene Kopie im Speicher ist besser als keine Daten
+                    stale = self._from_memory(asset, period, allow_stale=True)
+                    if stale is not None:
+                        frames[asset] = stale
+        return frames
+    
+    def get_histories(self, assets, period=None, start=None):
+        """
+        Historien je Asset aus einem gebündelten Download.
+
+        Mit start wird ab diesem Datum geladen (ohne Cache), z.B. um eine Lücke
+        seit dem letzten gespeicherten Tag beliebiger Länge nachzutragen.
+        """
+        if start is not None:
+            return self._fetch_batch(list(assets), start=start)
+        return self._ensure_loaded(list(assets), period or self.period)
+    
+    def get_close_panel(self, assets, period=None):
+        """Schlusskurse als (Datum × Asset)-Matrix; fehlende Assets werden gebündelt nachgeladen"""
+        frames = self.get_histories(assets, period)
+        closes = {asset: hist['Close'] for asset, hist in frames.items() if 'Close' in hist}
+        if not closes:
+            return pd.DataFrame()
+        return pd.DataFrame(closes).sort_index()
     
     def get_portfolio_performance(self, portfolio):
         """Berechnet die Performance für ein Portfolio"""
         if not portfolio or not isinstance(portfolio, dict):
             return {"error": "Kein gültiges Portfolio"}
         
-        total_value = 0
-        total_change = 0
-        assets_data = []
+        assets = list(portfolio.keys())
+        weights = np.array([float(portfolio[a]) for a in assets])
+        current = np.zeros(len(assets))
+        previous = np.zeros(len(assets))
         
-        for asset, weight in portfolio.items():
-            data = self.get_asset_data(asset)
+        frames = self._ensure_loaded(assets, self.period)
+        for i, asset in enumerate(assets):
+            data = frames.get(asset)
             if data is None or data.empty:
-                assets_data.append({
-                    "asset": asset,
-                    "weight": weight,
-                    "price": 0,
-                    "change": 0,
-                    "status": "error"
-                })
+                current[i] = previous[i] = np.nan
                 continue
-            
-            # Berechne aktuelle Werte
-            current_price = data['Close'].iloc[-1]
-            previous_price = data['Close'].iloc[-2] if len(data) > 1 else current_price
-            change_pct = ((current_price - previous_price) / previous_price) * 100 if previous_price > 0 else 0
-            
-            weighted_value = weight * current_price
-            weighted_change = weight * change_pct
-            
-            total_value += weighted_value
-            total_change += weighted_change
-            
-            assets_data.append({
+            closes = data['Close'].to_numpy(dtype=float)
+            current[i] = closes[-1]
+            previous[i] = closes[-2] if len(closes) > 1 else closes[-1]
+        
+        valid = ~np.isnan(current)
+        change_pct = np.zeros(len(assets))
+        mask = valid & (previous > 0)
+        change_pct[mask] = (current[mask] / previous[mask] - 1) * 100
+        
+        total_value = float(np.dot(weights[valid], current[valid]))
+        total_change = float(np.dot(weights[valid], change_pct[valid]))
+        
+        assets_data = [
+            {
                 "asset": asset,
-                "weight": weight,
-                "price": round(current_price, 2),
-                "change": round(change_pct, 2),
-                "status": "success"
-            })
+                "weight": portfolio[asset],
+                "price": round(float(current[i]), 2) if valid[i] else 0,
+                "change": round(float(change_pct[i]), 2) if valid[i] else 0,
+                "status": "success" if valid[i] else "error"
+            }
+            for i, asset in enumerate(assets)
+        ]
         
         return {
             "total_value": round(total_value, 2),
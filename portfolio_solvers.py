@@ -0,0 +1,539 @@
+"""
+Swiss Asset Manager - Portfolio-Solver
+--------------------------------------
+Spezialisierte Löser für die Optimierer in real_calculations und app.py:
+
+- solve_qp: primale Active-Set-Methode für konvexe QPs mit Gleichungen
+  (z.B. Budget, Zielrendite) und Box-Schranken (long-only). Löst je Iteration
+  ein KKT-System mit exakten Gradienten statt SciPy-Finite-Differenzen und
+  lässt sich mit der vorherigen Lösung warm starten.
+- min_variance / mean_variance: Markowitz-Probleme auf Basis von solve_qp
+- efficient_frontier: ganze Effizienzkurve mit Warmstart von Punkt zu Punkt
+- max_sharpe: Tangentialportfolio als konvexes QP (Variablentransformation)
+- risk_parity: Risk Budgeting per Newton auf der Log-Barrier-Formulierung
+- hrp: Hierarchical Risk Parity (Clustering, Quasi-Diagonalisierung,
+  rekursive Bisektion) in O(n²) ohne Matrixinversion, auch für n > T
+- evaluate_portfolios: Rendite, Volatilität, Risikobeiträge und Tracking Error
+  vieler Kandidaten-Portfolios in wenigen Matrixprodukten
+
+Alle Löser liefern neben den Gewichten Iterationen, Laufzeit und Konvergenz.
+Statt einer dichten Σ kann überall ein factor_model.FactorCovariance übergeben
+werden; risk_parity rechnet dann durchgehend in der Low-Rank-Form.
+"""
+
+import logging
+import time
+
+import numpy as np
+from scipy.cluster import hierarchy
+from scipy.linalg import cho_factor, cho_solve
+from scipy.optimize import linprog
+from scipy.spatial.distance import squareform
+
+from factor_model import FactorCovariance, as_matrix
+
+logger = logging.getLogger('swiss_asset_pro')
+
+TOLERANCE = 1e-10
+
+
+def _result(weights, iterations, converged, started, method, objective=None):
+    return {
+        'weights': weights,
+        'iterations': int(iterations),
+        'converged': bool(converged),
+        'time_ms': (time.perf_counter() - started) * 1000,
+        'method': method,
+        'objective': objective,
+    }
+
+
+def diagnostics(result):
+    """Solver-Kennzahlen eines Ergebnisses ohne die Gewichte (für API-Antworten)"""
+    return {key: value for key, value in result.items() if key != 'weights'}
+
+
+def _project_capped_simplex(v, lower, upper, total=1.0):
+    """Euklidische Projektion auf {lower <= x <= upper, sum(x) = total} per Bisektion"""
+    lo_tau = np.min(v - upper) - 1.0
+    hi_tau = np.max(v - lower) + 1.0
+    for _ in range(100):
+        tau = 0.5 * (lo_tau + hi_tau)
+        if np.clip(v - tau, lower, upper).sum() > total:
+            lo_tau = tau
+        else:
+            hi_tau = tau
+    return np.clip(v - 0.5 * (lo_tau + hi_tau), lower, upper)
+
+
+def _feasible_start(A, b, lower, upper, x0):
+    """Zulässiger Startpunkt; nutzt x0, wenn möglich, sonst eine LP-Ecke"""
+    n = A.shape[1]
+    budget_only = A.shape[0] == 1 and np.allclose(A[0], 1.0) and np.all(np.isfinite(upper))
+
+    if x0 is not None:
+        x = np.clip(np.asarray(x0, dtype=float), lower, upper)
+        if budget_only:
+            x = _project_capped_simplex(x, lower, upper, b[0])
+        if np.allclose(A @ x, b, atol=1e-9):
+            return x
+    elif budget_only:
+        return _project_capped_simplex(np.full(n, b[0] / n), lower, upper, b[0])
+
+    bounds = [(lo, None if np.isinf(hi) else hi) for lo, hi in zip(lower, upper)]
+    if x0 is None:
+        lp = linprog(np.zeros(n), A_eq=A, b_eq=b, bounds=bounds, method='highs')
+    else:
+        # Zulässiger Punkt mit minimalem L1-Abstand zu x0: x - x0 = s⁺ - s⁻
+        identity = np.eye(n)
+        A_eq = np.block([[A, np.zeros((len(b), 2 * n))], [identity, -identity, identity]])
+        b_eq = np.concatenate([b, x])
+        cost = np.concatenate([np.zeros(n), np.ones(2 * n)])
+        lp = linprog(cost, A_eq=A_eq, b_eq=b_eq, bounds=bounds + [(0, None)] * (2 * n), method='highs')
+    if lp.status != 0:
+        return None
+    return np.clip(lp.x[:n], lower, upper)
+
+
+def solve_qp(Q, c, A, b, lower, upper, x0=None, max_iter=None, tol=TOLERANCE):
+    """
+    Minimiert 0.5 xᵀQx + cᵀx unter A x = b und lower <= x <= upper.
+
+    Primale Active-Set-Methode (Nocedal/Wright, Alg. 16.3): die aktiven
+    Schranken werden fixiert, für die freien Variablen wird das KKT-System
+    gelöst; blockierende Schranken werden aufgenommen, Schranken mit falschem
+    Multiplikator-Vorzeichen freigegeben. Q muss positiv semidefinit sein.
+
+    Args:
+        Q: (n × n) Matrix, c: (n,) Vektor
+        A: (m × n) Gleichungsmatrix, b: (m,) rechte Seite
+        lower / upper: Schranken (Skalar oder (n,), upper darf inf sein)
+        x0: Warmstart (z.B. Lösung des Vorgängerproblems)
+        max_iter: Obergrenze der Iterationen (Default 10 n + 50)
+
+    Returns:
+        Dict mit weights, iterations, converged, time_ms, method, objective
+        (weights ist None, wenn das Problem unzulässig ist)
+    """
+    started = time.perf_counter()
+    Q = as_matrix(Q)
+    n = Q.shape[0]
+    c = np.zeros(n) if c is None else np.asarray(c, dtype=float)
+    A = np.atleast_2d(np.asarray(A, dtype=float))
+    b = np.atleast_1d(np.asarray(b, dtype=float))
+    m = A.shape[0]
+    lower = np.broadcast_to(np.asarray(lower, dtype=float), (n,)).copy()
+    upper = np.broadcast_to(np.asarray(upper, dtype=float), (n,)).copy()
+    max_iter = max_iter or 10 * n + 50
+
+    # Kleiner Ridge gegen singuläre Kovarianzen (weniger Beobachtungen als Assets)
+    Q = Q + np.eye(n) * (1e-12 * max(np.trace(Q) / n, 1e-12))
+
+    if x0 is None:
+        # Kaltstart: Lösung ohne Schranken, danach auf die zulässige Menge gebracht;
+        # die meisten Schranken sind damit schon in der ersten Arbeitsmenge
+        kkt = np.block([[Q, A.T], [A, np.zeros((m, m))]])
+        try:
+            x0 = np.linalg.solve(kkt, np.concatenate([-c, b]))[:n]
+        except np.linalg.LinAlgError:
+            x0 = None
+
+    x = _feasible_start(A, b, lower, upper, x0)
+    if x is None:
+        return _result(None, 0, False, started, 'active-set')
+
+    at_lower = np.abs(x - lower) <= 1e-12
+    at_upper = (np.abs(x - upper) <= 1e-12) & ~at_lower
+    # Mindestens m freie Variablen, sonst ist das KKT-System singulär
+    for i in np.flatnonzero(at_lower | at_upper):
+        if np.count_nonzero(~(at_lower | at_upper)) >= m:
+            break
+        at_lower[i] = at_upper[i] = False
+
+    converged = False
+    iterations = 0
+    scale = max(1.0, np.abs(Q).max(), np.abs(c).max())
+
+    for iterations in range(1, max_iter + 1):
+        gradient = Q @ x + c
+        free = ~(at_lower | at_upper)
+        F = np.flatnonzero(free)
+        k = len(F)
+
+        kkt = np.zeros((k + m, k + m))
+        kkt[:k, :k] = Q[np.ix_(F, F)]
+        kkt[:k, k:] = A[:, F].T
+        kkt[k:, :k] = A[:, F]
+        rhs = np.concatenate([-gradient[F], np.zeros(m)])
+        try:
+            solution = np.linalg.solve(kkt, rhs)
+        except np.linalg.LinAlgError:
+            solution = np.linalg.lstsq(kkt, rhs, rcond=None)[0]
+        step = np.zeros(n)
+        step[F] = solution[:k]
+        multipliers = solution[k:]
+
+        if np.max(np.abs(step), initial=0.0) <= 1e-12 * max(1.0, np.abs(x).max()):
+            # Stationär auf der Arbeitsmenge: Vorzeichen der Schranken-Multiplikatoren prüfen
+            reduced = gradient + A.T @ multipliers
+            violation = np.where(at_lower, -reduced, 0.0) + np.where(at_upper, reduced, 0.0)
+            worst = int(np.argmax(violation))
+            if violation[worst] <= tol * scale:
+                converged = True
+                break
+            at_lower[worst] = at_upper[worst] = False
+            continue
+
+        # Ratio-Test: längster zulässiger Schritt bis zur nächsten Schranke
+        with np.errstate(divide='ignore', invalid='ignore'):
+            limits = np.where(step < 0, (lower - x) / step,
+                              np.where(step > 0, (upper - x) / step, np.inf))
+        limits[~free] = np.inf
+        blocking = int(np.argmin(limits))
+        alpha = limits[blocking]
+        to_upper = step[blocking] > 0
+        if alpha >= 1.0:
+            alpha, blocking = 1.0, None
+
+        x = x + max(alpha, 0.0) * step
+        if blocking is not None:
+            x[blocking] = upper[blocking] if to_upper else lower[blocking]
+            at_upper[blocking] = to_upper
+            at_lower[blocking] = not to_upper
+
+    x = np.clip(x, lower, upper)
+    objective = float(0.5 * x @ Q @ x + c @ x)
+    return _result(x, iterations, converged, started, 'active-set', objective)
+
+
+def min_variance(cov, x0=None, upper=1.0):
+    """Long-only Minimum-Varianz-Portfolio (Budget = 1)"""
+    n = len(cov)
+    return solve_qp(cov, None, np.ones((1, n)), [1.0], 0.0, upper, x0=x0)
+
+
+def mean_variance(cov, mu, target_return, x0=None, upper=1.0):
+    """
+    Long-only Minimum-Varianz-Portfolio mit Zielrendite.
+
+    Eine nicht erreichbare Zielrendite wird auf die Spanne der Asset-Renditen
+    begrenzt statt das Problem scheitern zu lassen.
+    """
+    mu = np.asarray(mu, dtype=float)
+    n = len(mu)
+    target = float(np.clip(target_return, mu.min(), mu.max()))
+    return solve_qp(cov, None, np.vstack([np.ones(n), mu]), [1.0, target], 0.0, upper, x0=x0)
+
+
+def _max_return_portfolio(mu, upper=1.0):
+    """Long-only Portfolio mit höchster Rendite bei Obergrenze je Asset (greedy LP-Lösung)"""
+    mu = np.asarray(mu, dtype=float)
+    upper = np.broadcast_to(np.asarray(upper, dtype=float), mu.shape)
+    weights = np.zeros_like(mu)
+    remaining = 1.0
+    for i in np.argsort(-mu):
+        weights[i] = min(upper[i], remaining)
+        remaining -= weights[i]
+        if remaining <= 0:
+            break
+    return weights
+
+
+def efficient_frontier(cov, mu, points=50, upper=1.0):
+    """
+    Long-only Effizienzkurve mit `points` Punkten.
+
+    Startet beim Minimum-Varianz-Portfolio und erhöht die Zielrendite bis zur
+    höchsten erreichbaren Rendite; jeder Punkt wird mit der Lösung des
+    Nachbarpunkts warm gestartet, sodass sich die aktive Menge nur wenig ändert.
+
+    Returns:
+        Dict mit 'points' (target, weights, return, volatility, iterations,
+        converged) sowie 'iterations' und 'time_ms' für die ganze Kurve
+    """
+    started = time.perf_counter()
+    cov = as_matrix(cov)
+    mu = np.asarray(mu, dtype=float)
+    n = len(mu)
+    budget = np.ones((1, n))
+
+    anchor = solve_qp(cov, None, budget, [1.0], 0.0, upper)
+    if anchor['weights'] is None:
+        return {'points': [], 'iterations': anchor['iterations'], 'time_ms': anchor['time_ms']}
+
+    top = _max_return_portfolio(mu, upper)
+    lowest = float(anchor['weights'] @ mu)
+    highest = max(float(top @ mu), lowest)
+    targets = np.linspace(lowest, highest, points)
+    A = np.vstack([budget, mu])
+
+    frontier = []
+    iterations = anchor['iterations']
+    weights = anchor['weights']
+    for k, target in enumerate(targets):
+        if k > 0:
+            # Konvexe Kombination mit dem Renditemaximum trifft die neue Zielrendite
+            # exakt und bleibt zulässig, ohne die aktive Menge stark zu verändern
+            share = (target - weights @ mu) / max(highest - weights @ mu, 1e-16)
+            start = weights + np.clip(share, 0.0, 1.0) * (top - weights)
+            solution = solve_qp(cov, None, A, [1.0, target], 0.0, upper, x0=start)
+            if solution['weights'] is None:
+                break
+            weights = solution['weights']
+            iterations += solution['iterations']
+            converged = solution['converged']
+        else:
+            converged = anchor['converged']
+        frontier.append({
+            'target': float(target),
+            'weights': weights,
+            'return': float(weights @ mu),
+            'volatility': float(np.sqrt(max(weights @ cov @ weights, 0.0))),
+            'converged': bool(converged),
+        })
+
+    return {'points': frontier, 'iterations': int(iterations),
+            'time_ms': (time.perf_counter() - started) * 1000}
+
+
+def max_sharpe(cov, mu, risk_free_rate, x0=None):
+    """
+    Long-only Tangentialportfolio als konvexes QP.
+
+    Mit y = w / ((μ - r_f)ᵀw) wird max Sharpe zu min yᵀΣy unter (μ - r_f)ᵀy = 1,
+    y >= 0; die Gewichte sind y / Σy. Das Optimum ist global und deterministisch.
+    Hat kein Asset eine positive Überrendite, existiert kein Tangentialportfolio
+    und es wird das Minimum-Varianz-Portfolio geliefert.
+    """
+    started = time.perf_counter()
+    cov = as_matrix(cov)
+    excess = np.asarray(mu, dtype=float) - risk_free_rate
+
+    if excess.max() <= 0:
+        result = min_variance(cov, x0=x0)
+        result['method'] = 'active-set-min-variance'
+        return result
+
+    # Warmstart aus dem Gewichtsraum in den y-Raum skalieren
+    y0 = None
+    if x0 is not None:
+        x0 = np.asarray(x0, dtype=float)
+        if x0 @ excess > 0:
+            y0 = x0 / (x0 @ excess)
+
+    result = solve_qp(2 * cov, None, excess[None, :], [1.0], 0.0, np.inf, x0=y0)
+    y = result['weights']
+    if y is None or y.sum() <= 0:
+        result['weights'] = None
+        return result
+    weights = y / y.sum()
+    result['weights'] = weights
+    result['objective'] = float(weights @ excess / np.sqrt(weights @ cov @ weights))
+    result['time_ms'] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def risk_contributions(cov, weights):
+    """Relative Risikobeiträge w_i (Σw)_i / wᵀΣw (Summe = 1)"""
+    weights = np.asarray(weights, dtype=float)
+    contributions = weights * (cov @ weights)
+    total = contributions.sum()
+    return contributions / total if total > 0 else contributions
+
+
+def evaluate_portfolios(cov, mu, weights, risk_free_rate=0.0, benchmark=None):
+    """
+    Kennzahlen einer ganzen Gewichtsmatrix: W μ, diag(W Σ Wᵀ) und die
+    Risikobeiträge aus einem Produkt Σ Wᵀ.
+
+    Args:
+        cov: Σ (n × n) oder FactorCovariance
+        mu: erwartete Renditen (n,)
+        weights: (P × n) Gewichte oder (n,) für ein Portfolio
+        benchmark: optionale Benchmark-Gewichte (n,) für Tracking Error und aktive Rendite
+
+    Returns:
+        Dict mit expected_return, volatility, sharpe (P,), risk_contributions (P × n, Zeilensumme 1)
+        und bei Benchmark active_return, tracking_error, information_ratio (P,)
+    """
+    W = np.atleast_2d(np.asarray(weights, dtype=float))
+    mu = np.asarray(mu, dtype=float)
+    expected = W @ mu
+    marginal = (cov @ W.T).T                          # (P × n) = W Σ
+    variance = np.maximum(np.einsum('pn,pn->p', W, marginal), 0.0)
+    volatility = np.sqrt(variance)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(volatility > 0, (expected - risk_free_rate) / volatility, 0.0)
+        contributions = np.where(variance[:, None] > 0, W * marginal / variance[:, None], 0.0)
+
+    result = {
+        'expected_return': expected,
+        'volatility': volatility,
+        'sharpe': sharpe,
+        'risk_contributions': contributions,
+    }
+    if benchmark is not None:
+        b = np.asarray(benchmark, dtype=float)
+        sigma_b = cov @ b
+        # (w - b)ᵀ Σ (w - b) = wᵀΣw - 2 wᵀΣb + bᵀΣb
+        tracking_variance = np.maximum(variance - 2.0 * (W @ sigma_b) + b @ sigma_b, 0.0)
+        tracking_error = np.sqrt(tracking_variance)
+        active = expected - b @ mu
+        with np.errstate(divide='ignore', invalid='ignore'):
+            information_ratio = np.where(tracking_error > 1e-12, active / tracking_error, 0.0)
+        result.update({
+            'active_return': active,
+            'tracking_error': tracking_error,
+            'information_ratio': information_ratio,
+        })
+    return result
+
+
+def risk_parity(cov, budgets=None, x0=None, tol=1e-14, max_iter=100):
+    """
+    Long-only Risk-Budgeting-Portfolio (Equal Risk Contribution ohne budgets).
+
+    Newton-Verfahren auf der Log-Barrier-Formulierung (Spinu 2013):
+    min ½ yᵀΣy - Σ b_i log y_i mit y > 0; im Optimum gilt y_i (Σy)_i = b_i,
+    die Gewichte w = y / Σy haben also genau die Risikobeiträge b. Das Problem
+    ist streng konvex, das gedämpfte Newton-Verfahren konvergiert in wenigen
+    Iterationen, die Schrittweite hält y im Inneren.
+
+    Args:
+        cov: (n × n) Kovarianzmatrix oder FactorCovariance
+        budgets: Risikobudgets (n,), werden auf Summe 1 normiert; Default 1/n.
+            Assets mit Budget 0 erhalten Gewicht 0.
+        x0: Warmstart im Gewichtsraum
+
+    Returns:
+        Dict wie solve_qp, zusätzlich 'budget_error' (max. Abweichung der
+        relativen Risikobeiträge vom Budget, gemessen an der regularisierten Σ)
+    """
+    started = time.perf_counter()
+    factor = isinstance(cov, FactorCovariance)
+    cov = cov if factor else np.asarray(cov, dtype=float)
+    n = len(cov)
+    b = np.full(n, 1.0 / n) if budgets is None else np.asarray(budgets, dtype=float)
+    if b.shape != (n,) or np.any(b < 0) or b.sum() <= 0:
+        raise ValueError('Risk budgets must be non-negative with a positive sum')
+    b = b / b.sum()
+
+    active = np.flatnonzero(b > 0)
+    if factor:
+        # Faktormodell: spezifische Risiken > 0, Newton-Schritt per Woodbury in O(n k²)
+        S = cov.subset(active)
+        diagonal = S.diagonal()
+    else:
+        S = cov[np.ix_(active, active)]
+        # Ridge: bei mehr Assets als Beobachtungen ist Σ singulär und die Barriere
+        # entlang nichtnegativer Nullraum-Richtungen unbeschränkt
+        S = S + np.eye(len(active)) * (1e-8 * max(np.trace(S) / len(active), 1e-12))
+        diagonal = np.diag(S)
+    b_active = b[active]
+
+    # Start: y ∝ x0 (oder b / σ), skaliert auf das Optimum entlang dieses Strahls
+    y = None if x0 is None else np.asarray(x0, dtype=float)[active]
+    if y is None or np.any(y <= 0):
+        y = b_active / np.sqrt(np.maximum(diagonal, 1e-16))
+    y = y * np.sqrt(b_active.sum() / (y @ S @ y))
+
+    converged = False
+    iterations = 0
+    for iterations in range(1, max_iter + 1):
+        Sy = S @ y
+        gradient = Sy - b_active / y
+        barrier = b_active / y ** 2
+        try:
+            if factor:
+                step = -S.solve(gradient, extra_diagonal=barrier)
+            else:
+                step = -cho_solve(cho_factor(S + np.diag(barrier), check_finite=False), gradient, check_finite=False)
+        except np.linalg.LinAlgError:
+            step = -gradient / (diagonal + barrier)
+        decrement = float(-gradient @ step)
+        if decrement / 2 <= tol:
+            converged = True
+            break
+        # Fraction-to-boundary: y bleibt strikt positiv
+        shrinking = step < 0
+        alpha = min(1.0, 0.95 * np.min(-y[shrinking] / step[shrinking])) if shrinking.any() else 1.0
+        y = y + alpha * step
+
+    weights = np.zeros(n)
+    weights[active] = y / y.sum()
+    result = _result(weights, iterations, converged, started, 'newton-log-barrier',
+                     float(0.5 * y @ S @ y - b_active @ np.log(y)))
+    result['budget_error'] = float(np.max(np.abs(risk_contributions(S, y / y.sum()) - b_active)))
+    return result
+
+
+HRP_LINKAGES = ('single', 'complete', 'average', 'ward')
+
+
+def _cluster_variance(S, variance, start, stop):
+    """Varianz eines zusammenhängenden Clusters mit Inverse-Variance-Gewichten"""
+    ivp = 1.0 / variance[start:stop]
+    ivp = ivp / ivp.sum()
+    return float(ivp @ S[start:stop, start:stop] @ ivp)
+
+
+def hrp(cov, linkage='single'):
+    """
+    Hierarchical Risk Parity (López de Prado 2016), ohne Inversion von Σ.
+
+    1. Hierarchisches Clustering auf der Korrelationsdistanz d_ij = √(½(1 - ρ_ij))
+    2. Quasi-Diagonalisierung: Assets in der Blattreihenfolge des Dendrogramms
+    3. Rekursive Bisektion: jeder Cluster wird halbiert, das Gewicht zwischen
+       den Hälften im Verhältnis ihrer inversen Clustervarianzen aufgeteilt
+
+    Die Bisektion läuft Ebene für Ebene; die Blöcke einer Ebene sind zusammen
+    höchstens n² gross, insgesamt also O(n²). Funktioniert auch bei singulärer
+    Σ (mehr Assets als Beobachtungen); Gewichte sind immer long-only.
+
+    Args:
+        cov: (n × n) Kovarianzmatrix oder FactorCovariance
+        linkage: Linkage-Methode, siehe HRP_LINKAGES
+
+    Returns:
+        Dict wie solve_qp (iterations = Bisektionsebenen), zusätzlich 'order'
+        (quasi-diagonale Reihenfolge der Assets)
+    """
+    if linkage not in HRP_LINKAGES:
+        raise ValueError(f"Unknown linkage '{linkage}'")
+    started = time.perf_counter()
+    S = as_matrix(cov)
+    n = len(S)
+    variance = np.maximum(np.diag(S), 1e-16)
+    if n == 1:
+        return {**_result(np.ones(1), 0, True, started, f'hrp-{linkage}', float(S[0, 0])), 'order': [0]}
+
+    sigma = np.sqrt(variance)
+    correlation = np.clip(S / np.outer(sigma, sigma), -1.0, 1.0)
+    distance = np.sqrt(0.5 * (1.0 - correlation))
+    np.fill_diagonal(distance, 0.0)
+    order = hierarchy.leaves_list(hierarchy.linkage(squareform(distance, checks=False), method=linkage))
+
+    # In quasi-diagonaler Reihenfolge sind alle Cluster zusammenhängende Blöcke
+    S_ordered = S[np.ix_(order, order)]
+    variance_ordered = variance[order]
+    allocation = np.ones(n)
+    clusters = [(0, n)]
+    levels = 0
+    while clusters:
+        levels += 1
+        children = []
+        for start, stop in clusters:
+            middle = (start + stop) // 2
+            left_variance = _cluster_variance(S_ordered, variance_ordered, start, middle)
+            right_variance = _cluster_variance(S_ordered, variance_ordered, middle, stop)
+            alpha = right_variance / (left_variance + right_variance)
+            allocation[start:middle] *= alpha
+            allocation[middle:stop] *= 1.0 - alpha
+            children.extend(part for part in ((start, middle), (middle, stop)) if part[1] - part[0] > 1)
+        clusters = children
+
+    weights = np.empty(n)
+    weights[order] = allocation
+    result = _result(weights, levels, True, started, f'hrp-{linkage}', float(weights @ S @ weights))
+    result['order'] = order.tolist()
+    return result
@@ -10,6 +10,12 @@ import yfinance as yf
 from datetime import datetime, timedelta
 import logging
 
+import nav_engine
+import portfolio_solvers
+from factor_model import FactorCovariance, estimate_covariance
+from covariance_service import covariance_service
+from correlation_service import pairwise_correlation
+
 logger = logging.getLogger('swiss_asset_pro')
 
 class RealPortfolioCalculator:
@@ -18,6 +24,42 @@ class RealPortfolioCalculator:
     def __init__(self):
         self.risk_free_rate = 0.02  # 2% risikofreier Zinssatz (Schweiz)
         self.currency_rates = {'USD': 0.88, 'EUR': 0.95, 'GBP': 1.12}  # CHF conversion rates
+        # Letzte Lösung je (Methode, Assets) als Warmstart für den nächsten Aufruf
+        self._warm_starts = {}
+
+    def _warm_start(self, method, symbols):
+        return self._warm_starts.get((method, tuple(symbols)))
+
+    def _covariance(self, returns_df, n_factors=None):
+        """Annualisierte Σ als Array (inkrementeller Zustand) oder, mit n_factors, als PCA-Faktormodell"""
+        if n_factors:
+            return estimate_covariance(returns_df, n_factors)
+        return covariance_service.covariance(returns_df).values
+
+    def _mean_returns(self, returns_df, n_factors=None):
+        """
+        Annualisierte μ auf denselben Zeilen wie _covariance: das Faktormodell
+        nutzt alle Zeilen, der Kovarianzdienst nur vollständige Tage (rolling:
+        die letzten `window` davon)
+        """
+        if n_factors:
+            return returns_df.mean() * 252
+        complete = returns_df.dropna()
+        if covariance_service.method == 'rolling':
+            complete = complete.iloc[-covariance_service.window:]
+        return complete.mean() * 252
+
+    @staticmethod
+    def _covariance_info(cov):
+        return cov.to_dict() if isinstance(cov, FactorCovariance) else {'model': 'sample', 'assets': len(cov)}
+
+    def _solved(self, method, symbols, solution):
+        """Merkt sich konvergierte Gewichte als Warmstart, None sonst"""
+        if solution['weights'] is None or not solution['converged']:
+            logger.error(f"{method} solver did not converge: {portfolio_solvers.diagnostics(solution)}")
+            return None
+        self._warm_starts[(method, tuple(symbols))] = solution['weights']
+        return solution['weights']
         
     def get_historical_data(self, symbol, period='1y'):
         """Hole echte historische Daten von Yahoo Finance mit Fallback"""
@@ -95,6 +137,21 @@ class RealPortfolioCalculator:
         returns = hist_data['Close'].pct_change().dropna()
         return returns
     
+    def returns_panel(self, symbols, period='1y', max_workers=8):
+        """
+        Tägliche Renditen aller Symbole als ein DataFrame (Spalten = Symbole).
+
+        Lädt jedes Symbol genau einmal und parallel; Symbole ohne Daten fehlen
+        im Ergebnis.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        symbols = list(dict.fromkeys(symbols))
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(symbols)))) as pool:
+            series = list(pool.map(lambda symbol: self.calculate_real_returns(symbol, period), symbols))
+        returns_data = {symbol: returns for symbol, returns in zip(symbols, series) if returns is not None}
+        return pd.DataFrame(returns_data)
+    
     def calculate_real_volatility(self, symbol, period='1y'):
         """Berechne echte Volatilität (annualisiert)"""
         returns = self.calculate_real_returns(symbol, period)
@@ -121,8 +178,8 @@ class RealPortfolioCalculator:
             return 0
         return (expected_return - self.risk_free_rate) / volatility
     
-    def calculate_portfolio_metrics(self, portfolio_data):
-        """Berechne echte Portfolio-Metriken"""
+    def calculate_portfolio_metrics(self, portfolio_data, n_factors=None):
+        """Berechne echte Portfolio-Metriken (Korrelationen optional aus dem PCA-Faktormodell)"""
         if not portfolio_data:
             return {}
             
@@ -145,39 +202,31 @@ class RealPortfolioCalculator:
         
         # Berechne Korrelationen zwischen Assets
         symbols = [asset['symbol'] for asset in portfolio_data]
-        returns_data = {}
+        returns_df = self.returns_panel(symbols)
         
-        for symbol in symbols:
-            returns = self.calculate_real_returns(symbol)
-            if returns is not None:
-                returns_data[symbol] = returns
-        
-        # Berechne Kovarianz-Matrix
-        if len(returns_data) > 1:
-            returns_df = pd.DataFrame(returns_data)
-            correlation_matrix = returns_df.corr()
-            covariance_matrix = returns_df.cov() * 252  # Annualisiert
-            
-            # Berechne Portfolio-Varianz mit Korrelationen
-            portfolio_variance = 0
-            for i, asset1 in enumerate(portfolio_data):
-                for j, asset2 in enumerate(portfolio_data):
-                    weight1 = asset1.get('investment', 0) / total_value
-                    weight2 = asset2.get('investment', 0) / total_value
-                    
-                    if i == j:
-                        portfolio_variance += (weight1 * asset1.get('volatility', 0)) ** 2
-                    else:
-                        symbol1, symbol2 = asset1['symbol'], asset2['symbol']
-                        if symbol1 in correlation_matrix.index and symbol2 in correlation_matrix.columns:
-                            correlation = correlation_matrix.loc[symbol1, symbol2]
-                            portfolio_variance += 2 * weight1 * weight2 * asset1.get('volatility', 0) * asset2.get('volatility', 0) * correlation
+        # Portfolio-Varianz vᵀRv mit v = w·σ; Assets ohne Historie sind unkorreliert
+        if len(returns_df.columns) > 1:
+            scaled = np.array([asset.get('investment', 0) / total_value * asset.get('volatility', 0)
+                               for asset in portfolio_data])
+            known = np.array([symbol in returns_df.columns for symbol in symbols])
+            known_symbols = [symbol for symbol in symbols if symbol in returns_df.columns]
+            
+            if n_factors:
+                # R = S Σ S mit S = diag(Σ)^-1/2, Produkte über die Low-Rank-Form
+                factor_cov = FactorCovariance.from_returns(returns_df[known_symbols], n_factors)
+                u = scaled[known] / np.sqrt(factor_cov.diagonal())
+                portfolio_variance = factor_cov.variance(u)
+            else:
+                correlation_matrix = returns_df[known_symbols].corr().fillna(0).to_numpy(copy=True)
+                np.fill_diagonal(correlation_matrix, 1.0)
+                portfolio_variance = scaled[known] @ correlation_matrix @ scaled[known]
+            portfolio_variance += np.sum(scaled[~known] ** 2)
         
         portfolio_volatility = np.sqrt(portfolio_variance)
         sharpe_ratio = self.calculate_sharpe_ratio(portfolio_return, portfolio_volatility)
         
-        # Berechne Maximum Drawdown
-        max_drawdown = self.calculate_max_drawdown(portfolio_data)
+        # Berechne Maximum Drawdown (aus der Portfolio-NAV auf demselben Renditepanel)
+        max_drawdown = self.calculate_max_drawdown(portfolio_data, returns_df)
         
         return {
             'expected_return': portfolio_return,
@@ -187,14 +236,27 @@ class RealPortfolioCalculator:
             'total_value': total_value
         }
     
-    def calculate_max_drawdown(self, portfolio_data):
-        """Berechne Maximum Drawdown"""
+    def calculate_max_drawdown(self, portfolio_data, returns_df=None):
+        """
+        Maximum Drawdown der täglichen Portfolio-NAV (Buy & Hold der Investitionsbeträge).
+
+        Ohne Kurshistorie bleibt die frühere Schätzung -2 × höchste Volatilität.
+        """
         if not portfolio_data:
             return 0
+        
+        weights = {asset['symbol']: asset.get('investment', 0) for asset in portfolio_data}
+        if returns_df is None:
+            returns_df = self.returns_panel(list(weights))
+        known = [s for s in weights if s in returns_df.columns and weights[s] > 0]
+        if known and len(returns_df) > 1:
+            # Kursindex je Asset aus den Renditen; fehlende Tage ohne Kursänderung
+            prices = (1 + returns_df[known].fillna(0)).cumprod()
+            nav = nav_engine.portfolio_nav(prices, weights={s: weights[s] for s in known})
+            return nav_engine.max_drawdown(nav)['max_drawdown']
             
-        # Für vereinfachte Berechnung nehmen wir die höchste Volatilität
-        max_volatility = max(asset.get('volatility', 0) for asset in portfolio_data)
         # Schätzung: Max Drawdown ≈ 2 * Volatilität (empirische Regel)
+        max_volatility = max(asset.get('volatility', 0) for asset in portfolio_data)
         return -2 * max_volatility
     
     def calculate_correlation_matrix(self, portfolio_data):
@@ -203,18 +265,14 @@ class RealPortfolioCalculator:
             return {}
             
         symbols = [asset['symbol'] for asset in portfolio_data]
-        returns_data = {}
-        
-        for symbol in symbols:
-            returns = self.calculate_real_returns(symbol)
-            if returns is not None and len(returns) > 10:  # Mindestens 10 Datenpunkte
-                returns_data[symbol] = returns
+        returns_df = self.returns_panel(symbols)
+        returns_df = returns_df.loc[:, returns_df.count() > 10]  # Mindestens 10 Datenpunkte
         
-        if len(returns_data) < 2:
+        if returns_df.shape[1] < 2:
             return {}
             
-        returns_df = pd.DataFrame(returns_data)
-        correlation_matrix = returns_df.corr()
+        corr, _ = pairwise_correlation(returns_df, min_periods=1)
+        correlation_matrix = pd.DataFrame(corr, index=returns_df.columns, columns=returns_df.columns)
         
         return correlation_matrix.to_dict()
     
@@ -282,7 +340,7 @@ class RealPortfolioCalculator:
         
         return {}
     
-    def black_litterman_optimization(self, symbols, market_caps, views_dict=None):
+    def black_litterman_optimization(self, symbols, market_caps, views_dict=None, n_factors=None, returns_df=None):
         """
         Black-Litterman Portfolio Optimization mit echten Marktdaten
         
@@ -290,32 +348,28 @@ class RealPortfolioCalculator:
             symbols: Liste von Asset-Symbolen
             market_caps: Marktkapitalisierungen der Assets
             views_dict: Dict mit Views {symbol: expected_return}
+            n_factors: Optional PCA-Faktormodell mit n_factors Faktoren statt Stichproben-Σ
+            returns_df: Optional bereits geladenes Renditepanel (sonst 1y je Symbol)
         """
         try:
             # 1. Hole historische Daten für alle Assets
-            returns_data = {}
-            for symbol in symbols:
-                returns = self.calculate_real_returns(symbol, '1y')
-                if returns is not None:
-                    returns_data[symbol] = returns
-            
-            if not returns_data:
+            if returns_df is None:
+                returns_df = self.returns_panel(symbols, '1y')
+            if returns_df.empty:
                 logger.error("No returns data available for Black-Litterman")
                 return None
+            symbols = list(returns_df.columns)
             
-            # 2. Berechne Kovarianzmatrix
-            returns_df = pd.DataFrame(returns_data)
-            cov_matrix = returns_df.cov() * 252  # Annualisiert
+            # 2. Berechne Kovarianzmatrix (annualisiert)
+            cov_array = self._covariance(returns_df, n_factors)
             
             # 3. Market Equilibrium Returns (CAPM)
-            total_market_cap = sum(market_caps.values())
-            market_weights = {s: market_caps[s] / total_market_cap for s in symbols}
+            total_market_cap = sum(market_caps.get(s, 0) for s in symbols)
+            market_weights = np.array([market_caps.get(s, 0) / total_market_cap for s in symbols])
             
             # Pi = delta * Sigma * w_market
             delta = 2.5  # Risk aversion parameter
-            pi = {}
-            for symbol in symbols:
-                pi[symbol] = delta * sum(cov_matrix.loc[symbol, s] * market_weights.get(s, 0) for s in symbols if s in cov_matrix.columns)
+            pi = dict(zip(symbols, delta * (cov_array @ market_weights)))
             
             # 4. Incorporate Views (if provided)
             if views_dict:
@@ -335,26 +389,16 @@ class RealPortfolioCalculator:
             
             # 5. Optimize Portfolio
             returns_array = np.array([posterior_returns[s] for s in symbols])
-            cov_array = cov_matrix.values
             
             # Maximize Sharpe Ratio
-            def neg_sharpe(weights):
-                portfolio_return = np.dot(weights, returns_array)
-                portfolio_vol = np.sqrt(np.dot(weights, np.dot(cov_array, weights)))
-                sharpe = (portfolio_return - self.risk_free_rate) / portfolio_vol
-                return -sharpe
-            
-            # Constraints: weights sum to 1, all positive
-            constraints = {'type': 'eq', 'fun': lambda x: np.sum(x) - 1}
-            bounds = tuple((0, 1) for _ in symbols)
-            initial_weights = np.array([1/len(symbols)] * len(symbols))
+            solution = portfolio_solvers.max_sharpe(cov_array, returns_array, self.risk_free_rate,
+                                                    x0=self._warm_start('black_litterman', symbols))
+            weights = self._solved('black_litterman', symbols, solution)
             
-            result = minimize(neg_sharpe, initial_weights, method='SLSQP', bounds=bounds, constraints=constraints)
-            
-            if result.success:
-                optimal_weights = dict(zip(symbols, result.x))
-                portfolio_return = np.dot(result.x, returns_array)
-                portfolio_vol = np.sqrt(np.dot(result.x, np.dot(cov_array, result.x)))
+            if weights is not None:
+                optimal_weights = dict(zip(symbols, weights))
+                portfolio_return = np.dot(weights, returns_array)
+                portfolio_vol = np.sqrt(weights @ cov_array @ weights)
                 sharpe_ratio = (portfolio_return - self.risk_free_rate) / portfolio_vol
                 
                 return {
@@ -363,6 +407,8 @@ class RealPortfolioCalculator:
                     'volatility': portfolio_vol * 100,
                     'sharpe_ratio': sharpe_ratio,
                     'method': 'Black-Litterman',
+                    'covariance': self._covariance_info(cov_array),
+                    'solver': portfolio_solvers.diagnostics(solution),
                     'is_real_calculation': True
                 }
             else:
@@ -373,42 +419,31 @@ class RealPortfolioCalculator:
             logger.error(f"Error in Black-Litterman optimization: {e}")
             return None
     
-    def mean_variance_optimization(self, symbols, target_return=None):
-        """Mean-Variance Optimization (Markowitz) mit echten Daten"""
+    def mean_variance_optimization(self, symbols, target_return=None, n_factors=None, returns_df=None):
+        """Mean-Variance Optimization (Markowitz) mit echten Daten (optional mit Faktormodell)"""
         try:
-            returns_data = {}
-            for symbol in symbols:
-                returns = self.calculate_real_returns(symbol, '1y')
-                if returns is not None:
-                    returns_data[symbol] = returns
-            
-            if not returns_data:
+            if returns_df is None:
+                returns_df = self.returns_panel(symbols, '1y')
+            if returns_df.empty:
                 return None
             
-            returns_df = pd.DataFrame(returns_data)
-            mean_returns = returns_df.mean() * 252  # Annualisiert
-            cov_matrix = returns_df.cov() * 252
+            mean_returns = self._mean_returns(returns_df, n_factors)
+            cov_matrix = self._covariance(returns_df, n_factors)
             
             # Minimize variance for target return
-            def portfolio_variance(weights):
-                return np.dot(weights, np.dot(cov_matrix.values, weights))
-            
-            constraints = [
-                {'type': 'eq', 'fun': lambda x: np.sum(x) - 1}
-            ]
-            
+            symbols = list(returns_df.columns)
+            warm_start = self._warm_start('mean_variance', symbols)
             if target_return:
-                constraints.append({'type': 'eq', 'fun': lambda x: np.dot(x, mean_returns.values) - target_return})
-            
-            bounds = tuple((0, 1) for _ in symbols)
-            initial_weights = np.array([1/len(symbols)] * len(symbols))
-            
-            result = minimize(portfolio_variance, initial_weights, method='SLSQP', bounds=bounds, constraints=constraints)
+                solution = portfolio_solvers.mean_variance(cov_matrix, mean_returns.values,
+                                                           target_return, x0=warm_start)
+            else:
+                solution = portfolio_solvers.min_variance(cov_matrix, x0=warm_start)
+            weights = self._solved('mean_variance', symbols, solution)
             
-            if result.success:
-                optimal_weights = dict(zip(symbols, result.x))
-                portfolio_return = np.dot(result.x, mean_returns.values)
-                portfolio_vol = np.sqrt(portfolio_variance(result.x))
+            if weights is not None:
+                optimal_weights = dict(zip(symbols, weights))
+                portfolio_return = np.dot(weights, mean_returns.values)
+                portfolio_vol = np.sqrt(weights @ cov_matrix @ weights)
                 sharpe_ratio = (portfolio_return - self.risk_free_rate) / portfolio_vol
                 
                 return {
@@ -417,6 +452,8 @@ class RealPortfolioCalculator:
                     'volatility': portfolio_vol * 100,
                     'sharpe_ratio': sharpe_ratio,
                     'method': 'Mean-Variance',
+                    'covariance': self._covariance_info(cov_matrix),
+                    'solver': portfolio_solvers.diagnostics(solution),
                     'is_real_calculation': True
                 }
             
@@ -425,40 +462,37 @@ class RealPortfolioCalculator:
             logger.error(f"Error in Mean-Variance optimization: {e}")
             return None
     
-    def risk_parity_optimization(self, symbols):
-        """Risk Parity Optimization mit echten Daten"""
+    def risk_parity_optimization(self, symbols, budgets=None, n_factors=None, returns_df=None):
+        """
+        Risk Parity Optimization mit echten Daten
+        
+        Args:
+            symbols: Liste von Asset-Symbolen
+            budgets: Optionale Risikobudgets {symbol: anteil}; Assets ohne
+                Budget werden nicht gehalten. Default: gleiche Risikobeiträge
+            n_factors: Optional PCA-Faktormodell mit n_factors Faktoren statt Stichproben-Σ
+            returns_df: Optional bereits geladenes Renditepanel (sonst 1y je Symbol)
+        """
         try:
-            returns_data = {}
-            for symbol in symbols:
-                returns = self.calculate_real_returns(symbol, '1y')
-                if returns is not None:
-                    returns_data[symbol] = returns
-            
-            if not returns_data:
+            if returns_df is None:
+                returns_df = self.returns_panel(symbols, '1y')
+            if returns_df.empty:
                 return None
             
-            returns_df = pd.DataFrame(returns_data)
-            cov_matrix = returns_df.cov() * 252
+            cov_matrix = self._covariance(returns_df, n_factors)
             
             # Risk Parity: Alle Assets tragen gleiches Risiko bei
-            def risk_parity_objective(weights):
-                portfolio_vol = np.sqrt(np.dot(weights, np.dot(cov_matrix.values, weights)))
-                marginal_contrib = np.dot(cov_matrix.values, weights) / portfolio_vol
-                risk_contrib = weights * marginal_contrib
-                target_risk = portfolio_vol / len(symbols)
-                return np.sum((risk_contrib - target_risk) ** 2)
-            
-            constraints = {'type': 'eq', 'fun': lambda x: np.sum(x) - 1}
-            bounds = tuple((0, 1) for _ in symbols)
-            initial_weights = np.array([1/len(symbols)] * len(symbols))
-            
-            result = minimize(risk_parity_objective, initial_weights, method='SLSQP', bounds=bounds, constraints=constraints)
-            
-            if result.success:
-                optimal_weights = dict(zip(symbols, result.x))
-                mean_returns = returns_df.mean() * 252
-                portfolio_return = np.dot(result.x, mean_returns.values)
-                portfolio_vol = np.sqrt(np.dot(result.x, np.dot(cov_matrix.values, result.x)))
+            symbols = list(returns_df.columns)
+            budget_array = None if not budgets else np.array([float(budgets.get(s, 0)) for s in symbols])
+            solution = portfolio_solvers.risk_parity(cov_matrix, budget_array,
+                                                     x0=self._warm_start('risk_parity', symbols))
+            weights = self._solved('risk_parity', symbols, solution)
+            
+            if weights is not None:
+                optimal_weights = dict(zip(symbols, weights))
+                mean_returns = self._mean_returns(returns_df, n_factors)
+                portfolio_return = np.dot(weights, mean_returns.values)
+                portfolio_vol = np.sqrt(weights @ cov_matrix @ weights)
                 sharpe_ratio = (portfolio_return - self.risk_free_rate) / portfolio_vol
                 
                 return {
@@ -467,6 +501,9 @@ class RealPortfolioCalculator:
                     'volatility': portfolio_vol * 100,
                     'sharpe_ratio': sharpe_ratio,
                     'method': 'Risk Parity',
+                    'risk_contributions': dict(zip(symbols, portfolio_solvers.risk_contributions(cov_matrix, weights))),
+                    'covariance': self._covariance_info(cov_matrix),
+                    'solver': portfolio_solvers.diagnostics(solution),
                     'is_real_calculation': True
                 }
             
@@ -475,35 +512,26 @@ class RealPortfolioCalculator:
             logger.error(f"Error in Risk Parity optimization: {e}")
             return None
     
-    def minimum_variance_optimization(self, symbols):
-        """Minimum Variance Optimization mit echten Daten"""
+    def minimum_variance_optimization(self, symbols, n_factors=None, returns_df=None):
+        """Minimum Variance Optimization mit echten Daten (optional mit Faktormodell)"""
         try:
-            returns_data = {}
-            for symbol in symbols:
-                returns = self.calculate_real_returns(symbol, '1y')
-                if returns is not None:
-                    returns_data[symbol] = returns
-            
-            if not returns_data:
+            if returns_df is None:
+                returns_df = self.returns_panel(symbols, '1y')
+            if returns_df.empty:
                 return None
             
-            returns_df = pd.DataFrame(returns_data)
-            mean_returns = returns_df.mean() * 252
-            cov_matrix = returns_df.cov() * 252
-            
-            def portfolio_variance(weights):
-                return np.dot(weights, np.dot(cov_matrix.values, weights))
-            
-            constraints = {'type': 'eq', 'fun': lambda x: np.sum(x) - 1}
-            bounds = tuple((0, 1) for _ in symbols)
-            initial_weights = np.array([1/len(symbols)] * len(symbols))
+            mean_returns = self._mean_returns(returns_df, n_factors)
+            cov_matrix = self._covariance(returns_df, n_factors)
             
-            result = minimize(portfolio_variance, initial_weights, method='SLSQP', bounds=bounds, constraints=constraints)
+            symbols = list(returns_df.columns)
+            solution = portfolio_solvers.min_variance(cov_matrix,
+                                                      x0=self._warm_start('minimum_variance', symbols))
+            weights = self._solved('minimum_variance', symbols, solution)
             
-            if result.success:
-                optimal_weights = dict(zip(symbols, result.x))
-                portfolio_return = np.dot(result.x, mean_returns.values)
-                portfolio_vol = np.sqrt(portfolio_variance(result.x))
+            if weights is not None:
+                optimal_weights = dict(zip(symbols, weights))
+                portfolio_return = np.dot(weights, mean_returns.values)
+                portfolio_vol = np.sqrt(weights @ cov_matrix @ weights)
                 sharpe_ratio = (portfolio_return - self.risk_free_rate) / portfolio_vol if portfolio_vol > 0 else 0
                 
                 return {
@@ -512,6 +540,8 @@ class RealPortfolioCalculator:
                     'volatility': portfolio_vol * 100,
                     'sharpe_ratio': sharpe_ratio,
                     'method': 'Minimum Variance',
+                    'covariance': self._covariance_info(cov_matrix),
+                    'solver': portfolio_solvers.diagnostics(solution),
                     'is_real_calculation': True
                 }
             
@@ -520,6 +550,50 @@ class RealPortfolioCalculator:
             logger.error(f"Error in Minimum Variance optimization: {e}")
             return None
 
+    def hrp_optimization(self, symbols, linkage='single', n_factors=None, returns_df=None):
+        """
+        Hierarchical Risk Parity: Clustering statt Matrixinversion, daher auch
+        für grosse Universen (mehr Assets als Beobachtungen) in Millisekunden
+
+        Args:
+            symbols: Liste von Asset-Symbolen
+            linkage: Linkage-Methode des Clusterings (portfolio_solvers.HRP_LINKAGES)
+            n_factors: Optional PCA-Faktormodell mit n_factors Faktoren statt Stichproben-Σ
+            returns_df: Optional bereits geladenes Renditepanel (sonst 1y je Symbol)
+        """
+        try:
+            if returns_df is None:
+                returns_df = self.returns_panel(symbols, '1y')
+            if returns_df.empty:
+                return None
+
+            mean_returns = self._mean_returns(returns_df, n_factors)
+            cov_matrix = self._covariance(returns_df, n_factors)
+
+            symbols = list(returns_df.columns)
+            solution = portfolio_solvers.hrp(cov_matrix, linkage=linkage)
+            weights = solution['weights']
+
+            portfolio_return = np.dot(weights, mean_returns.values)
+            portfolio_vol = np.sqrt(weights @ cov_matrix @ weights)
+            sharpe_ratio = (portfolio_return - self.risk_free_rate) / portfolio_vol if portfolio_vol > 0 else 0
+
+            return {
+                'weights': dict(zip(symbols, weights)),
+                'expected_return': portfolio_return * 100,
+                'volatility': portfolio_vol * 100,
+                'sharpe_ratio': sharpe_ratio,
+                'method': 'Hierarchical Risk Parity',
+                'cluster_order': [symbols[i] for i in solution['order']],
+                'risk_contributions': dict(zip(symbols, portfolio_solvers.risk_contributions(cov_matrix, weights))),
+                'covariance': self._covariance_info(cov_matrix),
+                'solver': portfolio_solvers.diagnostics(solution),
+                'is_real_calculation': True
+            }
+        except Exception as e:
+            logger.error(f"Error in HRP optimization: {e}")
+            return None
+
 real_calculator = RealPortfolioCalculator()
 
 def get_real_asset_stats(symbol):
@@ -0,0 +1,235 @@
+"""
+Swiss Asset Manager - Historischer VaR/CVaR für viele Portfolios
+----------------------------------------------------------------
+Die Szenariomatrix R (T × n Tagesrenditen eines Universums) wird einmal
+aufgebaut; Verluste aller Portfolios entstehen dann in einem Produkt
+L = W Rᵀ (P × T). VaR und CVaR je Konfidenzniveau kommen aus einer
+partiellen Sortierung (np.partition) auf die k schlechtesten Szenarien statt
+aus vollständigen Sortierungen bzw. np.percentile je Portfolio.
+
+- Historisch: Renditen unverändert.
+- Gefiltert historisch (FHS): jede Rendite wird mit ihrer EWMA-Volatilität
+  standardisiert und auf die aktuelle Volatilitätsprognose skaliert
+  (Hull/White), damit ruhige Perioden das Risiko nicht unterschätzen.
+
+Szenariomengen werden pro (Universum, Filter, Stichtag) zwischengespeichert.
+Universum ist die Symbolmenge eines Portfolios, nicht die Vereinigung aller
+Anfragen: ein Symbol mit kurzer Historie kürzt nur die Szenarien der
+Portfolios, die es halten.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from scipy.signal import lfilter
+
+logger = logging.getLogger('swiss_asset_pro')
+
+DEFAULT_LEVELS = (0.95, 0.99)
+RISKMETRICS_LAMBDA = 0.94
+MAX_CACHED_SCENARIOS = 32
+
+
+def filtered_scenarios(returns, lam=RISKMETRICS_LAMBDA):
+    """
+    Volatilitätsskalierte Szenarien r_t · σ_(T+1) / σ_t mit EWMA-Varianzen je Asset.
+
+    σ²_t = λ σ²_(t-1) + (1 - λ) r²_(t-1), Startwert Stichprobenvarianz; die
+    Rekursion läuft für alle Assets zugleich als IIR-Filter entlang der Zeitachse.
+    """
+    R = np.asarray(returns, dtype=float)
+    seed = np.maximum(R.var(axis=0), 1e-16)
+    updated, _ = lfilter([1.0 - lam], [1.0, -lam], R ** 2, axis=0, zi=(lam * seed)[None, :])
+    variance = np.vstack([seed, updated[:-1]])     # σ²_t vor Beobachtung von r_t
+    forecast = updated[-1]                         # σ²_(T+1)
+    return R * np.sqrt(np.maximum(forecast, 1e-16) / np.maximum(variance, 1e-16))
+
+
+class ScenarioSet:
+    """Szenariomatrix eines Universums (T × n)"""
+
+    def __init__(self, scenarios, symbols, filtered=False, as_of=None):
+        self.scenarios = np.asarray(scenarios, dtype=float)
+        self.symbols = list(symbols)
+        self.filtered = filtered
+        self.as_of = as_of
+
+    @classmethod
+    def from_returns(cls, returns, filtered=False, lam=RISKMETRICS_LAMBDA):
+        """Aus einem Renditepanel (DataFrame, nur vollständige Tage)"""
+        complete = returns.dropna()
+        R = complete.to_numpy(dtype=float)
+        if filtered and len(R):
+            R = filtered_scenarios(R, lam)
+        as_of = complete.index[-1] if len(complete) else None
+        return cls(R, complete.columns, filtered, as_of)
+
+    def weight_matrix(self, portfolios):
+        """
+        (P × n) Gewichtsmatrix aus [{symbol: gewicht}]; unbekannte Symbole werden ignoriert.
+
+        Returns:
+            (W, coverage) mit coverage = Anteil der Gewichte mit Szenariodaten
+        """
+        position = {symbol: i for i, symbol in enumerate(self.symbols)}
+        W = np.zeros((len(portfolios), len(self.symbols)))
+        coverage = np.zeros(len(portfolios))
+        for row, weights in enumerate(portfolios):
+            total = sum(abs(float(w)) for w in weights.values())
+            for symbol, weight in weights.items():
+                if symbol in position:
+                    W[row, position[symbol]] += float(weight)
+                    coverage[row] += abs(float(weight))
+            coverage[row] = coverage[row] / total if total else 0.0
+        return W, coverage
+
+    def var(self, weights, levels=DEFAULT_LEVELS, values=None):
+        """VaR/CVaR aller Portfolios, siehe portfolio_var"""
+        return portfolio_var(self.scenarios, weights, levels, values)
+
+
+def portfolio_var(scenarios, weights, levels=DEFAULT_LEVELS, values=None):
+    """
+    Historischer VaR und CVaR für eine ganze Gewichtsmatrix.
+
+    Args:
+        scenarios: (T × n) Szenariorenditen
+        weights: (P × n) Gewichte oder (n,) für ein Portfolio
+        levels: Konfidenzniveaus, z.B. (0.95, 0.99)
+        values: optionale Portfoliowerte (P,) für Beträge statt Renditen
+
+    Returns:
+        Dict {level: {'var': (P,), 'cvar': (P,)}}; Renditen bzw. Beträge,
+        negative Zahlen = Verlust (wie die bisherigen var95/cvar95)
+    """
+    R = np.asarray(scenarios, dtype=float)
+    W = np.atleast_2d(np.asarray(weights, dtype=float))
+    T = len(R)
+    if T == 0:
+        empty = np.zeros(len(W))
+        return {level: {'var': empty, 'cvar': empty} for level in levels}
+
+    pnl = W @ R.T                                         # (P × T)
+    ks = {level: max(int(np.floor((1.0 - level) * T)), 1) for level in levels}
+    k_max = max(ks.values())
+    # Einmal auf die k_max schlechtesten Szenarien partitionieren, je Niveau nur noch im Rest
+    worst = np.partition(pnl, k_max - 1, axis=1)[:, :k_max]
+
+    scale = 1.0 if values is None else np.asarray(values, dtype=float)
+    result = {}
+    for level, k in ks.items():
+        tail = worst if k == k_max else np.partition(worst, k - 1, axis=1)[:, :k]
+        result[level] = {
+            'var': tail.max(axis=1) * scale,
+            'cvar': tail.mean(axis=1) * scale,
+        }
+    return result
+
+
+def var_cvar(returns, level=0.95):
+    """VaR und CVaR einer einzelnen Renditereihe (eine partielle Sortierung)"""
+    r = np.asarray(returns, dtype=float)
+    r = r[~np.isnan(r)]
+    if len(r) == 0:
+        return 0.0, 0.0
+    result = portfolio_var(r[:, None], np.ones(1), (level,))[level]
+    return float(result['var'][0]), float(result['cvar'][0])
+
+
+_scenarios = OrderedDict()
+_scenarios_lock = threading.Lock()
+
+
+def get_scenarios(key, as_of, build):
+    """
+    Szenariomenge für (key, as_of) aus dem Cache oder über build() neu aufgebaut.
+
+    Args:
+        key: Identität des Universums (z.B. Symbole, Periode, Filter)
+        as_of: letzter Handelstag; neue Daten ergeben eine neue Szenariomenge
+        build: Callable ohne Argumente, liefert ein ScenarioSet
+    """
+    cache_key = (key, str(as_of))
+    with _scenarios_lock:
+        scenario_set = _scenarios.get(cache_key)
+        if scenario_set is not None:
+            _scenarios.move_to_end(cache_key)
+            return scenario_set
+
+    scenario_set = build()
+    with _scenarios_lock:
+        _scenarios[cache_key] = scenario_set
+        while len(_scenarios) > MAX_CACHED_SCENARIOS:
+            _scenarios.popitem(last=False)
+    return scenario_set
+
+
+def clear_cache():
+    with _scenarios_lock:
+        _scenarios.clear()
+
+
+def group_by_universe(portfolios, available):
+    """
+    Portfolio-Indizes je Universum (gehaltene Symbole mit Renditedaten).
+
+    Returns:
+        Dict {tuple(symbole): [portfolio-indizes]}; Portfolios ohne Daten unter ()
+    """
+    available = set(available)
+    groups = {}
+    for row, weights in enumerate(portfolios):
+        universe = tuple(sorted(s for s, w in weights.items() if s in available and float(w) != 0.0))
+        groups.setdefault(universe, []).append(row)
+    return groups
+
+
+def batch_var(panel, portfolios, levels=DEFAULT_LEVELS, values=None, filtered=False,
+              lam=RISKMETRICS_LAMBDA, key=()):
+    """
+    VaR/CVaR vieler Portfolios, eine Szenariomatrix je Universum.
+
+    Jedes Universum verwendet nur die Tage, an denen alle seine Symbole
+    Renditen haben; Portfolios mit gleichem Universum teilen sich ein
+    W Rᵀ-Produkt und den Cache-Eintrag.
+
+    Args:
+        panel: Renditepanel (DataFrame, Spalten = Symbole, NaN vor Handelsbeginn)
+        portfolios: [{symbol: gewicht}]
+        levels: Konfidenzniveaus
+        values: optionale Portfoliowerte (P,)
+        filtered: FHS statt rein historischer Szenarien
+        lam: EWMA-Lambda für FHS
+        key: zusätzlicher Cache-Schlüssel (z.B. Periode)
+
+    Returns:
+        Liste je Portfolio mit coverage, scenarios, as_of und {level: {'var', 'cvar'}}
+
+    Raises:
+        ValueError: wenn ein Universum keinen vollständigen Handelstag hat
+    """
+    values = np.ones(len(portfolios)) if values is None else np.asarray(values, dtype=float)
+    results = [None] * len(portfolios)
+    for universe, rows in group_by_universe(portfolios, panel.columns).items():
+        if not universe:
+            for row in rows:
+                results[row] = {'coverage': 0.0, 'scenarios': 0, 'as_of': None,
+                                **{level: {'var': 0.0, 'cvar': 0.0} for level in levels}}
+            continue
+
+        returns = panel[list(universe)].dropna()
+        if returns.empty:
+            raise ValueError(f"No trading day with returns for all of {', '.join(universe)}")
+        scenario_set = get_scenarios((universe, filtered, lam) + tuple(key), returns.index[-1],
+                                     lambda: ScenarioSet.from_returns(returns, filtered, lam))
+
+        W, coverage = scenario_set.weight_matrix([portfolios[row] for row in rows])
+        risk = scenario_set.var(W, levels, values[rows])
+        for i, row in enumerate(rows):
+            results[row] = {'coverage': float(coverage[i]), 'scenarios': int(len(scenario_set.scenarios)),
+                            'as_of': scenario_set.as_of,
+                            **{level: {'var': float(risk[level]['var'][i]), 'cvar': float(risk[level]['cvar'][i])}
+                               for level in levels}}
+    return results
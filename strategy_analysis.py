@@ -0,0 +1,722 @@
+"""
+Swiss Asset Manager - Strategie-Analysen je Asset
+-------------------------------------------------
+Scorer für Value, Momentum, Buy & Hold und Carry sowie ein begrenzter
+Worker-Pool, der die Assets eines Portfolios parallel verarbeitet.
+
+analysis_bundle lädt Kurshistorie und Fundamentaldaten eines Portfolios
+einmal und rechnet alle Scorer plus Korrelation auf denselben Daten.
+
+Jeder Asset-Job hat eine eigene Deadline; Teilergebnisse bleiben erhalten
+und Fehler werden je Asset zurückgegeben statt stillschweigend übersprungen.
+"""
+
+import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+import pandas as pd
+
+import indicator_engine
+import nav_engine
+import risk_engine
+from covariance_service import covariance_service
+
+logger = logging.getLogger('swiss_asset_pro')
+
+MAX_WORKERS = 8
+ASSET_DEADLINE = 20  # Sekunden je Asset
+RISK_FREE_RATE = 0.02
+
+SECTIONS = ('value', 'momentum', 'buyhold', 'carry', 'correlation')
+
+
+def run_per_asset(portfolio, analyze, max_workers=MAX_WORKERS, deadline=ASSET_DEADLINE):
+    """
+    Führt analyze(asset) für alle Portfolio-Positionen in einem begrenzten Pool aus.
+
+    Ein Job, der länger als deadline Sekunden läuft, wird als Timeout gemeldet.
+    Jobs, die wegen hängender Worker nie starten, laufen nach
+    deadline * Anzahl Wellen ebenfalls in den Timeout.
+
+    Args:
+        portfolio: Liste von Positionen ({'symbol': ..., 'quantity': ...})
+        analyze: Funktion asset -> Ergebnis (None = keine Daten)
+        max_workers: Obergrenze paralleler Jobs
+        deadline: Sekunden je Asset
+
+    Returns:
+        (results, errors) - results in Portfolio-Reihenfolge,
+        errors als Liste von {'symbol', 'error'}
+    """
+    if not portfolio:
+        return [], []
+
+    workers = max(1, min(max_workers, len(portfolio)))
+    waves = math.ceil(len(portfolio) / workers)
+    batch_start = time.monotonic()
+    started = {}
+
+    def job(index, asset):
+        started[index] = time.monotonic()
+        return analyze(asset)
+
+    outcomes = {}
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = {executor.submit(job, i, asset): i for i, asset in enumerate(portfolio)}
+        pending = set(futures)
+
+        while pending:
+            done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = futures[future]
+                try:
+                    result = future.result()
+                    outcomes[index] = (result,) if result is not None else 'Keine Kursdaten verfügbar'
+                except Exception as e:
+                    outcomes[index] = str(e) or type(e).__name__
+
+            now = time.monotonic()
+            for future in list(pending):
+                index = futures[future]
+                if index in started:
+                    expired = now - started[index] > deadline
+                else:
+                    expired = now - batch_start > deadline * waves
+                if expired:
+                    future.cancel()
+                    pending.discard(future)
+                    outcomes[index] = f'Timeout nach {deadline}s'
+    finally:
+        # Hängende Yahoo-Requests nicht abwarten
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    results, errors = [], []
+    for index, asset in enumerate(portfolio):
+        outcome = outcomes.get(index)
+        if isinstance(outcome, tuple):
+            results.append(outcome[0])
+        else:
+            symbol = asset.get('symbol')
+            logger.warning(f"Analyse für {symbol} fehlgeschlagen: {outcome}")
+            errors.append({'symbol': symbol, 'error': outcome})
+    return results, errors
+
+
+def _dividend_yield(info):
+    """Dividendenrendite in Prozent (Yahoo liefert teils Dezimal, teils Prozent)"""
+    raw_div = info.get('dividendYield', 0)
+    if raw_div and raw_div > 1:  # Schon in Prozent!
+        div_yield = raw_div  # NICHT × 100
+    elif raw_div:
+        div_yield = raw_div * 100  # Dezimal → Prozent
+    else:
+        div_yield = 0
+
+    # Safety Cap
+    if div_yield > 20:
+        div_yield = 0  # Offensichtlich falsch
+    return div_yield
+
+
+# ================================================================================================
+# VALUE
+# ================================================================================================
+
+def value_score(symbol, quantity, info, hist, discount_rate, terminal_growth):
+    """Value-Kennzahlen (Graham, DCF, Risiko) für ein Asset"""
+    current_price = info.get('currentPrice', info.get('regularMarketPrice', 0))
+
+    # ✅ SMART P/E & P/B - Nur für Aktien!
+    asset_type = (info.get('quoteType') or '').lower()
+    if asset_type in ['equity', 'stock']:
+        pe_ratio = info.get('trailingPE', info.get('forwardPE', None))
+        pb_ratio = info.get('priceToBook', None)
+    else:
+        pe_ratio = None  # Indizes, Rohstoffe, Crypto haben kein P/E
+        pb_ratio = None
+
+    div_yield = _dividend_yield(info)
+
+    eps = info.get('trailingEps', info.get('forwardEps', 0))
+    book_value = info.get('bookValue', current_price / pb_ratio if pb_ratio and pb_ratio > 0 else current_price)
+    beta = info.get('beta', 1.0)
+
+    returns = hist['Close'].pct_change().dropna()
+    if len(hist) > 0:
+        # Snapshot-Preis ist bis zu einem Tag alt, letzter Schlusskurs ist aktueller
+        current_price = float(hist['Close'].iloc[-1])
+
+    # Calculate Sharpe Ratio
+    if len(returns) > 0:
+        excess_return = returns.mean() * 252 - RISK_FREE_RATE
+        volatility_annual = returns.std() * np.sqrt(252)
+        sharpe_ratio = excess_return / volatility_annual if volatility_annual > 0 else 0
+    else:
+        sharpe_ratio = 0
+        volatility_annual = 0.15
+
+    # Calculate VaR and CVaR (95% confidence, eine partielle Sortierung)
+    if len(returns) > 0:
+        var_return, cvar_return = risk_engine.var_cvar(returns.values, 0.95)
+        var_95 = var_return * current_price * quantity
+        cvar_95 = cvar_return * current_price * quantity
+    else:
+        var_95 = 0
+        cvar_95 = 0
+
+    # Maximum Drawdown
+    if len(hist) > 0:
+        cumulative = (1 + returns).cumprod()
+        running_max = cumulative.expanding().max()
+        drawdown = (cumulative - running_max) / running_max
+        max_drawdown = drawdown.min() * 100 if len(drawdown) > 0 else 0
+    else:
+        max_drawdown = 0
+
+    # Graham Number calculation (intrinsic value)
+    graham_number = 0
+    if eps and book_value and eps > 0 and book_value > 0:
+        graham_number = math.sqrt(22.5 * eps * book_value)
+
+    # ✅ FCF: Pro Aktie verwenden!
+    fcf_total = info.get('freeCashflow', None)
+    shares_outstanding = info.get('sharesOutstanding', None)
+
+    if fcf_total and shares_outstanding and shares_outstanding > 0:
+        fcf_per_share = fcf_total / shares_outstanding
+    elif eps and eps > 0:
+        fcf_per_share = eps * 0.8  # Fallback: 80% of EPS
+    else:
+        fcf_per_share = 0
+
+    # Simple DCF estimation (per share!)
+    if fcf_per_share > 0:
+        dcf_value = 0
+        for year in range(1, 11):
+            growth = terminal_growth if year > 5 else terminal_growth * 1.5
+            future_fcf = fcf_per_share * ((1 + growth) ** year)
+            dcf_value += future_fcf / ((1 + discount_rate) ** year)
+        terminal_value = (fcf_per_share * ((1 + terminal_growth) ** 10) * (1 + terminal_growth)) / (discount_rate - terminal_growth)
+        dcf_value += terminal_value / ((1 + discount_rate) ** 10)
+    else:
+        dcf_value = current_price
+
+    # Calculate fair value (average of methods)
+    fair_values = [v for v in [graham_number, dcf_value, current_price * 1.1] if v > 0]
+    fair_value = sum(fair_values) / len(fair_values) if fair_values else current_price
+
+    # Scoring (mit None-Checks!)
+    score = 0
+    if pe_ratio and pe_ratio > 0 and pe_ratio < 15: score += 25
+    elif pe_ratio and pe_ratio > 0 and pe_ratio < 20: score += 15
+    if pb_ratio and pb_ratio > 0 and pb_ratio < 1.5: score += 20
+    elif pb_ratio and pb_ratio > 0 and pb_ratio < 3: score += 10
+    if div_yield > 3: score += 20
+    elif div_yield > 1.5: score += 10
+    if fair_value > current_price * 1.1: score += 35
+    elif fair_value > current_price: score += 15
+
+    # Recommendation
+    upside = ((fair_value - current_price) / current_price) * 100
+    if upside > 20:
+        recommendation = 'STRONG BUY'
+        rec_color = '#4caf50'
+    elif upside > 10:
+        recommendation = 'BUY'
+        rec_color = '#8bc34a'
+    elif upside > -10:
+        recommendation = 'HOLD'
+        rec_color = '#ff9800'
+    else:
+        recommendation = 'SELL'
+        rec_color = '#f44336'
+
+    return {
+        'symbol': symbol,
+        'quantity': quantity,
+        'currentPrice': current_price,
+        'fairValue': fair_value,
+        'grahamNumber': graham_number,
+        'dcfValue': dcf_value,
+        'peRatio': pe_ratio,
+        'pbRatio': pb_ratio,
+        'divYield': div_yield,
+        'eps': eps,
+        'fcf': fcf_total if fcf_total else None,  # Total FCF für Display
+        'fcf_per_share': fcf_per_share,  # FCF pro Aktie für Berechnungen
+        'bookValue': book_value,
+        'upside': upside,
+        'score': score,
+        'recommendation': recommendation,
+        'recColor': rec_color,
+        'assetValue': current_price * quantity,
+        'assetFairValue': fair_value * quantity,
+        'sharpeRatio': sharpe_ratio,
+        'beta': beta,
+        'var95': var_95,
+        'cvar95': cvar_95,
+        'maxDrawdown': max_drawdown,
+        'volatility': volatility_annual * 100
+    }
+
+
+def value_summary(results):
+    total_value = sum(r['assetValue'] for r in results)
+    total_fair_value = sum(r['assetFairValue'] for r in results)
+    portfolio_valuation = ((total_fair_value - total_value) / total_value) * 100 if total_value > 0 else 0
+    avg_score = sum(r['score'] for r in results) / len(results) if results else 0
+    avg_sharpe = sum(r['sharpeRatio'] for r in results) / len(results) if results else 0
+
+    # Portfolio Beta (weighted)
+    portfolio_beta = sum(r['beta'] * (r['assetValue'] / total_value) for r in results) if total_value > 0 else 1.0
+
+    return {
+        'totalValue': total_value,
+        'totalFairValue': total_fair_value,
+        'portfolioValuation': portfolio_valuation,
+        'avgScore': avg_score,
+        'avgSharpe': avg_sharpe,
+        'portfolioBeta': portfolio_beta,
+        # Summe der Einzel-VaRs nur als Fallback; analysis_bundle ersetzt sie durch den NAV-VaR
+        'portfolioVaR95': sum(r['var95'] for r in results),
+        'portfolioCVaR95': sum(r['cvar95'] for r in results),
+        # Portfolio Max Drawdown (worst case)
+        'worstDrawdown': min((r['maxDrawdown'] for r in results), default=0)
+    }
+
+
+# ================================================================================================
+# MOMENTUM
+# ================================================================================================
+
+def momentum_from_indicators(symbol, quantity, row):
+    """Momentum-Score aus einer Zeile von indicator_engine.latest_indicators"""
+    current_price = row['current_price']
+    current_macd = row['macd']
+    current_signal = row['macd_signal']
+    current_histogram = row['macd_histogram']
+    current_rsi = row['rsi']
+    momentum_return = row['momentum_return']
+    volatility = row['volatility']
+    sharpe_ratio = row['sharpe_ratio']
+
+    # Bollinger Bands
+    bb_middle = row['bb_middle'] if not pd.isna(row['bb_middle']) else current_price
+    bb_upper = row['bb_upper'] if not pd.isna(row['bb_upper']) else current_price * 1.1
+    bb_lower = row['bb_lower'] if not pd.isna(row['bb_lower']) else current_price * 0.9
+    bb_position = ((current_price - bb_lower) / (bb_upper - bb_lower)) * 100 if bb_upper > bb_lower else 50
+
+    # Trend strength
+    ma_short_val = row['ma_short'] if not pd.isna(row['ma_short']) else current_price
+    ma_long_val = row['ma_long'] if not pd.isna(row['ma_long']) else current_price
+
+    if current_price > ma_short_val > ma_long_val:
+        trend = 'STRONG UPTREND'
+        trend_color = '#4caf50'
+        trend_score = 90
+    elif current_price > ma_short_val:
+        trend = 'UPTREND'
+        trend_color = '#8bc34a'
+        trend_score = 70
+    elif current_price < ma_short_val < ma_long_val:
+        trend = 'DOWNTREND'
+        trend_color = '#f44336'
+        trend_score = 30
+    else:
+        trend = 'NEUTRAL'
+        trend_color = '#ff9800'
+        trend_score = 50
+
+    # Enhanced Momentum score with MACD and Bollinger Bands
+    score = 0
+
+    # Momentum Return
+    if momentum_return > 20: score += 25
+    elif momentum_return > 10: score += 15
+    elif momentum_return > 0: score += 8
+
+    # RSI
+    if current_rsi > 70: score -= 10  # Overbought
+    elif current_rsi > 50: score += 12
+    elif current_rsi > 30: score += 5
+    else: score -= 10  # Oversold
+
+    # Moving Averages
+    if current_price > ma_short_val: score += 15
+    if ma_short_val > ma_long_val: score += 15
+
+    # MACD Signal
+    if current_histogram > 0 and current_macd > current_signal: score += 15  # Bullish
+    elif current_histogram < 0 and current_macd < current_signal: score -= 10  # Bearish
+
+    # Bollinger Bands Position
+    if bb_position < 20: score += 10  # Near lower band (oversold)
+    elif bb_position > 80: score -= 10  # Near upper band (overbought)
+    elif 40 <= bb_position <= 60: score += 5  # Middle range (stable)
+
+    return {
+        'symbol': symbol,
+        'quantity': quantity,
+        'momentum_return': momentum_return,
+        'return_3m': row['return_3m'],
+        'return_6m': row['return_6m'],
+        'return_12m': row['return_12m'],
+        'rsi': current_rsi,
+        'volatility': volatility,
+        'sharpe_ratio': sharpe_ratio,
+        'trend': trend,
+        'trend_color': trend_color,
+        'trend_score': trend_score,
+        'momentum_score': score,
+        'ma_short': ma_short_val,
+        'ma_long': ma_long_val,
+        'current_price': current_price,
+        'macd': current_macd,
+        'macd_signal': current_signal,
+        'macd_histogram': current_histogram,
+        'bb_upper': bb_upper,
+        'bb_middle': bb_middle,
+        'bb_lower': bb_lower,
+        'bb_position': bb_position
+    }
+
+
+def momentum_summary(results):
+    count = len(results)
+    return {
+        'avgMomentum': sum(r['momentum_return'] for r in results) / count if count else 0,
+        'avgScore': sum(r['momentum_score'] for r in results) / count if count else 0,
+        'avgVolatility': sum(r['volatility'] for r in results) / count if count else 0
+    }
+
+
+# ================================================================================================
+# BUY & HOLD
+# ================================================================================================
+
+def buyhold_score(symbol, quantity, info, hist):
+    """Qualitäts-Score (ROE, Verschuldung, Margen, Dividende) für ein Asset"""
+    # Quality metrics
+    roe = info.get('returnOnEquity', 0) * 100 if info.get('returnOnEquity') else 0
+    debt_to_equity = info.get('debtToEquity', 100)
+    current_ratio = info.get('currentRatio', 1)
+    profit_margin = info.get('profitMargins', 0) * 100 if info.get('profitMargins') else 0
+
+    # Growth metrics
+    revenue_growth = info.get('revenueGrowth', 0) * 100 if info.get('revenueGrowth') else 0
+    earnings_growth = info.get('earningsQuarterlyGrowth', 0) * 100 if info.get('earningsQuarterlyGrowth') else 0
+
+    div_yield = _dividend_yield(info)
+    payout_ratio = info.get('payoutRatio', 0) * 100 if info.get('payoutRatio') else 0
+
+    # ✅ Market Cap
+    market_cap = info.get('marketCap', 0)
+
+    # ✅ Volatility (echte Berechnung!)
+    if not hist.empty and len(hist) > 20:
+        returns = hist['Close'].pct_change().dropna()
+        volatility = returns.std() * np.sqrt(252) * 100  # Annualized
+    else:
+        volatility = 0
+
+    # Quality score
+    quality_score = 0
+    if roe > 15: quality_score += 25
+    elif roe > 10: quality_score += 15
+    if debt_to_equity < 50: quality_score += 20
+    elif debt_to_equity < 100: quality_score += 10
+    if current_ratio > 1.5: quality_score += 15
+    elif current_ratio > 1: quality_score += 10
+    if profit_margin > 15: quality_score += 20
+    elif profit_margin > 10: quality_score += 10
+    if div_yield > 2: quality_score += 10
+
+    # Category
+    if quality_score >= 75:
+        category = 'CORE'
+        cat_color = '#4caf50'
+    elif quality_score >= 50:
+        category = 'QUALITY'
+        cat_color = '#8bc34a'
+    elif quality_score >= 30:
+        category = 'SATELLITE'
+        cat_color = '#ff9800'
+    else:
+        category = 'SPECULATIVE'
+        cat_color = '#f44336'
+
+    return {
+        'symbol': symbol,
+        'quantity': quantity,
+        'market_cap': market_cap,
+        'dividend_yield': div_yield,
+        'volatility': volatility,
+        'roe': roe,
+        'debtToEquity': debt_to_equity,
+        'currentRatio': current_ratio,
+        'profitMargin': profit_margin,
+        'revenueGrowth': revenue_growth,
+        'earningsGrowth': earnings_growth,
+        'divYield': div_yield,
+        'payoutRatio': payout_ratio,
+        'qualityScore': quality_score,
+        'category': category,
+        'catColor': cat_color
+    }
+
+
+def buyhold_summary(results):
+    avg_quality = sum(r['qualityScore'] for r in results) / len(results) if results else 0
+    return {
+        'avgQuality': avg_quality,
+        'coreCount': sum(1 for r in results if r['category'] == 'CORE'),
+        'satelliteCount': sum(1 for r in results if r['category'] in ['SATELLITE', 'SPECULATIVE']),
+        # Estimate expected CAGR based on quality
+        'expectedCAGR': 5 + (avg_quality / 10),  # Base 5% + quality bonus
+        'confidence': min(95, 60 + avg_quality / 3)
+    }
+
+
+# ================================================================================================
+# CARRY
+# ================================================================================================
+
+def carry_score(symbol, quantity, info, hist, financing_cost):
+    """Netto-Carry (Dividende minus Finanzierung), Risikoprämie und Trend für ein Asset"""
+    current_price = info.get('currentPrice', info.get('regularMarketPrice', 0))
+    div_yield = _dividend_yield(info)
+
+    # Net carry = dividend yield - financing cost
+    net_carry = div_yield - (financing_cost * 100)
+
+    # Annual income
+    annual_div_per_share = current_price * (div_yield / 100)
+    annual_income = annual_div_per_share * quantity
+    financing_cost_amount = current_price * quantity * financing_cost
+    net_annual_income = annual_income - financing_cost_amount
+
+    # ✅ Yield Diff (vs Benchmark - z.B. Swiss Gov Bond ~0.5%)
+    benchmark_yield = 0.5
+    yield_diff = div_yield - benchmark_yield
+
+    # ✅ Risk Premium (einfache Schätzung)
+    if not hist.empty and len(hist) > 20:
+        returns = hist['Close'].pct_change().dropna()
+        volatility = returns.std() * np.sqrt(252) * 100  # Annualized
+        risk_premium = (div_yield / volatility) * 100 if volatility > 0 else 0
+    else:
+        risk_premium = 0
+
+    # ✅ Trend (Simple 50d MA vs 200d MA)
+    if len(hist) >= 200:
+        ma_50 = hist['Close'].rolling(window=50).mean().iloc[-1]
+        ma_200 = hist['Close'].rolling(window=200).mean().iloc[-1]
+        trend = 'BULLISH' if ma_50 > ma_200 else 'BEARISH'
+    else:
+        trend = 'NEUTRAL'
+
+    return {
+        'symbol': symbol,
+        'quantity': quantity,
+        'currentPrice': current_price,
+        'divYield': div_yield,
+        'yield_diff': yield_diff,
+        'risk_premium': risk_premium,
+        'trend': trend,
+        'netCarry': net_carry,
+        'annualIncome': annual_income,
+        'financingCost': financing_cost_amount,
+        'netAnnualIncome': net_annual_income,
+        'assetValue': current_price * quantity
+    }
+
+
+def carry_summary(results):
+    total_carry = sum(r['netAnnualIncome'] for r in results)
+    total_value = sum(r['assetValue'] for r in results)
+    avg_carry = (total_carry / total_value * 100) if total_value > 0 else 0
+    return {
+        'netCarry': avg_carry,
+        'expectedAnnualReturn': total_carry,
+        'totalValue': total_value,
+        'carryVolatility': abs(avg_carry) * 0.5  # Simplified estimate
+    }
+
+
+# ================================================================================================
+# BUNDLE
+# ================================================================================================
+
+def parse_params(data):
+    """Parameter der Einzel-Endpoints (gleiche Namen und Defaults)"""
+    return {
+        'discount_rate': float(data.get('discountRate', 8)) / 100,
+        'terminal_growth': float(data.get('terminalGrowth', 2)) / 100,
+        'lookback_months': int(data.get('lookbackMonths', 12)),
+        'ma_short': int(data.get('maShort', 50)),
+        'ma_long': int(data.get('maLong', 200)),
+        'financing_cost': float(data.get('financingCost', 3)) / 100
+    }
+
+
+def history_months(lookback_months=12):
+    """Länge der gemeinsamen Historie: 2 Jahre bzw. doppelter Momentum-Lookback"""
+    return max(24, lookback_months * 2)
+
+
+def last_months(hist, months):
+    """Schneidet die letzten months Monate aus einer längeren Historie"""
+    if hist.empty:
+        return hist
+    return hist[hist.index >= hist.index[-1] - pd.DateOffset(months=months)]
+
+
+def portfolio_risk(histories, quantities):
+    """
+    VaR/CVaR der aktuellen Bestände und Max Drawdown der Portfolio-NAV.
+
+    Ersetzt die Summe der Einzel-VaRs, die die Diversifikation ignoriert: die
+    heutigen Gewichte werden auf die gemeinsamen historischen Renditen
+    angewandt. Beträge in CHF bzw. Kurswährung, bezogen auf den letzten Portfoliowert.
+    """
+    closes = indicator_engine.align_closes(histories, by_date=True).ffill().dropna()
+    held = {symbol: quantity for symbol, quantity in quantities.items() if symbol in closes.columns and quantity}
+    if not held or len(closes) < 3:
+        return {}
+    nav = nav_engine.portfolio_nav(closes, quantities=held)
+    summary = nav_engine.nav_summary(nav, RISK_FREE_RATE, levels=(0.95, 0.99))
+    symbols = list(held)
+    exposure = closes[symbols].iloc[-1].to_numpy() * np.array([held[s] for s in symbols])
+    scenarios = closes[symbols].pct_change().dropna().to_numpy()
+    risk = risk_engine.portfolio_var(scenarios, exposure, (0.95, 0.99))
+    return {
+        'portfolioVaR95': float(risk[0.95]['var'][0]),
+        'portfolioCVaR95': float(risk[0.95]['cvar'][0]),
+        'portfolioVaR99': float(risk[0.99]['var'][0]),
+        'portfolioCVaR99': float(risk[0.99]['cvar'][0]),
+        'portfolioMaxDrawdown': summary['drawdown']['max_drawdown'] * 100,
+        'portfolioVolatility': summary['volatility'] * 100,
+    }
+
+
+def correlation_summary(histories, window=None):
+    """
+    Korrelationsmatrix, annualisierte Renditen und Volatilitäten auf gemeinsamen Handelstagen.
+
+    Die Korrelation kommt aus dem inkrementellen Kovarianzzustand (rollendes
+    Fenster über `window` Balken, Default: ganzes Panel), sodass Folgeaufrufe
+    mit einem neuen Tagesbalken nur diesen anhängen.
+    """
+    returns = indicator_engine.align_closes(histories, by_date=True).pct_change(fill_method=None).dropna()
+    return {
+        'symbols': list(returns.columns),
+        'matrix': covariance_service.correlation(
+            returns, method='rolling', window=window or max(len(returns), 2)).values.tolist(),
+        'meanReturns': (returns.mean() * 252).tolist(),
+        'volatilities': (returns.std() * np.sqrt(252)).tolist(),
+        'observations': len(returns)
+    }
+
+
+def _score_all(portfolio, score):
+    """Wendet einen Scorer auf alle Positionen an (reine CPU-Arbeit auf geladenen Daten)"""
+    results, errors = [], []
+    for asset in portfolio:
+        symbol = asset.get('symbol')
+        try:
+            result = score(symbol, float(asset.get('quantity', 0)))
+        except Exception as e:
+            errors.append({'symbol': symbol, 'error': str(e) or type(e).__name__})
+            continue
+        if result is None:
+            errors.append({'symbol': symbol, 'error': 'Keine Kursdaten verfügbar'})
+        else:
+            results.append(result)
+    return results, errors
+
+
+def analysis_bundle(portfolio, load_history, load_fundamentals, params, sections=SECTIONS):
+    """
+    Lädt Historie und Fundamentaldaten einmal und rechnet die gewünschten Abschnitte.
+
+    Args:
+        portfolio: Liste von Positionen ({'symbol': ..., 'quantity': ...})
+        load_history: Funktion (symbol, months) -> DataFrame mit 'Close'
+        load_fundamentals: Funktion [symbols] -> {symbol: info-Dict}
+        params: Dict aus parse_params
+        sections: Teilmenge von SECTIONS
+
+    Returns:
+        Dict je Abschnitt ({'results', 'errors', 'summary'} bzw. Korrelation)
+        plus 'errors' des Ladevorgangs
+    """
+    months = history_months(params['lookback_months'])
+
+    def load(asset):
+        symbol = asset.get('symbol')
+        hist = load_history(symbol, months)
+        return (symbol, hist) if hist is not None and not hist.empty else None
+
+    loaded, load_errors = run_per_asset(portfolio, load)
+    histories = dict(loaded)
+    # Positionen ohne Historie werden nur einmal unter 'errors' gemeldet
+    scored = [asset for asset in portfolio if asset.get('symbol') in histories]
+
+    def hist_1y(symbol):
+        return last_months(histories[symbol], 12)
+
+    fundamentals = {}
+    if any(section in sections for section in ('value', 'buyhold', 'carry')):
+        fundamentals = load_fundamentals([asset.get('symbol') for asset in scored])
+
+    indicators = {}
+
+    def momentum_indicators():
+        # Gespeicherter Indikatorzustand je Symbol; seit dem letzten Aufruf neue Balken
+        # werden nur angehängt, neue Symbole in einem Durchgang über die Matrix aufgebaut
+        if 'latest' not in indicators:
+            indicators['latest'] = pd.DataFrame(indicator_engine.indicator_cache.update_many(
+                {symbol: last_months(hist, params['lookback_months'] * 2) for symbol, hist in histories.items()},
+                params['ma_short'], params['ma_long'], params['lookback_months'], RISK_FREE_RATE
+            )).T
+        return indicators['latest']
+
+    scorers = {
+        'value': (lambda symbol, quantity: value_score(
+            symbol, quantity, fundamentals.get(symbol, {}), hist_1y(symbol),
+            params['discount_rate'], params['terminal_growth']), value_summary),
+        'momentum': (lambda symbol, quantity: momentum_from_indicators(
+            symbol, quantity, momentum_indicators().loc[symbol]), momentum_summary),
+        'buyhold': (lambda symbol, quantity: buyhold_score(
+            symbol, quantity, fundamentals.get(symbol, {}), hist_1y(symbol)), buyhold_summary),
+        'carry': (lambda symbol, quantity: carry_score(
+            symbol, quantity, fundamentals.get(symbol, {}), hist_1y(symbol),
+            params['financing_cost']), carry_summary),
+    }
+
+    bundle = {'errors': load_errors}
+    for section in sections:
+        if section == 'correlation':
+            # Fenster = ganzes Panel, also genau der angefragte Lookback
+            bundle['correlation'] = correlation_summary(histories)
+            continue
+        score, summarize = scorers[section]
+        results, errors = _score_all(scored, score)
+        summary = summarize(results)
+        if section == 'value':
+            # Portfolio-VaR/CVaR/Drawdown aus der gemeinsamen NAV statt Summen je Asset
+            summary.update(portfolio_risk(
+                {r['symbol']: hist_1y(r['symbol']) for r in results},
+                {r['symbol']: r['quantity'] for r in results}
+            ))
+        bundle[section] = {
+            'success': True,
+            'results': results,
+            'errors': errors,
+            'summary': summary
+        }
+    return bundle
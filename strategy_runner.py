@@ -0,0 +1,394 @@
+"""
+Swiss Asset Manager - Strategie-Runner
+--------------------------------------
+Führt die Strategien von /api/strategy_optimization (Mean-Variance, Risk
+Parity, Min Variance, Max Sharpe, Black-Litterman, HRP) gleichzeitig auf
+einem gemeinsamen Renditepanel aus, statt nacheinander mit je eigenem
+Datenabruf.
+
+- Die Strategien sind CPU-gebunden und unabhängig; sie laufen in einem
+  Prozess-Pool. Mit einem Webprozess wird er beim Start der App per fork
+  angelegt und aufgewärmt, solange noch keine Server-Threads laufen; mit
+  mehreren Webprozessen (WEB_CONCURRENCY) erst beim ersten Aufruf. Laufen
+  bereits Threads, startet der Pool per forkserver statt fork. Ohne fork
+  (z.B. Windows) oder mit SWISS_STRATEGY_POOL=0 übernimmt ein Thread-Pool.
+- Die Poolgrösse verteilt die CPUs auf die Webprozesse (SWISS_STRATEGY_WORKERS
+  überschreibt sie).
+- Jede Strategie hat eine Deadline (SWISS_STRATEGY_DEADLINE Sekunden); später
+  fertige Strategien werden als 'timeout' gemeldet, die übrigen Ergebnisse
+  bleiben gültig. Laufende Prozessaufgaben lassen sich nicht abbrechen; der
+  Pool wird dann beendet und beim nächsten Aufruf neu aufgebaut, damit
+  hängende Worker spätere Anfragen nicht blockieren.
+- run() liefert die Ergebnisse in Abschlussreihenfolge, damit der Endpunkt
+  sie einzeln streamen kann.
+- Warmstarts der Solver (real_calculator._warm_starts) leben im
+  Elternprozess: jede Aufgabe bekommt ihr x0 mit, und die gelösten Gewichte
+  kommen mit dem Ergebnis zurück.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+import portfolio_solvers
+from real_calculations import real_calculator
+
+logger = logging.getLogger('swiss_asset_pro')
+
+DEFAULT_DEADLINE = 20.0
+STRATEGY_ORDER = ('mean_variance', 'risk_parity', 'min_variance', 'max_sharpe', 'black_litterman', 'hrp')
+# Warmstart-Methode je Strategie in real_calculator._warm_starts (HRP löst nicht iterativ)
+WARM_START_METHODS = {
+    'mean_variance': 'mean_variance',
+    'risk_parity': 'risk_parity',
+    'min_variance': 'minimum_variance',
+    'max_sharpe': 'max_sharpe',
+    'black_litterman': 'black_litterman',
+}
+
+
+def _mean_variance(symbols, returns_df, options):
+    # 80 % der durchschnittlichen erwarteten Rendite als Ziel (Assets ohne Daten zählen mit 0)
+    mean_returns = returns_df.mean() * 252
+    avg_return = mean_returns.sum() / len(symbols) if len(symbols) > 0 else 0.08
+    result = real_calculator.mean_variance_optimization(symbols, target_return=avg_return * 0.8,
+                                                        n_factors=options.get('n_factors'), returns_df=returns_df)
+    if not result:
+        return None
+    return {
+        'name': 'Mean-Variance',
+        'description': 'Optimales Rendite-Risiko-Verhältnis',
+        'return': result.get('expected_return', 0),  # Already in %
+        'risk': result.get('volatility', 0),          # Already in %
+        'sharpe': result.get('sharpe_ratio', 0),
+        'weights': result.get('weights', []),
+        'solver': result.get('solver'),
+        'recommendation': 'OPTIMAL' if result.get('sharpe_ratio', 0) > 0.5 else 'BALANCIERT'
+    }
+
+
+def _risk_parity(symbols, returns_df, options):
+    budgets = options.get('risk_budgets')
+    result = real_calculator.risk_parity_optimization(symbols, budgets=budgets, n_factors=options.get('n_factors'),
+                                                      returns_df=returns_df)
+    if not result:
+        return None
+    return {
+        'name': 'Risk Parity',
+        'description': 'Risikobeiträge gemäss Risikobudget' if budgets else 'Gleicher Risikobeitrag aller Assets',
+        'return': result.get('expected_return', 0),
+        'risk': result.get('volatility', 0),
+        'sharpe': result.get('sharpe_ratio', 0),
+        'weights': result.get('weights', []),
+        'riskContributions': result.get('risk_contributions', {}),
+        'solver': result.get('solver'),
+        'recommendation': 'BALANCIERT'
+    }
+
+
+def _min_variance(symbols, returns_df, options):
+    result = real_calculator.minimum_variance_optimization(symbols, n_factors=options.get('n_factors'),
+                                                           returns_df=returns_df)
+    if not result:
+        return None
+    return {
+        'name': 'Min Variance',
+        'description': 'Minimales Portfolio-Risiko',
+        'return': result.get('expected_return', 0),
+        'risk': result.get('volatility', 0),
+        'sharpe': result.get('sharpe_ratio', 0),
+        'weights': result.get('weights', []),
+        'solver': result.get('solver'),
+        'recommendation': 'KONSERVATIV'
+    }
+
+
+def _max_sharpe(symbols, returns_df, options):
+    if len(returns_df.columns) < 2:
+        return None
+    mean_returns = returns_df.mean() * 252
+    cov_matrix = real_calculator._covariance(returns_df, options.get('n_factors'))
+    sharpe_symbols = list(returns_df.columns)
+    solution = portfolio_solvers.max_sharpe(
+        cov_matrix, mean_returns.values, real_calculator.risk_free_rate,
+        x0=real_calculator._warm_start('max_sharpe', sharpe_symbols)
+    )
+    weights = real_calculator._solved('max_sharpe', sharpe_symbols, solution)
+    if weights is None:
+        return None
+    portfolio_return = np.dot(weights, mean_returns.values)
+    portfolio_vol = np.sqrt(weights @ cov_matrix @ weights)
+    return {
+        'name': 'Max Sharpe',
+        'description': 'Maximales Rendite-Risiko-Verhältnis',
+        'return': portfolio_return * 100,
+        'risk': portfolio_vol * 100,
+        'sharpe': (portfolio_return - real_calculator.risk_free_rate) / portfolio_vol,
+        'weights': dict(zip(sharpe_symbols, weights)),
+        'solver': portfolio_solvers.diagnostics(solution),
+        'recommendation': 'AGGRESSIV' if portfolio_return > 0.10 else 'MODERAT'
+    }
+
+
+def _black_litterman(symbols, returns_df, options):
+    # Marktkapitalisierungen vereinfacht gleich gewichtet
+    market_caps = {symbol: 1.0 for symbol in symbols}
+    result = real_calculator.black_litterman_optimization(symbols, market_caps, n_factors=options.get('n_factors'),
+                                                          returns_df=returns_df)
+    if not result:
+        return None
+    return {
+        'name': 'Black-Litterman',
+        'description': 'Marktdaten + eigene Erwartungen',
+        'return': result.get('expected_return', 0),
+        'risk': result.get('volatility', 0),
+        'sharpe': result.get('sharpe_ratio', 0),
+        'weights': result.get('weights', []),
+        'solver': result.get('solver'),
+        'recommendation': 'EXPERTE'
+    }
+
+
+def _hrp(symbols, returns_df, options):
+    result = real_calculator.hrp_optimization(symbols, linkage=options.get('hrp_linkage') or 'single',
+                                              n_factors=options.get('n_factors'), returns_df=returns_df)
+    if not result:
+        return None
+    return {
+        'name': 'Hierarchical Risk Parity',
+        'description': 'Risikoaufteilung entlang der Korrelations-Cluster',
+        'return': result.get('expected_return', 0),
+        'risk': result.get('volatility', 0),
+        'sharpe': result.get('sharpe_ratio', 0),
+        'weights': result.get('weights', []),
+        'riskContributions': result.get('risk_contributions', {}),
+        'clusterOrder': result.get('cluster_order', []),
+        'solver': result.get('solver'),
+        'recommendation': 'BALANCIERT'
+    }
+
+
+STRATEGIES = {
+    'mean_variance': _mean_variance,
+    'risk_parity': _risk_parity,
+    'min_variance': _min_variance,
+    'max_sharpe': _max_sharpe,
+    'black_litterman': _black_litterman,
+    'hrp': _hrp,
+}
+
+
+def _json_ready(value):
+    """numpy-Skalare in Python-Zahlen (Ergebnisse gehen über Prozessgrenzen und in JSON)"""
+    if isinstance(value, dict):
+        return {key: _json_ready(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_ready(item) for item in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def run_strategy(key, symbols, returns_df, options):
+    """
+    Eine Strategie auf dem gemeinsamen Panel; Modulfunktion, damit sie im Prozess-Pool läuft.
+
+    options['x0'] setzt den Warmstart des Solvers; ein geforkter Worker sieht
+    sonst nur den Stand von real_calculator beim Start des Pools.
+
+    Returns:
+        (result oder None, error oder None, Laufzeit in Sekunden, gelöste Gewichte oder None)
+    """
+    started = time.perf_counter()
+    method = WARM_START_METHODS.get(key)
+    warm_key = (method, tuple(returns_df.columns))
+    if method and options.get('x0') is not None:
+        real_calculator._warm_starts[warm_key] = options['x0']
+    try:
+        result = STRATEGIES[key](symbols, returns_df, options)
+        weights = real_calculator._warm_starts.get(warm_key) if method else None
+        return _json_ready(result), None, time.perf_counter() - started, weights
+    except Exception as e:
+        logger.warning(f"{key} optimization failed: {e}")
+        return None, str(e), time.perf_counter() - started, None
+
+
+def _task_options(key, returns_df, options):
+    """Optionen einer Aufgabe inklusive Warmstart aus dem Elternprozess"""
+    method = WARM_START_METHODS.get(key)
+    x0 = real_calculator._warm_start(method, returns_df.columns) if method else None
+    return dict(options, x0=x0) if x0 is not None else options
+
+
+def _warm():
+    """Erzwingt den Start eines Workers (Module sind per fork bereits geladen)"""
+    return os.getpid()
+
+
+def web_workers():
+    """Anzahl Webprozesse (gunicorn liest WEB_CONCURRENCY als Default für -w)"""
+    return max(1, int(os.environ.get('WEB_CONCURRENCY', 1)))
+
+
+def default_workers():
+    """CPUs auf die Webprozesse verteilt, höchstens ein Worker je Strategie"""
+    return max(1, min(len(STRATEGIES), (os.cpu_count() or 1) // web_workers()))
+
+
+def _mp_context():
+    """fork, solange nur der Hauptthread läuft; sonst forkserver (fork mit Threads kann deadlocken)"""
+    methods = multiprocessing.get_all_start_methods()
+    if threading.active_count() > 1 and 'forkserver' in methods:
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('fork')
+
+
+class StrategyRunner:
+    """Prozess-Pool für die Strategien mit Deadline je Strategie"""
+
+    def __init__(self, max_workers=None, deadline=DEFAULT_DEADLINE, use_processes=True):
+        self.max_workers = int(max_workers or default_workers())
+        self.deadline = float(deadline)
+        self.use_processes = use_processes and 'fork' in multiprocessing.get_all_start_methods()
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                if self.use_processes:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=_mp_context())
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def warm(self):
+        """
+        Legt den Pool an und startet alle Worker. Bei fork werden sämtliche
+        Prozesse beim ersten submit erzeugt; deshalb beim App-Start aufrufen,
+        bevor Server-Threads laufen. In Worker-Prozessen ohne Wirkung.
+        """
+        if multiprocessing.parent_process() is not None:
+            return []
+        try:
+            pool = self._pool()
+            pids = [future.result(timeout=30) for future in [pool.submit(_warm) for _ in range(self.max_workers)]]
+            logger.info(f"Strategie-Pool mit {len(set(pids))} Workern bereit "
+                        f"({'Prozesse' if self.use_processes else 'Threads'})")
+            return pids
+        except Exception as e:
+            logger.warning(f"Strategie-Pool konnte nicht vorgewärmt werden, Fallback auf Threads: {e}")
+            self._reset(use_processes=False)
+            return []
+
+    def _reset(self, use_processes=None):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            if use_processes is not None:
+                self.use_processes = use_processes
+
+    def _recycle(self):
+        """Beendet hängende Worker; der Pool wird beim nächsten Aufruf neu angelegt"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        if isinstance(executor, ProcessPoolExecutor):
+            terminate = getattr(executor, 'terminate_workers', None)  # ab Python 3.14
+            if terminate is not None:
+                terminate()
+            else:
+                for process in list((executor._processes or {}).values()):
+                    process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, keys, symbols, returns_df, options):
+        try:
+            pool = self._pool()
+            return {pool.submit(run_strategy, key, symbols, returns_df, _task_options(key, returns_df, options)): key
+                    for key in keys}
+        except (BrokenProcessPool, RuntimeError) as e:
+            # Abgestürzter Worker: Pool einmal neu aufbauen
+            logger.warning(f"Strategie-Pool neu gestartet: {e}")
+            self._reset()
+            pool = self._pool()
+            return {pool.submit(run_strategy, key, symbols, returns_df, _task_options(key, returns_df, options)): key
+                    for key in keys}
+
+    def run(self, symbols, returns_df, options=None, keys=None, deadline=None):
+        """
+        Startet alle Strategien gleichzeitig und liefert Ereignisse in Abschlussreihenfolge.
+
+        Yields:
+            Dict mit strategy, status ('ok', 'failed', 'timeout'), result, error, duration
+        """
+        keys = list(keys or STRATEGY_ORDER)
+        unknown = [key for key in keys if key not in STRATEGIES]
+        if unknown:
+            raise ValueError(f"Unknown strategies: {', '.join(unknown)}")
+        deadline = self.deadline if deadline is None else float(deadline)
+        started = time.perf_counter()
+        futures = self._submit(keys, symbols, returns_df, options or {})
+        pending = set(futures)
+
+        while pending:
+            remaining = deadline - (time.perf_counter() - started)
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = futures[future]
+                weights = None
+                try:
+                    result, error, duration, weights = future.result()
+                except BrokenProcessPool as e:
+                    self._reset()
+                    result, error, duration = None, f"worker crashed: {e}", time.perf_counter() - started
+                except Exception as e:
+                    result, error, duration = None, str(e), time.perf_counter() - started
+                if weights is not None:
+                    # Gelöste Gewichte des Workers als Warmstart für den nächsten Aufruf
+                    real_calculator._warm_starts[(WARM_START_METHODS[key], tuple(returns_df.columns))] = weights
+                yield {
+                    'strategy': key,
+                    'status': 'ok' if result is not None else 'failed',
+                    'result': result,
+                    'error': error,
+                    'duration': round(duration, 4),
+                }
+
+        # Wartende Aufgaben werden abgebrochen; laufende blockieren ihren Worker weiter,
+        # deshalb den Pool beenden, bevor die Timeouts gemeldet werden
+        stuck = [future for future in pending if not future.cancel()]
+        if stuck:
+            logger.warning("Strategie-Pool wird nach Deadline neu aufgebaut")
+            self._recycle()
+        for future in pending:
+            logger.warning(f"{futures[future]} optimization exceeded the {deadline:.1f}s deadline")
+            yield {
+                'strategy': futures[future],
+                'status': 'timeout',
+                'result': None,
+                'error': f"Deadline of {deadline:.1f}s exceeded",
+                'duration': round(time.perf_counter() - started, 4),
+            }
+
+    def shutdown(self):
+        self._reset()
+
+
+runner = StrategyRunner(
+    max_workers=int(os.environ.get('SWISS_STRATEGY_WORKERS', 0)) or None,
+    deadline=float(os.environ.get('SWISS_STRATEGY_DEADLINE', DEFAULT_DEADLINE)),
+    use_processes=os.environ.get('SWISS_STRATEGY_POOL', '1') != '0',
+)
+# Vorwärmen beim App-Start nur mit einem Webprozess, sonst legt jeder Webprozess einen eigenen Pool an
+PREWARM = os.environ.get('SWISS_STRATEGY_PREWARM', '1' if web_workers() == 1 else '0') != '0'
@@ -0,0 +1,437 @@
+"""
+Swiss Asset Manager - Historische Stress-Szenarien
+--------------------------------------------------
+Spielt reale Krisenfenster auf ein Portfolio ab statt pauschaler Schocks je
+Anlageklasse:
+
+- 2008 GFC (Lehman bis Tiefpunkt), 2011 EUR/CHF-Mindestkurs, 2015 SNB-Aufhebung
+  des Mindestkurses, 2020 COVID-Crash, 2022 Zinswende.
+
+Die Tagesrenditen je Symbol und Fenster werden einmal geladen und in der
+lokalen Datenbank (persistent_store.StressReturnsStore) abgelegt; Anfragen
+laufen danach ohne Netzwerkzugriff. Symbole ohne Historie im Fenster (z.B.
+später kotiert) werden über ein Proxy abgebildet (Schweizer Aktien → SMI,
+Anleihen → AGG, Gold → GC=F, ...). Nicht-CHF-Anlagen werden mit dem
+Wechselkurs desselben Fensters in CHF umgerechnet.
+
+Alle Szenarien zusammen sind ein Renditewürfel (Szenario × Tag × Asset, kürzere
+Fenster mit Nullrenditen aufgefüllt); Wertpfade, Drawdowns und Beiträge der
+Assets entstehen in einem vektorisierten Durchlauf.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger('swiss_asset_pro')
+
+SCENARIOS = OrderedDict([
+    ('gfc_2008', {
+        'name': 'Finanzkrise 2008',
+        'start': '2008-09-12', 'end': '2009-03-09',
+        'description': 'Lehman-Konkurs bis zum Tiefpunkt der Aktienmärkte',
+    }),
+    ('eurchf_floor_2011', {
+        'name': 'EUR/CHF-Mindestkurs 2011',
+        'start': '2011-07-01', 'end': '2011-09-30',
+        'description': 'Franken-Aufwertung und Einführung des Mindestkurses von 1.20',
+    }),
+    ('snb_unpeg_2015', {
+        'name': 'SNB-Aufhebung Mindestkurs 2015',
+        'start': '2015-01-14', 'end': '2015-01-30',
+        'description': 'Aufhebung des EUR/CHF-Mindestkurses am 15. Januar 2015',
+    }),
+    ('covid_2020', {
+        'name': 'COVID-19 2020',
+        'start': '2020-02-19', 'end': '2020-03-23',
+        'description': 'Pandemie-Crash vom Höchststand bis zum Tiefpunkt',
+    }),
+    ('rates_2022', {
+        'name': 'Zinswende 2022',
+        'start': '2022-01-03', 'end': '2022-10-12',
+        'description': 'Inflationsschock und schnelle Zinserhöhungen, Aktien und Anleihen gleichzeitig im Minus',
+    }),
+])
+
+BASE_CURRENCY = 'CHF'
+DEFAULT_PROXY = '^GSPC'
+# Handelstage, um die ein Symbol nach Fensterbeginn starten darf und trotzdem als vorhanden gilt
+START_TOLERANCE_DAYS = 5
+LEAD_DAYS = 10
+MAX_WORKERS = 8
+
+SWISS_INDICES = ('^SSMI', '^SLI', '^SPI', '^SSHI')
+BOND_SYMBOLS = ('BND', 'AGG', 'LQD', 'HYG', 'JNK', 'EMB', 'TLT', 'IEF', 'SHY', 'GOVT', 'MUB', 'TIP', 'BNDX')
+GOLD_SYMBOLS = ('GC=F', 'GLD', 'IAU', 'GOLD', 'SI=F', 'SLV', 'PL=F', 'PA=F', 'GDX')
+COMMODITY_SYMBOLS = ('CL=F', 'NG=F', 'HG=F', 'HO=F', 'RB=F', 'USO', 'DBC')
+
+PROXIES = {
+    'swiss_equity': '^SSMI',
+    'euro_equity': '^STOXX50E',
+    'uk_equity': '^FTSE',
+    'japan_equity': '^N225',
+    'equity': DEFAULT_PROXY,
+    'crypto': '^IXIC',
+    'bond': 'AGG',
+    'gold': 'GC=F',
+    'commodity': 'CL=F',
+}
+
+SUFFIX_CURRENCIES = {
+    '.SW': 'CHF', '.DE': 'EUR', '.F': 'EUR', '.PA': 'EUR', '.AS': 'EUR', '.MI': 'EUR', '.MC': 'EUR',
+    '.BR': 'EUR', '.VI': 'EUR', '.HE': 'EUR', '.LS': 'EUR', '.L': 'GBP', '.T': 'JPY',
+}
+INDEX_CURRENCIES = {
+    '^SSMI': 'CHF', '^SLI': 'CHF', '^SPI': 'CHF', '^SSHI': 'CHF',
+    '^STOXX50E': 'EUR', '^GDAXI': 'EUR', '^FCHI': 'EUR', '^FTSE': 'GBP', '^N225': 'JPY',
+}
+
+
+def asset_category(symbol):
+    """Grobe Anlageklasse eines Yahoo-Symbols für die Proxy-Zuordnung"""
+    if symbol.endswith('.SW') or symbol in SWISS_INDICES:
+        return 'swiss_equity'
+    if symbol in BOND_SYMBOLS:
+        return 'bond'
+    if symbol in GOLD_SYMBOLS:
+        return 'gold'
+    if symbol in COMMODITY_SYMBOLS or symbol.endswith('=F'):
+        return 'commodity'
+    if symbol.endswith('-USD'):
+        return 'crypto'
+    currency = symbol_currency(symbol)
+    if currency == 'EUR':
+        return 'euro_equity'
+    if currency == 'GBP':
+        return 'uk_equity'
+    if currency == 'JPY':
+        return 'japan_equity'
+    return 'equity'
+
+
+def proxy_for(symbol):
+    return PROXIES[asset_category(symbol)]
+
+
+def symbol_currency(symbol):
+    """Kurswährung aus Börsensuffix bzw. Index; Devisenpaare notieren in der Quotierungswährung"""
+    if symbol.endswith('=X') and len(symbol) >= 8:
+        return symbol[3:6]
+    if symbol in INDEX_CURRENCIES:
+        return INDEX_CURRENCIES[symbol]
+    for suffix, currency in SUFFIX_CURRENCIES.items():
+        if symbol.endswith(suffix):
+            return currency
+    return 'USD'
+
+
+def fx_symbol(currency, base=BASE_CURRENCY):
+    """Yahoo-Devisenpaar, dessen Rendite eine Anlage in `currency` in die Basiswährung umrechnet"""
+    return f"{currency}{base}=X"
+
+
+def window_returns(closes, start, end):
+    """
+    Tagesrenditen eines Symbols im Fenster [start, end].
+
+    Die erste Rendite läuft vom letzten Schlusskurs vor dem Fenster zum ersten
+    im Fenster. Ohne Kurs vor dem Fenster oder bei Kotierung erst deutlich
+    nach Fensterbeginn gilt das Symbol als ohne Historie.
+
+    Returns:
+        (dates [YYYY-MM-DD], returns) oder None
+    """
+    closes = closes.dropna()
+    closes = closes[closes > 0]
+    if closes.empty:
+        return None
+    index = pd.DatetimeIndex(closes.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    closes = pd.Series(closes.to_numpy(dtype=float), index=index.normalize())
+
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    before = closes[closes.index < start]
+    inside = closes[(closes.index >= start) & (closes.index <= end)]
+    if before.empty or inside.empty:
+        return None
+    if np.busday_count(start.date(), inside.index[0].date()) > START_TOLERANCE_DAYS:
+        return None
+    prices = np.concatenate([[before.iloc[-1]], inside.to_numpy()])
+    return [d.strftime('%Y-%m-%d') for d in inside.index], prices[1:] / prices[:-1] - 1.0
+
+
+def yahoo_closes(symbol, start, end):
+    """Default-Downloader: Schlusskurse von Yahoo Finance"""
+    import yfinance as yf
+    hist = yf.Ticker(symbol).history(start=start, end=end, auto_adjust=True)
+    return None if hist is None or hist.empty else hist['Close']
+
+
+class StressLibrary:
+    """
+    Bibliothek der Szenario-Renditevektoren, im Speicher als ein Panel
+    (Tage × Symbole) je Szenario und persistent in stress_returns.
+    """
+
+    def __init__(self, store=None, scenarios=SCENARIOS):
+        self.store = store
+        self.scenarios = scenarios
+        self._vectors = {key: {} for key in scenarios}
+        # Paare ohne Daten {szenario: {symbol: 'no_history' | 'failed'}}; precompute überspringt sie
+        self._missing = {key: {} for key in scenarios}
+        self._panels = {}
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    def _ensure_loaded(self):
+        if self._loaded or self.store is None:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                for key, vectors in self.store.load().items():
+                    if key in self._vectors:
+                        self._vectors[key].update(vectors)
+                for key, missing in self.store.load_missing().items():
+                    if key in self._missing:
+                        self._missing[key].update(missing)
+            except Exception as e:
+                logger.warning(f"Stress-Szenarien konnten nicht geladen werden: {e}")
+            self._panels.clear()
+            self._loaded = True
+
+    def add(self, scenario, symbol, dates, returns, persist=True):
+        """Renditevektor eines Symbols für ein Szenario übernehmen (und speichern)"""
+        with self._lock:
+            self._vectors[scenario][symbol] = (list(dates), np.asarray(returns, dtype=float))
+            self._missing[scenario].pop(symbol, None)
+            self._panels.pop(scenario, None)
+        if persist and self.store is not None:
+            self.store.save(scenario, symbol, dates, returns)
+
+    def mark_missing(self, scenario, symbol, reason, persist=True):
+        """Paar ohne Daten merken, damit precompute es ohne force nicht erneut lädt"""
+        with self._lock:
+            self._missing[scenario][symbol] = reason
+        if persist and self.store is not None:
+            self.store.save_missing(scenario, symbol, reason)
+
+    def symbols(self, scenario=None):
+        """Symbole mit Daten (in einem bzw. mindestens einem Szenario)"""
+        self._ensure_loaded()
+        with self._lock:
+            if scenario is not None:
+                return sorted(self._vectors[scenario])
+            return sorted(set().union(*self._vectors.values()))
+
+    def panel(self, scenario):
+        """
+        Ausgerichtetes Panel eines Szenarios.
+
+        Returns:
+            (dates, {symbol: spalte}, R) mit R (T × n); Tage ohne Handel eines
+            Symbols haben Rendite 0 (die nächste Rendite umfasst die Lücke)
+        """
+        self._ensure_loaded()
+        with self._lock:
+            cached = self._panels.get(scenario)
+            if cached is not None:
+                return cached
+            vectors = self._vectors[scenario]
+            symbols = sorted(vectors)
+            dates = sorted(set().union(*(vectors[s][0] for s in symbols))) if symbols else []
+            row = {d: i for i, d in enumerate(dates)}
+            R = np.zeros((len(dates), len(symbols)))
+            for column, symbol in enumerate(symbols):
+                days, returns = vectors[symbol]
+                R[[row[d] for d in days], column] = returns
+            cached = (dates, {symbol: i for i, symbol in enumerate(symbols)}, R)
+            self._panels[scenario] = cached
+            return cached
+
+    def precompute(self, symbols, download=yahoo_closes, force=False, max_workers=MAX_WORKERS):
+        """
+        Lädt fehlende Renditevektoren (Netzwerk) für die Symbole, ihre Proxies
+        und die benötigten Devisenpaare; ein Download je Symbol über alle Fenster.
+
+        Paare ohne Historie im Fenster und Symbole ohne Kursdaten werden gespeichert
+        und nur mit force=True erneut geladen; Downloadfehler (Netzwerk) nicht.
+
+        Returns:
+            Dict mit stored {symbol: [szenarien]}, no_history {symbol: [szenarien]} und failed
+        """
+        self._ensure_loaded()
+        wanted = set(symbols)
+        wanted |= {proxy_for(s) for s in symbols}
+        wanted |= {fx_symbol(symbol_currency(s)) for s in wanted if symbol_currency(s) != BASE_CURRENCY}
+        wanted = sorted(wanted)
+
+        with self._lock:
+            todo = {}
+            for symbol in wanted:
+                keys = [key for key in self.scenarios
+                        if force or (symbol not in self._vectors[key] and symbol not in self._missing[key])]
+                if keys:
+                    todo[symbol] = keys
+
+        first = min(date.fromisoformat(self.scenarios[k]['start']) for k in self.scenarios) - timedelta(days=LEAD_DAYS)
+        last = max(date.fromisoformat(self.scenarios[k]['end']) for k in self.scenarios) + timedelta(days=1)
+
+        def load(symbol):
+            try:
+                return symbol, download(symbol, first.isoformat(), last.isoformat()), None
+            except Exception as e:
+                logger.warning(f"Stress-Historie für {symbol} nicht ladbar: {e}")
+                return symbol, None, e
+
+        stored, no_history, failed = {}, {}, []
+        if todo:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(todo)))) as pool:
+                downloads = list(pool.map(load, todo))
+            for symbol, closes, error in downloads:
+                if closes is None or len(closes) == 0:
+                    failed.append(symbol)
+                    if error is None:
+                        # Keine Kursdaten (z.B. unbekanntes Symbol), kein vorübergehender Fehler
+                        for key in todo[symbol]:
+                            self.mark_missing(key, symbol, 'failed')
+                    continue
+                for key in todo[symbol]:
+                    scenario = self.scenarios[key]
+                    vector = window_returns(closes, scenario['start'], scenario['end'])
+                    if vector is None:
+                        no_history.setdefault(symbol, []).append(key)
+                        self.mark_missing(key, symbol, 'no_history')
+                    else:
+                        self.add(key, symbol, *vector)
+                        stored.setdefault(symbol, []).append(key)
+        logger.info(f"Stress-Bibliothek: {len(stored)} Symbole geladen, {len(failed)} fehlgeschlagen")
+        return {'stored': stored, 'no_history': no_history, 'failed': failed}
+
+    def resolve(self, symbol, scenario, proxies=None):
+        """Datenquelle eines Symbols im Szenario: eigenes Symbol, Proxy, Default-Proxy oder None"""
+        _, columns, _ = self.panel(scenario)
+        candidates = [symbol, (proxies or {}).get(symbol), proxy_for(symbol), DEFAULT_PROXY]
+        for candidate in candidates:
+            if candidate and candidate in columns:
+                return candidate
+        return None
+
+    def run(self, holdings, scenarios=None, proxies=None, currencies=None):
+        """
+        Alle Szenarien auf ein Portfolio anwenden (Buy & Hold über das Fenster).
+
+        Args:
+            holdings: {symbol: wert} in CHF bzw. Gewichte; negative Werte = Short
+            scenarios: Szenario-Schlüssel (Default: alle)
+            proxies: optionale {symbol: proxy} vor der automatischen Zuordnung
+            currencies: optionale {symbol: währung} statt der Ableitung aus dem Suffix
+
+        Returns:
+            Dict mit scenarios (Tabelle je Szenario) und total_value
+        """
+        keys = list(scenarios or self.scenarios)
+        unknown = [key for key in keys if key not in self.scenarios]
+        if unknown:
+            raise ValueError(f"Unknown stress scenarios: {', '.join(unknown)}")
+        symbols = list(holdings)
+        values = np.array([float(holdings[s]) for s in symbols])
+        total = values.sum()
+        if not symbols or total == 0:
+            raise ValueError('Portfolio has no value')
+        w = values / total
+        currencies = currencies or {}
+
+        # Renditewürfel (S × T_max × n) und Quellen je Szenario und Asset
+        blocks, sources, unconverted = [], [], []
+        for key in keys:
+            dates, columns, R = self.panel(key)
+            block = np.zeros((len(dates), len(symbols)))
+            used = []
+            for j, symbol in enumerate(symbols):
+                source = self.resolve(symbol, key, proxies)
+                used.append(source)
+                if source is None:
+                    continue
+                r = R[:, columns[source]]
+                currency = currencies.get(symbol) if source == symbol else None
+                currency = currency or symbol_currency(source)
+                if currency != BASE_CURRENCY:
+                    pair = fx_symbol(currency)
+                    if pair in columns:
+                        r = (1.0 + r) * (1.0 + R[:, columns[pair]]) - 1.0
+                    else:
+                        unconverted.append((key, symbol))
+                block[:, j] = r
+            blocks.append(block)
+            sources.append(used)
+
+        T_max = max((len(block) for block in blocks), default=0)
+        cube = np.zeros((len(keys), T_max, len(symbols)))
+        for s, block in enumerate(blocks):
+            cube[s, :len(block)] = block
+
+        growth = np.cumprod(1.0 + cube, axis=1)                      # (S × T × n)
+        path = np.concatenate([np.ones((len(keys), 1)), growth @ w], axis=1)
+        asset_returns = growth[:, -1, :] - 1.0 if T_max else np.zeros((len(keys), len(symbols)))
+        contributions = asset_returns * w                            # Anteil am Portfolioergebnis
+        drawdowns = (path / np.maximum.accumulate(path, axis=1) - 1.0).min(axis=1)
+        daily = path[:, 1:] / path[:, :-1] - 1.0
+        worst_day = daily.min(axis=1) if T_max else np.zeros(len(keys))
+
+        table = []
+        for s, key in enumerate(keys):
+            scenario = self.scenarios[key]
+            covered = [sources[s][j] is not None for j in range(len(symbols))]
+            table.append({
+                'scenario': key,
+                'name': scenario['name'],
+                'start': scenario['start'],
+                'end': scenario['end'],
+                'description': scenario['description'],
+                'days': len(blocks[s]),
+                'portfolio_return': float(path[s, -1] - 1.0),
+                'pnl': float((path[s, -1] - 1.0) * total),
+                'max_drawdown': float(drawdowns[s]),
+                'worst_day': float(worst_day[s]),
+                'coverage': float(np.abs(w)[covered].sum() / np.abs(w).sum()),
+                'assets': [{
+                    'symbol': symbol,
+                    'source': sources[s][j],
+                    'proxied': sources[s][j] is not None and sources[s][j] != symbol,
+                    'return': float(asset_returns[s, j]) if sources[s][j] else None,
+                    'contribution': float(contributions[s, j]) if sources[s][j] else None,
+                } for j, symbol in enumerate(symbols)],
+            })
+        return {
+            'scenarios': table,
+            'total_value': float(total),
+            'base_currency': BASE_CURRENCY,
+            'unconverted': [{'scenario': key, 'symbol': symbol} for key, symbol in unconverted],
+        }
+
+
+_library = None
+_library_lock = threading.Lock()
+
+
+def get_stress_library():
+    """Prozessweite Bibliothek auf swiss_asset_manager.db"""
+    global _library
+    with _library_lock:
+        if _library is None:
+            try:
+                from persistent_store import StressReturnsStore
+                store = StressReturnsStore()
+            except Exception as e:
+                logger.warning(f"stress_returns nicht verfügbar, Szenarien nur im Speicher: {e}")
+                store = None
+            _library = StressLibrary(store)
+        return _library
@@ -0,0 +1,35 @@
+# tests/conftest.py
+"""
+Shared fixtures for the numerical engine tests
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def _factor_returns(rows=500, n=8, factors=3, seed=0, drift=0.0003, loading=0.5, noise=0.01,
+                    loadings=None, start='2023-01-02'):
+    """
+    Daily returns with a factor structure: F B + ε (rows × n, columns S0..Sn-1).
+
+    Args:
+        factors: Number of common factors (volatility 1% each)
+        seed: Seed or an existing np.random.Generator (further draws continue from it)
+        drift: Mean of the idiosyncratic returns
+        loading: Standard deviation of the random loadings B
+        noise: Standard deviation of the idiosyncratic returns
+        loadings: Fixed (factors × n) loadings instead of random ones, e.g. blocks
+        start: First business day of the index, None for a RangeIndex
+    """
+    rng = np.random.default_rng(seed)
+    common = rng.normal(0, 0.01, (rows, factors))
+    B = rng.normal(0, loading, (factors, n)) if loadings is None else np.asarray(loadings, dtype=float)
+    data = common @ B + rng.normal(drift, noise, (rows, n))
+    index = pd.bdate_range(start, periods=rows) if start is not None else None
+    return pd.DataFrame(data, index=index, columns=[f'S{i}' for i in range(n)])
+
+
+@pytest.fixture
+def factor_returns():
+    """Factory for random factor-model return panels, see _factor_returns"""
+    return _factor_returns
@@ -0,0 +1,67 @@
+# tests/test_backtest.py
+"""
+Unit tests for the walk-forward strategy backtest
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+
+import backtest
+import nav_engine
+
+
+def _loop_nav(R, positions, weights, cost_rate):
+    """Tagesschleife mit driftenden Beständen als Referenz"""
+    value, holdings, nav = 1.0, None, [1.0]
+    targets = dict(zip(positions, weights))
+    for t in range(positions[0], len(R)):
+        if t > positions[0]:
+            holdings = holdings * (1 + R[t])
+            value = holdings.sum()
+            nav.append(value)
+        if t in targets:
+            current = holdings / value if holdings is not None else np.zeros(R.shape[1])
+            value *= 1 - cost_rate * np.abs(targets[t] - current).sum()
+            holdings = targets[t] * value
+    return np.array(nav)
+
+
+def test_vectorized_nav_matches_daily_loop(factor_returns):
+    returns = factor_returns(300, start='2020-01-01')
+    R = returns.to_numpy()
+    positions = backtest.rebalance_positions(returns.index, 'monthly', lookback=60)
+    assert all(returns.index[p].month != returns.index[p + 1].month for p in positions)
+
+    rng = np.random.default_rng(4)
+    weights = rng.dirichlet(np.ones(8), len(positions))
+    path = nav_engine.walk_forward_nav(R, positions, weights, cost_rate=0.0015)
+    assert np.allclose(path['nav'], _loop_nav(R, positions, weights, 0.0015))
+    assert np.isclose(path['turnover'][0], 1.0) and np.all(path['costs'] == 0.0015 * path['turnover'])
+
+
+def test_weights_use_only_past_data(factor_returns):
+    returns = factor_returns(800, start='2020-01-01')
+    result = backtest.run_backtest(returns, frequency='quarterly', lookback=120)
+    shocked = returns.copy()
+    cutoff = result['rebalance_dates'][2]
+    shocked.loc[shocked.index > cutoff] *= -3
+    again = backtest.run_backtest(shocked, frequency='quarterly', lookback=120)
+    for key in backtest.STRATEGIES:
+        assert np.allclose(result['strategies'][key]['weights'][:3], again['strategies'][key]['weights'][:3])
+        assert not np.allclose(result['strategies'][key]['nav'], again['strategies'][key]['nav'])
+
+
+def test_parallel_chunks_match_sequential_run(factor_returns):
+    returns = factor_returns(800, start='2020-01-01')
+    returns.iloc[:400, 2] = np.nan
+    sequential = backtest.run_backtest(returns, lookback=120, max_workers=1)
+    parallel = backtest.run_backtest(returns, lookback=120, max_workers=4)
+    assert sequential['dates'][0] == sequential['rebalance_dates'][0]
+    for key, strategy in sequential['strategies'].items():
+        assert strategy['failed_rebalances'] == 0
+        assert np.allclose(strategy['weights'], parallel['strategies'][key]['weights'], atol=1e-6)
+        assert np.all(strategy['weights'][:8, 2] == 0)      # S2 ohne volle Historie nicht investiert
+        assert np.allclose(strategy['weights'].sum(axis=1), 1)
+        assert np.isfinite(strategy['statistics']['max_drawdown'])
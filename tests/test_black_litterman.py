@@ -0,0 +1,119 @@
+# tests/test_black_litterman.py
+"""
+Unit tests for the shared Black-Litterman engine
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+
+import black_litterman
+
+
+def _sigma(factor_returns, n, seed=0):
+    returns = factor_returns(500, n, factors=4, seed=seed, drift=0, start=None)
+    return np.cov(returns, rowvar=False) * 252
+
+
+def _explicit_inverses(sigma, pi, P, Q, tau, risk_aversion):
+    """The formula the endpoints used before the engine"""
+    omega = np.eye(len(Q)) * 0.0001
+    tau_sigma_inv = np.linalg.inv(tau * sigma)
+    omega_inv = np.linalg.inv(omega)
+    middle = np.linalg.inv(tau_sigma_inv + P.T @ omega_inv @ P)
+    mu_bl = middle @ (tau_sigma_inv @ pi + P.T @ omega_inv @ Q)
+    weights = np.linalg.inv(risk_aversion * sigma) @ mu_bl
+    weights = weights / weights.sum()
+    weights = np.maximum(weights, 0)
+    return mu_bl, weights / weights.sum()
+
+
+def test_matches_explicit_inverse_formula(factor_returns):
+    symbols = [f'S{i}' for i in range(20)]
+    sigma = _sigma(factor_returns, 20)
+    engine = black_litterman.BlackLittermanEngine(sigma, symbols)
+    market = np.full(20, 1 / 20)
+    pi = engine.equilibrium(market, 2.5)
+    assert np.allclose(pi, 2.5 * sigma @ market)
+
+    views = [{'asset1': 'S0', 'asset2': 'S1', 'expectedOutperformance': 0.03},
+             {'asset1': 'S5', 'asset2': 'UNKNOWN', 'expectedOutperformance': 0.01}]
+    P, Q = black_litterman.view_matrix(views, symbols)
+    assert P[0, 0] == 1 and P[0, 1] == -1 and P[1].sum() == 1
+
+    result = engine.optimize(pi, P, Q, tau=0.05, risk_aversion=2.5)
+    mu_bl, weights = _explicit_inverses(sigma, pi, P, Q, 0.05, 2.5)
+    assert np.allclose(result['posterior'], mu_bl)
+    assert np.allclose(result['weights'], weights)
+    assert np.isclose(result['volatility'], np.sqrt(weights @ sigma @ weights))
+
+    # Without views the posterior is the equilibrium and the market portfolio is optimal
+    plain = engine.optimize(pi, tau=0.05, risk_aversion=2.5)
+    assert np.allclose(plain['posterior'], pi) and np.allclose(plain['weights'], market)
+
+
+def test_engine_cache_per_panel_and_as_of(factor_returns):
+    black_litterman.clear_cache()
+    builds = []
+
+    def build():
+        builds.append(1)
+        return _sigma(factor_returns, 5)
+
+    first = black_litterman.get_engine(('returns', ('A', 'B')), '2025-06-30', build)
+    again = black_litterman.get_engine(('returns', ('A', 'B')), '2025-06-30', build)
+    newer = black_litterman.get_engine(('returns', ('A', 'B')), '2025-07-01', build)
+    assert first is again and newer is not first and len(builds) == 2
+
+
+def test_singular_covariance_gets_ridge():
+    rng = np.random.default_rng(1)
+    returns = rng.normal(0, 0.01, (30, 60))
+    sigma = np.cov(returns, rowvar=False) * 252
+    engine = black_litterman.BlackLittermanEngine(sigma)
+    assert engine.jitter > 0
+    result = engine.optimize(engine.equilibrium(np.full(60, 1 / 60), 2.5), tau=0.05)
+    assert np.all(np.isfinite(result['weights'])) and np.isclose(result['weights'].sum(), 1)
+
+
+def test_sweep_matches_single_runs(factor_returns):
+    symbols = [f'S{i}' for i in range(15)]
+    engine = black_litterman.BlackLittermanEngine(_sigma(factor_returns, 15, seed=2), symbols)
+    market = np.linspace(1, 2, 15) / np.linspace(1, 2, 15).sum()
+    P, _ = black_litterman.view_matrix([{'asset1': 'S0', 'asset2': 'S1'}, {'asset1': 'S2', 'asset2': 'S3'}], symbols)
+    taus, lambdas = [0.01, 0.05, 0.2], [1.0, 2.5]
+    Q_grid = [[0.02, 0.01], [-0.03, 0.0], [0.05, 0.05], [0.0, -0.02]]
+
+    sweep = engine.sweep(engine.equilibrium(market, 1.0), P, Q_grid, taus, lambdas)
+    assert sweep['weights'].shape == (24, 15)
+
+    for g in range(24):
+        tau, risk_aversion = sweep['tau'][g], sweep['risk_aversion'][g]
+        single = engine.optimize(engine.equilibrium(market, risk_aversion), P, Q_grid[sweep['q_index'][g]],
+                                 tau=tau, risk_aversion=risk_aversion)
+        assert np.allclose(sweep['posterior'][g], single['posterior'])
+        assert np.allclose(sweep['weights'][g], single['weights'])
+        assert np.isclose(sweep['volatility'][g], single['volatility'])
+
+
+def test_sweep_endpoint_accepts_scalar_outperformance(monkeypatch, factor_returns):
+    import pandas as pd
+    import app as app_module
+
+    symbols = ['NESN.SW', 'NOVN.SW', 'ROG.SW']
+    sigma = _sigma(factor_returns, 3, seed=5)
+    returns_df = pd.DataFrame(np.zeros((5, 3)), columns=symbols)
+    engine = black_litterman.BlackLittermanEngine(sigma, symbols)
+    monkeypatch.setattr(app_module, '_bl_engine', lambda requested: (returns_df, engine))
+
+    portfolio = [{'symbol': s, 'weight': 1 / 3} for s in symbols]
+    views = [{'asset1': 'NESN.SW', 'asset2': 'NOVN.SW', 'view': 0.02}]
+    client = app_module.app.test_client()
+    scalar = client.post('/api/black_litterman', json={
+        'portfolio': portfolio, 'views': views, 'tau': [0.025, 0.05], 'expectedOutperformance': 0.03})
+    listed = client.post('/api/black_litterman', json={
+        'portfolio': portfolio, 'views': views, 'tau': [0.025, 0.05], 'expectedOutperformance': [0.03]})
+    assert scalar.status_code == 200 and listed.status_code == 200
+    assert scalar.get_json()['grid'] == listed.get_json()['grid']
+    assert [point['expectedOutperformance'] for point in scalar.get_json()['grid']] == [0.03, 0.03]
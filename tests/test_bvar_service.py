@@ -73,6 +73,69 @@ def test_estimate_sigma():
     except Exception as e:
         print(f"⚠️  test_estimate_sigma failed: {e}")
 
+def test_result_cache_key_and_as_of():
+    """Cache key changes with every input and with the monthly data stand"""
+    from bvar_module.bvar_service import result_cache_key, data_as_of
+    base = dict(tickers=['^GSPC', '^IXIC'], start='2015-01-01', end=None, nlags=2, steps=12, bayesian=False)
+    key = result_cache_key(as_of='2025-10', **base)
+    assert key == result_cache_key(as_of='2025-10', **base)
+    assert key != result_cache_key(as_of='2025-11', **base)
+    assert key != result_cache_key(as_of='2025-10', **{**base, 'nlags': 3})
+    assert key != result_cache_key(as_of='2025-10', **{**base, 'bayesian': True})
+    assert data_as_of('2025-10-03') == data_as_of('2025-10-31') == '2025-10'
+
+
+def test_pipeline_serves_cached_result(tmp_path, monkeypatch):
+    """Second call with the same inputs does not refit; new data does"""
+    import numpy as np
+    from bvar_module import bvar_service
+
+    fits = []
+    monkeypatch.setattr(bvar_service, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(bvar_service, 'estimate_var_classical', lambda data, nlags=2: fits.append(len(data)) or 'var')
+    monkeypatch.setattr(bvar_service, 'forecast_var_classical',
+                        lambda var_res, steps=12: pd.DataFrame(np.zeros((steps, 2)), columns=['A', 'B']))
+    monkeypatch.setattr(bvar_service, 'irf_plot', lambda *args, **kwargs: None)
+    monkeypatch.setattr(bvar_service, 'fevd_table', lambda var_res, steps=12: None)
+    bvar_service.clear_result_cache()
+
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(rng.normal(0, 0.04, (60, 2)), columns=['A', 'B'],
+                        index=pd.date_range('2015-01-31', periods=60, freq='ME'))
+    config = {'tickers': ['A', 'B'], 'use_local_prices_df': data, 'forecast_steps': 6}
+
+    first = bvar_service.run_bvar_pipeline(config)
+    second = bvar_service.run_bvar_pipeline(config)
+    assert fits == [60] and not first['metadata']['cache_hit'] and second['metadata']['cache_hit']
+    assert second['forecast'].equals(first['forecast'])
+
+    # Nach Neustart (leerer Speicher) von Disk
+    bvar_service.clear_result_cache()
+    assert bvar_service.run_bvar_pipeline(config)['metadata']['cache_hit'] and fits == [60]
+
+    # Neuer Monat: neuer Schlüssel, neuer Fit
+    extended = pd.concat([data, pd.DataFrame([[0.01, 0.02]], columns=['A', 'B'],
+                                             index=[data.index[-1] + pd.offsets.MonthEnd()])])
+    third = bvar_service.run_bvar_pipeline({**config, 'use_local_prices_df': extended})
+    assert fits == [60, 61] and not third['metadata']['cache_hit']
+    bvar_service.clear_result_cache()
+
+
+def test_store_result_survives_concurrent_pruning(tmp_path, monkeypatch):
+    """A cache file removed by another worker between glob and getmtime is ignored"""
+    from bvar_module import bvar_service
+
+    monkeypatch.setattr(bvar_service, 'CACHE_DIR', str(tmp_path))
+    (tmp_path / 'bvar_result_old.pkl').write_bytes(b'')
+
+    def vanished(path):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(bvar_service.os.path, 'getmtime', vanished)
+    bvar_service._store_result('new', {'forecast': None})
+    assert (tmp_path / 'bvar_result_new.pkl').exists()
+    bvar_service.clear_result_cache()
+
 if __name__ == '__main__':
     print("Running BVAR Service Tests...")
     print("=" * 50)
@@ -0,0 +1,66 @@
+# tests/test_correlation_service.py
+"""
+Unit tests for the cached correlation service behind /api/calculate_correlation
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+
+import correlation_service as cs
+
+
+# Zwei Blöcke: S0-S3 und S4-S7 laden je auf einen Faktor
+BLOCKS = np.repeat(np.eye(2), 4, axis=1)
+
+
+def _panel(factor_returns, rows=300, seed=0):
+    return factor_returns(rows, 8, factors=2, seed=seed, drift=0, noise=0.006, loadings=BLOCKS, start='2024-01-01')
+
+
+def test_pairwise_complete_matches_pandas(factor_returns):
+    panel = _panel(factor_returns)
+    assert np.allclose(cs.pairwise_correlation(panel)[0], panel.corr().values)
+
+    # Kürzere Historien und Lücken: gleiche Semantik wie DataFrame.corr(min_periods)
+    gappy = panel.copy()
+    gappy.iloc[:200, 1] = np.nan
+    gappy.iloc[::7, 4] = np.nan
+    gappy.iloc[:290, 6] = np.nan
+    corr, counts = cs.pairwise_correlation(gappy, min_periods=20)
+    expected = gappy.corr(min_periods=20).values
+    assert np.allclose(corr, expected, equal_nan=True)
+    assert counts[1, 4] == gappy.iloc[:, [1, 4]].dropna().shape[0]
+    assert np.isnan(corr[6, 0]) and corr[0, 0] == 1
+
+
+def test_compact_upper_triangle_and_cluster_order(factor_returns):
+    service = cs.CorrelationService()
+    panel = _panel(factor_returns)
+    entry = service.matrix(panel, window=252)
+    symbols = ['S3', 'S0', 'S5']
+    result = service.compact(entry, symbols)
+    assert result['symbols'] == symbols and len(result['upper_triangle']) == 3
+    expected = panel.tail(252)[symbols].corr().values
+    assert np.allclose(cs.from_upper_triangle(result['upper_triangle'], 3), expected, atol=1e-6)
+
+    # Cluster-Reihenfolge hält die beiden Blöcke zusammen
+    clustered = service.compact(entry, cluster=True)
+    blocks = [int(s[1:]) < 4 for s in clustered['symbols']]
+    assert blocks == sorted(blocks) or blocks == sorted(blocks, reverse=True)
+
+
+def test_cache_by_symbol_set_window_and_as_of(factor_returns):
+    service = cs.CorrelationService()
+    panel = _panel(factor_returns)
+    first = service.matrix(panel, window=120)
+    assert service.matrix(panel[panel.columns[::-1]], window=120) is first
+    assert service.matrix(panel, window=60) is not first
+    newer = service.matrix(pd.concat([panel, _panel(factor_returns, 1, seed=3).set_index(
+        pd.DatetimeIndex([panel.index[-1] + pd.offsets.BDay()]))]), window=120)
+    assert newer is not first and newer['as_of'] != first['as_of']
+
+    complete = service.matrix(panel, window=120, pairwise=False)
+    assert np.allclose(complete['corr'], first['corr'])
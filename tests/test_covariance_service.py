@@ -0,0 +1,91 @@
+# tests/test_covariance_service.py
+"""
+Unit tests for the incremental rolling/EWMA covariance service
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+
+import covariance_service as cs
+
+
+def test_rolling_append_matches_full_recompute(factor_returns):
+    returns = factor_returns(400, 6, drift=0.0002)
+    state = cs.RollingCovariance.from_history(returns.iloc[:100], window=60)
+    for date, row in zip(returns.index[100:], returns.to_numpy()[100:]):
+        state.append(row, date)
+    expected = returns.tail(60).cov().values * 252
+    assert state.count == 60 and state.last_date == returns.index[-1]
+    assert np.allclose(state.covariance(), expected)
+    assert np.allclose(state.mean(), returns.tail(60).mean().values * 252)
+
+    # Intraday-Update des letzten Balkens
+    revised = returns.copy()
+    revised.iloc[-1] *= 1.5
+    state.replace_last(revised.iloc[-1].to_numpy())
+    assert np.allclose(state.covariance(), revised.tail(60).cov().values * 252)
+
+
+def test_ewma_matches_riskmetrics_recursion(factor_returns):
+    returns = factor_returns(200, 6, drift=0.0002)
+    X = returns.to_numpy()
+    state = cs.EwmaCovariance.from_history(returns.iloc[:150], lam=0.94)
+    for date, row in zip(returns.index[150:], X[150:]):
+        state.append(row, date)
+
+    weights = 0.94 ** np.arange(199, -1, -1)
+    weights /= weights.sum()
+    expected = (X * weights[:, None]).T @ X * 252
+    # Die Initialisierung normiert die Gewichte, danach gilt die Rekursion exakt
+    recursive = cs.EwmaCovariance.from_history(returns.iloc[:150], lam=0.94).covariance(annualize=False)
+    for row in X[150:]:
+        recursive = 0.94 * recursive + 0.06 * np.outer(row, row)
+    assert np.allclose(state.covariance(), recursive * 252)
+    assert np.allclose(state.covariance(), expected, rtol=1e-3)
+
+
+def test_service_appends_new_bars_and_rebuilds_on_revisions(factor_returns):
+    service = cs.CovarianceService(window=120)
+    returns = factor_returns(300, 6, drift=0.0002)
+    first = service.state(returns.iloc[:250])
+    assert np.allclose(service.covariance(returns.iloc[:250]).values, returns.iloc[130:250].cov().values * 252)
+
+    # Zwei neue Tagesbalken: gleicher Zustand, nur angehängt
+    assert service.state(returns.iloc[:252]) is first
+    assert np.allclose(service.covariance(returns.iloc[:252]).values, returns.iloc[132:252].cov().values * 252)
+    correlation = service.correlation(returns.iloc[:252]).values
+    assert np.allclose(correlation, returns.iloc[132:252].corr().values)
+
+    # Revidierte Historie vor dem letzten Balken: Neuaufbau
+    revised = returns.iloc[:253].copy()
+    revised.iloc[-2] = 0.0
+    assert np.allclose(service.covariance(revised).values, revised.tail(120).cov().values * 252)
+
+    # Fehlende Werte: nur vollständige Zeilen, EWMA separat konfigurierbar
+    gappy = returns.copy()
+    gappy.iloc[5, 2] = np.nan
+    assert np.allclose(service.covariance(gappy, window=1000).values, gappy.dropna().cov().values * 252)
+    ewma = service.covariance(returns, method='ewma', lam=0.97).values
+    assert ewma.shape == (6, 6) and np.all(np.linalg.eigvalsh(ewma) > 0)
+    assert service.push_bar(list(returns.columns), returns.iloc[-1].to_numpy(), returns.index[-1] + pd.Timedelta(days=1))
+
+
+def test_shorter_panel_after_longer_call_is_rebuilt(factor_returns):
+    service = cs.CovarianceService(window=252)
+    returns = factor_returns(500, 6, drift=0.0002)
+    service.covariance(returns)
+    short = returns.tail(120)
+    assert np.allclose(service.covariance(short).values, short.cov().values * 252)
+    assert np.allclose(service.covariance(returns.tail(121)).values, returns.tail(121).cov().values * 252)
+    ewma = service.covariance(returns, method='ewma')
+    assert np.allclose(service.covariance(short, method='ewma').values,
+                       cs.EwmaCovariance.from_history(short).covariance())
+    assert not np.allclose(ewma.values, service.covariance(short, method='ewma').values)
+
+    # LRU: je Spaltentupel ein Zustand, höchstens MAX_STATES
+    for i in range(cs.MAX_STATES + 10):
+        service.covariance(returns.iloc[:, [i % 6, (i + 1) % 6]].rename(columns=lambda c: f'{c}_{i}'))
+    assert len(service._states) == cs.MAX_STATES
@@ -0,0 +1,56 @@
+# tests/test_factor_model.py
+"""
+Unit tests for the PCA factor covariance and its use in the optimizers
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+
+import factor_model
+import portfolio_solvers
+
+
+def test_low_rank_products_match_dense_matrix(factor_returns):
+    model = factor_model.FactorCovariance.from_returns(factor_returns(252, 80, factors=6, start=None), n_factors=6)
+    dense = model.to_dense()
+    rng = np.random.default_rng(1)
+    w = rng.dirichlet(np.ones(80))
+    block = rng.normal(size=(80, 3))
+
+    assert model.shape == (80, 80) and model.n_factors == 6 and model.symbols[0] == 'S0'
+    assert np.allclose(model @ w, dense @ w) and np.allclose(w @ model, w @ dense)
+    assert np.allclose(model @ block, dense @ block)
+    assert np.isclose(w @ model @ w, w @ dense @ w) and np.isclose(model.variance(w), w @ dense @ w)
+    assert np.allclose(model.diagonal(), np.diag(dense))
+
+    extra = rng.uniform(0.1, 1, 80)
+    assert np.allclose((dense + np.diag(extra)) @ model.solve(w, extra), w)
+
+    # Diagonal reproduces the sample variances, six factors explain most of the risk
+    sample = factor_returns(252, 80, factors=6, start=None).cov().values * 252
+    assert np.allclose(model.diagonal(), np.diag(sample))
+    assert model.explained_variance > 0.5
+
+
+def test_thousand_assets_with_singular_sample_covariance(factor_returns):
+    returns = factor_returns(252, 1000, factors=6, start=None)
+    assert np.linalg.matrix_rank(returns.cov().values) < 1000
+
+    model = factor_model.estimate_covariance(returns, n_factors=10)
+    assert isinstance(model, factor_model.FactorCovariance)
+    assert np.all(np.linalg.eigvalsh(model.to_dense()) > 0)
+
+    parity = portfolio_solvers.risk_parity(model)
+    assert parity['converged'] and parity['iterations'] < 20
+    contributions = portfolio_solvers.risk_contributions(model, parity['weights'])
+    assert np.allclose(contributions, 1 / 1000, atol=1e-8)
+
+    minimum = portfolio_solvers.min_variance(model)
+    assert minimum['converged'] and np.isclose(minimum['weights'].sum(), 1)
+
+
+def test_sample_covariance_stays_default(factor_returns):
+    returns = factor_returns(252, 5, factors=6, start=None)
+    assert np.allclose(factor_model.estimate_covariance(returns).values, returns.cov().values * 252)
@@ -0,0 +1,82 @@
+# tests/test_fundamentals_store.py
+"""
+Unit tests for the fundamentals snapshot store
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from live_data.storage import DataStore, FundamentalsStore
+from live_data.storage import fundamentals_store as module
+
+
+class _FakeTicker:
+    calls = 0
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+    @property
+    def info(self):
+        _FakeTicker.calls += 1
+        return {'quoteType': 'EQUITY', 'currentPrice': 100.0, 'trailingPE': 18.5,
+                'dividendYield': 0.031, 'irrelevantField': 'dropped'}
+
+
+def test_snapshots_are_persisted_and_reused(tmp_path, monkeypatch):
+    monkeypatch.setattr(module.yf, 'Ticker', _FakeTicker)
+    _FakeTicker.calls = 0
+    data_store = DataStore(str(tmp_path / 'live.db'))
+
+    store = FundamentalsStore(data_store)
+    snapshots = store.get_many(['NESN.SW', 'NOVN.SW'])
+    assert _FakeTicker.calls == 2
+    assert snapshots['NESN.SW']['trailingPE'] == 18.5
+    assert 'irrelevantField' not in snapshots['NESN.SW']
+
+    # Memory hit, no further .info calls
+    assert store.get('NESN.SW')['currentPrice'] == 100.0
+    assert _FakeTicker.calls == 2
+
+    # A fresh process reads the persisted snapshot instead of calling .info
+    reloaded = FundamentalsStore(data_store)
+    assert reloaded.get('NOVN.SW')['dividendYield'] == 0.031
+    assert _FakeTicker.calls == 2
+    assert reloaded.tracked_symbols() == ['NESN.SW', 'NOVN.SW']
+
+    result = reloaded.refresh()
+    assert sorted(result['snapshots']) == ['NESN.SW', 'NOVN.SW']
+    assert result['failed'] == []
+    assert _FakeTicker.calls == 4
+
+
+class _FailingTicker:
+    calls = 0
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+    @property
+    def info(self):
+        _FailingTicker.calls += 1
+        raise ValueError('404 Not Found')
+
+
+def test_failed_symbols_are_not_refetched_within_the_failure_ttl(tmp_path, monkeypatch):
+    monkeypatch.setattr(module.yf, 'Ticker', _FailingTicker)
+    _FailingTicker.calls = 0
+    store = FundamentalsStore(DataStore(str(tmp_path / 'live.db')), failure_ttl=900)
+
+    assert store.get_many(['DELISTED']) == {'DELISTED': {}}
+    assert store.get_many(['DELISTED']) == {'DELISTED': {}}
+    assert store.get('DELISTED') == {}
+    assert _FailingTicker.calls == 1
+
+    # The scheduler's bulk refresh still retries
+    assert store.refresh(['DELISTED'])['failed'] == ['DELISTED']
+    assert _FailingTicker.calls == 2
+
+    # Once the failure TTL has passed the symbol is fetched again
+    store.failure_ttl = 0
+    store.get_many(['DELISTED'])
+    assert _FailingTicker.calls == 3
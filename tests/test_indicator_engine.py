@@ -0,0 +1,163 @@
+# tests/test_indicator_engine.py
+"""
+Unit tests for the vectorized indicator engine
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+
+import indicator_engine
+
+
+def _history(days, seed):
+    rng = np.random.default_rng(seed)
+    close = 50 * np.exp(np.cumsum(rng.normal(0.0003, 0.012, days)))
+    return pd.DataFrame({'Close': close}, index=pd.bdate_range(end='2025-06-30', periods=days))
+
+
+def _reference(close, ma_short=50, ma_long=200):
+    """Per-series computation as momentum_analysis did it before the engine"""
+    exp1 = close.ewm(span=12, adjust=False).mean()
+    exp2 = close.ewm(span=26, adjust=False).mean()
+    macd = exp1 - exp2
+    signal = macd.ewm(span=9, adjust=False).mean()
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    returns = close.pct_change()
+    return {
+        'ma_short': close.rolling(window=ma_short).mean().iloc[-1],
+        'ma_long': close.rolling(window=ma_long).mean().iloc[-1],
+        'macd': macd.iloc[-1],
+        'macd_signal': signal.iloc[-1],
+        'bb_upper': (close.rolling(20).mean() + close.rolling(20).std() * 2).iloc[-1],
+        'rsi': (100 - (100 / (1 + gain / loss))).iloc[-1],
+        'return_6m': ((close.iloc[-1] / close.iloc[-126]) - 1) * 100 if len(close) >= 126 else 0,
+        'momentum_return': ((close.iloc[-1] / close.iloc[-252]) - 1) * 100 if len(close) >= 252 else 0,
+        'volatility': returns.std() * np.sqrt(252) * 100,
+    }
+
+
+def test_latest_matches_per_series_computation():
+    histories = {'LONG': _history(500, 1), 'SHORT': _history(150, 2)}
+    closes = indicator_engine.align_closes(histories)
+    assert closes.shape == (500, 2)
+    assert closes['SHORT'].isna().sum() == 350
+
+    latest = indicator_engine.latest_indicators(closes)
+    for symbol, hist in histories.items():
+        expected = _reference(hist['Close'])
+        for name, value in expected.items():
+            assert np.isclose(latest.loc[symbol, name], value, equal_nan=True), (symbol, name)
+
+    # SHORT has no 200-day average yet
+    assert np.isnan(latest.loc['SHORT', 'ma_long'])
+
+
+def test_full_series_end_in_latest_values():
+    closes = indicator_engine.align_closes({'A': _history(300, 3), 'B': _history(300, 4)})
+    series = indicator_engine.compute_indicators(closes, last_only=False)
+    latest = indicator_engine.compute_indicators(closes, last_only=True)
+
+    for name in ['ma_short', 'ma_long', 'macd', 'bb_lower', 'rsi', 'return_3m']:
+        assert series[name].shape == closes.shape
+        assert np.allclose(series[name].iloc[-1], latest[name])
+
+
+def test_incremental_state_matches_batch_computation():
+    hist = _history(400, 5)
+    closes = hist['Close']
+    window = 300
+
+    state = indicator_engine.IndicatorState.from_history(closes.iloc[:window], returns_window=window - 1)
+    for date, close in closes.iloc[window:].items():
+        state.append_bar(close, date)
+
+    # Batch over the same trailing window the state keeps for volatility
+    batch = indicator_engine.latest_indicators(closes.iloc[-window:].to_frame('X')).loc['X']
+    full = indicator_engine.latest_indicators(closes.to_frame('X')).loc['X']
+    latest = state.latest()
+    for name in ['ma_short', 'ma_long', 'macd', 'macd_signal', 'bb_upper', 'bb_lower', 'rsi',
+                 'return_3m', 'return_12m', 'momentum_return']:
+        assert np.isclose(latest[name], full[name]), name
+    assert np.isclose(latest['volatility'], batch['volatility'])
+    assert np.isclose(latest['sharpe_ratio'], batch['sharpe_ratio'])
+
+
+def test_replace_last_bar_and_cache_updates():
+    hist = _history(300, 6)
+    cache = indicator_engine.IndicatorCache()
+    first = cache.update('X', hist.iloc[:-1])
+    assert first['observations'] == 299
+
+    # One new bar is appended, not rebuilt
+    state = cache.get('X')
+    latest = cache.update('X', hist)
+    assert cache.get('X') is state
+    expected = indicator_engine.latest_indicators(hist[['Close']].rename(columns={'Close': 'X'})).loc['X']
+    for name in ['ma_short', 'macd', 'rsi', 'bb_middle', 'return_6m']:
+        assert np.isclose(latest[name], expected[name]), name
+
+    # Intraday tick replaces the last bar
+    live = hist.copy()
+    live.iloc[-1, 0] = hist['Close'].iloc[-1] * 1.02
+    state.replace_last_bar(live['Close'].iloc[-1])
+    expected = indicator_engine.latest_indicators(live[['Close']].rename(columns={'Close': 'X'})).loc['X']
+    for name in ['ma_short', 'ma_long', 'macd_signal', 'rsi', 'bb_upper', 'return_3m']:
+        assert np.isclose(state.latest()[name], expected[name]), name
+
+
+def test_update_many_seeds_from_one_pass_and_is_bounded(monkeypatch):
+    histories = {'LONG': _history(400, 7), 'SHORT': _history(90, 8), 'TINY': _history(10, 9)}
+    cache = indicator_engine.IndicatorCache()
+    latest = cache.update_many(histories)
+
+    for symbol, hist in histories.items():
+        expected = indicator_engine.IndicatorState.from_history(hist['Close']).latest()
+        for name, value in expected.items():
+            assert np.isclose(latest[symbol][name], value, equal_nan=True), (symbol, name)
+        reference = indicator_engine.latest_indicators(hist[['Close']].rename(columns={'Close': symbol})).loc[symbol]
+        for name in ['ma_short', 'macd', 'macd_signal', 'rsi', 'bb_lower', 'volatility', 'return_3m']:
+            assert np.isclose(latest[symbol][name], reference[name], equal_nan=True), (symbol, name)
+
+    monkeypatch.setattr(indicator_engine, 'MAX_STATES', 2)
+    cache.update_many({'NEW': _history(60, 10)})
+    assert cache.get('NEW') is not None and cache.get('LONG') is None
+    assert len(cache._states) == 2
+
+
+def test_align_by_date_uses_calendar_days_across_time_zones():
+    zurich = _history(5, 11)
+    zurich.index = zurich.index.tz_localize('Europe/Zurich')
+    new_york = _history(4, 12)
+    new_york.index = new_york.index.tz_localize('America/New_York')
+
+    closes = indicator_engine.align_closes({'Z': zurich, 'N': new_york}, by_date=True)
+    assert closes.index.tz is None and len(closes) == 5
+    assert closes['Z'].notna().all() and closes['N'].isna().sum() == 1
+    assert closes['N'].iloc[-1] == new_york['Close'].iloc[-1]
+
+
+def test_revised_history_and_other_rate_rebuild_the_state():
+    hist = _history(300, 13)
+    cache = indicator_engine.IndicatorCache()
+    cache.update('X', hist.iloc[:-1], risk_free_rate=0.0)
+    state = cache.get('X', risk_free_rate=0.0)
+
+    # Dividende: auto_adjust skaliert die ganze Vorgeschichte
+    adjusted = hist.copy()
+    adjusted.iloc[:-5, 0] *= 0.9
+    latest = cache.update('X', adjusted, risk_free_rate=0.0)
+    assert cache.get('X', risk_free_rate=0.0) is not state
+    fresh = indicator_engine.IndicatorState.from_history(adjusted['Close'], risk_free_rate=0.0).latest()
+    for name in ['ma_short', 'ma_long', 'macd', 'rsi', 'return_3m', 'sharpe_ratio']:
+        assert np.isclose(latest[name], fresh[name]), name
+
+    # Anderer risikofreier Zins: eigener Zustand
+    other = cache.update('X', adjusted, risk_free_rate=0.10)
+    expected = indicator_engine.IndicatorState.from_history(adjusted['Close'], risk_free_rate=0.10).latest()
+    assert np.isclose(other['sharpe_ratio'], expected['sharpe_ratio'])
+    assert not np.isclose(other['sharpe_ratio'], latest['sharpe_ratio'])
@@ -0,0 +1,58 @@
+# tests/test_minnesota_bvar.py
+"""
+Unit tests for the conjugate Minnesota-prior BVAR
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from bvar_module.minnesota import MinnesotaBVAR, lagged_design
+
+
+def _var_data(n_series, n_obs=130, seed=1):
+    rng = np.random.default_rng(seed)
+    values = np.zeros((n_obs, n_series))
+    for t in range(1, n_obs):
+        values[t] = 0.3 * values[t - 1] + rng.normal(0.005, 0.04, n_series)
+    return pd.DataFrame(values, columns=[f'S{i}' for i in range(n_series)])
+
+
+def test_marginal_likelihood_matches_multivariate_t():
+    # Univariat: Y ~ t_ν0(X B0, S0/ν0 (I + X Ω0 Xᵀ))
+    data = _var_data(1, n_obs=40)
+    model = MinnesotaBVAR(nlags=2, tightness=0.5).fit(data)
+    Y, X = lagged_design(data.values, 2)
+    shape = model.S0[0, 0] / model.nu0 * (np.eye(len(Y)) + X @ np.diag(model.prior_variances(0.5)) @ X.T)
+    expected = stats.multivariate_t(loc=X @ model.B0[:, 0], shape=shape, df=model.nu0).logpdf(Y[:, 0])
+    assert np.isclose(model.log_ml, expected, rtol=1e-9)
+
+
+def test_tightness_maximizes_marginal_likelihood():
+    model = MinnesotaBVAR(nlags=2).fit(_var_data(8))
+    grid = np.exp(np.linspace(np.log(1e-3), np.log(10), 100))
+    assert model.log_ml >= max(model.log_marginal_likelihood(g) for g in grid) - 1e-6
+    assert model.summary()['tightness_optimized']
+
+
+def test_posterior_draws_and_forecast():
+    data = _var_data(5)
+    model = MinnesotaBVAR(nlags=2, tightness=0.3).fit(data)
+    B, sigma, roots = model.sample(20000, rng=0)
+    assert B.shape == (20000, 11, 5) and sigma.shape == (20000, 5, 5)
+    assert np.allclose(sigma, roots @ roots.transpose(0, 2, 1))
+    scale = np.abs(model.sigma_mean).max()
+    assert np.abs(sigma.mean(axis=0) - model.sigma_mean).max() < 0.02 * scale
+    assert np.abs(B.mean(axis=0) - model.coef).max() < 0.01
+
+    forecast = model.forecast(steps=6, draws=4000, rng=1)
+    assert forecast['paths'].shape == (4000, 6, 5)
+    assert list(forecast['mean'].columns) == list(data.columns)
+    assert (forecast['bands'][0.05].values < forecast['mean'].values).all()
+    assert (forecast['mean'].values < forecast['bands'][0.95].values).all()
+    # Erster Schritt: E[y_(T+1)] = x_T B_n
+    x = np.concatenate([[1.0], data.values[-1], data.values[-2]])
+    assert np.allclose(forecast['mean'].values[0], x @ model.coef, atol=0.01)
@@ -0,0 +1,73 @@
+# tests/test_nav_engine.py
+"""
+Unit tests for the portfolio NAV engine and its risk statistics
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+
+import nav_engine
+import strategy_analysis
+
+
+def _prices(returns):
+    """Kurse aus einem Renditepanel, Spalten A, B, C, ..."""
+    return 100 * (1 + returns).cumprod().set_axis(list('ABCD')[:returns.shape[1]], axis=1)
+
+
+def test_nav_for_quantities_and_rebalancing_rules(factor_returns):
+    prices = _prices(factor_returns(400, 4, factors=0, noise=0.012))
+    nav = nav_engine.portfolio_nav(prices, quantities={'A': 10, 'C': 5, 'X': 3})
+    assert np.allclose(nav.values, prices['A'] * 10 + prices['C'] * 5)
+
+    weights = {'A': 0.25, 'B': 0.25, 'C': 0.5}
+    drift = nav_engine.portfolio_nav(prices, weights=weights)
+    assert np.allclose(drift.values, prices[['A', 'B', 'C']].values @ (np.array([0.25, 0.25, 0.5]) / prices.iloc[0, :3].values))
+
+    daily = nav_engine.portfolio_nav(prices, weights=weights, rebalance='daily')
+    r = prices[['A', 'B', 'C']].pct_change().fillna(0).values @ np.array([0.25, 0.25, 0.5])
+    assert np.allclose(daily.values, np.cumprod(1 + r))
+
+    # Monatlich: Gewichte am Monatsende zurückgesetzt, dazwischen Drift
+    monthly = nav_engine.portfolio_nav(prices, weights=weights, rebalance='monthly')
+    ends = nav_engine.period_ends(prices.index, 'monthly')
+    first_month = ends[0]
+    assert np.allclose(monthly.values[:first_month + 1], drift.values[:first_month + 1])
+    assert monthly.iloc[-1] != drift.iloc[-1]
+
+
+def test_drawdown_rolling_volatility_and_var(factor_returns):
+    nav = pd.Series([100, 110, 105, 120, 90, 95, 125, 118.0], index=pd.bdate_range('2024-01-01', periods=8))
+    result = nav_engine.max_drawdown(nav)
+    assert np.isclose(result['max_drawdown'], 90 / 120 - 1)
+    assert result['peak'] == nav.index[3] and result['trough'] == nav.index[4] and result['recovery'] == nav.index[6]
+
+    long_nav = _prices(factor_returns(300, 1, factors=0, noise=0.012))['A']
+    rolling = nav_engine.rolling_volatility(long_nav, window=21)
+    expected = long_nav.pct_change().dropna().rolling(21).std() * np.sqrt(252)
+    assert np.allclose(rolling.values, expected.values, equal_nan=True)
+
+    r = long_nav.pct_change().dropna().values
+    var = nav_engine.historical_var(r, levels=(0.95,))[0.95]
+    tail = np.sort(r)[:int(0.05 * len(r))]
+    assert var['var'] == tail[-1] and np.isclose(var['cvar'], tail.mean())
+
+    stats = nav_engine.benchmark_statistics(long_nav, long_nav)
+    assert np.isclose(stats['beta'], 1) and np.isclose(stats['tracking_error'], 0)
+
+
+def test_portfolio_var_reflects_diversification(factor_returns):
+    prices = _prices(factor_returns(500, 4, factors=0, noise=0.012))
+    histories = {symbol: prices[[symbol]].rename(columns={symbol: 'Close'}) for symbol in prices.columns}
+    quantities = {symbol: 10 for symbol in prices.columns}
+    risk = strategy_analysis.portfolio_risk(histories, quantities)
+
+    single = 0.0
+    for symbol in prices.columns:
+        r = prices[symbol].pct_change().dropna().values
+        single += nav_engine.historical_var(r, levels=(0.95,))[0.95]['var'] * prices[symbol].iloc[-1] * 10
+    assert single < risk['portfolioVaR95'] < 0
+    assert risk['portfolioCVaR95'] <= risk['portfolioVaR95'] and risk['portfolioMaxDrawdown'] < 0
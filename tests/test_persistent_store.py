@@ -0,0 +1,148 @@
+# tests/test_persistent_store.py
+"""
+Unit tests for the swiss_asset_manager.db persistence tier
+"""
+import sys
+import os
+import sqlite3
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from persistent_store import MarketDataCacheStore, PerformanceMetricsStore
+
+
+def _make_db(tmp_path):
+    """Create the tables app.init_database provides"""
+    db_path = str(tmp_path / 'test.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute('CREATE TABLE market_data_cache (symbol TEXT PRIMARY KEY, data TEXT NOT NULL, '
+                 'timestamp TEXT NOT NULL, source TEXT NOT NULL)')
+    conn.execute('CREATE TABLE user_preferences (key TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at TEXT NOT NULL)')
+    conn.execute('CREATE TABLE performance_metrics (id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT NOT NULL, '
+                 'portfolio_value REAL NOT NULL, daily_return REAL, cumulative_return REAL, volatility REAL, '
+                 'sharpe_ratio REAL, max_drawdown REAL, var_95 REAL)')
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def test_market_data_cache_roundtrip(tmp_path):
+    store = MarketDataCacheStore(_make_db(tmp_path))
+    assert store.set('live_price_NESN.SW', {'price': 101.5}, ttl=300)
+    value, remaining = store.get('live_price_NESN.SW')
+    assert value == {'price': 101.5}
+    assert 0 < remaining <= 300
+    assert store.get('missing') is None
+
+
+def test_market_data_cache_expiry(tmp_path):
+    store = MarketDataCacheStore(_make_db(tmp_path))
+    store.set('expired', [1, 2, 3], ttl=-1)
+    assert store.get('expired') is None
+    assert store.purge_expired() == 1
+
+
+def test_incremental_snapshots_match_full_computation(tmp_path):
+    store = PerformanceMetricsStore(_make_db(tmp_path))
+    values = [100, 102, 99, 101, 97, 103, 104]
+    points = [(f'2025-01-{i + 1:02d}', v) for i, v in enumerate(values)]
+
+    assert store.append_snapshots('p', points[:4]) == 4
+    # Already stored dates are skipped, only new ones are appended
+    assert store.append_snapshots('p', points) == 3
+
+    history = store.get_history('p')
+    assert [row['portfolio_value'] for row in history] == values
+
+    returns = np.diff(values) / np.array(values[:-1])
+    last = history[-1]
+    assert np.isclose(last['volatility'], returns.std(ddof=1) * np.sqrt(252))
+    assert np.isclose(last['max_drawdown'], 97 / 102 - 1)
+    assert np.isclose(last['cumulative_return'], 104 / 100 - 1)
+
+    summary = store.get_summary('p')
+    assert summary['observations'] == len(values)
+    assert np.isclose(summary['currentDrawdown'], 0.0)
+
+
+def test_risk_fields_share_one_trailing_window(tmp_path):
+    store = PerformanceMetricsStore(_make_db(tmp_path), risk_free_rate=0.01)
+    rng = np.random.default_rng(4)
+    values = 100 * np.cumprod(1 + rng.normal(0.0005, 0.01, 400))
+    points = [(d.strftime('%Y-%m-%d'), v) for d, v in zip(pd.bdate_range('2023-01-02', periods=400), values)]
+    store.append_snapshots('p', points[:300])
+    store.append_snapshots('p', points)
+
+    window = (np.diff(values) / values[:-1])[-252:]
+    last = store.get_history('p')[-1]
+    volatility = window.std(ddof=1) * np.sqrt(252)
+    assert np.isclose(last['volatility'], volatility)
+    assert np.isclose(last['sharpe_ratio'], (window.mean() * 252 - 0.01) / volatility)
+    assert np.isclose(last['var_95'], np.percentile(window, 5))
+
+
+def test_simple_cache_writes_only_json_payloads_through(tmp_path):
+    import app as app_module
+    store = MarketDataCacheStore(_make_db(tmp_path))
+    cache = app_module.SimpleCache(l2=store)
+    cache.set('live_price_NESN.SW', {'price': 101.5}, ttl=300)
+    cache.set('returns_panel_1y_abc', pd.DataFrame({'A': [0.01, 0.02]}), ttl=300)
+    cache._l2_writer.shutdown(wait=True)
+
+    assert store.get('live_price_NESN.SW')[0] == {'price': 101.5}
+    assert store.get('returns_panel_1y_abc') is None
+    # A fresh instance (e.g. another worker) reads the payload from L2
+    assert app_module.SimpleCache(l2=store).get('live_price_NESN.SW') == {'price': 101.5}
+
+
+def test_performance_history_backfills_gaps_longer_than_a_year(tmp_path, monkeypatch):
+    import app as app_module
+    store = PerformanceMetricsStore(_make_db(tmp_path))
+    key = store.portfolio_key({'A.SW': 10.0})
+    store.save_holdings(key, {'A.SW': 10.0})
+    store.append_snapshots(key, [('2023-01-02', 1000.0), ('2023-01-03', 1010.0)])
+
+    requests = []
+
+    def get_histories(symbols, period=None, start=None):
+        requests.append((list(symbols), start))
+        index = pd.bdate_range(start, '2025-01-31')
+        return {'A.SW': pd.DataFrame({'Close': np.linspace(101, 120, len(index))}, index=index)}
+
+    monkeypatch.setattr(app_module, 'performance_store', store)
+    monkeypatch.setattr(app_module, 'PERSISTENT_STORE_AVAILABLE', True)
+    monkeypatch.setattr(app_module.cache, 'l2', None)
+    monkeypatch.setattr(app_module.portfolio_loader, 'get_histories', get_histories)
+    response = app_module.app.test_client().post(
+        '/api/portfolio_performance_history', json={'portfolio': [{'symbol': 'A.SW', 'quantity': 10}]})
+
+    assert response.status_code == 200
+    assert requests == [(['A.SW'], '2023-01-03')]
+    history = response.get_json()['history']
+    dates = [row['date'] for row in history]
+    assert dates[0] == '2023-01-02' and dates[-1] == '2025-01-31'
+    assert len(dates) == len(set(dates)) == 2 + len(pd.bdate_range('2023-01-04', '2025-01-31'))
+
+
+def test_connections_are_closed_after_each_call(tmp_path, monkeypatch):
+    import persistent_store
+    opened = []
+    connect = sqlite3.connect
+
+    def tracking(*args, **kwargs):
+        conn = connect(*args, **kwargs)
+        opened.append(conn)
+        return conn
+
+    db_path = _make_db(tmp_path)
+    monkeypatch.setattr(persistent_store.sqlite3, 'connect', tracking)
+    store = MarketDataCacheStore(db_path)
+    store.set('key', {'a': 1}, ttl=60)
+    assert store.get('key')[0] == {'a': 1}
+    assert len(opened) == 2
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute('SELECT 1')
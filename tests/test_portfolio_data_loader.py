@@ -0,0 +1,88 @@
+# tests/test_portfolio_data_loader.py
+"""
+Unit tests for the batch portfolio data loader
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import portfolio_data_loader
+from portfolio_data_loader import PortfolioDataLoader
+
+DAYS = pd.bdate_range('2025-03-03', periods=5)
+
+
+def _frame(start, index):
+    close = start + np.arange(len(index), dtype=float)
+    return pd.DataFrame({'Open': close, 'Close': close}, index=index)
+
+
+@pytest.fixture
+def yahoo(monkeypatch):
+    """Batch download returns tz-naive frames (ignore_tz default) and misses FLAKY; history is tz-aware"""
+    calls = {'download': 0, 'history': []}
+
+    def download(assets, **kwargs):
+        calls['download'] += 1
+        frames = {asset: _frame(100.0, DAYS) for asset in assets if asset != 'FLAKY'}
+        return pd.concat(frames, axis=1)
+
+    class Ticker:
+        def __init__(self, asset):
+            self.asset = asset
+
+        def history(self, **kwargs):
+            calls['history'].append(self.asset)
+            return _frame(50.0, DAYS.tz_localize('Europe/Zurich'))
+
+    monkeypatch.setattr(portfolio_data_loader.yf, 'download', download)
+    monkeypatch.setattr(portfolio_data_loader.yf, 'Ticker', Ticker)
+    return calls
+
+
+def _loader(tmp_path):
+    loader = PortfolioDataLoader(max_workers=2)
+    loader.cache_dir = str(tmp_path)
+    return loader
+
+
+def test_batch_and_fallback_frames_share_one_index(tmp_path, yahoo):
+    loader = _loader(tmp_path)
+    frames = loader.get_histories(['AAPL', 'FLAKY'], '1mo')
+    assert yahoo['history'] == ['FLAKY']
+    for hist in frames.values():
+        assert str(hist.index.tz) == 'UTC'
+        assert list(hist.index.strftime('%Y-%m-%d')) == list(DAYS.strftime('%Y-%m-%d'))
+
+    panel = loader.get_close_panel(['AAPL', 'FLAKY'], '1mo')
+    assert panel.shape == (5, 2) and panel.notna().all().all()
+    assert panel['FLAKY'].iloc[0] == 50.0 and panel['AAPL'].iloc[-1] == 104.0
+
+
+def test_pickle_cache_round_trip(tmp_path, yahoo):
+    first = _loader(tmp_path).get_histories(['AAPL', 'MSFT'], '1mo')
+    assert yahoo['download'] == 1
+
+    # Neue Instanz (leerer Speicher) liest die Pickles ohne Download
+    second = _loader(tmp_path).get_histories(['AAPL', 'MSFT'], '1mo')
+    assert yahoo['download'] == 1
+    for asset in first:
+        pd.testing.assert_frame_equal(second[asset], first[asset])
+
+
+def test_legacy_naive_pickle_joins_fresh_frames(tmp_path, yahoo):
+    loader = _loader(tmp_path)
+    _frame(10.0, DAYS).to_pickle(loader._cache_file('OLD', '1mo'))
+    panel = loader.get_close_panel(['OLD', 'FLAKY'], '1mo')
+    assert str(panel.index.tz) == 'UTC' and panel.shape == (5, 2)
+
+
+def test_memory_copy_is_bounded(tmp_path, yahoo, monkeypatch):
+    monkeypatch.setattr(portfolio_data_loader, 'MAX_FRAMES', 3)
+    loader = _loader(tmp_path)
+    loader.get_histories([f'A{i}' for i in range(5)], '1mo')
+    assert list(loader._frames) == [('A2', '1mo'), ('A3', '1mo'), ('A4', '1mo')]
@@ -0,0 +1,226 @@
+# tests/test_portfolio_solvers.py
+"""
+Unit tests for the active-set QP and the portfolio solvers built on it
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+from scipy.optimize import minimize
+
+import portfolio_solvers
+
+
+def _problem(factor_returns, n, seed=0, observations=500):
+    rng = np.random.default_rng(seed)
+    returns = factor_returns(observations, n, seed=rng, drift=0, loading=1, start=None).to_numpy()
+    return np.cov(returns, rowvar=False) * 252, returns.mean(axis=0) * 252 + rng.normal(0.05, 0.05, n)
+
+
+def _slsqp_min_variance(cov, constraints=()):
+    n = len(cov)
+    result = minimize(lambda w: w @ cov @ w, np.full(n, 1 / n), jac=lambda w: 2 * cov @ w, method='SLSQP',
+                      bounds=[(0, 1)] * n, options={'ftol': 1e-14, 'maxiter': 1000},
+                      constraints=[{'type': 'eq', 'fun': lambda w: w.sum() - 1}, *constraints])
+    return result.x
+
+
+def test_min_variance_matches_slsqp_and_kkt(factor_returns):
+    cov, _ = _problem(factor_returns, 40)
+    solution = portfolio_solvers.min_variance(cov)
+    w = solution['weights']
+
+    assert solution['converged'] and solution['method'] == 'active-set'
+    assert np.isclose(w.sum(), 1) and w.min() >= 0
+    assert w @ cov @ w <= _slsqp_min_variance(cov) @ cov @ _slsqp_min_variance(cov) + 1e-10
+
+    # KKT: equal marginal variance on held assets, larger on the others
+    marginal = cov @ w
+    held = w > 1e-8
+    assert np.allclose(marginal[held], marginal[held].mean())
+    assert np.all(marginal[~held] >= marginal[held].mean() - 1e-10)
+
+
+def test_mean_variance_hits_target_and_clips_unreachable(factor_returns):
+    cov, mu = _problem(factor_returns, 25, seed=1)
+    target = np.quantile(mu, 0.7)
+    solution = portfolio_solvers.mean_variance(cov, mu, target)
+    w = solution['weights']
+    assert solution['converged']
+    assert np.isclose(w @ mu, target) and np.isclose(w.sum(), 1) and w.min() >= 0
+
+    reference = _slsqp_min_variance(cov, [{'type': 'eq', 'fun': lambda x: x @ mu - target}])
+    assert w @ cov @ w <= reference @ cov @ reference + 1e-9
+
+    # Above the best single asset the target falls back to max(mu)
+    capped = portfolio_solvers.mean_variance(cov, mu, mu.max() + 1)
+    assert capped['converged'] and np.isclose(capped['weights'] @ mu, mu.max())
+
+
+def test_warm_start_from_previous_window():
+    rng = np.random.default_rng(2)
+    returns = rng.normal(0, 0.01, (800, 100)) @ rng.normal(0, 0.3, (100, 100)) + rng.normal(0, 0.01, (800, 100))
+    mu = returns.mean(axis=0) * 252 + rng.normal(0.05, 0.05, 100)
+    previous = np.cov(returns[:500], rowvar=False) * 252
+    current = np.cov(returns[5:505], rowvar=False) * 252
+    target = np.quantile(mu, 0.6)
+
+    cold = portfolio_solvers.mean_variance(current, mu, target)
+    seed = portfolio_solvers.mean_variance(previous, mu, target)['weights']
+    warm = portfolio_solvers.mean_variance(current, mu, target, x0=seed)
+    assert warm['converged'] and warm['iterations'] < cold['iterations']
+    assert np.allclose(warm['weights'], cold['weights'], atol=1e-8)
+
+    # Restarting from the optimum needs a single optimality check
+    again = portfolio_solvers.mean_variance(current, mu, target, x0=warm['weights'])
+    assert again['iterations'] == 1
+
+    diagnostics = portfolio_solvers.diagnostics(warm)
+    assert 'weights' not in diagnostics and diagnostics['time_ms'] >= 0
+
+
+def test_max_sharpe_is_global_tangency_portfolio(factor_returns):
+    cov, mu = _problem(factor_returns, 30, seed=3)
+    solution = portfolio_solvers.max_sharpe(cov, mu, 0.02)
+    w = solution['weights']
+    assert solution['converged'] and solution['method'] == 'active-set'
+    assert np.isclose(w.sum(), 1) and w.min() >= 0
+    best = (w @ mu - 0.02) / np.sqrt(w @ cov @ w)
+    assert np.isclose(solution['objective'], best)
+
+    # No random long-only portfolio and no SLSQP start beats the QP optimum
+    rng = np.random.default_rng(0)
+    for start in rng.dirichlet(np.ones(30), 20):
+        result = minimize(lambda x: -(x @ mu - 0.02) / np.sqrt(x @ cov @ x), start, method='SLSQP',
+                          bounds=[(0, 1)] * 30, constraints=[{'type': 'eq', 'fun': lambda x: x.sum() - 1}])
+        assert best >= -result.fun - 1e-6
+        assert best >= (start @ mu - 0.02) / np.sqrt(start @ cov @ start)
+
+    # Warm start from the previous tangency portfolio
+    warm = portfolio_solvers.max_sharpe(cov, mu, 0.02, x0=w)
+    assert warm['iterations'] == 1 and np.allclose(warm['weights'], w)
+
+    # Without positive excess return there is no tangency portfolio
+    fallback = portfolio_solvers.max_sharpe(cov, np.full(30, 0.01), 0.02)
+    assert fallback['method'] == 'active-set-min-variance'
+    assert np.allclose(fallback['weights'], portfolio_solvers.min_variance(cov)['weights'])
+
+
+def test_risk_parity_newton_with_budgets(factor_returns):
+    cov, _ = _problem(factor_returns, 50, seed=5)
+    parity = portfolio_solvers.risk_parity(cov)
+    assert parity['converged'] and parity['method'] == 'newton-log-barrier'
+    assert parity['iterations'] < 20 and parity['budget_error'] < 1e-6
+    assert np.allclose(portfolio_solvers.risk_contributions(cov, parity['weights']), 1 / 50, atol=1e-6)
+
+    budgets = np.linspace(1, 3, 50)
+    budgets[:5] = 0
+    budgeted = portfolio_solvers.risk_parity(cov, budgets, x0=parity['weights'])
+    w = budgeted['weights']
+    assert budgeted['converged'] and np.isclose(w.sum(), 1) and np.all(w[:5] == 0)
+    assert np.allclose(portfolio_solvers.risk_contributions(cov, w), budgets / budgets.sum(), atol=1e-6)
+
+    warm = portfolio_solvers.risk_parity(cov, budgets, x0=w)
+    assert warm['iterations'] == 1
+
+
+def test_risk_parity_on_singular_covariance():
+    rng = np.random.default_rng(6)
+    returns = rng.normal(0, 0.01, (120, 8)) @ rng.normal(0, 0.5, (8, 300)) + rng.normal(0, 0.01, (120, 300))
+    cov = np.cov(returns, rowvar=False) * 252
+    parity = portfolio_solvers.risk_parity(cov)
+    assert parity['converged'] and parity['budget_error'] < 1e-5
+
+
+def test_efficient_frontier_is_monotone_and_optimal(factor_returns):
+    cov, mu = _problem(factor_returns, 30, seed=4)
+    frontier = portfolio_solvers.efficient_frontier(cov, mu, points=50, upper=0.25)
+    points = frontier['points']
+    assert len(points) == 50 and all(p['converged'] for p in points)
+
+    returns = np.array([p['return'] for p in points])
+    volatilities = np.array([p['volatility'] for p in points])
+    assert np.all(np.diff(returns) > 0) and np.all(np.diff(volatilities) >= -1e-12)
+    assert np.allclose(returns, [p['target'] for p in points])
+
+    minimum = portfolio_solvers.solve_qp(cov, None, np.ones((1, 30)), [1.0], 0.0, 0.25)
+    assert np.allclose(points[0]['weights'], minimum['weights'], atol=1e-8)
+    for point in points[::7]:
+        w = point['weights']
+        assert w.max() <= 0.25 + 1e-12 and np.isclose(w.sum(), 1)
+        cold = portfolio_solvers.solve_qp(cov, None, np.vstack([np.ones(30), mu]), [1.0, point['target']], 0.0, 0.25)
+        assert np.isclose(w @ cov @ w, cold['weights'] @ cov @ cold['weights'], rtol=1e-9)
+
+
+def test_evaluate_portfolios_matches_per_row_formulas(factor_returns):
+    from factor_model import FactorCovariance
+    cov, mu = _problem(factor_returns, 15, seed=3)
+    W = np.random.default_rng(4).dirichlet(np.ones(15), 40)
+    benchmark = np.full(15, 1 / 15)
+    result = portfolio_solvers.evaluate_portfolios(cov, mu, W, 0.02, benchmark)
+
+    for p in (0, 17, 39):
+        w = W[p]
+        volatility = np.sqrt(w @ cov @ w)
+        assert np.isclose(result['expected_return'][p], w @ mu)
+        assert np.isclose(result['volatility'][p], volatility)
+        assert np.isclose(result['sharpe'][p], (w @ mu - 0.02) / volatility)
+        assert np.allclose(result['risk_contributions'][p], portfolio_solvers.risk_contributions(cov, w))
+        active = w - benchmark
+        assert np.isclose(result['tracking_error'][p], np.sqrt(active @ cov @ active))
+        assert np.isclose(result['information_ratio'][p], active @ mu / np.sqrt(active @ cov @ active))
+
+    # Benchmark selbst: kein Tracking Error; Faktorform liefert dieselben Zahlen wie die dichte Matrix
+    assert portfolio_solvers.evaluate_portfolios(cov, mu, benchmark, 0.02, benchmark)['tracking_error'][0] < 1e-7
+    returns = np.random.default_rng(5).normal(0, 0.01, (300, 15))
+    model = FactorCovariance.from_returns(returns, 3)
+    factor = portfolio_solvers.evaluate_portfolios(model, mu, W, 0.02, benchmark)
+    dense = portfolio_solvers.evaluate_portfolios(model.to_dense(), mu, W, 0.02, benchmark)
+    assert np.allclose(factor['volatility'], dense['volatility']) and np.allclose(factor['tracking_error'], dense['tracking_error'])
+
+
+def _reference_hrp(cov, order):
+    """Rekursive Bisektion nach López de Prado auf Indexlisten"""
+    weights = np.ones(len(cov))
+    clusters = [list(order)]
+    while clusters:
+        clusters = [c[start:stop] for c in clusters if len(c) > 1
+                    for start, stop in ((0, len(c) // 2), (len(c) // 2, len(c)))]
+        for left, right in zip(clusters[::2], clusters[1::2]):
+            variances = []
+            for members in (left, right):
+                ivp = 1 / np.diag(cov)[members]
+                ivp /= ivp.sum()
+                variances.append(ivp @ cov[np.ix_(members, members)] @ ivp)
+            alpha = 1 - variances[0] / sum(variances)
+            weights[left] *= alpha
+            weights[right] *= 1 - alpha
+    return weights
+
+
+def test_hrp_matches_reference_bisection(factor_returns):
+    cov, _ = _problem(factor_returns, 40, seed=9)
+    result = portfolio_solvers.hrp(cov)
+    assert result['converged'] and sorted(result['order']) == list(range(40))
+    assert np.allclose(result['weights'], _reference_hrp(cov, result['order']), atol=1e-12)
+    assert np.isclose(result['weights'].sum(), 1.0) and np.all(result['weights'] > 0)
+
+    # Unkorrelierte Assets: HRP = Inverse-Variance-Portfolio
+    variances = np.array([0.01, 0.04, 0.09, 0.16, 0.25])
+    expected = (1 / variances) / (1 / variances).sum()
+    assert np.allclose(portfolio_solvers.hrp(np.diag(variances), linkage='average')['weights'], expected)
+
+
+def test_hrp_on_singular_covariance_and_factor_model():
+    from factor_model import estimate_covariance
+    import pandas as pd
+    rng = np.random.default_rng(4)
+    returns = pd.DataFrame(rng.normal(0, 0.01, (60, 150)) + rng.normal(0, 0.01, (60, 1)))
+    sample = returns.cov().values * 252                  # Rang 59 < 150
+    dense = portfolio_solvers.hrp(sample)
+    assert np.isclose(dense['weights'].sum(), 1.0) and np.all(dense['weights'] > 0)
+
+    model = estimate_covariance(returns, n_factors=3)
+    factor = portfolio_solvers.hrp(model)
+    assert np.allclose(factor['weights'], portfolio_solvers.hrp(model.to_dense())['weights'])
@@ -0,0 +1,25 @@
+# tests/test_real_calculations.py
+"""
+Unit tests for the optimizer inputs of the real portfolio calculator
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+
+from real_calculations import RealPortfolioCalculator
+
+
+def test_mean_returns_use_the_covariance_rows(factor_returns):
+    returns = factor_returns(300, 3)
+    returns.iloc[:100, 2] = np.nan                      # S2 erst später gehandelt
+    calculator = RealPortfolioCalculator()
+
+    # Stichproben-Σ aus den letzten 252 vollständigen Tagen, μ aus denselben Tagen
+    window = returns.dropna().iloc[-252:]
+    assert np.allclose(calculator._covariance(returns), window.cov() * 252)
+    assert np.allclose(calculator._mean_returns(returns), window.mean() * 252)
+
+    # Das Faktormodell füllt Lücken mit dem Spaltenmittel und nutzt alle Zeilen
+    assert np.allclose(calculator._mean_returns(returns, n_factors=1), returns.mean() * 252)
@@ -0,0 +1,89 @@
+# tests/test_risk_engine.py
+"""
+Unit tests for the batch historical / filtered-historical VaR engine
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pytest
+
+import risk_engine
+
+
+def test_batch_matches_sorted_single_portfolios(factor_returns):
+    returns = factor_returns(500, 12)
+    R = returns.to_numpy()
+    W = np.random.default_rng(1).dirichlet(np.ones(12), 200)
+    values = np.linspace(1e4, 1e6, 200)
+    result = risk_engine.portfolio_var(R, W, (0.95, 0.99), values)
+
+    for p in (0, 57, 199):
+        losses = np.sort(R @ W[p])
+        for level in (0.95, 0.99):
+            k = int(np.floor((1 - level) * len(R)))
+            assert np.isclose(result[level]['var'][p], losses[k - 1] * values[p])
+            assert np.isclose(result[level]['cvar'][p], losses[:k].mean() * values[p])
+
+    # Diversifikation: Portfolio-VaR kleiner als die Summe der Einzel-VaRs
+    single = risk_engine.portfolio_var(R, np.eye(12), (0.95,))[0.95]['var']
+    assert result[0.95]['var'][0] / values[0] > W[0] @ single
+    assert risk_engine.var_cvar(R[:, 3], 0.95) == (single[3], risk_engine.portfolio_var(R, np.eye(12), (0.95,))[0.95]['cvar'][3])
+
+
+def test_filtered_scenarios_follow_ewma_recursion(factor_returns):
+    R = factor_returns(300, 3).to_numpy()
+    filtered = risk_engine.filtered_scenarios(R, lam=0.94)
+
+    variance = R.var(axis=0)
+    expected = np.empty_like(R)
+    sigmas = []
+    for t in range(len(R)):
+        sigmas.append(np.sqrt(variance))
+        variance = 0.94 * variance + 0.06 * R[t] ** 2
+    forecast = np.sqrt(variance)
+    for t in range(len(R)):
+        expected[t] = R[t] * forecast / sigmas[t]
+    assert np.allclose(filtered, expected)
+
+
+def test_scenario_set_weights_and_cache(factor_returns):
+    risk_engine.clear_cache()
+    returns = factor_returns(500, 12)
+    returns.iloc[:10, 0] = np.nan
+    builds = []
+
+    def build():
+        builds.append(1)
+        return risk_engine.ScenarioSet.from_returns(returns, filtered=True)
+
+    scenarios = risk_engine.get_scenarios(('u', 'f'), returns.index[-1], build)
+    assert risk_engine.get_scenarios(('u', 'f'), returns.index[-1], build) is scenarios and len(builds) == 1
+    assert scenarios.scenarios.shape == (490, 12)
+
+    W, coverage = scenarios.weight_matrix([{'S0': 0.5, 'S1': 0.5}, {'S2': 0.5, 'XX': 0.5}])
+    assert W.shape == (2, 12) and W[0, 0] == 0.5 and list(coverage) == [1.0, 0.5]
+    result = scenarios.var(W)
+    assert np.all(result[0.99]['cvar'] <= result[0.99]['var']) and np.all(result[0.99]['var'] <= result[0.95]['var'])
+
+
+def test_batch_var_builds_one_scenario_set_per_universe(factor_returns):
+    risk_engine.clear_cache()
+    returns = factor_returns(300, 4)
+    returns.iloc[:250, 3] = np.nan                      # S3 erst seit 50 Tagen gehandelt
+    portfolios = [{'S0': 0.5, 'S1': 0.5}, {'S1': 0.5, 'S0': 0.5}, {'S2': 0.5, 'S3': 0.5}, {'XX': 1.0}]
+
+    result = risk_engine.batch_var(returns, portfolios, values=[1.0, 2.0, 1.0, 1.0])
+    # Die kurze Historie von S3 kürzt nur das Portfolio, das S3 hält
+    assert [r['scenarios'] for r in result] == [300, 300, 50, 0]
+    assert np.isclose(result[1][0.95]['var'], 2 * result[0][0.95]['var'])
+    assert result[3]['coverage'] == 0.0 and result[3][0.99]['var'] == 0.0
+
+    expected = risk_engine.portfolio_var(returns[['S0', 'S1']].to_numpy(), np.array([0.5, 0.5]))
+    assert np.isclose(result[0][0.99]['cvar'], expected[0.99]['cvar'][0])
+
+    returns.iloc[250:, 2] = np.nan                      # S2 und S3 ohne gemeinsamen Handelstag
+    risk_engine.clear_cache()
+    with pytest.raises(ValueError):
+        risk_engine.batch_var(returns, portfolios)
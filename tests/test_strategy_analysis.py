@@ -0,0 +1,109 @@
+# tests/test_strategy_analysis.py
+"""
+Unit tests for the per-asset strategy scorers and the worker pool fan-out
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+
+import strategy_analysis
+
+
+def _hist(days=300, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.01, days)))
+    index = pd.bdate_range('2024-01-01', periods=days)
+    return pd.DataFrame({'Close': close}, index=index)
+
+
+def test_fan_out_keeps_order_and_reports_errors():
+    portfolio = [{'symbol': s} for s in ['A', 'FAIL', 'B', 'EMPTY', 'C']]
+
+    def analyze(asset):
+        if asset['symbol'] == 'FAIL':
+            raise ValueError('boom')
+        if asset['symbol'] == 'EMPTY':
+            return None
+        time.sleep(0.05)
+        return {'symbol': asset['symbol']}
+
+    results, errors = strategy_analysis.run_per_asset(portfolio, analyze, max_workers=4)
+    assert [r['symbol'] for r in results] == ['A', 'B', 'C']
+    assert [e['symbol'] for e in errors] == ['FAIL', 'EMPTY']
+    assert errors[0]['error'] == 'boom'
+
+
+def test_fan_out_runs_in_parallel_with_deadline():
+    portfolio = [{'symbol': f'S{i}'} for i in range(6)] + [{'symbol': 'SLOW'}]
+
+    def analyze(asset):
+        time.sleep(5 if asset['symbol'] == 'SLOW' else 0.2)
+        return {'symbol': asset['symbol']}
+
+    start = time.monotonic()
+    results, errors = strategy_analysis.run_per_asset(portfolio, analyze, max_workers=8, deadline=1)
+    elapsed = time.monotonic() - start
+
+    assert len(results) == 6
+    assert errors == [{'symbol': 'SLOW', 'error': 'Timeout nach 1s'}]
+    # Close to the deadline, far below the sequential 6 * 0.2 + 5 seconds
+    assert elapsed < 2
+
+
+def test_scorers_on_shared_history():
+    hist = _hist()
+    info = {'quoteType': 'EQUITY', 'currentPrice': 90.0, 'trailingPE': 12, 'priceToBook': 1.2,
+            'dividendYield': 0.035, 'trailingEps': 6.0, 'bookValue': 40.0, 'returnOnEquity': 0.2,
+            'debtToEquity': 40, 'currentRatio': 1.8, 'profitMargins': 0.18}
+
+    value = strategy_analysis.value_score('X', 10, info, hist, 0.08, 0.02)
+    assert value['currentPrice'] == hist['Close'].iloc[-1]
+    assert np.isclose(value['divYield'], 3.5)
+    assert value['assetValue'] == value['currentPrice'] * 10
+
+    buyhold = strategy_analysis.buyhold_score('X', 10, info, hist)
+    assert buyhold['category'] == 'CORE'
+
+    carry = strategy_analysis.carry_score('X', 10, info, hist, 0.03)
+    assert np.isclose(carry['netCarry'], 0.5)
+    assert strategy_analysis.carry_summary([carry])['totalValue'] == 900.0
+
+
+def test_bundle_loads_each_history_once():
+    calls = []
+
+    def load_history(symbol, months):
+        calls.append((symbol, months))
+        if symbol == 'MISSING':
+            return pd.DataFrame({'Close': []})
+        return _hist(520, seed=len(calls))
+
+    portfolio = [{'symbol': 'A', 'quantity': 1}, {'symbol': 'B', 'quantity': 2}, {'symbol': 'MISSING'}]
+    params = strategy_analysis.parse_params({})
+    bundle = strategy_analysis.analysis_bundle(
+        portfolio, load_history, lambda symbols: {s: {'dividendYield': 0.02} for s in symbols}, params
+    )
+
+    assert sorted(calls) == [('A', 24), ('B', 24), ('MISSING', 24)]
+    assert bundle['errors'] == [{'symbol': 'MISSING', 'error': 'Keine Kursdaten verfügbar'}]
+    for section in ['value', 'momentum', 'buyhold', 'carry']:
+        assert [r['symbol'] for r in bundle[section]['results']] == ['A', 'B']
+        assert bundle[section]['errors'] == []
+
+    correlation = bundle['correlation']
+    assert correlation['symbols'] == ['A', 'B']
+    assert np.allclose(np.diag(correlation['matrix']), 1.0)
+
+
+def test_correlation_covers_only_the_requested_lookback():
+    long = {'A': _hist(520, seed=1), 'B': _hist(520, seed=2)}
+    short = {symbol: hist.tail(250) for symbol, hist in long.items()}
+    strategy_analysis.correlation_summary(long)
+    summary = strategy_analysis.correlation_summary(short)
+    returns = pd.DataFrame({s: h['Close'] for s, h in short.items()}).pct_change().dropna()
+    assert summary['observations'] == len(returns)
+    assert np.allclose(summary['matrix'], returns.corr().values)
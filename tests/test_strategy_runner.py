@@ -0,0 +1,116 @@
+# tests/test_strategy_runner.py
+"""
+Unit tests for the concurrent strategy runner
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pytest
+
+import strategy_runner
+from real_calculations import real_calculator
+
+
+def _panel(factor_returns, n_assets=6, n_days=252, seed=3):
+    symbols = [f'A{i}.SW' for i in range(n_assets)]
+    returns = factor_returns(n_days, n_assets, factors=1, seed=seed, drift=0.0002, noise=0.008,
+                             loadings=np.ones((1, n_assets)), start='2024-01-01')
+    return symbols, returns.set_axis(symbols, axis=1)
+
+
+@pytest.mark.parametrize('use_processes', [False, True])
+def test_runner_matches_sequential_results(use_processes, factor_returns):
+    symbols, panel = _panel(factor_returns)
+    runner = strategy_runner.StrategyRunner(max_workers=3, deadline=60, use_processes=use_processes)
+    try:
+        events = list(runner.run(symbols, panel))
+    finally:
+        runner.shutdown()
+
+    assert sorted(event['strategy'] for event in events) == sorted(strategy_runner.STRATEGY_ORDER)
+    assert all(event['status'] == 'ok' for event in events)
+    for event in events:
+        expected, error, _, _ = strategy_runner.run_strategy(event['strategy'], symbols, panel, {})
+        assert error is None
+        assert event['result']['name'] == expected['name']
+        assert np.isclose(event['result']['sharpe'], expected['sharpe'], atol=1e-6)
+        weights = event['result']['weights']
+        assert np.isclose(sum(weights.values()), 1.0, atol=1e-6)
+
+
+def test_worker_solutions_become_parent_warm_starts(monkeypatch, factor_returns):
+    symbols, panel = _panel(factor_returns, seed=5)
+    monkeypatch.setattr(real_calculator, '_warm_starts', {})
+    runner = strategy_runner.StrategyRunner(max_workers=3, deadline=60, use_processes=True)
+    try:
+        list(runner.run(symbols, panel))
+        solved = dict(real_calculator._warm_starts)
+        assert set(solved) == {(method, tuple(panel.columns))
+                               for method in strategy_runner.WARM_START_METHODS.values()}
+
+        # Das x0 des Elternprozesses geht mit der Aufgabe in den Worker
+        options = strategy_runner._task_options('max_sharpe', panel, {})
+        assert options['x0'] is solved[('max_sharpe', tuple(panel.columns))]
+        assert all(event['status'] == 'ok' for event in runner.run(symbols, panel))
+    finally:
+        runner.shutdown()
+
+
+def test_stuck_process_workers_are_recycled_after_a_deadline(factor_returns):
+    symbols, panel = _panel(factor_returns)
+    runner = strategy_runner.StrategyRunner(max_workers=1, deadline=0.5, use_processes=True)
+    try:
+        busy = runner._pool().submit(time.sleep, 30)
+        events = list(runner.run(symbols, panel, keys=['min_variance']))
+        assert [event['status'] for event in events] == ['timeout']
+        with pytest.raises(Exception):
+            busy.result(timeout=5)
+
+        # Der neue Pool ist frei; ohne Neuaufbau stünde die Aufgabe hinter dem Schläfer
+        started = time.perf_counter()
+        events = list(runner.run(symbols, panel, keys=['min_variance'], deadline=20))
+        assert [event['status'] for event in events] == ['ok']
+        assert time.perf_counter() - started < 20
+    finally:
+        runner.shutdown()
+
+
+def test_pool_size_is_shared_between_web_workers(monkeypatch):
+    monkeypatch.setattr(strategy_runner.os, 'cpu_count', lambda: 8)
+    monkeypatch.setenv('WEB_CONCURRENCY', '4')
+    assert strategy_runner.default_workers() == 2
+    monkeypatch.delenv('WEB_CONCURRENCY')
+    assert strategy_runner.default_workers() == len(strategy_runner.STRATEGIES)
+
+
+def test_deadline_and_failures_are_reported(monkeypatch, factor_returns):
+    symbols, panel = _panel(factor_returns)
+
+    def slow(symbols, returns_df, options):
+        time.sleep(2.0)
+        return {'name': 'Slow'}
+
+    def broken(symbols, returns_df, options):
+        raise RuntimeError('solver exploded')
+
+    monkeypatch.setitem(strategy_runner.STRATEGIES, 'max_sharpe', slow)
+    monkeypatch.setitem(strategy_runner.STRATEGIES, 'black_litterman', broken)
+    runner = strategy_runner.StrategyRunner(max_workers=5, deadline=0.5, use_processes=False)
+    try:
+        started = time.perf_counter()
+        events = {event['strategy']: event for event in runner.run(symbols, panel)}
+        elapsed = time.perf_counter() - started
+    finally:
+        runner.shutdown()
+
+    assert elapsed < 1.5
+    assert events['max_sharpe']['status'] == 'timeout' and events['max_sharpe']['result'] is None
+    assert events['black_litterman']['status'] == 'failed'
+    assert 'solver exploded' in events['black_litterman']['error']
+    assert events['min_variance']['status'] == 'ok'
+
+    with pytest.raises(ValueError):
+        list(runner.run(symbols, panel, keys=['equal_weight']))
@@ -0,0 +1,115 @@
+# tests/test_stress_engine.py
+"""
+Unit tests for the historical stress-scenario engine
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import stress_engine
+from persistent_store import StressReturnsStore
+
+
+def _closes(symbol, start, end):
+    """Deterministische Kurse je Symbol; NEWCO erst ab 2016 kotiert"""
+    index = pd.bdate_range(start, end)
+    seed = sum(ord(c) for c in symbol)
+    rng = np.random.default_rng(seed)
+    prices = pd.Series(100 * np.cumprod(1 + rng.normal(0, 0.01, len(index))), index=index)
+    if symbol == 'NEWCO.SW':
+        return prices[prices.index >= '2016-01-01']
+    return prices
+
+
+def test_window_returns_start_before_window():
+    closes = _closes('NESN.SW', '2015-01-01', '2015-02-10')
+    dates, returns = stress_engine.window_returns(closes, '2015-01-14', '2015-01-30')
+    assert dates[0] == '2015-01-14' and dates[-1] == '2015-01-30'
+    assert np.isclose(returns[0], closes['2015-01-14'] / closes['2015-01-13'] - 1)
+    assert np.isclose(np.prod(1 + returns), closes['2015-01-30'] / closes['2015-01-13'])
+    # Kotierung nach Fensterbeginn: keine Historie
+    assert stress_engine.window_returns(closes[closes.index >= '2015-01-26'], '2015-01-14', '2015-01-30') is None
+
+
+def test_run_matches_per_asset_replay_with_proxy_and_fx(tmp_path):
+    library = stress_engine.StressLibrary(StressReturnsStore(str(tmp_path / 'stress.db')))
+    result = library.precompute(['NESN.SW', 'AAPL', 'NEWCO.SW'], download=_closes)
+    assert {'^SSMI', 'USDCHF=X', '^GSPC'} <= set(result['stored'])
+    assert set(result['no_history']['NEWCO.SW']) == {'gfc_2008', 'eurchf_floor_2011', 'snb_unpeg_2015'}
+
+    holdings = {'NESN.SW': 60000.0, 'AAPL': 30000.0, 'NEWCO.SW': 10000.0}
+    table = library.run(holdings)['scenarios']
+    assert [row['scenario'] for row in table] == list(stress_engine.SCENARIOS)
+
+    for row in table:
+        scenario = stress_engine.SCENARIOS[row['scenario']]
+
+        def total(symbol):
+            dates, r = stress_engine.window_returns(
+                _closes(symbol, '2008-09-02', '2022-10-13'), scenario['start'], scenario['end'])
+            return np.prod(1 + r) - 1
+
+        usd_in_chf = (1 + total('AAPL')) * (1 + total('USDCHF=X')) - 1
+        listed = row['scenario'] in ('covid_2020', 'rates_2022')
+        expected = 0.6 * total('NESN.SW') + 0.3 * usd_in_chf + 0.1 * total('NEWCO.SW' if listed else '^SSMI')
+        assert np.isclose(row['portfolio_return'], expected)
+        assert np.isclose(row['pnl'], expected * 100000)
+        newco = row['assets'][2]
+        assert newco['source'] == ('NEWCO.SW' if listed else '^SSMI') and newco['proxied'] != listed
+        assert np.isclose(sum(a['contribution'] for a in row['assets']), row['portfolio_return'])
+        assert row['max_drawdown'] <= min(row['portfolio_return'], 0.0) + 1e-12
+
+    # Neue Instanz liest die gespeicherten Vektoren ohne Download
+    reloaded = stress_engine.StressLibrary(StressReturnsStore(str(tmp_path / 'stress.db')))
+    again = reloaded.run(holdings)['scenarios']
+    assert [row['portfolio_return'] for row in again] == [row['portfolio_return'] for row in table]
+
+
+def test_missing_pairs_are_remembered_until_forced(tmp_path):
+    def download(symbol, start, end):
+        if symbol == 'FLAKY.SW':
+            raise ConnectionError('timeout')
+        return None if symbol == 'GONE.SW' else _closes(symbol, start, end)
+
+    db = str(tmp_path / 'stress.db')
+    symbols = ['NESN.SW', 'NEWCO.SW', 'GONE.SW', 'FLAKY.SW']
+    first = stress_engine.StressLibrary(StressReturnsStore(db)).precompute(symbols, download=download)
+    assert set(first['failed']) == {'GONE.SW', 'FLAKY.SW'}
+
+    calls = []
+
+    def counting(symbol, start, end):
+        calls.append(symbol)
+        return download(symbol, start, end)
+
+    # Neue Instanz (z.B. nächster Scheduler-Lauf): nur der Netzwerkfehler wird erneut versucht
+    library = stress_engine.StressLibrary(StressReturnsStore(db))
+    again = library.precompute(symbols, download=counting)
+    assert calls == ['FLAKY.SW']
+    assert again['no_history'] == {}
+
+    calls.clear()
+    forced = library.precompute(symbols, download=counting, force=True)
+    assert {'NESN.SW', 'NEWCO.SW', 'GONE.SW', 'FLAKY.SW'} <= set(calls)
+    assert set(forced['no_history']['NEWCO.SW']) == set(first['no_history']['NEWCO.SW'])
+
+
+def test_padding_subset_and_unknown_scenario():
+    library = stress_engine.StressLibrary()
+    library.add('snb_unpeg_2015', 'ABC', ['2015-01-14', '2015-01-15', '2015-01-16'], [0.0, -0.10, 0.05], persist=False)
+    library.add('covid_2020', 'ABC', ['2020-02-19'], [-0.02], persist=False)
+
+    result = library.run({'ABC': 1.0}, scenarios=['snb_unpeg_2015', 'covid_2020'], currencies={'ABC': 'CHF'})
+    snb, covid = result['scenarios']
+    assert snb['days'] == 3 and covid['days'] == 1
+    assert np.isclose(snb['portfolio_return'], 0.9 * 1.05 - 1)
+    assert np.isclose(snb['max_drawdown'], -0.10) and np.isclose(snb['worst_day'], -0.10)
+    assert np.isclose(covid['portfolio_return'], -0.02) and np.isclose(covid['max_drawdown'], -0.02)
+    assert library.run({'ZZZ': 1.0}, scenarios=['covid_2020'])['scenarios'][0]['coverage'] == 0.0
+
+    with pytest.raises(ValueError):
+        library.run({'ABC': 1.0}, scenarios=['dotcom_2000'])